@@ -1,21 +1,48 @@
 """
-[INPUT]: 依赖 httpx
-[OUTPUT]: 对外提供 AIClient 类
+[INPUT]: 依赖 httpx, http_pool, llm_cache, resilience, singleflight, asyncio, os, time
+[OUTPUT]: 对外提供 AIClient 类, RateLimiter, JSONItemParser, get_rate_limiter(), estimate_tokens()
 [POS]: AI API 调用客户端，被 chapter_bar 和未来的 shownotes/subtitle 消费
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
+import asyncio
 import json
+import os
 import re
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import AbstractAsyncContextManager
 from dataclasses import dataclass
 
 import httpx
 
+from vmarker import http_pool, resilience
+from vmarker.llm_cache import get_llm_cache
+from vmarker.singleflight import get_flight
+
+# =============================================================================
+#  辅助函数
+# =============================================================================
+
+def _parse_float_env(key: str, default: float) -> float:
+    """安全解析非负浮点数环境变量"""
+    value = os.getenv(key)
+    if value is None:
+        return default
+    try:
+        parsed = float(value)
+        return parsed if parsed >= 0 else default
+    except ValueError:
+        return default
+
 
 # =============================================================================
 #  配置
 # =============================================================================
 
+# 每个服务商每分钟请求上限，0 表示不限
+DEFAULT_RATE_LIMIT_RPM = _parse_float_env("AI_RATE_LIMIT_RPM", 0)
+
 @dataclass
 class AIConfig:
     """AI 配置"""
@@ -25,6 +52,57 @@ class AIConfig:
     timeout: float = 60.0
 
 
+# =============================================================================
+#  限流
+# =============================================================================
+
+class RateLimiter:
+    """
+    令牌桶限流器
+
+    按固定速率补充令牌，允许短时突发（容量为每秒速率，至少 1）。
+    """
+
+    def __init__(self, requests_per_minute: float):
+        """
+        Args:
+            requests_per_minute: 每分钟请求上限，0 表示不限流
+        """
+        self.rate = requests_per_minute / 60
+        self.capacity = max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """获取一个令牌，不足时等待"""
+        if self.rate <= 0:
+            return
+
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+_rate_limiters: dict[str, RateLimiter] = {}
+
+
+def get_rate_limiter(api_base: str) -> RateLimiter:
+    """获取服务商 (api_base) 共享的限流器"""
+    key = api_base.rstrip("/")
+    limiter = _rate_limiters.get(key)
+    if limiter is None:
+        limiter = RateLimiter(DEFAULT_RATE_LIMIT_RPM)
+        _rate_limiters[key] = limiter
+    return limiter
+
+
 # =============================================================================
 #  AI 客户端
 # =============================================================================
@@ -32,17 +110,35 @@ class AIConfig:
 class AIClient:
     """AI API 客户端（兼容 OpenAI 格式）"""
 
-    def __init__(self, config: AIConfig):
+    def __init__(
+        self,
+        config: AIConfig,
+        pool: http_pool.HTTPPool | None = None,
+        retry: resilience.RetryPolicy | None = None,
+    ):
+        """
+        Args:
+            config: AI 配置
+            pool: 连接池（可选，默认使用应用级连接池，不存在时创建临时客户端）
+            retry: 重试策略（可选，默认读取 AI_MAX_RETRIES 等环境变量）
+        """
         self.config = config
+        self.pool = pool
+        self.retry = retry or resilience.RetryPolicy()
+        self.output_tokens = 0  # 本客户端累计的输出 token 数（不含缓存命中）
         self._client: httpx.AsyncClient | None = None
+        self._client_ctx: AbstractAsyncContextManager[httpx.AsyncClient] | None = None
 
     async def __aenter__(self) -> "AIClient":
-        self._client = httpx.AsyncClient(timeout=self.config.timeout)
+        self._client_ctx = http_pool.client_for(self.config.api_base, self.pool)
+        self._client = await self._client_ctx.__aenter__()
         return self
 
     async def __aexit__(self, *args) -> None:
-        if self._client:
-            await self._client.aclose()
+        if self._client_ctx:
+            await self._client_ctx.__aexit__(*args)
+        self._client = None
+        self._client_ctx = None
 
     async def chat(self, prompt: str, temperature: float = 0.3) -> str:
         """
@@ -52,9 +148,107 @@ class AIClient:
             prompt: 用户提示
             temperature: 温度参数
 
+        429、5xx 和网络错误按退避策略重试；启用 AI_HEDGE 时，每次尝试中
+        超过近期 p95 延迟仍未返回则再发一个相同请求，取先返回的结果。
+        对冲请求与主请求共用一次尝试的限流令牌与熔断计数。
+        输出 token 数累计到 output_tokens（服务商未返回 usage 时估算）。
+
         Returns:
             AI 回复内容
         """
+        url, headers, payload = self._request(prompt, temperature)
+        tracker = resilience.get_tracker(self.config.api_base)
+
+        async def post() -> httpx.Response:
+            start = time.monotonic()
+            response = await self._client.post(
+                url,
+                headers=headers,
+                json=payload,
+                timeout=http_pool.timeout_for("chat", self.config.timeout),
+            )
+            response.raise_for_status()
+            tracker.record(time.monotonic() - start)
+            return response
+
+        hedge_delay = None
+        if resilience.HEDGE_ENABLED:
+            hedge_delay = tracker.quantile(resilience.HEDGE_QUANTILE)
+        response = await self._with_retry(lambda: resilience.hedged(post, hedge_delay))
+
+        result = response.json()
+        content = result["choices"][0]["message"]["content"]
+        self._count_output(result.get("usage"), content)
+        return content
+
+    async def chat_stream(self, prompt: str, temperature: float = 0.3) -> AsyncIterator[str]:
+        """
+        以流式模式 (SSE) 发送聊天请求
+
+        Args:
+            prompt: 用户提示
+            temperature: 温度参数
+
+        建立连接与响应头阶段的失败按退避策略重试，开始产出内容后不再重试。
+        输出 token 数累计方式同 chat()。
+
+        Yields:
+            回复内容的增量片段
+        """
+        url, headers, payload = self._request(prompt, temperature)
+        payload["stream"] = True
+
+        async def open_stream() -> httpx.Response:
+            request = self._client.build_request(
+                "POST",
+                url,
+                headers=headers,
+                json=payload,
+                timeout=http_pool.timeout_for("chat", self.config.timeout),
+            )
+            response = await self._client.send(request, stream=True)
+            if response.is_error:
+                await response.aclose()
+                response.raise_for_status()
+            return response
+
+        response = await self._with_retry(open_stream)
+        parts: list[str] = []
+        usage = None
+        try:
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                usage = chunk.get("usage") or usage
+                choices = chunk.get("choices") or [{}]
+                delta = choices[0].get("delta", {}).get("content")
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        finally:
+            await response.aclose()
+            self._count_output(usage, "".join(parts))
+
+    def _count_output(self, usage: dict | None, content: str) -> None:
+        """累计输出 token 数，优先使用服务商返回的 usage.completion_tokens"""
+        tokens = (usage or {}).get("completion_tokens")
+        self.output_tokens += tokens if isinstance(tokens, int) else estimate_tokens(content)
+
+    async def _with_retry(self, send: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+        """经过熔断检查与限流发送请求，失败按重试策略重试"""
+        return await resilience.call_with_retry(
+            send,
+            breaker=resilience.get_breaker(self.config.api_base),
+            policy=self.retry,
+            before=get_rate_limiter(self.config.api_base).acquire,
+        )
+
+    def _request(self, prompt: str, temperature: float) -> tuple[str, dict, dict]:
+        """构建聊天请求的 (url, headers, payload)"""
         if not self._client:
             raise RuntimeError("AIClient 未初始化，请使用 async with")
 
@@ -68,32 +262,210 @@ class AIClient:
             "messages": [{"role": "user", "content": prompt}],
             "temperature": temperature,
         }
+        return url, headers, payload
 
-        response = await self._client.post(url, headers=headers, json=payload)
-        response.raise_for_status()
-
-        result = response.json()
-        return result["choices"][0]["message"]["content"]
-
-    async def chat_json(self, prompt: str, temperature: float = 0.3) -> dict:
+    async def chat_json(
+        self,
+        prompt: str,
+        temperature: float = 0.3,
+        *,
+        use_cache: bool = True,
+    ) -> dict:
         """
         发送聊天请求并解析 JSON 响应
 
+        相同 (api_base, model, temperature, prompt) 的结果持久缓存，
+        只有成功解析的响应会写入缓存。未命中时相同请求合并执行：
+        并发调用者共享同一次请求，其他 worker 等待后直接读取缓存。
+        共享请求使用不属于任何调用者的客户端，发起者提前退出不影响其他等待者；
+        该请求的输出 token 数计入每个共享结果的调用者。
+
         Args:
             prompt: 用户提示
             temperature: 温度参数
+            use_cache: 是否读取缓存（False 时强制请求，结果仍会写入缓存）
 
         Returns:
             解析后的 JSON 对象
         """
+        cache = get_llm_cache()
+        key = cache.make_key(self.config.api_base, self.config.model, temperature, prompt)
+        if not use_cache:
+            return await self._fetch_json(key, prompt, temperature)
+
+        cached = await asyncio.to_thread(cache.get, key)
+        if cached is not None:
+            return cached
+
+        async def fetch() -> tuple[dict, int]:
+            # 等锁期间其他 worker 可能已写入缓存
+            cached = await asyncio.to_thread(cache.get, key)
+            if cached is not None:
+                return cached, 0
+            async with AIClient(self.config, self.pool, self.retry) as client:
+                result = await client._fetch_json(key, prompt, temperature)
+            return result, client.output_tokens
+
+        (result, tokens), _ = await get_flight().do(
+            f"llm:{key}", fetch, cross_process=cache.enabled
+        )
+        self.output_tokens += tokens
+        return result
+
+    async def _fetch_json(self, key: str, prompt: str, temperature: float) -> dict:
+        """请求并解析 JSON 响应，写入缓存"""
+        start = time.monotonic()
         content = await self.chat(prompt, temperature)
-        return parse_json_response(content)
+        result = parse_json_response(content)
+
+        await asyncio.to_thread(get_llm_cache().put, key, result, time.monotonic() - start)
+        return result
+
+    async def chat_json_stream(
+        self,
+        prompt: str,
+        temperature: float = 0.3,
+        *,
+        use_cache: bool = True,
+    ) -> AsyncIterator[tuple[str | None, dict]]:
+        """
+        流式发送聊天请求，每当顶层数组中的一个对象闭合就立即产出
+
+        与 chat_json() 共用缓存；命中时直接按顺序产出缓存中的条目。
+
+        Args:
+            prompt: 用户提示
+            temperature: 温度参数
+            use_cache: 是否读取缓存
+
+        Yields:
+            (数组键名, 条目)，如 ("chapters", {...})；
+            最后产出 (None, 完整 JSON 对象)
+        """
+        cache = get_llm_cache()
+        key = cache.make_key(self.config.api_base, self.config.model, temperature, prompt)
+        if use_cache:
+            cached = await asyncio.to_thread(cache.get, key)
+            if cached is not None:
+                for name, value in cached.items():
+                    if isinstance(value, list):
+                        for item in value:
+                            if isinstance(item, dict):
+                                yield name, item
+                yield None, cached
+                return
+
+        start = time.monotonic()
+        parser = JSONItemParser()
+        async for delta in self.chat_stream(prompt, temperature):
+            for item in parser.feed(delta):
+                yield item
+
+        result = parser.result()
+        await asyncio.to_thread(cache.put, key, result, time.monotonic() - start)
+        yield None, result
+
+
+# =============================================================================
+#  增量 JSON 解析
+# =============================================================================
+
+class JSONItemParser:
+    """
+    增量 JSON 解析器
+
+    逐段喂入模型输出，识别 {"key": [{...}, {...}]} 结构中顶层数组里的对象，
+    每个对象闭合时立即返回；对象之前的 markdown 代码块标记等内容被忽略。
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0            # 下一个待扫描字符
+        self._depth = 0          # 当前嵌套深度（对象与数组）
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0   # 当前字符串的起始位置
+        self._last_key = ""      # 顶层对象中最近读到的字符串（可能是键）
+        self._array_key = None   # 当前所在的顶层数组键名
+        self._item_start = -1    # 当前条目对象的起始位置
+
+    def feed(self, chunk: str) -> list[tuple[str, dict]]:
+        """
+        喂入一段文本
+
+        Returns:
+            本段中闭合的 (数组键名, 条目) 列表
+        """
+        self._buffer += chunk
+        items: list[tuple[str, dict]] = []
+        buf = self._buffer
+
+        for i in range(self._pos, len(buf)):
+            ch = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_key = buf[self._string_start + 1:i]
+                continue
+
+            if self._depth == 0 and ch != "{":
+                continue  # 忽略顶层对象之前的内容
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch in "{[":
+                self._depth += 1
+                if ch == "[" and self._depth == 2:
+                    self._array_key = self._last_key
+                elif ch == "{" and self._depth == 3 and self._array_key is not None:
+                    self._item_start = i
+            elif ch in "}]":
+                if ch == "}" and self._depth == 3 and self._item_start >= 0:
+                    try:
+                        item = json.loads(buf[self._item_start:i + 1])
+                    except json.JSONDecodeError:
+                        item = None
+                    if isinstance(item, dict):
+                        items.append((self._array_key, item))
+                    self._item_start = -1
+                elif ch == "]" and self._depth == 2:
+                    self._array_key = None
+                self._depth -= 1
+
+        self._pos = len(buf)
+        return items
+
+    @property
+    def text(self) -> str:
+        """已接收的完整文本"""
+        return self._buffer
+
+    def result(self) -> dict:
+        """解析完整输出"""
+        return parse_json_response(self._buffer)
 
 
 # =============================================================================
 #  工具函数
 # =============================================================================
 
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估算文本的 token 数
+
+    中日韩字符约 1 字 1 token，其他字符约 4 字符 1 token，
+    用于分批规划，不追求精确。
+    """
+    cjk = sum(1 for ch in text if "\u3000" <= ch <= "\u9fff" or "\uac00" <= ch <= "\ud7af")
+    return cjk + (len(text) - cjk + 3) // 4
+
+
 def parse_json_response(content: str) -> dict:
     """
     从 AI 响应中提取 JSON
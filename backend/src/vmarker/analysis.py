@@ -0,0 +1,189 @@
+"""
+[INPUT]: 依赖 ai_client, transcript, models
+[OUTPUT]: 对外提供 VideoAnalysis, OutlineItem, analyze(), analyze_stream()
+[POS]: 字幕综合分析，一次请求同时得到章节、摘要与大纲；
+       chapter_bar.extract_ai() 与 shownotes.generate_shownotes() 都是它的视图，
+       相同字幕的第二次调用命中 AI 响应缓存
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+
+from vmarker import transcript
+from vmarker.ai_client import AIClient, AIConfig
+from vmarker.models import Chapter, ChapterList, Subtitle
+
+# =============================================================================
+#  数据模型
+# =============================================================================
+
+@dataclass
+class OutlineItem:
+    """大纲条目"""
+    timestamp: float  # 开始时间（秒）
+    title: str        # 标题/要点
+
+
+@dataclass
+class VideoAnalysis:
+    """字幕综合分析结果"""
+    chapters: ChapterList
+    summary: str                # 整体摘要
+    outline: list[OutlineItem]  # 带时间戳的大纲
+
+
+# =============================================================================
+#  Prompt 模板
+# =============================================================================
+
+# chapters 放在最前，流式请求时章节最先到达
+_RESPONSE_FORMAT = """返回 JSON 格式（不要其他内容），按 chapters、summary、outline 的顺序输出:
+{{
+  "chapters": [{{"title": "标题", "start_time": 0.0, "end_time": 120.0}}, ...],
+  "summary": "视频整体摘要...",
+  "outline": [{{"timestamp": 0, "title": "开场介绍"}}, ...]
+}}"""
+
+_ANALYSIS_PROMPT = """你是视频内容分析专家。分析以下字幕，同时生成章节、摘要和大纲。
+
+要求：
+1. chapters: 将视频划分为 5-10 个章节，识别主题变化点，标题简洁有意义（不超过15字），
+   时间连续，覆盖整个视频
+2. summary: 视频整体摘要，不超过 100 字
+3. outline: 5-10 个关键要点，timestamp 为要点出现的时间点（秒数，取字幕的开始时间），
+   title 为简洁的要点标题（10-20 字）
+
+视频总时长: {duration:.1f} 秒
+
+字幕（每行开头方括号内为开始秒数）:
+{subtitles}
+
+""" + _RESPONSE_FORMAT
+
+_ANALYSIS_REDUCE_PROMPT = """你是视频内容分析专家。
+以下是从一个长视频各时间段中提取的候选主题（按时间排序），
+请根据它们同时生成整个视频的章节、摘要和大纲。
+
+要求：
+1. chapters: 将相近的主题合并为 5-10 个章节，标题简洁有意义（不超过15字），
+   开始时间取自候选主题的时间，时间连续，覆盖整个视频
+2. summary: 视频整体摘要，不超过 100 字
+3. outline: 5-10 个关键要点，timestamp 取自候选主题的时间，title 为简洁的要点标题（10-20 字）
+
+视频总时长: {duration:.1f} 秒
+
+候选主题（每行开头方括号内为开始秒数）:
+{topics}
+
+""" + _RESPONSE_FORMAT
+
+
+# =============================================================================
+#  核心函数
+# =============================================================================
+
+async def analyze(
+    subtitles: list[Subtitle],
+    duration: float | None = None,
+    *,
+    api_key: str,
+    api_base: str = "https://api.openai.com/v1",
+    model: str = "gpt-4o-mini",
+) -> VideoAnalysis:
+    """
+    一次请求生成章节、摘要与大纲
+
+    字幕较短时单次请求；超出单次请求长度时按时间窗口并发提取候选主题，
+    再用一次请求合并，覆盖整个视频。
+
+    Args:
+        subtitles: 字幕列表
+        duration: 视频总时长（可选，默认取最后一条字幕的结束时间）
+        api_key: API Key
+        api_base: API 基础 URL
+        model: 模型名称
+
+    Returns:
+        VideoAnalysis 实例
+    """
+    duration = _duration(subtitles, duration)
+    config = AIConfig(api_key=api_key, api_base=api_base, model=model)
+    async with AIClient(config) as client:
+        prompt = await _build_prompt(client, subtitles, duration)
+        data = await client.chat_json(prompt)
+
+    return _parse_analysis(data, duration)
+
+
+async def analyze_stream(
+    subtitles: list[Subtitle],
+    duration: float | None = None,
+    *,
+    api_key: str,
+    api_base: str = "https://api.openai.com/v1",
+    model: str = "gpt-4o-mini",
+) -> AsyncIterator[Chapter | VideoAnalysis]:
+    """
+    一次请求生成章节、摘要与大纲（流式版本）
+
+    参数同 analyze()，与其共用缓存。每个章节在模型输出中闭合后立即产出，
+    长字幕的窗口分析阶段不产出。
+
+    Yields:
+        Chapter 实例，最后产出完整的 VideoAnalysis
+    """
+    duration = _duration(subtitles, duration)
+    config = AIConfig(api_key=api_key, api_base=api_base, model=model)
+    async with AIClient(config) as client:
+        prompt = await _build_prompt(client, subtitles, duration)
+        async for key, item in client.chat_json_stream(prompt):
+            if key == "chapters":
+                yield _parse_chapter(item, duration)
+            elif key is None:
+                yield _parse_analysis(item, duration)
+
+
+async def _build_prompt(client: AIClient, subtitles: list[Subtitle], duration: float) -> str:
+    """构建分析提示词，长字幕先按窗口提取候选主题"""
+    if transcript.needs_windowing(subtitles):
+        topics = await transcript.extract_topics(client, subtitles)
+        return _ANALYSIS_REDUCE_PROMPT.format(
+            duration=duration, topics=transcript.format_topics(topics)
+        )
+    return _ANALYSIS_PROMPT.format(
+        duration=duration, subtitles=transcript.pack_transcript(subtitles)
+    )
+
+
+def _duration(subtitles: list[Subtitle], duration: float | None) -> float:
+    if duration is not None:
+        return duration
+    return max((s.end_time for s in subtitles), default=0.0)
+
+
+# =============================================================================
+#  解析
+# =============================================================================
+
+def _parse_analysis(data: dict, duration: float) -> VideoAnalysis:
+    """解析模型输出的完整结果"""
+    chapters = [_parse_chapter(c, duration) for c in data.get("chapters", [])]
+    outline = [
+        OutlineItem(timestamp=item.get("timestamp", 0), title=item.get("title", ""))
+        for item in data.get("outline", [])
+    ]
+    return VideoAnalysis(
+        chapters=ChapterList(chapters=chapters, duration=duration),
+        summary=data.get("summary", ""),
+        outline=outline,
+    )
+
+
+def _parse_chapter(item: dict, duration: float) -> Chapter:
+    """解析模型输出的单个章节"""
+    return Chapter(
+        title=str(item.get("title", "未命名")),
+        start_time=float(item.get("start_time", 0)),
+        end_time=float(item.get("end_time", duration)),
+    )
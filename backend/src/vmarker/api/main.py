@@ -1,5 +1,6 @@
 """
-[INPUT]: 依赖 FastAPI, routes, dotenv
+[INPUT]: 依赖 FastAPI, routes, dotenv, artifact_cache, llm_cache, resilience, singleflight,
+         youtube_transcript, executor, http_pool, job_store
 [OUTPUT]: 对外提供 app (FastAPI 实例)
 [POS]: FastAPI 应用主入口
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
@@ -13,7 +14,6 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
-
 # =============================================================================
 #  加载环境变量
 # =============================================================================
@@ -22,9 +22,27 @@ from pydantic import BaseModel
 _env_path = Path(__file__).parent.parent.parent.parent / ".env"
 load_dotenv(_env_path)
 
-from vmarker import __version__
-from vmarker.api.routes import auth, chapter_bar, progress_bar, shownotes, subtitle, video, youtube
-
+from vmarker import (
+    __version__,
+    artifact_cache,
+    executor,
+    http_pool,
+    job_store,
+    llm_cache,
+    resilience,
+    singleflight,
+    youtube_transcript,
+)
+from vmarker.api.routes import (
+    analysis,
+    auth,
+    chapter_bar,
+    progress_bar,
+    shownotes,
+    subtitle,
+    video,
+    youtube,
+)
 
 # =============================================================================
 #  生命周期
@@ -39,9 +57,18 @@ async def lifespan(app: FastAPI):
     cleaned = cleanup_old_sessions(max_age_hours=24)
     if cleaned:
         print(f"[vmarker] 已清理 {cleaned} 个过期会话")
+    job_store.get_job_store().collect()
+
+    # 创建共享 HTTP 连接池（AI 与 ASR 调用复用长连接）
+    http_pool.init_pool()
 
     yield
 
+    await http_pool.close_pool()
+
+    # 关闭渲染进程池
+    executor.shutdown()
+
 
 # =============================================================================
 #  FastAPI 应用
@@ -80,6 +107,18 @@ async def health():
     return HealthResponse(status="ok", version=__version__)
 
 
+@app.get("/metrics")
+async def metrics():
+    """缓存命中等运行指标（当前进程）"""
+    return {
+        "artifact_cache": artifact_cache.get_cache().stats(),
+        "llm_cache": llm_cache.get_llm_cache().stats(),
+        "ai_client": resilience.stats(),
+        "singleflight": singleflight.get_flight().stats(),
+        "transcript_cache": youtube_transcript.get_transcript_cache().stats(),
+    }
+
+
 # =============================================================================
 #  注册功能路由
 # =============================================================================
@@ -87,6 +126,7 @@ async def health():
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Auth"])
 app.include_router(chapter_bar.router, prefix="/api/v1/chapter-bar", tags=["Chapter Bar"])
 app.include_router(shownotes.router, prefix="/api/v1/shownotes", tags=["Show Notes"])
+app.include_router(analysis.router, prefix="/api/v1/analysis", tags=["Analysis"])
 app.include_router(subtitle.router, prefix="/api/v1/subtitle", tags=["Subtitle"])
 app.include_router(progress_bar.router, prefix="/api/v1/progress-bar", tags=["Progress Bar"])
 app.include_router(video.router, prefix="/api/v1/video", tags=["Video"])
@@ -0,0 +1,82 @@
+"""
+[INPUT]: 依赖 FastAPI, analysis, parser, models
+[OUTPUT]: 对外提供 router (APIRouter 实例)
+[POS]: 字幕综合分析的 API 路由，一次请求同时返回章节、摘要与大纲
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import os
+import traceback
+from typing import Annotated
+
+from fastapi import APIRouter, File, HTTPException, UploadFile
+from pydantic import BaseModel
+
+from vmarker import analysis
+from vmarker.models import Chapter
+from vmarker.parser import decode_srt_bytes, parse_srt
+
+router = APIRouter()
+
+
+# =============================================================================
+#  响应模型
+# =============================================================================
+
+class OutlineItemResponse(BaseModel):
+    timestamp: float
+    title: str
+
+
+class AnalysisResponse(BaseModel):
+    chapters: list[Chapter]
+    duration: float
+    summary: str
+    outline: list[OutlineItemResponse]
+
+
+# =============================================================================
+#  路由
+# =============================================================================
+
+@router.post("/analyze", response_model=AnalysisResponse)
+async def analyze(
+    file: Annotated[UploadFile, File(description="SRT 字幕文件")],
+):
+    """
+    一次 AI 请求同时生成章节、摘要与大纲
+
+    与 /chapter-bar/chapters/ai、/shownotes/generate 共用缓存，
+    之后对同一字幕调用这两个接口不再请求 AI。
+    """
+    api_key = os.getenv("API_KEY", "")
+    api_base = os.getenv("API_BASE", "https://api.openai.com/v1")
+    api_model = os.getenv("API_MODEL", "gpt-4o-mini")
+
+    if not api_key:
+        raise HTTPException(400, "未配置 AI API Key，请在 backend/.env 中设置 API_KEY")
+
+    try:
+        content = decode_srt_bytes(await file.read())
+        srt = parse_srt(content)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    try:
+        result = await analysis.analyze(
+            srt.subtitles, srt.duration,
+            api_key=api_key, api_base=api_base, model=api_model,
+        )
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(500, f"分析失败: {e}")
+
+    return AnalysisResponse(
+        chapters=result.chapters.chapters,
+        duration=result.chapters.duration,
+        summary=result.summary,
+        outline=[
+            OutlineItemResponse(timestamp=item.timestamp, title=item.title)
+            for item in result.outline
+        ],
+    )
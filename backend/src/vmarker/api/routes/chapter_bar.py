@@ -1,21 +1,36 @@
 """
-[INPUT]: 依赖 FastAPI, chapter_bar, parser, themes, models
+[INPUT]: 依赖 FastAPI, chapter_bar, parser, themes, models, artifact_cache, executor, job_store
 [OUTPUT]: 对外提供 router (APIRouter 实例)
-[POS]: Chapter Bar 功能的 API 路由
+[POS]: Chapter Bar 功能的 API 路由，AI 分段限时返回（超时先给本地结果，可通过任务获取 AI 结果，
+       任务状态写入 job_store，多 worker 均可查询），并支持 NDJSON 流式返回
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
+import asyncio
+import json
 import os
+import traceback
+import uuid
+from collections.abc import AsyncIterator
 from pathlib import Path
 from tempfile import TemporaryDirectory
 from typing import Annotated
 
 from fastapi import APIRouter, File, Form, HTTPException, UploadFile
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 
+from vmarker import artifact_cache, executor
 from vmarker import chapter_bar as cb
-from vmarker.models import Chapter, ChapterBarConfig, ChapterValidationResult, ColorScheme, VideoConfig
+from vmarker.job_store import HEARTBEAT_INTERVAL, get_job_store
+from vmarker.models import (
+    Chapter,
+    ChapterBarConfig,
+    ChapterList,
+    ChapterValidationResult,
+    ColorScheme,
+    VideoConfig,
+)
 from vmarker.parser import decode_srt_bytes, parse_srt
 from vmarker.themes import THEMES, get_theme
 
@@ -42,6 +57,14 @@ class ParseResponse(BaseModel):
 class ChaptersResponse(BaseModel):
     chapters: list[Chapter]
     duration: float
+    source: str = "auto"  # 结果来源："auto" / "lexical" / "ai"
+    job_id: str | None = None  # AI 分段超出预算仍在进行时，用于获取 AI 结果
+
+
+class ChapterJobResponse(BaseModel):
+    status: str  # "pending" / "done" / "failed"
+    result: ChaptersResponse | None = None
+    error: str | None = None
 
 
 class CustomColors(BaseModel):
@@ -61,6 +84,60 @@ class GenerateRequest(BaseModel):
     key_frame_interval: float | None = None  # 关键帧间隔（秒）
 
 
+# =============================================================================
+#  AI 分段任务
+# =============================================================================
+
+MAX_JOBS = 100  # 本进程保留的任务数上限，超出时取消最早的任务
+
+# 超出预算后继续进行的 AI 分段（持有任务引用；状态另写入 job_store 供其他 worker 查询）
+_jobs: dict[str, asyncio.Task[ChapterJobResponse]] = {}
+
+
+async def _save_job(job_id: str, job: ChapterJobResponse) -> None:
+    await asyncio.to_thread(get_job_store().put, job_id, job.model_dump())
+
+
+async def _run_job(job_id: str, pending: asyncio.Task[ChapterList]) -> ChapterJobResponse:
+    """等待 AI 分段完成并记录结果，等待期间定期刷新心跳；异常在此取出，任务本身不会失败"""
+    try:
+        while True:
+            done, _ = await asyncio.wait({pending}, timeout=HEARTBEAT_INTERVAL)
+            if done:
+                break
+            await _save_job(job_id, ChapterJobResponse(status="pending"))
+        chapters = pending.result()
+    except asyncio.CancelledError:
+        pending.cancel()
+        raise
+    except Exception as e:
+        traceback.print_exception(e)
+        job = ChapterJobResponse(status="failed", error=str(e))
+    else:
+        job = ChapterJobResponse(
+            status="done",
+            result=ChaptersResponse(
+                chapters=chapters.chapters, duration=chapters.duration, source="ai"
+            ),
+        )
+    await _save_job(job_id, job)
+    return job
+
+
+async def _register_job(pending: asyncio.Task[ChapterList]) -> str:
+    """登记后台 AI 分段任务，返回任务 ID"""
+    while len(_jobs) >= MAX_JOBS:
+        oldest = next(iter(_jobs))
+        if not _jobs.pop(oldest).cancel():
+            continue
+        await _save_job(oldest, ChapterJobResponse(status="failed", error="任务已取消"))
+
+    job_id = uuid.uuid4().hex
+    await _save_job(job_id, ChapterJobResponse(status="pending"))
+    _jobs[job_id] = asyncio.create_task(_run_job(job_id, pending))
+    return job_id
+
+
 # =============================================================================
 #  路由
 # =============================================================================
@@ -112,11 +189,34 @@ async def extract_auto(
     return ChaptersResponse(chapters=chapters.chapters, duration=chapters.duration)
 
 
+@router.post("/chapters/lexical", response_model=ChaptersResponse)
+async def extract_lexical(
+    file: Annotated[UploadFile, File(description="SRT 字幕文件")],
+    chapters: Annotated[int | None, Form(ge=2, le=12)] = None,
+):
+    """按字幕词汇变化分段提取章节（离线，无需 AI）"""
+    try:
+        content = decode_srt_bytes(await file.read())
+        srt = parse_srt(content)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    result = cb.extract_lexical(srt.subtitles, srt.duration, chapters)
+    return ChaptersResponse(chapters=result.chapters, duration=result.duration, source="lexical")
+
+
 @router.post("/chapters/ai", response_model=ChaptersResponse)
 async def extract_ai(
     file: Annotated[UploadFile, File(description="SRT 字幕文件")],
+    budget: Annotated[float | None, Form(ge=0, le=600)] = None,
 ):
-    """AI 智能分段提取章节"""
+    """
+    AI 智能分段提取章节
+
+    AI 与本地词汇分段同时开始，AI 在 budget 秒内（默认 AI_CHAPTER_BUDGET_SECONDS，
+    0 表示一直等待）返回则使用 AI 结果，否则先返回本地结果（source 为 "lexical"）。
+    AI 仍在进行时返回 job_id，可通过 GET /chapters/ai/jobs/{job_id} 获取 AI 结果。
+    """
     # 从环境变量获取配置（使用 .env 中的变量名）
     api_key = os.getenv("API_KEY", "")
     api_base = os.getenv("API_BASE", "https://api.openai.com/v1")
@@ -131,19 +231,93 @@ async def extract_ai(
     except ValueError as e:
         raise HTTPException(400, str(e))
 
+    result = await cb.extract_budgeted(
+        srt.subtitles, srt.duration,
+        api_key=api_key, api_base=api_base, model=api_model,
+        budget=cb.DEFAULT_AI_BUDGET if budget is None else budget,
+    )
+    if result.error is not None:
+        # 打印错误日志便于调试
+        traceback.print_exception(result.error)
+
+    job_id = await _register_job(result.pending) if result.pending is not None else None
+    return ChaptersResponse(
+        chapters=result.chapters.chapters,
+        duration=result.chapters.duration,
+        source=result.source,
+        job_id=job_id,
+    )
+
+
+@router.get("/chapters/ai/jobs/{job_id}", response_model=ChapterJobResponse)
+async def get_ai_job(job_id: str):
+    """
+    获取超出预算后继续进行的 AI 分段结果
+
+    本进程的任务直接读取；其他 worker 登记的任务从 job_store 读取，
+    结果在记录有效期内可重复获取。所属 worker 退出后任务返回 failed。
+    """
+    task = _jobs.get(job_id)
+    if task is not None and task.done() and not task.cancelled():
+        return task.result()
+
+    record = await asyncio.to_thread(get_job_store().get, job_id)
+    if record is not None:
+        return ChapterJobResponse.model_validate(record)
+    raise HTTPException(404, "任务不存在或已过期")
+
+
+@router.post("/chapters/ai/stream")
+async def extract_ai_stream(
+    file: Annotated[UploadFile, File(description="SRT 字幕文件")],
+):
+    """
+    AI 智能分段提取章节（NDJSON 流式返回）
+
+    每行一个 JSON 事件：
+    - {"type": "chapter", "chapter": {...}}：模型输出中闭合的章节，按顺序到达
+    - {"type": "done", "chapters": [...], "duration": ..., "fallback": bool}：最终章节列表；
+      AI 失败时降级到自动分段，fallback 为 true
+    """
+    api_key = os.getenv("API_KEY", "")
+    api_base = os.getenv("API_BASE", "https://api.openai.com/v1")
+    api_model = os.getenv("API_MODEL", "gpt-4o-mini")
+
+    if not api_key:
+        raise HTTPException(400, "未配置 AI API Key，请在 backend/.env 中设置 API_KEY")
+
     try:
-        chapters = await cb.extract_ai(
-            srt.subtitles, srt.duration,
-            api_key=api_key, api_base=api_base, model=api_model,
+        content = decode_srt_bytes(await file.read())
+        srt = parse_srt(content)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    async def events() -> AsyncIterator[str]:
+        chapters: list[Chapter] = []
+        fallback = False
+        try:
+            async for chapter in cb.extract_ai_stream(
+                srt.subtitles, srt.duration,
+                api_key=api_key, api_base=api_base, model=api_model,
+            ):
+                chapters.append(chapter)
+                yield _ndjson({"type": "chapter", "chapter": chapter.model_dump()})
+        except Exception:
+            traceback.print_exc()
+            # 降级到自动分段
+            chapters = cb.extract_auto(srt.subtitles, srt.duration).chapters
+            fallback = True
+
+        done = ChaptersResponse(
+            chapters=chapters, duration=srt.duration, source="auto" if fallback else "ai"
         )
-    except Exception as e:
-        # 打印错误日志便于调试
-        import traceback
-        traceback.print_exc()
-        # 降级到自动分段
-        chapters = cb.extract_auto(srt.subtitles, srt.duration)
+        yield _ndjson({"type": "done", **done.model_dump(), "fallback": fallback})
 
-    return ChaptersResponse(chapters=chapters.chapters, duration=chapters.duration)
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+def _ndjson(event: dict) -> str:
+    return json.dumps(event, ensure_ascii=False) + "\n"
 
 
 @router.post("/validate", response_model=ChapterValidationResult)
@@ -198,13 +372,24 @@ async def generate_video(request: GenerateRequest):
 
     with TemporaryDirectory() as tmpdir:
         output = Path(tmpdir) / filename
+        key = cb.cache_key(
+            config,
+            format=request.format,
+            scheme=scheme,
+            key_frame_interval=request.key_frame_interval,
+        )
         try:
-            cb.generate(
-                config,
+            await artifact_cache.get_cache().get_or_create_async(
+                key,
                 output,
-                format=request.format,
-                scheme=scheme,
-                key_frame_interval=request.key_frame_interval,
+                lambda path: executor.run_cpu(
+                    cb.generate,
+                    config,
+                    path,
+                    format=request.format,
+                    scheme=scheme,
+                    key_frame_interval=request.key_frame_interval,
+                ),
             )
         except RuntimeError as e:
             raise HTTPException(500, f"生成失败: {e}")
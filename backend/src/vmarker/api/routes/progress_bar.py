@@ -1,5 +1,5 @@
 """
-[INPUT]: 依赖 FastAPI, progress_bar
+[INPUT]: 依赖 FastAPI, progress_bar, artifact_cache, executor
 [OUTPUT]: 对外提供 router (APIRouter 实例)
 [POS]: Progress Bar 功能的 API 路由
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
@@ -12,6 +12,7 @@ from fastapi import APIRouter, HTTPException
 from fastapi.responses import Response
 from pydantic import BaseModel, Field
 
+from vmarker import artifact_cache, executor
 from vmarker import progress_bar as pb
 
 
@@ -93,12 +94,22 @@ async def generate_progress_bar(request: GenerateRequest):
 
     with TemporaryDirectory() as tmpdir:
         output = Path(tmpdir) / filename
+        key = pb.cache_key(
+            config,
+            format=request.format,
+            key_frame_interval=request.key_frame_interval,
+        )
         try:
-            pb.generate(
-                config,
+            await artifact_cache.get_cache().get_or_create_async(
+                key,
                 output,
-                format=request.format,
-                key_frame_interval=request.key_frame_interval,
+                lambda path: executor.run_cpu(
+                    pb.generate,
+                    config,
+                    path,
+                    format=request.format,
+                    key_frame_interval=request.key_frame_interval,
+                ),
             )
         except RuntimeError as e:
             raise HTTPException(500, f"生成失败: {e}")
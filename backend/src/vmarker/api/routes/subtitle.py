@@ -1,15 +1,17 @@
 """
 [INPUT]: 依赖 FastAPI, subtitle, parser
 [OUTPUT]: 对外提供 router (APIRouter 实例)
-[POS]: 字幕润色功能的 API 路由
+[POS]: 字幕润色功能的 API 路由，支持 NDJSON 流式返回
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
+import json
 import os
+from collections.abc import AsyncIterator
 from typing import Annotated
 
 from fastapi import APIRouter, File, HTTPException, UploadFile
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 
 from vmarker import subtitle as sub
@@ -35,6 +37,8 @@ class PolishedSubtitleItem(BaseModel):
 class PolishResponse(BaseModel):
     subtitles: list[PolishedSubtitleItem]
     changes_count: int
+    cached_count: int = 0  # 命中逐条缓存、未请求 AI 的字幕数
+    output_tokens: int = 0  # 模型输出 token 数
     srt_content: str  # 润色后的 SRT 文件内容
 
 
@@ -80,22 +84,84 @@ async def polish_subtitles(
     srt_content = sub.generate_srt(result.subtitles)
 
     return PolishResponse(
-        subtitles=[
-            PolishedSubtitleItem(
-                index=s.index,
-                start_time=s.start_time,
-                end_time=s.end_time,
-                original_text=s.original_text,
-                polished_text=s.polished_text,
-                changed=s.original_text != s.polished_text,
-            )
-            for s in result.subtitles
-        ],
+        subtitles=[_item(s) for s in result.subtitles],
         changes_count=result.changes_count,
+        cached_count=result.cached_count,
+        output_tokens=result.output_tokens,
         srt_content=srt_content,
     )
 
 
+@router.post("/polish/stream")
+async def polish_subtitles_stream(
+    file: Annotated[UploadFile, File(description="SRT 字幕文件")],
+):
+    """
+    润色字幕（NDJSON 流式返回）
+
+    每行一个 JSON 事件：
+    - {"type": "subtitle", "subtitle": {...}}：单条润色结果，到达顺序不固定，以 index 定位
+    - {"type": "done", ...}：最终结果，字段同 /polish 响应
+    - {"type": "error", "message": "..."}：润色失败
+    """
+    api_key = os.getenv("API_KEY", "")
+    api_base = os.getenv("API_BASE", "https://api.openai.com/v1")
+    api_model = os.getenv("API_MODEL", "gpt-4o-mini")
+
+    if not api_key:
+        raise HTTPException(400, "未配置 AI API Key，请在 backend/.env 中设置 API_KEY")
+
+    if not file.filename or not file.filename.endswith(".srt"):
+        raise HTTPException(400, "请上传 .srt 文件")
+
+    try:
+        content = decode_srt_bytes(await file.read())
+        srt = parse_srt(content)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            async for event in sub.polish_subtitles_stream(
+                srt.subtitles,
+                api_key=api_key,
+                api_base=api_base,
+                model=api_model,
+            ):
+                if isinstance(event, sub.PolishResult):
+                    done = PolishResponse(
+                        subtitles=[_item(s) for s in event.subtitles],
+                        changes_count=event.changes_count,
+                        cached_count=event.cached_count,
+                        output_tokens=event.output_tokens,
+                        srt_content=sub.generate_srt(event.subtitles),
+                    )
+                    yield _ndjson({"type": "done", **done.model_dump()})
+                else:
+                    yield _ndjson({"type": "subtitle", "subtitle": _item(event).model_dump()})
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            yield _ndjson({"type": "error", "message": f"润色字幕失败: {e}"})
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+def _item(s: sub.PolishedSubtitle) -> PolishedSubtitleItem:
+    return PolishedSubtitleItem(
+        index=s.index,
+        start_time=s.start_time,
+        end_time=s.end_time,
+        original_text=s.original_text,
+        polished_text=s.polished_text,
+        changed=s.original_text != s.polished_text,
+    )
+
+
+def _ndjson(event: dict) -> str:
+    return json.dumps(event, ensure_ascii=False) + "\n"
+
+
 @router.post("/download")
 async def download_polished(
     file: Annotated[UploadFile, File(description="SRT 字幕文件")],
@@ -1,26 +1,49 @@
 """
-[INPUT]: 依赖 FastAPI, video_probe, asr, video_composer, video_composer_parallel, temp_manager, chapter_bar, progress_bar
+[INPUT]: 依赖 FastAPI, video_probe, asr, video_composer, video_composer_parallel, temp_manager,
+         artifact_cache, singleflight, executor, chapter_bar, progress_bar
 [OUTPUT]: 对外提供 router (APIRouter 实例)
-[POS]: 视频上传和处理 API 路由，支持 ASR 转录和视频合成（含并行）
+[POS]: 视频上传和处理 API 路由，支持按内容摘要秒传、ASR 转录和视频合成（含并行，产物可缓存复用）；
+       阻塞操作均不占用事件循环，相同的并发转录与合成只执行一次
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
+import asyncio
+import functools
+import hashlib
 import os
+from collections.abc import Awaitable, Callable
 from pathlib import Path
 from typing import Annotated
 
 from fastapi import APIRouter, File, Form, HTTPException, UploadFile
-from fastapi.responses import Response
+from fastapi.responses import FileResponse
 from pydantic import BaseModel, field_validator
 
-from vmarker import asr, chapter_bar as cb, progress_bar as pb, video_composer, video_composer_parallel, video_probe
+from vmarker import (
+    artifact_cache,
+    asr,
+    executor,
+    video_composer,
+    video_composer_parallel,
+    video_probe,
+)
+from vmarker import chapter_bar as cb
+from vmarker import progress_bar as pb
+from vmarker.artifact_cache import canonical_key
 from vmarker.models import Chapter, ChapterBarConfig, ColorScheme, VideoConfig
-from vmarker.progress_bar import ProgressBarConfig
 from vmarker.parser import parse_srt
-from vmarker.temp_manager import TempSession, cleanup_old_sessions, get_session
+from vmarker.progress_bar import ProgressBarConfig
+from vmarker.singleflight import get_flight
+from vmarker.temp_manager import (
+    TempSession,
+    blob_temp_path,
+    cleanup_old_sessions,
+    get_session,
+    has_blob,
+    store_blob_file,
+)
 from vmarker.themes import THEMES, get_theme
 
-
 router = APIRouter()
 
 
@@ -29,7 +52,8 @@ router = APIRouter()
 # =============================================================================
 
 MAX_FILE_SIZE = 500 * 1024 * 1024  # 500MB
-MAX_DURATION = 300  # 5 分钟
+UPLOAD_CHUNK_BYTES = 1024 * 1024  # 上传内容分块写入与摘要的块大小
+MAX_DURATION = video_probe.DEFAULT_MAX_DURATION  # 默认 30 分钟，见 MAX_VIDEO_DURATION_SECONDS
 PARALLEL_THRESHOLD_SECONDS = 180  # 超过 3 分钟自动使用并行合成
 ALLOWED_EXTENSIONS = {".mp4", ".mov", ".webm", ".mkv", ".avi"}
 
@@ -48,6 +72,7 @@ class VideoUploadResponse(BaseModel):
     height: int
     fps: float
     file_size_mb: float
+    sha256: str  # 内容摘要，可用于后续秒传
 
 
 class ASRResponse(BaseModel):
@@ -119,7 +144,9 @@ class ComposeParallelRequest(BaseModel):
 
 @router.post("/upload", response_model=VideoUploadResponse)
 async def upload_video(
-    file: Annotated[UploadFile, File(description="视频文件 (mp4/mov/webm/mkv/avi, ≤500MB, ≤5min)")],
+    file: Annotated[
+        UploadFile, File(description="视频文件 (mp4/mov/webm/mkv/avi, ≤500MB, ≤30min)")
+    ],
 ):
     """
     上传视频文件
@@ -133,20 +160,82 @@ async def upload_video(
     if ext not in ALLOWED_EXTENSIONS:
         raise HTTPException(400, f"不支持的文件格式: {ext}，支持: {', '.join(ALLOWED_EXTENSIONS)}")
 
-    # 读取文件内容
-    content = await file.read()
+    # 按内容摘要存储，相同视频只保存一份
+    digest = await _receive_upload(file)
+
+    return await _create_session_from_blob(digest, ext)
+
+
+@router.post("/upload/by-hash", response_model=VideoUploadResponse)
+async def upload_video_by_hash(
+    sha256: Annotated[str, Form(description="视频内容的 SHA-256 摘要")],
+    filename: Annotated[str, Form(description="原始文件名，用于确定格式")] = "video.mp4",
+):
+    """
+    按内容摘要秒传
+
+    服务端已存有相同内容时直接创建会话，无需再次上传文件；
+    返回 404 时客户端应回退到 /upload。
+    """
+    ext = Path(filename).suffix.lower()
+    if ext not in ALLOWED_EXTENSIONS:
+        raise HTTPException(400, f"不支持的文件格式: {ext}，支持: {', '.join(ALLOWED_EXTENSIONS)}")
+
+    digest = sha256.lower()
+    if not has_blob(digest):
+        raise HTTPException(404, "服务端不存在该内容，请上传完整文件")
 
-    # 验证文件大小
-    if len(content) > MAX_FILE_SIZE:
-        raise HTTPException(400, f"文件大小超出限制 ({MAX_FILE_SIZE // 1024 // 1024}MB)")
+    return await _create_session_from_blob(digest, ext)
 
-    # 创建会话并保存文件
+
+async def _receive_upload(file: UploadFile) -> str:
+    """
+    分块读取上传内容，边写入 blob 临时文件边计算摘要，完成后存为 blob
+
+    内存占用只有一个分块；超出 MAX_FILE_SIZE 时立即中止。
+
+    Returns:
+        内容摘要
+    """
+    tmp_path = blob_temp_path()
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp_path, "wb") as out:
+            while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+                size += len(chunk)
+                if size > MAX_FILE_SIZE:
+                    raise HTTPException(
+                        400, f"文件大小超出限制 ({MAX_FILE_SIZE // 1024 // 1024}MB)"
+                    )
+                await asyncio.to_thread(_write_chunk, out, hasher, chunk)
+        digest = hasher.hexdigest()
+        await asyncio.to_thread(store_blob_file, tmp_path, digest)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return digest
+
+
+def _write_chunk(out, hasher, chunk: bytes) -> None:
+    out.write(chunk)
+    hasher.update(chunk)
+
+
+async def _create_session_from_blob(digest: str, ext: str) -> VideoUploadResponse:
+    """基于已存储的内容创建会话并验证视频"""
     session = TempSession()
-    video_path = session.save_upload(f"source{ext}", content)
+    try:
+        video_path = session.link_blob(digest, f"source{ext}")
+    except FileNotFoundError:
+        # 检查存在与链接之间 blob 可能已被清理回收
+        session.cleanup()
+        raise HTTPException(404, "服务端不存在该内容，请上传完整文件")
 
     # 探测视频信息
     try:
-        info = video_probe.validate_video(video_path, MAX_DURATION, MAX_FILE_SIZE / 1024 / 1024)
+        info = await video_probe.validate_video_async(
+            video_path, MAX_DURATION, MAX_FILE_SIZE / 1024 / 1024
+        )
     except ValueError as e:
         session.cleanup()
         raise HTTPException(400, str(e))
@@ -154,6 +243,12 @@ async def upload_video(
         session.cleanup()
         raise HTTPException(400, f"视频解析失败: {e}")
 
+    # 探测结果随会话持久化，后续合成无需再次探测
+    session.update_meta(
+        source_digest=digest,
+        probe={"identity": list(video_probe.file_identity(video_path)), "info": info.to_dict()},
+    )
+
     return VideoUploadResponse(
         session_id=session.session_id,
         duration=info.duration,
@@ -161,6 +256,7 @@ async def upload_video(
         height=info.height,
         fps=info.fps,
         file_size_mb=info.file_size / 1024 / 1024,
+        sha256=digest,
     )
 
 
@@ -175,6 +271,8 @@ async def transcribe_video(session_id: str):
     对已上传的视频进行 ASR 转录
 
     返回字幕数量和 SRT 内容，SRT 内容会保存到会话目录供后续使用。
+    相同视频与配置的并发转录（重复点击、多个标签页）合并为一次 ASR 请求，
+    会话中已有相同配置的转录结果时直接复用。
     """
     # 获取配置
     api_key = os.getenv("API_KEY", "")
@@ -197,14 +295,32 @@ async def transcribe_video(session_id: str):
     video_path = video_files[0]
 
     # ASR 转录
-    try:
-        config = asr.ASRConfig(api_key=api_key, api_base=api_base, model=model)
+    config = asr.ASRConfig(api_key=api_key, api_base=api_base, model=model)
+    asr_key = canonical_key(
+        "asr",
+        session.read_meta().get("source_digest") or session_id,
+        config.api_base.rstrip("/"),
+        config.model,
+        config.language,
+        config.audio_format,
+    )
+
+    async def transcribe() -> str:
+        # 等锁期间其他 worker 可能已完成同一会话的转录
+        if session.read_meta().get("asr_key") == asr_key and session.exists("subtitles.srt"):
+            return session.read_text("subtitles.srt")
         srt_content = await asr.transcribe_to_srt(video_path, config)
+        _save_srt(session, srt_content, asr_key)
+        return srt_content
+
+    try:
+        srt_content, shared = await get_flight().do(asr_key, transcribe)
     except Exception as e:
         raise HTTPException(500, f"ASR 转录失败: {e}")
 
-    # 保存 SRT 到会话
-    session.save_text("subtitles.srt", srt_content)
+    # 保存 SRT 到会话（共享其他会话的转录结果时）
+    if shared:
+        _save_srt(session, srt_content, asr_key)
 
     # 解析字幕获取信息
     result = parse_srt(srt_content)
@@ -217,6 +333,12 @@ async def transcribe_video(session_id: str):
     )
 
 
+def _save_srt(session: TempSession, srt_content: str, asr_key: str) -> None:
+    """保存转录结果，并记录其对应的转录键"""
+    session.save_text("subtitles.srt", srt_content)
+    session.update_meta(asr_key=asr_key)
+
+
 # =============================================================================
 #  路由 - 获取会话 SRT
 # =============================================================================
@@ -260,7 +382,7 @@ async def compose_video(session_id: str, request: ComposeRequest):
         raise HTTPException(404, "未找到上传的视频")
 
     source_video = video_files[0]
-    source_info = video_probe.probe(source_video)
+    source_info = await _probe_source(session, source_video)
 
     # 验证位置参数
     if request.position not in ("top", "bottom"):
@@ -268,13 +390,8 @@ async def compose_video(session_id: str, request: ComposeRequest):
 
     position = video_composer.OverlayPosition.TOP if request.position == "top" else video_composer.OverlayPosition.BOTTOM
 
-    # 根据功能生成 Bar
-    if request.feature == "chapter-bar":
-        bar_path = _generate_chapter_bar(session, source_info, request)
-    elif request.feature == "progress-bar":
-        bar_path = _generate_progress_bar(session, source_info, request)
-    else:
-        raise HTTPException(400, f"不支持的功能: {request.feature}")
+    # 构建 Bar 渲染任务
+    bar_job = _build_bar_job(source_info, request, request.key_frame_interval)
 
     # 合成视频 - 自动选择串行或并行
     output_path = session.get_path("output.mp4")
@@ -289,28 +406,39 @@ async def compose_video(session_id: str, request: ComposeRequest):
             position=position,
             chunk_seconds=chunk_seconds,
         )
-        try:
-            await video_composer_parallel.compose_vstack_parallel(
-                source_video, bar_path, output_path, parallel_config
-            )
-        except RuntimeError as e:
-            raise HTTPException(500, f"视频合成失败: {e}")
+        compose_key = _compose_key(
+            session, bar_job, request.position,
+            ("parallel", parallel_config.chunk_seconds, parallel_config.gop_multiplier),
+        )
+
+        async def produce(path: Path) -> None:
+            bar_path = await _render_bar(session, bar_job)
+            try:
+                await video_composer_parallel.compose_vstack_parallel(
+                    source_video, bar_path, path, parallel_config, source_info
+                )
+            except RuntimeError as e:
+                raise HTTPException(500, f"视频合成失败: {e}")
     else:
         # 串行合成
         compose_config = video_composer.CompositionConfig(position=position)
-        try:
-            video_composer.compose_vstack(source_video, bar_path, output_path, compose_config)
-        except RuntimeError as e:
-            raise HTTPException(500, f"视频合成失败: {e}")
+        compose_key = _compose_key(
+            session, bar_job, request.position, ("serial", video_composer.ENCODE_ARGS)
+        )
 
-    # 返回合成后的视频
-    content = output_path.read_bytes()
+        async def produce(path: Path) -> None:
+            bar_path = await _render_bar(session, bar_job)
+            try:
+                await video_composer.compose_vstack_async(
+                    source_video, bar_path, path, compose_config, source_info
+                )
+            except RuntimeError as e:
+                raise HTTPException(500, f"视频合成失败: {e}")
 
-    return Response(
-        content=content,
-        media_type="video/mp4",
-        headers={"Content-Disposition": 'attachment; filename="composed.mp4"'},
-    )
+    await _compose_output(compose_key, output_path, produce)
+
+    # 返回合成后的视频（流式发送，不整体读入内存）
+    return FileResponse(output_path, media_type="video/mp4", filename="composed.mp4")
 
 
 @router.post("/compose-parallel/{session_id}")
@@ -332,7 +460,7 @@ async def compose_video_parallel(session_id: str, request: ComposeParallelReques
         raise HTTPException(404, "未找到上传的视频")
 
     source_video = video_files[0]
-    source_info = video_probe.probe(source_video)
+    source_info = await _probe_source(session, source_video)
 
     # 验证位置参数
     if request.position not in ("top", "bottom"):
@@ -340,13 +468,8 @@ async def compose_video_parallel(session_id: str, request: ComposeParallelReques
 
     position = video_composer.OverlayPosition.TOP if request.position == "top" else video_composer.OverlayPosition.BOTTOM
 
-    # 根据功能生成 Bar
-    if request.feature == "chapter-bar":
-        bar_path = _generate_chapter_bar_parallel(session, source_info, request)
-    elif request.feature == "progress-bar":
-        bar_path = _generate_progress_bar_parallel(session, source_info, request)
-    else:
-        raise HTTPException(400, f"不支持的功能: {request.feature}")
+    # 构建 Bar 渲染任务（并行模式由内部控制 GOP）
+    bar_job = _build_bar_job(source_info, request, None)
 
     # 并行合成视频
     output_path = session.get_path("output.mp4")
@@ -355,86 +478,61 @@ async def compose_video_parallel(session_id: str, request: ComposeParallelReques
         chunk_seconds=request.chunk_seconds or video_composer_parallel.DEFAULT_CHUNK_SECONDS,
         max_workers=request.max_workers or video_composer_parallel.DEFAULT_MAX_WORKERS,
     )
-
-    try:
-        await video_composer_parallel.compose_vstack_parallel(
-            source_video, bar_path, output_path, parallel_config
-        )
-    except RuntimeError as e:
-        raise HTTPException(500, f"并行视频合成失败: {e}")
-
-    # 返回合成后的视频
-    content = output_path.read_bytes()
-
-    return Response(
-        content=content,
-        media_type="video/mp4",
-        headers={"Content-Disposition": 'attachment; filename="composed.mp4"'},
+    compose_key = _compose_key(
+        session, bar_job, request.position,
+        ("parallel", parallel_config.chunk_seconds, parallel_config.gop_multiplier),
     )
 
+    async def produce(path: Path) -> None:
+        bar_path = await _render_bar(session, bar_job)
+        try:
+            await video_composer_parallel.compose_vstack_parallel(
+                source_video, bar_path, path, parallel_config, source_info
+            )
+        except RuntimeError as e:
+            raise HTTPException(500, f"并行视频合成失败: {e}")
 
-def _generate_chapter_bar(session: TempSession, source_info: video_probe.VideoInfo, request: ComposeRequest) -> Path:
-    """生成 Chapter Bar 视频"""
-    if not request.chapters:
-        raise HTTPException(400, "Chapter Bar 需要提供 chapters 参数")
+    await _compose_output(compose_key, output_path, produce)
 
-    # 验证章节
-    validation = cb.validate(request.chapters, source_info.duration)
-    if not validation.valid:
-        blocking = [i for i in validation.issues if i.blocking]
-        if blocking:
-            raise HTTPException(400, f"章节配置错误: {blocking[0].message}")
+    # 返回合成后的视频（流式发送，不整体读入内存）
+    return FileResponse(output_path, media_type="video/mp4", filename="composed.mp4")
 
-    # 获取配色方案
-    if request.theme in THEMES:
-        scheme = get_theme(request.theme)
-    else:
-        scheme = get_theme("tech-blue")
 
-    # 生成配置
-    config = ChapterBarConfig(
-        chapters=validation.chapters,
-        duration=source_info.duration,
-        video=VideoConfig(width=source_info.width, height=request.bar_height),
-        theme=request.theme,
-    )
+async def _probe_source(session: TempSession, source_video: Path) -> video_probe.VideoInfo:
+    """获取源视频信息，文件身份未变时直接使用会话中保存的探测结果"""
+    saved = session.read_meta().get("probe")
+    identity = list(video_probe.file_identity(source_video))
+    if saved and saved.get("identity") == identity:
+        return video_probe.VideoInfo.from_dict(saved["info"])
 
-    # 生成 Bar 视频
-    bar_path = session.get_path("chapter_bar.mp4")
-    cb.generate(
-        config,
-        bar_path,
-        format="mp4",
-        scheme=scheme,
-        key_frame_interval=request.key_frame_interval,
-    )
-
-    return bar_path
-
-
-def _generate_progress_bar(session: TempSession, source_info: video_probe.VideoInfo, request: ComposeRequest) -> Path:
-    """生成 Progress Bar 视频"""
-    config = ProgressBarConfig(
-        duration=source_info.duration,
-        width=source_info.width,
-        height=request.progress_height,
-        played_color=request.played_color,
-        unplayed_color=request.unplayed_color,
-    )
+    info = await video_probe.probe_async(source_video)
+    session.update_meta(probe={"identity": identity, "info": info.to_dict()})
+    return info
 
-    bar_path = session.get_path("progress_bar.mp4")
-    pb.generate(
-        config,
-        bar_path,
-        format="mp4",
-        key_frame_interval=request.key_frame_interval,
-    )
 
-    return bar_path
+# (文件名, 缓存键, 渲染协程函数)
+BarJob = tuple[str, str, Callable[[Path], Awaitable[Path]]]
 
 
-def _generate_chapter_bar_parallel(session: TempSession, source_info: video_probe.VideoInfo, request: ComposeParallelRequest) -> Path:
-    """生成 Chapter Bar 视频（并行模式）"""
+def _build_bar_job(
+    source_info: video_probe.VideoInfo,
+    request: ComposeRequest | ComposeParallelRequest,
+    key_frame_interval: float | None,
+) -> BarJob:
+    """根据功能构建 Bar 渲染任务"""
+    if request.feature == "chapter-bar":
+        return _chapter_bar_job(source_info, request, key_frame_interval)
+    if request.feature == "progress-bar":
+        return _progress_bar_job(source_info, request, key_frame_interval)
+    raise HTTPException(400, f"不支持的功能: {request.feature}")
+
+
+def _chapter_bar_job(
+    source_info: video_probe.VideoInfo,
+    request: ComposeRequest | ComposeParallelRequest,
+    key_frame_interval: float | None,
+) -> BarJob:
+    """构建 Chapter Bar 渲染任务"""
     if not request.chapters:
         raise HTTPException(400, "Chapter Bar 需要提供 chapters 参数")
 
@@ -459,21 +557,26 @@ def _generate_chapter_bar_parallel(session: TempSession, source_info: video_prob
         theme=request.theme,
     )
 
-    # 生成 Bar 视频
-    bar_path = session.get_path("chapter_bar.mp4")
-    cb.generate(
+    # 帧渲染在进程池中执行，参数需可 pickle
+    render = functools.partial(
+        executor.run_cpu,
+        cb.generate,
         config,
-        bar_path,
         format="mp4",
         scheme=scheme,
-        key_frame_interval=None,  # 并行模式由内部控制 GOP
+        key_frame_interval=key_frame_interval,
     )
 
-    return bar_path
+    key = cb.cache_key(config, format="mp4", scheme=scheme, key_frame_interval=key_frame_interval)
+    return "chapter_bar.mp4", key, render
 
 
-def _generate_progress_bar_parallel(session: TempSession, source_info: video_probe.VideoInfo, request: ComposeParallelRequest) -> Path:
-    """生成 Progress Bar 视频（并行模式）"""
+def _progress_bar_job(
+    source_info: video_probe.VideoInfo,
+    request: ComposeRequest | ComposeParallelRequest,
+    key_frame_interval: float | None,
+) -> BarJob:
+    """构建 Progress Bar 渲染任务"""
     config = ProgressBarConfig(
         duration=source_info.duration,
         width=source_info.width,
@@ -482,17 +585,49 @@ def _generate_progress_bar_parallel(session: TempSession, source_info: video_pro
         unplayed_color=request.unplayed_color,
     )
 
-    bar_path = session.get_path("progress_bar.mp4")
-    pb.generate(
+    render = functools.partial(
+        executor.run_cpu,
+        pb.generate,
         config,
-        bar_path,
         format="mp4",
-        key_frame_interval=None,  # 并行模式由内部控制 GOP
+        key_frame_interval=key_frame_interval,
     )
 
+    key = pb.cache_key(config, format="mp4", key_frame_interval=key_frame_interval)
+    return "progress_bar.mp4", key, render
+
+
+async def _render_bar(session: TempSession, bar_job: BarJob) -> Path:
+    """渲染 Bar 视频到会话目录，相同配置直接复用缓存"""
+    filename, key, render = bar_job
+    bar_path = session.get_path(filename)
+    await artifact_cache.get_cache().get_or_create_async(key, bar_path, render)
     return bar_path
 
 
+def _compose_key(
+    session: TempSession, bar_job: BarJob, position: str, profile: tuple
+) -> str | None:
+    """合成结果缓存键：(源视频摘要, Bar 键, 位置, 编码方案)，旧会话无摘要时不缓存"""
+    source_digest = session.read_meta().get("source_digest")
+    if not source_digest:
+        return None
+    return canonical_key("compose", source_digest, bar_job[1], position, profile)
+
+
+async def _compose_output(
+    compose_key: str | None,
+    output_path: Path,
+    produce: Callable[[Path], Awaitable[None]],
+) -> None:
+    """放置合成结果：有缓存键时复用缓存并合并相同的并发合成，否则直接生成"""
+    if compose_key is None:
+        output_path.unlink(missing_ok=True)  # 可能是缓存条目的硬链接，不可原地覆盖
+        await produce(output_path)
+        return
+    await artifact_cache.get_cache().get_or_create_async(compose_key, output_path, produce)
+
+
 # =============================================================================
 #  路由 - 会话管理
 # =============================================================================
@@ -503,12 +638,12 @@ async def delete_session(session_id: str):
     """清理会话"""
     session = get_session(session_id)
     if session:
-        session.cleanup()
+        await asyncio.to_thread(session.cleanup)
     return {"status": "cleaned"}
 
 
 @router.post("/cleanup")
 async def cleanup_sessions(max_age_hours: int = 24):
     """清理过期会话（管理接口）"""
-    cleaned = cleanup_old_sessions(max_age_hours)
+    cleaned = await asyncio.to_thread(cleanup_old_sessions, max_age_hours)
     return {"cleaned": cleaned}
@@ -1,20 +1,28 @@
 """
-[INPUT]: 依赖 FastAPI, youtube_transcript, youtube_downloader, asr, chapter_bar, temp_manager
+[INPUT]: 依赖 FastAPI, youtube_transcript, youtube_downloader, youtube_pipeline, youtube_batch, asr,
+         chapter_bar, executor, temp_manager
 [OUTPUT]: 对外提供 router (APIRouter 实例)
-[POS]: YouTube 章节生成功能的 API 路由，支持两种模式：字幕提取（快速）和下载 ASR（备选）
+[POS]: YouTube 章节生成功能的 API 路由，支持两种模式：字幕提取（快速）和下载 ASR（备选），
+       以及字幕提取方式的批量生成（NDJSON 流式返回）
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
+import json
 import os
+import time
+from collections.abc import AsyncIterator
 
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 
-from vmarker import chapter_bar
+from vmarker import chapter_bar, youtube_pipeline
 from vmarker.asr import ASRConfig, transcribe_video
+from vmarker.executor import run_io
 from vmarker.temp_manager import TempSession
+from vmarker.youtube_batch import MAX_BATCH_URLS, format_youtube_chapters, generate_chapters_batch
 from vmarker.youtube_downloader import download_audio, validate_youtube_url
-from vmarker.youtube_transcript import get_transcript, extract_video_id
+from vmarker.youtube_transcript import get_transcript_async, extract_video_id
 
 
 router = APIRouter()
@@ -29,6 +37,10 @@ class YouTubeRequest(BaseModel):
     url: str
 
 
+class YouTubeBatchRequest(BaseModel):
+    urls: list[str] = Field(min_length=1, max_length=MAX_BATCH_URLS)
+
+
 class ChapterResponse(BaseModel):
     title: str
     start_time: float
@@ -40,6 +52,7 @@ class YouTubeChaptersResponse(BaseModel):
     duration: float
     chapters: list[ChapterResponse]
     youtube_format: str
+    timings: dict[str, float] | None = None  # 各阶段耗时（秒），仅下载 ASR 方式返回
 
 
 # =============================================================================
@@ -69,7 +82,7 @@ async def generate_chapters_from_transcript(req: YouTubeRequest):
 
     # Step 1: 获取字幕
     try:
-        info = get_transcript(req.url)
+        info = await get_transcript_async(req.url)
     except ValueError as e:
         raise HTTPException(400, str(e))
     except RuntimeError as e:
@@ -88,7 +101,7 @@ async def generate_chapters_from_transcript(req: YouTubeRequest):
         raise HTTPException(500, f"AI 分段失败: {e}")
 
     # Step 3: 格式化
-    youtube_format = _format_youtube_chapters(chapter_list.chapters)
+    youtube_format = format_youtube_chapters(chapter_list.chapters)
 
     return YouTubeChaptersResponse(
         video_title=info.video_id,
@@ -105,6 +118,68 @@ async def generate_chapters_from_transcript(req: YouTubeRequest):
     )
 
 
+# =============================================================================
+#  路由 - 批量字幕提取
+# =============================================================================
+
+
+@router.post("/batch")
+async def generate_chapters_batch_stream(req: YouTubeBatchRequest):
+    """
+    批量从 YouTube 链接生成章节（字幕提取方式，NDJSON 流式返回）
+
+    字幕获取与 AI 分段流水线执行，各自限制并发。每行一个 JSON 事件，按完成顺序到达：
+    - {"type": "result", "index": i, "url": ..., ...}：单个视频的结果，字段同 /from-url 响应
+    - {"type": "error", "index": i, "url": ..., "message": "..."}：单个链接失败，不影响其余链接
+    - {"type": "done", "total": n, "succeeded": k, "failed": n - k}：全部完成
+    """
+    api_key = os.getenv("API_KEY", "")
+    api_base = os.getenv("API_BASE", "https://api.openai.com/v1")
+    api_model = os.getenv("API_MODEL", "gpt-4o-mini")
+
+    if not api_key:
+        raise HTTPException(400, "未配置 AI API Key")
+
+    async def events() -> AsyncIterator[str]:
+        succeeded = 0
+        batch = generate_chapters_batch(
+            req.urls, api_key=api_key, api_base=api_base, model=api_model
+        )
+        async for item in batch:
+            if item.error is not None:
+                yield _ndjson(
+                    {"type": "error", "index": item.index, "url": item.url, "message": item.error}
+                )
+                continue
+            succeeded += 1
+            result = YouTubeChaptersResponse(
+                video_title=item.info.video_id,
+                duration=item.info.duration,
+                chapters=[
+                    ChapterResponse(
+                        title=ch.title,
+                        start_time=ch.start_time,
+                        end_time=ch.end_time,
+                    )
+                    for ch in item.chapters.chapters
+                ],
+                youtube_format=format_youtube_chapters(item.chapters.chapters),
+            )
+            yield _ndjson(
+                {"type": "result", "index": item.index, "url": item.url, **result.model_dump()}
+            )
+        total = len(req.urls)
+        yield _ndjson(
+            {"type": "done", "total": total, "succeeded": succeeded, "failed": total - succeeded}
+        )
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+def _ndjson(event: dict) -> str:
+    return json.dumps(event, ensure_ascii=False) + "\n"
+
+
 # =============================================================================
 #  路由 - 下载 ASR 方式（备选，需要登录）
 # =============================================================================
@@ -116,6 +191,7 @@ async def generate_chapters_from_download(req: YouTubeRequest):
     从 YouTube 链接生成章节（下载 ASR 方式）
 
     流程：下载音频 → ASR 转录 → AI 分段 → 格式化
+    默认边下载边转录（见 youtube_pipeline），下载与 ASR 重叠
     适用：视频无字幕时的备选方案
     """
     api_key = os.getenv("API_KEY", "")
@@ -131,39 +207,49 @@ async def generate_chapters_from_download(req: YouTubeRequest):
         raise HTTPException(400, "无效的 YouTube 链接")
 
     session = TempSession()
+    asr_config = ASRConfig(
+        api_key=api_key,
+        api_base=asr_api_base,
+        model=asr_model,
+    )
 
     try:
-        # Step 1: 下载音频
+        # Step 1-2: 下载音频并转录（流式时两者重叠）
         try:
-            info = download_audio(req.url, session.session_dir)
+            if youtube_pipeline.STREAMING_ENABLED:
+                streamed = await youtube_pipeline.transcribe_youtube(
+                    req.url, session.session_dir, asr_config
+                )
+                title, duration, timings = streamed.title, streamed.duration, streamed.timings
+                subtitles = streamed.subtitles.subtitles
+            else:
+                info = await run_io(download_audio, req.url, session.session_dir)
+                start = time.monotonic()
+                srt_file = await transcribe_video(info.audio_path, asr_config)
+                title, duration, subtitles = info.title, info.duration, srt_file.subtitles
+                timings = {**info.timings, "asr": round(time.monotonic() - start, 3)}
         except ValueError as e:
             raise HTTPException(400, str(e))
         except RuntimeError as e:
             raise HTTPException(400, str(e))
 
-        # Step 2: ASR 转录
-        asr_config = ASRConfig(
-            api_key=api_key,
-            api_base=asr_api_base,
-            model=asr_model,
-        )
-        srt_file = await transcribe_video(info.audio_path, asr_config)
-
         # Step 3: AI 分段
+        start = time.monotonic()
         chapter_list = await chapter_bar.extract_ai(
-            srt_file.subtitles,
-            info.duration,
+            subtitles,
+            duration,
             api_key=api_key,
             api_base=api_base,
             model=api_model,
         )
+        timings["ai"] = round(time.monotonic() - start, 3)
 
         # Step 4: 格式化
-        youtube_format = _format_youtube_chapters(chapter_list.chapters)
+        youtube_format = format_youtube_chapters(chapter_list.chapters)
 
         return YouTubeChaptersResponse(
-            video_title=info.title,
-            duration=info.duration,
+            video_title=title,
+            duration=duration,
             chapters=[
                 ChapterResponse(
                     title=ch.title,
@@ -173,33 +259,8 @@ async def generate_chapters_from_download(req: YouTubeRequest):
                 for ch in chapter_list.chapters
             ],
             youtube_format=youtube_format,
+            timings=timings,
         )
 
     finally:
         session.cleanup()
-
-
-# =============================================================================
-#  辅助函数
-# =============================================================================
-
-
-def _format_youtube_chapters(chapters: list) -> str:
-    """格式化为 YouTube Description 时间戳格式"""
-    lines = []
-    for ch in chapters:
-        timestamp = _format_timestamp(ch.start_time)
-        lines.append(f"{timestamp} {ch.title}")
-    return "\n".join(lines)
-
-
-def _format_timestamp(seconds: float) -> str:
-    """将秒数格式化为 YouTube 时间戳"""
-    total_seconds = int(seconds)
-    hours = total_seconds // 3600
-    minutes = (total_seconds % 3600) // 60
-    secs = total_seconds % 60
-
-    if hours > 0:
-        return f"{hours}:{minutes:02d}:{secs:02d}"
-    return f"{minutes}:{secs:02d}"
@@ -0,0 +1,307 @@
+"""
+[INPUT]: 依赖 asyncio, hashlib, json, os, pathlib, dataclasses, enum, pydantic, temp_manager,
+         singleflight
+[OUTPUT]: 对外提供 ArtifactCache, canonical_key(), get_cache()
+[POS]: 渲染产物磁盘缓存，Bar 视频与合成结果按配置哈希复用，按 LRU 控制总容量
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+import dataclasses
+import hashlib
+import json
+import os
+import uuid
+from collections.abc import Awaitable, Callable
+from enum import Enum
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from vmarker import temp_manager
+from vmarker.singleflight import get_flight
+
+# =============================================================================
+#  辅助函数
+# =============================================================================
+
+
+def _parse_int_env(key: str, default: int) -> int:
+    """安全解析非负整数环境变量"""
+    value = os.getenv(key)
+    if value is None:
+        return default
+    try:
+        parsed = int(value)
+        return parsed if parsed >= 0 else default
+    except ValueError:
+        return default
+
+
+def _normalize(value):
+    """将缓存键的组成部分转换为可稳定序列化的结构"""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return _normalize(dataclasses.asdict(value))
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, Path):
+        return str(value)
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def canonical_key(*parts) -> str:
+    """
+    计算规范化缓存键
+
+    支持 pydantic 模型、dataclass、枚举、路径及基础类型，
+    字典按键排序后序列化，保证相同输入得到相同的键。
+
+    Returns:
+        SHA-256 十六进制摘要
+    """
+    payload = json.dumps(
+        _normalize(list(parts)),
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _scratch_path(output_path: Path) -> Path:
+    """output_path 旁的临时生成路径（保留后缀，FFmpeg 按后缀选择封装格式）"""
+    return output_path.with_name(f".{output_path.stem}.{uuid.uuid4().hex[:8]}{output_path.suffix}")
+
+
+# =============================================================================
+#  环境变量配置
+# =============================================================================
+
+DEFAULT_MAX_MB = _parse_int_env("ARTIFACT_CACHE_MAX_MB", 2048)  # 0 表示禁用
+
+
+# =============================================================================
+#  缓存类
+# =============================================================================
+
+
+class ArtifactCache:
+    """
+    渲染产物磁盘缓存
+
+    条目以 "<key><suffix>" 存放，命中时刷新 mtime，
+    写入后按 mtime 从旧到新淘汰直至总大小不超过上限。
+    """
+
+    def __init__(self, root: Path, max_bytes: int):
+        """
+        初始化缓存
+
+        Args:
+            root: 缓存目录
+            max_bytes: 容量上限（字节），0 表示禁用缓存
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _path(self, key: str, suffix: str) -> Path:
+        return self.root / f"{key}{suffix}"
+
+    def get(self, key: str, suffix: str) -> Path | None:
+        """
+        查找缓存条目
+
+        Returns:
+            命中时返回缓存文件路径，否则返回 None
+        """
+        path = self._find(key, suffix)
+        if path is None:
+            if self.enabled:
+                self.misses += 1
+            return None
+
+        self.hits += 1
+        return path
+
+    def _find(self, key: str, suffix: str) -> Path | None:
+        """查找条目并刷新 LRU 时间，不计入命中统计"""
+        if not self.enabled:
+            return None
+
+        path = self._path(key, suffix)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def put(self, key: str, src: Path, suffix: str) -> Path | None:
+        """
+        写入缓存条目（以硬链接方式，不复制内容）
+
+        Args:
+            key: 缓存键
+            src: 产物文件
+            suffix: 文件后缀
+
+        Returns:
+            缓存文件路径，缓存禁用时返回 None
+        """
+        if not self.enabled:
+            return None
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self._path(key, suffix)
+        tmp_path = self.root / f".{key}.{uuid.uuid4().hex[:8]}.tmp"
+        temp_manager.link_file(src, tmp_path)
+        os.replace(tmp_path, path)
+        os.utime(path)
+
+        self._evict()
+        return path
+
+    def get_or_create(
+        self,
+        key: str,
+        output_path: Path,
+        produce: Callable[[Path], object],
+    ) -> bool:
+        """
+        从缓存放置产物，未命中时生成并写入缓存
+
+        产物先生成到临时路径再替换到 output_path：output_path 可能是某个缓存条目的硬链接
+        （同一会话先前命中或写入），直接覆盖写入会同时改写该缓存条目。
+
+        Args:
+            key: 缓存键
+            output_path: 产物目标路径
+            produce: 生成函数，接收目标路径
+
+        Returns:
+            是否命中缓存
+        """
+        suffix = output_path.suffix
+        cached = self.get(key, suffix)
+        if cached is not None:
+            temp_manager.link_file(cached, output_path)
+            return True
+
+        tmp_path = _scratch_path(output_path)
+        try:
+            produce(tmp_path)
+            self.put(key, tmp_path, suffix)
+            os.replace(tmp_path, output_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        return False
+
+    async def get_or_create_async(
+        self,
+        key: str,
+        output_path: Path,
+        produce: Callable[[Path], Awaitable[object]],
+    ) -> bool:
+        """
+        get_or_create() 的异步版本，produce 为协程函数
+
+        写入与淘汰涉及目录扫描，放到线程中执行。相同产物的并发生成合并执行：
+        同进程的后到者链接先到者的产物，其他 worker 等待后直接命中缓存。
+
+        Returns:
+            是否命中缓存（含共享其他调用者的产物）
+        """
+        suffix = output_path.suffix
+        cached = self.get(key, suffix)
+        if cached is not None:
+            temp_manager.link_file(cached, output_path)
+            return True
+
+        async def create() -> tuple[Path, bool]:
+            cached = self._find(key, suffix)  # 等锁期间其他 worker 可能已生成
+            if cached is not None:
+                return cached, True
+            tmp_path = _scratch_path(output_path)
+            try:
+                await produce(tmp_path)
+                stored = await asyncio.to_thread(self.put, key, tmp_path, suffix)
+                os.replace(tmp_path, output_path)
+            finally:
+                tmp_path.unlink(missing_ok=True)
+            return stored or output_path, False
+
+        (path, hit), shared = await get_flight().do(
+            f"artifact:{key}{suffix}", create, cross_process=self.enabled
+        )
+        if path != output_path:
+            temp_manager.link_file(path, output_path)
+        return hit or shared
+
+    def _evict(self) -> None:
+        """按 LRU 淘汰条目直至不超过容量上限"""
+        entries: list[tuple[float, int, Path]] = []
+        total = 0
+        for path in self.root.iterdir():
+            if path.name.startswith("."):
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        """命中统计"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "max_bytes": self.max_bytes,
+        }
+
+
+# =============================================================================
+#  全局实例
+# =============================================================================
+
+_cache: ArtifactCache | None = None
+
+
+def get_cache() -> ArtifactCache:
+    """获取进程内共享的渲染缓存（目录位于临时会话根目录下）"""
+    global _cache
+    if _cache is None:
+        _cache = ArtifactCache(
+            temp_manager.BASE_DIR / ".artifacts",
+            DEFAULT_MAX_MB * 1024 * 1024,
+        )
+    return _cache
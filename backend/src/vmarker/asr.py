@@ -1,17 +1,81 @@
 """
-[INPUT]: 依赖 httpx, pathlib, models, parser
-[OUTPUT]: 对外提供 ASRConfig, transcribe_video()
-[POS]: ASR 语音识别模块，支持 OpenAI Whisper API 及兼容服务
+[INPUT]: 依赖 httpx, asyncio, os, re, shutil, uuid, pathlib, models, parser, http_pool, executor,
+         resilience
+[OUTPUT]: 对外提供 ASRConfig, transcribe_video(), transcribe_to_srt(), transcribe_file(),
+          extract_audio(), detect_silences(), plan_chunks(), stitch_srt()
+[POS]: ASR 语音识别模块，支持 OpenAI Whisper API 及兼容服务；
+       上传前用 FFmpeg 提取单声道 16 kHz 低码率音频，上传体积比原视频小一到两个数量级；
+       长音频在静音处切分为有限长度的分片并发转录，再按时间偏移拼接；上传失败按退避策略重试
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
-from dataclasses import dataclass
+import asyncio
+import os
+import re
+import shutil
+import uuid
+from dataclasses import dataclass, field
 from pathlib import Path
 
 import httpx
 
+from vmarker import http_pool, resilience
+from vmarker.executor import run_process
 from vmarker.models import SubtitleFile
-from vmarker.parser import parse_srt
+from vmarker.parser import format_srt, parse_srt
+
+
+# =============================================================================
+#  辅助函数
+# =============================================================================
+
+
+def _parse_int_env(key: str, default: int) -> int:
+    """安全解析非负整数环境变量"""
+    value = os.getenv(key)
+    if value is None:
+        return default
+    try:
+        parsed = int(value)
+        return parsed if parsed >= 0 else default
+    except ValueError:
+        return default
+
+
+# =============================================================================
+#  音频格式
+# =============================================================================
+
+# 格式名 -> (文件后缀, FFmpeg 编码参数)
+AUDIO_FORMATS: dict[str, tuple[str, list[str]]] = {
+    "mp3": (".mp3", ["-c:a", "libmp3lame", "-b:a", "32k"]),
+    "opus": (".ogg", ["-c:a", "libopus", "-b:a", "24k", "-application", "voip"]),
+}
+AUDIO_SAMPLE_RATE = 16000  # Whisper 内部按 16 kHz 处理，更高采样率不提升识别效果
+
+
+def _parse_format_env(key: str, default: str) -> str:
+    """解析音频格式环境变量，none 表示直接上传原文件，无效值回退默认"""
+    value = os.getenv(key, default).strip().lower()
+    return value if value in AUDIO_FORMATS or value == "none" else default
+
+
+DEFAULT_AUDIO_FORMAT = _parse_format_env("ASR_AUDIO_FORMAT", "mp3")
+
+
+# =============================================================================
+#  分片配置
+# =============================================================================
+
+DEFAULT_CHUNK_SECONDS = _parse_int_env("ASR_CHUNK_SECONDS", 600)  # 分片时长上限，0 表示不分片
+DEFAULT_CONCURRENCY = max(1, _parse_int_env("ASR_CONCURRENCY", 4))  # 同时转录的分片数
+MIN_CHUNK_RATIO = 0.5  # 切分点只在分片后半段内寻找静音，避免过短的分片
+SILENCE_NOISE_DB = -35  # 低于此音量视为静音
+SILENCE_MIN_SECONDS = 0.4  # 静音至少持续此时长才可作为切分点
+
+_DURATION_RE = re.compile(r"Duration: (\d+):(\d{2}):(\d{2}(?:\.\d+)?)")
+_SILENCE_START_RE = re.compile(r"silence_start: (-?\d+(?:\.\d+)?)")
+_SILENCE_END_RE = re.compile(r"silence_end: (-?\d+(?:\.\d+)?)")
 
 
 # =============================================================================
@@ -28,6 +92,11 @@ class ASRConfig:
     model: str = "whisper-1"
     language: str = "zh"
     timeout: float = 300.0  # 5 分钟超时，ASR 处理较慢
+    audio_format: str = DEFAULT_AUDIO_FORMAT  # 上传前提取的音频格式，"none" 直接上传原文件
+    chunk_seconds: int = DEFAULT_CHUNK_SECONDS  # 音频分片时长上限，0 表示整段上传
+    concurrency: int = DEFAULT_CONCURRENCY  # 同时转录的分片数
+    # 每次上传的重试策略（429、5xx 与网络错误），默认读取 AI_MAX_RETRIES 等环境变量
+    retry: resilience.RetryPolicy = field(default_factory=resilience.RetryPolicy)
 
 
 # =============================================================================
@@ -35,16 +104,20 @@ class ASRConfig:
 # =============================================================================
 
 
-async def transcribe_video(video_path: Path, config: ASRConfig) -> SubtitleFile:
+async def transcribe_video(
+    video_path: Path,
+    config: ASRConfig,
+    pool: http_pool.HTTPPool | None = None,
+) -> SubtitleFile:
     """
     使用 Whisper API 转录视频文件
 
-    Whisper API 直接支持常见视频格式（mp4, webm, mov 等），
-    无需提取音频。
+    视频先提取为紧凑音频再上传（见 transcribe_to_srt()）。
 
     Args:
         video_path: 视频文件路径
         config: ASR 配置
+        pool: 连接池（可选，默认使用应用级连接池）
 
     Returns:
         SubtitleFile 实例
@@ -54,42 +127,28 @@ async def transcribe_video(video_path: Path, config: ASRConfig) -> SubtitleFile:
         httpx.HTTPStatusError: API 请求失败
         ValueError: 响应解析失败
     """
-    if not video_path.exists():
-        raise FileNotFoundError(f"视频文件不存在: {video_path}")
-
-    url = f"{config.api_base.rstrip('/')}/audio/transcriptions"
-
-    async with httpx.AsyncClient(timeout=config.timeout) as client:
-        with open(video_path, "rb") as f:
-            # 构建 multipart form data
-            files = {"file": (video_path.name, f, _get_mime_type(video_path))}
-            data = {
-                "model": config.model,
-                "language": config.language,
-                "response_format": "srt",
-            }
-
-            response = await client.post(
-                url,
-                headers={"Authorization": f"Bearer {config.api_key}"},
-                files=files,
-                data=data,
-            )
-
-        response.raise_for_status()
-        srt_content = response.text
+    srt_content = await transcribe_to_srt(video_path, config, pool)
 
     # 复用现有 SRT 解析器
     return parse_srt(srt_content)
 
 
-async def transcribe_to_srt(video_path: Path, config: ASRConfig) -> str:
+async def transcribe_to_srt(
+    video_path: Path,
+    config: ASRConfig,
+    pool: http_pool.HTTPPool | None = None,
+) -> str:
     """
     转录视频并返回 SRT 字符串
 
+    非音频文件先按 config.audio_format 提取音频（写在源文件旁，再次转录时复用），
+    只上传音频。音频超过 config.chunk_seconds 时在静音处切分，
+    分片并发转录（最多 config.concurrency 个），结果按分片起点偏移时间并重新编号。
+
     Args:
         video_path: 视频文件路径
         config: ASR 配置
+        pool: 连接池（可选，默认使用应用级连接池）
 
     Returns:
         SRT 格式字符串
@@ -97,28 +156,256 @@ async def transcribe_to_srt(video_path: Path, config: ASRConfig) -> str:
     if not video_path.exists():
         raise FileNotFoundError(f"视频文件不存在: {video_path}")
 
+    upload_path = video_path
+    if config.audio_format != "none" and not _get_mime_type(video_path).startswith("audio/"):
+        upload_path = await extract_audio(video_path, config.audio_format)
+
+    # 只切分音频（视频容器无法按任意时间点无损切分）
+    if config.chunk_seconds <= 0 or not _get_mime_type(upload_path).startswith("audio/"):
+        return await transcribe_file(upload_path, config, pool)
+
+    duration, silences = await detect_silences(upload_path)
+    chunks = plan_chunks(duration, silences, config.chunk_seconds)
+    if len(chunks) <= 1:
+        return await transcribe_file(upload_path, config, pool)
+    return await _transcribe_chunks(upload_path, chunks, config, pool)
+
+
+async def _transcribe_chunks(
+    audio_path: Path,
+    chunks: list[tuple[float, float]],
+    config: ASRConfig,
+    pool: http_pool.HTTPPool | None,
+) -> str:
+    """切分并发转录各分片，任一分片失败时取消其余分片"""
+    work_dir = audio_path.parent / f".{audio_path.stem}.chunks-{uuid.uuid4().hex[:8]}"
+    work_dir.mkdir()
+    semaphore = asyncio.Semaphore(max(1, config.concurrency))
+    parts = [""] * len(chunks)
+
+    async def run(i: int, start: float, end: float) -> None:
+        async with semaphore:
+            chunk_path = work_dir / f"{i:04d}{audio_path.suffix}"
+            await _cut_chunk(audio_path, start, end, chunk_path)
+            parts[i] = await transcribe_file(chunk_path, config, pool)
+            chunk_path.unlink(missing_ok=True)
+
+    try:
+        async with asyncio.TaskGroup() as group:
+            for i, (start, end) in enumerate(chunks):
+                group.create_task(run(i, start, end))
+    except ExceptionGroup as eg:
+        raise eg.exceptions[0] from None
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return stitch_srt(parts, [start for start, _ in chunks])
+
+
+async def transcribe_file(
+    path: Path, config: ASRConfig, pool: http_pool.HTTPPool | None = None
+) -> str:
+    """
+    上传单个文件转录（不提取、不切分），返回 SRT 字符串
+
+    429、5xx 和网络错误按 config.retry 重试，每次重试重新读取文件；
+    转录接口使用独立的熔断器，不影响同一服务商的 AI 对话请求。
+    """
     url = f"{config.api_base.rstrip('/')}/audio/transcriptions"
+    data = {
+        "model": config.model,
+        "language": config.language,
+        "response_format": "srt",
+    }
 
-    async with httpx.AsyncClient(timeout=config.timeout) as client:
-        with open(video_path, "rb") as f:
-            files = {"file": (video_path.name, f, _get_mime_type(video_path))}
-            data = {
-                "model": config.model,
-                "language": config.language,
-                "response_format": "srt",
-            }
-
-            response = await client.post(
-                url,
-                headers={"Authorization": f"Bearer {config.api_key}"},
-                files=files,
-                data=data,
-            )
-
-        response.raise_for_status()
+    async with http_pool.client_for(url, pool) as client:
+
+        async def post() -> httpx.Response:
+            with open(path, "rb") as f:
+                # 构建 multipart form data
+                files = {"file": (path.name, f, _get_mime_type(path))}
+                response = await client.post(
+                    url,
+                    headers={"Authorization": f"Bearer {config.api_key}"},
+                    files=files,
+                    data=data,
+                    timeout=http_pool.timeout_for("asr", config.timeout),
+                )
+            response.raise_for_status()
+            return response
+
+        response = await resilience.call_with_retry(
+            post, breaker=resilience.get_breaker(url), policy=config.retry
+        )
         return response.text
 
 
+async def extract_audio(media_path: Path, audio_format: str = DEFAULT_AUDIO_FORMAT) -> Path:
+    """
+    提取单声道 16 kHz 低码率音频
+
+    输出为源文件旁的 "<stem>.asr<后缀>"（在会话目录内，随会话清理）；
+    已提取且不早于源文件时直接复用。
+
+    Args:
+        media_path: 视频或音频文件
+        audio_format: AUDIO_FORMATS 中的格式名
+
+    Returns:
+        音频文件路径
+
+    Raises:
+        RuntimeError: FFmpeg 执行失败（如源文件没有音轨）
+    """
+    suffix, codec_args = AUDIO_FORMATS[audio_format]
+    output_path = media_path.with_name(f"{media_path.stem}.asr{suffix}")
+    if output_path.exists() and output_path.stat().st_mtime >= media_path.stat().st_mtime:
+        return output_path
+
+    # 先写临时文件再改名，中途失败不会留下不完整的音频（后缀保留供 FFmpeg 推断封装格式）
+    tmp_path = output_path.with_name(f".{output_path.stem}.{uuid.uuid4().hex[:8]}{suffix}")
+    cmd = [
+        "ffmpeg", "-y",
+        "-i", str(media_path),
+        "-map", "0:a:0",  # 只取第一条音轨
+        "-vn", "-sn", "-dn",
+        "-ac", "1",
+        "-ar", str(AUDIO_SAMPLE_RATE),
+        *codec_args,
+        str(tmp_path),
+    ]
+    result = await run_process(cmd)
+
+    if result.returncode != 0:
+        tmp_path.unlink(missing_ok=True)
+        raise RuntimeError(f"FFmpeg 音频提取失败: {result.stderr[-500:]}")
+
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+# =============================================================================
+#  分片
+# =============================================================================
+
+
+async def detect_silences(audio_path: Path) -> tuple[float, list[tuple[float, float]]]:
+    """
+    用 FFmpeg silencedetect 检测静音区间
+
+    Returns:
+        (音频时长, [(静音开始, 静音结束), ...])；时长未知时为 0
+
+    Raises:
+        RuntimeError: FFmpeg 执行失败
+    """
+    cmd = [
+        "ffmpeg", "-hide_banner", "-nostats",
+        "-i", str(audio_path),
+        "-af", f"silencedetect=noise={SILENCE_NOISE_DB}dB:d={SILENCE_MIN_SECONDS}",
+        "-f", "null", "-",
+    ]
+    result = await run_process(cmd)
+
+    if result.returncode != 0:
+        raise RuntimeError(f"FFmpeg 静音检测失败: {result.stderr[-500:]}")
+
+    return _parse_silencedetect(result.stderr)
+
+
+def _parse_silencedetect(stderr: str) -> tuple[float, list[tuple[float, float]]]:
+    """解析 silencedetect 输出；末尾未结束的静音延续到音频结尾"""
+    duration = 0.0
+    match = _DURATION_RE.search(stderr)
+    if match:
+        hours, minutes, seconds = match.groups()
+        duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+    silences: list[tuple[float, float]] = []
+    start: float | None = None
+    for line in stderr.splitlines():
+        if (m := _SILENCE_START_RE.search(line)) is not None:
+            start = max(0.0, float(m.group(1)))
+        elif (m := _SILENCE_END_RE.search(line)) is not None and start is not None:
+            silences.append((start, float(m.group(1))))
+            start = None
+
+    if start is not None and duration > start:
+        silences.append((start, duration))
+    return duration, silences
+
+
+def plan_chunks(
+    duration: float,
+    silences: list[tuple[float, float]],
+    max_seconds: float,
+) -> list[tuple[float, float]]:
+    """
+    规划分片：每片不超过 max_seconds，尽量在静音中点切分
+
+    切分点取分片后半段内最靠后的静音中点；该范围内没有静音时在上限处硬切。
+
+    Returns:
+        [(开始秒, 结束秒), ...]，首尾相接覆盖整段音频
+    """
+    if max_seconds <= 0 or duration <= max_seconds:
+        return [(0.0, duration)]
+
+    cut_points = sorted((start + end) / 2 for start, end in silences)
+    chunks: list[tuple[float, float]] = []
+    start = 0.0
+
+    while duration - start > max_seconds:
+        limit = start + max_seconds
+        candidates = [c for c in cut_points if start + max_seconds * MIN_CHUNK_RATIO <= c <= limit]
+        cut = candidates[-1] if candidates else limit
+        chunks.append((start, cut))
+        start = cut
+
+    chunks.append((start, duration))
+    return chunks
+
+
+async def _cut_chunk(audio_path: Path, start: float, end: float, output_path: Path) -> Path:
+    """按时间截取音频分片（流复制，不重新编码）"""
+    cmd = [
+        "ffmpeg", "-y",
+        "-ss", f"{start:.3f}",
+        "-t", f"{end - start:.3f}",
+        "-i", str(audio_path),
+        "-c", "copy",
+        str(output_path),
+    ]
+    result = await run_process(cmd)
+
+    if result.returncode != 0:
+        raise RuntimeError(f"FFmpeg 音频切分失败: {result.stderr[-500:]}")
+
+    return output_path
+
+
+def stitch_srt(parts: list[str], offsets: list[float]) -> str:
+    """
+    拼接各分片的 SRT：时间加上分片起点，序号从 1 重新编号
+
+    Args:
+        parts: 各分片的 SRT 字符串（可为空）
+        offsets: 各分片在原音频中的起点（秒）
+
+    Returns:
+        SRT 格式字符串
+    """
+    subtitles = []
+    for part, offset in zip(parts, offsets):
+        for sub in parse_srt(part).subtitles:
+            subtitles.append(sub.model_copy(update={
+                "index": len(subtitles) + 1,
+                "start_time": sub.start_time + offset,
+                "end_time": sub.end_time + offset,
+            }))
+    return format_srt(subtitles)
+
+
 # =============================================================================
 #  辅助函数
 # =============================================================================
@@ -136,5 +423,6 @@ def _get_mime_type(path: Path) -> str:
         ".wav": "audio/wav",
         ".m4a": "audio/mp4",
         ".flac": "audio/flac",
+        ".ogg": "audio/ogg",
     }
     return mime_map.get(path.suffix.lower(), "application/octet-stream")
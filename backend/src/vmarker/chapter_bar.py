@@ -1,16 +1,22 @@
 """
-[INPUT]: 依赖 models, themes, ai_client, video_encoder, Pillow
-[OUTPUT]: 对外提供 extract_auto(), extract_ai(), validate(), generate()
+[INPUT]: 依赖 models, themes, analysis, lexical, video_encoder, artifact_cache, Pillow, asyncio, os
+[OUTPUT]: 对外提供 extract_auto(), extract_lexical(), extract_ai(), extract_ai_stream(),
+          extract_budgeted(), BudgetedChapters, validate(), generate(), cache_key()
 [POS]: 章节进度条完整流程，是 Chapter Bar 功能的核心实现
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
+import asyncio
+import os
 import re
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
 from pathlib import Path
 
 from PIL import Image, ImageDraw
 
-from vmarker.ai_client import AIClient, AIConfig
+from vmarker import analysis, lexical
+from vmarker.artifact_cache import canonical_key
 from vmarker.models import (
     Chapter,
     ChapterBarConfig,
@@ -23,6 +29,7 @@ from vmarker.models import (
 )
 from vmarker.themes import get_theme
 from vmarker.video_encoder import (
+    ENCODE_ARGS,
     ProgressCallback,
     VideoEncoder,
     get_font,
@@ -30,6 +37,30 @@ from vmarker.video_encoder import (
 )
 
 
+# =============================================================================
+#  辅助函数
+# =============================================================================
+
+def _parse_float_env(key: str, default: float) -> float:
+    """安全解析非负浮点数环境变量"""
+    value = os.getenv(key)
+    if value is None:
+        return default
+    try:
+        parsed = float(value)
+        return parsed if parsed >= 0 else default
+    except ValueError:
+        return default
+
+
+# =============================================================================
+#  环境变量配置
+# =============================================================================
+
+# AI 分段等待预算，0 表示一直等待
+DEFAULT_AI_BUDGET = _parse_float_env("AI_CHAPTER_BUDGET_SECONDS", 10.0)
+
+
 # =============================================================================
 #  章节提取 - 自动分段
 # =============================================================================
@@ -77,24 +108,31 @@ def _extract_title(subs: list[Subtitle], start: float, end: float) -> str:
 
 
 # =============================================================================
-#  章节提取 - AI 智能分段
+#  章节提取 - 词汇衔接分段
 # =============================================================================
 
-_AI_PROMPT = """你是视频章节分析专家。分析以下字幕，将视频划分为 5-10 个章节。
-
-要求：
-1. 识别主题变化点
-2. 标题简洁有意义（不超过15字）
-3. 时间连续，覆盖整个视频
+def extract_lexical(
+    subtitles: list[Subtitle],
+    duration: float,
+    chapters: int | None = None,
+) -> ChapterList:
+    """
+    按字幕词汇变化划分章节（离线，无需 AI）
 
-视频总时长: {duration:.1f} 秒
+    Args:
+        subtitles: 字幕列表
+        duration: 视频总时长
+        chapters: 章节数上限（可选，默认按时长估算）
 
-字幕:
-{subtitles}
+    Returns:
+        ChapterList 实例
+    """
+    return lexical.segment(subtitles, duration, chapters=chapters)
 
-返回 JSON 格式（不要其他内容）:
-{{"chapters": [{{"title": "标题", "start_time": 0.0, "end_time": 120.0}}, ...]}}"""
 
+# =============================================================================
+#  章节提取 - AI 智能分段
+# =============================================================================
 
 async def extract_ai(
     subtitles: list[Subtitle],
@@ -107,6 +145,9 @@ async def extract_ai(
     """
     使用 AI 智能划分章节
 
+    取 analysis.analyze() 结果中的章节；与大纲生成共用同一请求和缓存，
+    同一字幕再生成大纲时不再请求 AI。
+
     Args:
         subtitles: 字幕列表
         duration: 视频总时长
@@ -117,27 +158,100 @@ async def extract_ai(
     Returns:
         ChapterList 实例
     """
-    # 构建字幕文本
-    sub_text = "\n".join(f"[{s.start_time:.1f}s] {s.text}" for s in subtitles)
-    if len(sub_text) > 15000:
-        sub_text = sub_text[:15000] + "\n...(已截断)"
-
-    prompt = _AI_PROMPT.format(duration=duration, subtitles=sub_text)
-
-    config = AIConfig(api_key=api_key, api_base=api_base, model=model)
-    async with AIClient(config) as client:
-        data = await client.chat_json(prompt)
-
-    chapters = [
-        Chapter(
-            title=str(c.get("title", "未命名")),
-            start_time=float(c.get("start_time", 0)),
-            end_time=float(c.get("end_time", duration)),
-        )
-        for c in data.get("chapters", [])
-    ]
+    result = await analysis.analyze(
+        subtitles, duration, api_key=api_key, api_base=api_base, model=model
+    )
+    return result.chapters
+
+
+async def extract_ai_stream(
+    subtitles: list[Subtitle],
+    duration: float,
+    *,
+    api_key: str,
+    api_base: str = "https://api.openai.com/v1",
+    model: str = "gpt-4o-mini",
+) -> AsyncIterator[Chapter]:
+    """
+    使用 AI 智能划分章节（流式版本）
+
+    参数同 extract_ai()，每个章节在模型输出中闭合后立即产出。
+    长字幕的窗口分析阶段不产出，合并阶段开始后逐个产出。
+
+    Yields:
+        Chapter 实例
+    """
+    async for item in analysis.analyze_stream(
+        subtitles, duration, api_key=api_key, api_base=api_base, model=model
+    ):
+        if isinstance(item, Chapter):
+            yield item
 
-    return ChapterList(chapters=chapters, duration=duration)
+
+@dataclass
+class BudgetedChapters:
+    """限时分段结果"""
+    chapters: ChapterList
+    source: str  # "ai" / "lexical"
+    pending: "asyncio.Task[ChapterList] | None" = None  # 超出预算仍在进行的 AI 分段
+    error: BaseException | None = None  # AI 分段失败的原因
+
+
+async def extract_budgeted(
+    subtitles: list[Subtitle],
+    duration: float,
+    *,
+    api_key: str,
+    api_base: str = "https://api.openai.com/v1",
+    model: str = "gpt-4o-mini",
+    budget: float = DEFAULT_AI_BUDGET,
+) -> BudgetedChapters:
+    """
+    限时 AI 分段：AI 与本地词汇分段同时开始
+
+    AI 在预算内返回则使用 AI 结果；超出预算返回本地结果，
+    AI 分段继续进行并通过 pending 交给调用方后续获取；AI 失败时返回本地结果。
+
+    Args:
+        subtitles: 字幕列表
+        duration: 视频总时长
+        api_key: API Key
+        api_base: API 基础 URL
+        model: 模型名称
+        budget: 等待 AI 的时间（秒），0 表示一直等待
+
+    Returns:
+        BudgetedChapters 实例
+    """
+    ai_task = asyncio.create_task(
+        extract_ai(subtitles, duration, api_key=api_key, api_base=api_base, model=model)
+    )
+    local_task = asyncio.create_task(asyncio.to_thread(extract_lexical, subtitles, duration))
+    # 不再需要本地结果时，其异常在回调中取出，避免 "exception was never retrieved"
+    local_task.add_done_callback(_consume_exception)
+
+    try:
+        await asyncio.wait({ai_task}, timeout=budget or None)
+        if ai_task.done() and not ai_task.cancelled() and ai_task.exception() is None:
+            local_task.cancel()
+            return BudgetedChapters(chapters=ai_task.result(), source="ai")
+
+        local = await local_task
+    except asyncio.CancelledError:
+        ai_task.cancel()
+        local_task.cancel()
+        raise
+
+    if ai_task.cancelled():
+        return BudgetedChapters(chapters=local, source="lexical", error=asyncio.CancelledError())
+    if ai_task.done():
+        return BudgetedChapters(chapters=local, source="lexical", error=ai_task.exception())
+    return BudgetedChapters(chapters=local, source="lexical", pending=ai_task)
+
+
+def _consume_exception(task: asyncio.Task) -> None:
+    if not task.cancelled():
+        task.exception()
 
 
 # =============================================================================
@@ -300,6 +414,25 @@ def generate(
     )
 
 
+def cache_key(
+    config: ChapterBarConfig,
+    *,
+    format: str = "mp4",
+    scheme: ColorScheme | None = None,
+    key_frame_interval: float | None = None,
+) -> str:
+    """
+    计算渲染缓存键
+
+    参数与 generate() 一致，相同的键保证生成相同的视频。
+    """
+    if scheme is None:
+        scheme = get_theme(config.theme)
+    return canonical_key(
+        "chapter-bar", config, scheme, format, key_frame_interval, ENCODE_ARGS.get(format)
+    )
+
+
 def _render_frame(
     chapters: list[Chapter],
     duration: float,
@@ -1,11 +1,12 @@
 """
-[INPUT]: 依赖 typer, rich, dotenv, chapter_bar, parser, themes
+[INPUT]: 依赖 typer, rich, dotenv, chapter_bar, parser, themes, youtube_batch
 [OUTPUT]: 对外提供 app (通用入口), acb_app (Chapter Bar 专用入口)
 [POS]: CLI 入口点，提供命令行界面
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
 import asyncio
+import json
 from enum import Enum
 from pathlib import Path
 from typing import Annotated, Optional
@@ -35,6 +36,7 @@ console = Console()
 
 class SegmentMode(str, Enum):
     auto = "auto"
+    lexical = "lexical"
     ai = "ai"
 
 
@@ -121,6 +123,8 @@ def _run_chapter_bar(
             except Exception as e:
                 console.print(f"[yellow]AI 失败，降级为自动分段: {e}[/yellow]")
                 chapters = cb.extract_auto(srt.subtitles, srt.duration, interval)
+    elif mode == SegmentMode.lexical:
+        chapters = cb.extract_lexical(srt.subtitles, srt.duration)
     else:
         chapters = cb.extract_auto(srt.subtitles, srt.duration, interval)
 
@@ -282,6 +286,113 @@ def cmd_chapter(
     )
 
 
+@app.command("youtube-batch")
+def cmd_youtube_batch(
+    urls: Annotated[list[str] | None, typer.Argument(help="YouTube 链接")] = None,
+    input_file: Annotated[
+        Path | None,
+        typer.Option("-f", "--file", exists=True, help="链接列表文件（每行一个，# 开头为注释）"),
+    ] = None,
+    output: Annotated[
+        Path | None, typer.Option("-o", "--output", help="结果写入 JSON Lines 文件")
+    ] = None,
+    fetch_concurrency: Annotated[
+        int | None,
+        typer.Option(
+            "--fetch-concurrency", min=1, max=32,
+            help="同时获取字幕的视频数（默认读取 YOUTUBE_BATCH_FETCH_CONCURRENCY）",
+        ),
+    ] = None,
+    ai_concurrency: Annotated[
+        int | None,
+        typer.Option(
+            "--ai-concurrency", min=1, max=32,
+            help="同时进行 AI 分段的视频数（默认读取 YOUTUBE_BATCH_AI_CONCURRENCY）",
+        ),
+    ] = None,
+    fetch_rpm: Annotated[
+        float | None,
+        typer.Option(
+            "--fetch-rpm", min=0,
+            help="每分钟字幕请求上限，0 表示不限流（默认读取 YOUTUBE_TRANSCRIPT_RPM）",
+        ),
+    ] = None,
+    api_key: Annotated[str | None, typer.Option("--api-key", envvar="API_KEY")] = None,
+    api_base: Annotated[
+        str, typer.Option("--api-base", envvar="API_BASE")
+    ] = "https://api.openai.com/v1",
+    model: Annotated[str, typer.Option("--model", envvar="API_MODEL")] = "gpt-4o-mini",
+) -> None:
+    """批量从 YouTube 链接生成章节（字幕提取方式）"""
+    # 模块级配置读取环境变量，在命令内导入以确保 load_dotenv 已执行
+    from vmarker import youtube_batch as yb
+
+    if fetch_concurrency is None:
+        fetch_concurrency = yb.DEFAULT_FETCH_CONCURRENCY
+    if ai_concurrency is None:
+        ai_concurrency = yb.DEFAULT_AI_CONCURRENCY
+    if fetch_rpm is None:
+        fetch_rpm = yb.DEFAULT_FETCH_RPM
+
+    all_urls = list(urls or [])
+    if input_file is not None:
+        lines = input_file.read_text(encoding="utf-8").splitlines()
+        all_urls += [line.strip() for line in lines if line.strip() and not line.startswith("#")]
+
+    if not all_urls:
+        console.print("[red]错误: 请提供链接或 --file[/red]")
+        raise typer.Exit(1)
+    if not api_key:
+        console.print("[red]错误: 需要 --api-key 或 API_KEY 环境变量[/red]")
+        raise typer.Exit(1)
+
+    console.print(
+        f"\n[bold]vmarker v{__version__}[/bold] - YouTube 批量章节 ({len(all_urls)} 个链接)\n"
+    )
+
+    async def run() -> int:
+        failed = 0
+        out = output.open("w", encoding="utf-8") if output else None
+        try:
+            async for item in yb.generate_chapters_batch(
+                all_urls,
+                api_key=api_key,
+                api_base=api_base,
+                model=model,
+                fetch_concurrency=fetch_concurrency,
+                ai_concurrency=ai_concurrency,
+                fetch_rpm=fetch_rpm,
+            ):
+                record = {"index": item.index, "url": item.url}
+                if item.error is not None:
+                    failed += 1
+                    record["error"] = item.error
+                    console.print(f"[red]✗ [{item.index + 1}] {item.url}: {item.error}[/red]")
+                else:
+                    chapters = item.chapters.chapters
+                    record["duration"] = item.info.duration
+                    record["chapters"] = [ch.model_dump() for ch in chapters]
+                    record["youtube_format"] = yb.format_youtube_chapters(chapters)
+                    console.print(
+                        f"[green]✓ [{item.index + 1}] {item.url}[/green] {len(chapters)} 个章节"
+                    )
+                    console.print(record["youtube_format"], markup=False)
+                if out is not None:
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    out.flush()
+        finally:
+            if out is not None:
+                out.close()
+        return failed
+
+    failed = asyncio.run(run())
+    console.print(f"\n完成: {len(all_urls) - failed} 成功, {failed} 失败")
+    if output:
+        console.print(f"结果: {output}")
+    if failed:
+        raise typer.Exit(1)
+
+
 @app.command("themes")
 def cmd_themes() -> None:
     """列出配色方案"""
@@ -0,0 +1,168 @@
+"""
+[INPUT]: 依赖 asyncio, concurrent.futures, multiprocessing, functools, os
+[OUTPUT]: 对外提供 ProcessResult, run_process(), run_cpu(), run_io(), shutdown()
+[POS]: 异步执行层，子进程 (FFmpeg/FFprobe) 以 asyncio 方式等待，Python 帧渲染放入有界进程池，
+       同步网络调用（如 YouTube 字幕获取）放入有界线程池，API 事件循环不被阻塞
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+import functools
+import multiprocessing
+import os
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+
+# =============================================================================
+#  辅助函数
+# =============================================================================
+
+
+def _parse_int_env(key: str, default: int) -> int:
+    """安全解析正整数环境变量"""
+    value = os.getenv(key)
+    if value is None:
+        return default
+    try:
+        parsed = int(value)
+        return parsed if parsed > 0 else default
+    except ValueError:
+        return default
+
+
+# =============================================================================
+#  环境变量配置
+# =============================================================================
+
+DEFAULT_RENDER_WORKERS = _parse_int_env(
+    "RENDER_MAX_WORKERS", max(1, (os.cpu_count() or 2) // 2)
+)  # 帧渲染进程池大小
+DEFAULT_IO_WORKERS = _parse_int_env("IO_MAX_WORKERS", 8)  # 同步 I/O 线程池大小
+
+
+# =============================================================================
+#  子进程
+# =============================================================================
+
+
+@dataclass
+class ProcessResult:
+    """子进程执行结果"""
+
+    returncode: int
+    stdout: str
+    stderr: str
+
+
+async def run_process(cmd: list[str]) -> ProcessResult:
+    """
+    异步执行子进程并收集输出
+
+    等待期间不占用事件循环；调用方被取消（如客户端断开）时终止子进程。
+
+    Args:
+        cmd: 命令及参数
+
+    Returns:
+        ProcessResult 实例
+    """
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await process.communicate()
+    except asyncio.CancelledError:
+        process.kill()
+        await process.wait()
+        raise
+
+    return ProcessResult(
+        returncode=process.returncode,
+        stdout=stdout.decode("utf-8", errors="replace"),
+        stderr=stderr.decode("utf-8", errors="replace"),
+    )
+
+
+# =============================================================================
+#  进程池
+# =============================================================================
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """懒加载渲染进程池（spawn 模式，避免 fork 继承事件循环和线程状态）"""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=DEFAULT_RENDER_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+async def run_cpu[T](fn: Callable[..., T], *args, **kwargs) -> T:
+    """
+    在渲染进程池中执行 CPU 密集型函数
+
+    fn 及参数需可 pickle（模块级函数、pydantic 模型、Path 等）。
+
+    Args:
+        fn: 要执行的函数
+        *args: 位置参数
+        **kwargs: 关键字参数
+
+    Returns:
+        函数返回值
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_pool(), functools.partial(fn, *args, **kwargs))
+
+
+# =============================================================================
+#  线程池
+# =============================================================================
+
+_io_pool: ThreadPoolExecutor | None = None
+
+
+def _get_io_pool() -> ThreadPoolExecutor:
+    """懒加载 I/O 线程池"""
+    global _io_pool
+    if _io_pool is None:
+        _io_pool = ThreadPoolExecutor(
+            max_workers=DEFAULT_IO_WORKERS, thread_name_prefix="vmarker-io"
+        )
+    return _io_pool
+
+
+async def run_io[T](fn: Callable[..., T], *args, **kwargs) -> T:
+    """
+    在有界线程池中执行阻塞的同步 I/O 函数
+
+    与 asyncio.to_thread 不同，线程数有上限，大量并发请求不会耗尽默认线程池。
+
+    Args:
+        fn: 要执行的函数
+        *args: 位置参数
+        **kwargs: 关键字参数
+
+    Returns:
+        函数返回值
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_io_pool(), functools.partial(fn, *args, **kwargs))
+
+
+def shutdown() -> None:
+    """关闭进程池与线程池（应用退出时调用）"""
+    global _pool, _io_pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+    if _io_pool is not None:
+        _io_pool.shutdown(wait=False, cancel_futures=True)
+        _io_pool = None
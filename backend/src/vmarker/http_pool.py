@@ -0,0 +1,180 @@
+"""
+[INPUT]: 依赖 httpx, os, contextlib, importlib, urllib
+[OUTPUT]: 对外提供 HTTPPool, timeout_for(), init_pool(), close_pool(), get_pool(), client_for()
+[POS]: 应用级 HTTP 连接池，按源站 (scheme://host:port) 复用长连接，被 ai_client 和 asr 消费
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import importlib.util
+import os
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+import httpx
+
+# =============================================================================
+#  辅助函数
+# =============================================================================
+
+
+def _parse_int_env(key: str, default: int) -> int:
+    """安全解析正整数环境变量"""
+    value = os.getenv(key)
+    if value is None:
+        return default
+    try:
+        parsed = int(value)
+        return parsed if parsed > 0 else default
+    except ValueError:
+        return default
+
+
+def _origin(url: str) -> str:
+    """提取源站标识，作为连接池分组键"""
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    return f"{parts.scheme}://{parts.hostname}:{port}"
+
+
+# =============================================================================
+#  环境变量配置
+# =============================================================================
+
+DEFAULT_MAX_PER_HOST = _parse_int_env("HTTP_MAX_PER_HOST", 16)  # 单个源站的连接上限
+DEFAULT_MAX_KEEPALIVE = _parse_int_env("HTTP_MAX_KEEPALIVE", 8)  # 单个源站保持的空闲连接数
+DEFAULT_KEEPALIVE_EXPIRY = _parse_int_env("HTTP_KEEPALIVE_SECONDS", 60)  # 空闲连接保留时间
+# HTTP/2 需要安装 h2（httpx[http2]），未安装时自动使用 HTTP/1.1
+HTTP2_ENABLED = os.getenv("HTTP2", "1") != "0" and importlib.util.find_spec("h2") is not None
+
+CONNECT_TIMEOUT = 10.0  # 建连超时（秒），所有调用类型共用
+POOL_TIMEOUT = 30.0  # 等待空闲连接的超时（秒）
+
+# 各调用类型的读写超时（秒）
+TIMEOUTS = {
+    "chat": 60.0,
+    "asr": 300.0,
+    "default": 30.0,
+}
+
+
+def timeout_for(kind: str, read: float | None = None) -> httpx.Timeout:
+    """
+    获取调用类型对应的超时设置
+
+    Args:
+        kind: 调用类型 ("chat" / "asr" / "default")
+        read: 覆盖读写超时（秒），如来自 AIConfig.timeout
+
+    Returns:
+        httpx.Timeout 实例
+    """
+    value = read if read is not None else TIMEOUTS.get(kind, TIMEOUTS["default"])
+    return httpx.Timeout(value, connect=CONNECT_TIMEOUT, pool=POOL_TIMEOUT)
+
+
+# =============================================================================
+#  连接池
+# =============================================================================
+
+
+class HTTPPool:
+    """
+    按源站分组的 httpx.AsyncClient 集合
+
+    每个源站一个客户端，连接上限即单源站上限，
+    避免某个慢速服务（如 ASR）占满全部连接。
+    """
+
+    def __init__(
+        self,
+        *,
+        max_per_host: int = DEFAULT_MAX_PER_HOST,
+        max_keepalive: int = DEFAULT_MAX_KEEPALIVE,
+        keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+        http2: bool = HTTP2_ENABLED,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        """
+        初始化连接池
+
+        Args:
+            max_per_host: 单个源站的连接上限
+            max_keepalive: 单个源站保持的空闲连接数
+            keepalive_expiry: 空闲连接保留时间（秒）
+            http2: 是否启用 HTTP/2
+            transport: 自定义传输层（测试或基准时替换为本地替身服务）
+        """
+        self.limits = httpx.Limits(
+            max_connections=max_per_host,
+            max_keepalive_connections=min(max_keepalive, max_per_host),
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2
+        self.transport = transport
+        self._clients: dict[str, httpx.AsyncClient] = {}
+
+    def client(self, url: str) -> httpx.AsyncClient:
+        """获取 url 所属源站的共享客户端"""
+        origin = _origin(url)
+        client = self._clients.get(origin)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=self.limits,
+                http2=self.http2,
+                timeout=timeout_for("default"),
+                transport=self.transport,
+            )
+            self._clients[origin] = client
+        return client
+
+    async def aclose(self) -> None:
+        """关闭全部客户端"""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            await client.aclose()
+
+
+# =============================================================================
+#  全局实例
+# =============================================================================
+
+_pool: HTTPPool | None = None
+
+
+def init_pool(pool: HTTPPool | None = None) -> HTTPPool:
+    """创建应用级连接池（在 FastAPI lifespan 启动时调用）"""
+    global _pool
+    _pool = pool or HTTPPool()
+    return _pool
+
+
+async def close_pool() -> None:
+    """关闭应用级连接池（在 FastAPI lifespan 退出时调用）"""
+    global _pool
+    if _pool is not None:
+        pool, _pool = _pool, None
+        await pool.aclose()
+
+
+def get_pool() -> HTTPPool | None:
+    """获取应用级连接池，未初始化（如 CLI）时返回 None"""
+    return _pool
+
+
+@asynccontextmanager
+async def client_for(url: str, pool: HTTPPool | None = None) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    获取访问 url 的客户端
+
+    优先使用传入或应用级的连接池；都不存在时（CLI 单次调用）
+    创建临时客户端并在退出时关闭。
+    """
+    pool = pool or _pool
+    if pool is not None:
+        yield pool.client(url)
+        return
+
+    async with httpx.AsyncClient(timeout=timeout_for("default")) as client:
+        yield client
@@ -0,0 +1,141 @@
+"""
+[INPUT]: 依赖 json, os, re, time, uuid, pathlib, temp_manager
+[OUTPUT]: 对外提供 JobStore, get_job_store(), HEARTBEAT_INTERVAL
+[POS]: 后台任务状态存储，每个任务一个 JSON 文件（BASE_DIR/.jobs），多个 uvicorn worker 均可查询；
+       记录所属进程与心跳，心跳过期的未完成任务视为失败；被 Chapter Bar 路由的 AI 分段任务消费
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import json
+import os
+import re
+import time
+import uuid
+from pathlib import Path
+
+from vmarker import temp_manager
+
+# =============================================================================
+#  辅助函数
+# =============================================================================
+
+
+def _parse_int_env(key: str, default: int) -> int:
+    """安全解析非负整数环境变量"""
+    value = os.getenv(key)
+    if value is None:
+        return default
+    try:
+        parsed = int(value)
+        return parsed if parsed >= 0 else default
+    except ValueError:
+        return default
+
+
+# =============================================================================
+#  环境变量配置
+# =============================================================================
+
+HEARTBEAT_INTERVAL = 5.0  # 所属进程刷新未完成任务心跳的间隔（秒）
+STALE_AFTER = 30.0  # 心跳超过该时长未刷新时，认为所属进程已退出（秒）
+DEFAULT_TTL_HOURS = _parse_int_env("JOB_TTL_HOURS", 24)  # 任务记录保留时长
+
+_JOB_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+# =============================================================================
+#  任务存储
+# =============================================================================
+
+
+class JobStore:
+    """
+    任务状态存储
+
+    记录为 {"status": ..., ...} 字典，写入时附带所属进程 (owner) 与心跳时间 (heartbeat)；
+    先写临时文件再原子重命名，读取方不会看到写了一半的内容。
+    """
+
+    def __init__(self, root: Path, ttl_seconds: float, stale_after: float = STALE_AFTER):
+        """
+        Args:
+            root: 任务文件目录
+            ttl_seconds: 记录有效期（秒）
+            stale_after: 心跳过期阈值（秒）
+        """
+        self.root = root
+        self.ttl_seconds = ttl_seconds
+        self.stale_after = stale_after
+
+    def _path(self, job_id: str) -> Path | None:
+        return self.root / f"{job_id}.json" if _JOB_ID_RE.match(job_id) else None
+
+    def put(self, job_id: str, record: dict) -> None:
+        """
+        写入任务记录并刷新心跳（由任务所属进程调用）
+
+        Raises:
+            ValueError: 任务 ID 格式非法
+        """
+        path = self._path(job_id)
+        if path is None:
+            raise ValueError(f"无效的任务 ID: {job_id}")
+        self.root.mkdir(parents=True, exist_ok=True)
+        data = {"owner": os.getpid(), "heartbeat": time.time(), "record": record}
+        tmp = path.with_name(f".{job_id}.{uuid.uuid4().hex}.tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def get(self, job_id: str) -> dict | None:
+        """
+        读取任务记录
+
+        Returns:
+            任务记录；不存在或已过期时返回 None。
+            未完成且心跳过期的任务返回 failed 记录
+        """
+        path = self._path(job_id)
+        if path is None:
+            return None
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+        age = time.time() - data["heartbeat"]
+        if age > self.ttl_seconds:
+            return None
+        record = data["record"]
+        if record.get("status") == "pending" and age > self.stale_after:
+            return {"status": "failed", "error": f"任务所在进程 ({data['owner']}) 已停止响应"}
+        return record
+
+    def collect(self) -> int:
+        """删除过期的任务记录，返回删除数量"""
+        if not self.root.exists():
+            return 0
+        removed = 0
+        cutoff = time.time() - self.ttl_seconds
+        for path in self.root.iterdir():
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+
+# =============================================================================
+#  全局实例
+# =============================================================================
+
+_store: JobStore | None = None
+
+
+def get_job_store() -> JobStore:
+    """获取进程内共享的任务存储（目录位于临时会话根目录下）"""
+    global _store
+    if _store is None:
+        _store = JobStore(temp_manager.BASE_DIR / ".jobs", DEFAULT_TTL_HOURS * 3600)
+    return _store
@@ -0,0 +1,307 @@
+"""
+[INPUT]: 依赖 numpy, models, re
+[OUTPUT]: 对外提供 segment(), tokenize(), gap_scores(), depth_scores()
+[POS]: 离线词汇衔接分段（TextTiling），按相邻窗口词汇相似度的低谷划分章节，
+       关键词作为标题；不依赖网络，1 小时字幕毫秒级完成，被 chapter_bar 消费
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import re
+
+import numpy as np
+
+from vmarker.models import Chapter, ChapterList, Subtitle
+
+# =============================================================================
+#  配置
+# =============================================================================
+
+BLOCK_SECONDS = 20.0  # 相邻字幕合并为一个文本块的时间跨度
+WINDOW_BLOCKS = 6  # 比较相似度时每侧的块数
+MIN_CHAPTER_SECONDS = 60.0  # 章节最短时长
+TARGET_CHAPTER_SECONDS = 300.0  # 未指定章节数时，按此时长估算章节数
+MIN_DEPTH_RATIO = 0.2  # 低谷深度不足最深低谷的此比例时视为噪声
+MIN_CHAPTERS = 2
+MAX_CHAPTERS = 12
+TITLE_KEYWORDS = 3  # 标题使用的关键词数
+TITLE_MAX_CHARS = 15
+
+# 常见虚词，含有这些字的二元组不作为特征
+_CJK_STOP_CHARS = set(
+    "的了是我你他她它们这那就也都和与及在有不没很还又再把被给让对从到向以为着过吗呢吧啊呀哦嗯哈"
+    "个么呃但或且"
+)
+_WORD_STOP = {
+    "the", "and", "for", "that", "this", "with", "you", "are", "was", "but", "not", "have",
+    "has", "had", "its", "it's", "they", "them", "their", "there", "what", "when", "which",
+    "will", "would", "can", "could", "just", "like", "about", "from", "into", "your", "our",
+    "we", "so", "of", "to", "in", "on", "is", "be", "as", "at", "or", "an", "if", "do",
+    "don't", "i'm", "we're", "you're", "gonna", "yeah", "okay", "really", "very", "also",
+    "then", "than", "some", "all", "one", "get", "got", "know", "think", "going", "because",
+}
+
+_TOKEN_RE = re.compile(r"[\u3400-\u9fff\uac00-\ud7af]+|[A-Za-z][A-Za-z0-9'+#.-]*")
+_CJK_RE = re.compile(r"[\u3400-\u9fff\uac00-\ud7af]")
+
+
+# =============================================================================
+#  分词
+# =============================================================================
+
+def tokenize(text: str) -> list[str]:
+    """
+    提取词汇特征
+
+    中日韩文本取相邻两字组成的二元组（不依赖分词词典），
+    西文取小写单词；均去掉常见虚词。
+    """
+    tokens: list[str] = []
+    for run in _TOKEN_RE.findall(text):
+        if _CJK_RE.match(run):
+            tokens.extend(
+                run[i:i + 2] for i in range(len(run) - 1)
+                if run[i] not in _CJK_STOP_CHARS and run[i + 1] not in _CJK_STOP_CHARS
+            )
+        else:
+            word = run.lower().rstrip(".-")
+            if len(word) > 2 and word not in _WORD_STOP:
+                tokens.append(word)
+    return tokens
+
+
+# =============================================================================
+#  相似度与深度
+# =============================================================================
+
+def gap_scores(matrix: np.ndarray, window: int = WINDOW_BLOCKS) -> np.ndarray:
+    """
+    计算每个块间隙两侧窗口的余弦相似度
+
+    Args:
+        matrix: (块数, 词表大小) 的加权词频矩阵
+        window: 每侧的块数
+
+    Returns:
+        长度为 块数-1 的相似度数组，第 i 项为块 i 与块 i+1 之间
+    """
+    n = matrix.shape[0]
+    if n < 2:
+        return np.zeros(0)
+
+    cumulative = np.vstack(
+        [np.zeros((1, matrix.shape[1]), matrix.dtype), np.cumsum(matrix, axis=0)]
+    )
+    gaps = np.arange(1, n)
+    left = cumulative[gaps] - cumulative[np.maximum(gaps - window, 0)]
+    right = cumulative[np.minimum(gaps + window, n)] - cumulative[gaps]
+
+    norms = np.linalg.norm(left, axis=1) * np.linalg.norm(right, axis=1)
+    dots = np.einsum("ij,ij->i", left, right)
+    return np.divide(dots, norms, out=np.zeros_like(dots), where=norms > 0)
+
+
+def depth_scores(scores: np.ndarray) -> np.ndarray:
+    """
+    计算每个间隙的深度：向两侧爬升到的最高点与自身相似度之差的和
+
+    深度越大，说明该处相似度低谷越明显，越可能是主题变化点；
+    非局部极小值的深度为 0。
+    """
+    n = len(scores)
+    depths = np.zeros(n)
+    for i in range(n):
+        if (i > 0 and scores[i - 1] < scores[i]) or (i < n - 1 and scores[i + 1] < scores[i]):
+            continue
+        left = i
+        while left > 0 and scores[left - 1] >= scores[left]:
+            left -= 1
+        right = i
+        while right < n - 1 and scores[right + 1] >= scores[right]:
+            right += 1
+        depths[i] = (scores[left] - scores[i]) + (scores[right] - scores[i])
+    return depths
+
+
+def _smooth(scores: np.ndarray, width: int = 3) -> np.ndarray:
+    """滑动平均平滑，减少单块噪声造成的假低谷"""
+    if len(scores) < width:
+        return scores
+    padded = np.pad(scores, width // 2, mode="edge")
+    return np.convolve(padded, np.ones(width) / width, mode="valid")
+
+
+# =============================================================================
+#  分段
+# =============================================================================
+
+def segment(
+    subtitles: list[Subtitle],
+    duration: float,
+    *,
+    chapters: int | None = None,
+    block_seconds: float = BLOCK_SECONDS,
+    window: int = WINDOW_BLOCKS,
+    min_chapter_seconds: float = MIN_CHAPTER_SECONDS,
+) -> ChapterList:
+    """
+    按词汇衔接划分章节（TextTiling）
+
+    1. 字幕按时间合并为文本块，提取词汇特征并按 IDF 加权
+    2. 计算每个块间隙左右窗口的余弦相似度并平滑
+    3. 取深度超过阈值的低谷作为边界，按深度从大到小选取，相邻边界不短于最短章节时长
+    4. 标题取章节内相对全片最突出的关键词
+
+    Args:
+        subtitles: 字幕列表（按时间排序）
+        duration: 视频总时长（秒）
+        chapters: 章节数上限（可选，默认按时长估算）
+        block_seconds: 文本块时间跨度（秒）
+        window: 每侧窗口块数
+        min_chapter_seconds: 章节最短时长（秒）
+
+    Returns:
+        ChapterList 实例
+    """
+    blocks = _build_blocks(subtitles, block_seconds)
+    if chapters is None:
+        chapters = round(duration / TARGET_CHAPTER_SECONDS)
+    chapters = max(MIN_CHAPTERS, min(MAX_CHAPTERS, chapters))
+
+    if len(blocks) < 2 or duration <= 0:
+        return ChapterList(
+            chapters=[
+                Chapter(
+                    title=_fallback_title(subtitles) or "章节 1",
+                    start_time=0.0,
+                    end_time=duration,
+                )
+            ],
+            duration=duration,
+        )
+
+    # 只在一个块中出现的词对跨窗口相似度没有贡献，去掉以缩小矩阵
+    block_freq: dict[str, int] = {}
+    for _, tokens in blocks:
+        for token in set(tokens):
+            block_freq[token] = block_freq.get(token, 0) + 1
+    vocabulary: dict[str, int] = {}
+    rows = [
+        [vocabulary.setdefault(token, len(vocabulary)) for token in tokens if block_freq[token] > 1]
+        for _, tokens in blocks
+    ]
+    counts = np.zeros((len(blocks), max(1, len(vocabulary))), dtype=np.float32)
+    for i, ids in enumerate(rows):
+        if ids:
+            counts[i] = np.bincount(ids, minlength=counts.shape[1])
+
+    document_freq = np.count_nonzero(counts, axis=0)
+    idf = np.log((1 + len(blocks)) / (1 + document_freq)) + 1
+    weighted = counts * idf
+
+    scores = _smooth(gap_scores(weighted, window))
+    depths = depth_scores(scores)
+    starts = [start for start, _ in blocks]
+    boundaries = _pick_boundaries(depths, starts, chapters - 1, min_chapter_seconds, duration)
+
+    # 出现在过半文本块中的词贯穿全片（口头禅等），不适合作为章节标题
+    title_weight = np.where(document_freq > len(blocks) / 2, 0.0, idf)
+    edges = [0.0, *(starts[i + 1] for i in boundaries), duration]
+    words = {index: token for token, index in vocabulary.items()}
+    result: list[Chapter] = []
+    for start, end in zip(edges, edges[1:]):
+        mask = [start <= s < end for s in starts]
+        title = _keyword_title(counts[mask].sum(axis=0) * title_weight, words)
+        if not title:
+            title = _fallback_title([s for s in subtitles if start <= s.start_time < end])
+        title = title or f"章节 {len(result) + 1}"
+        result.append(Chapter(title=title, start_time=start, end_time=end))
+
+    return ChapterList(chapters=result, duration=duration)
+
+
+def _build_blocks(subtitles: list[Subtitle], block_seconds: float) -> list[tuple[float, list[str]]]:
+    """按时间把字幕合并为 (开始时间, 词汇特征) 文本块"""
+    blocks: list[tuple[float, list[str]]] = []
+    for sub in subtitles:
+        tokens = tokenize(sub.text)
+        if blocks and sub.start_time - blocks[-1][0] < block_seconds:
+            blocks[-1][1].extend(tokens)
+        else:
+            blocks.append((sub.start_time, tokens))
+    return blocks
+
+
+def _pick_boundaries(
+    depths: np.ndarray,
+    starts: list[float],
+    limit: int,
+    min_seconds: float,
+    duration: float,
+) -> list[int]:
+    """
+    按深度从大到小选取边界
+
+    阈值取 TextTiling 的 (低谷深度均值 - 标准差/2) 与最深低谷的 MIN_DEPTH_RATIO 中较大者，
+    避免主题单一的片段中的细小波动被切开。
+    """
+    valleys = depths[depths > 0]
+    if len(valleys) == 0 or limit <= 0:
+        return []
+
+    cutoff = max(valleys.mean() - valleys.std() / 2, valleys.max() * MIN_DEPTH_RATIO)
+    chosen: list[int] = []
+    for gap in np.argsort(-depths, kind="stable"):
+        if depths[gap] <= 0 or depths[gap] < cutoff or len(chosen) >= limit:
+            break
+        time = starts[gap + 1]
+        if time < min_seconds or duration - time < min_seconds:
+            continue
+        if any(abs(time - starts[other + 1]) < min_seconds for other in chosen):
+            continue
+        chosen.append(int(gap))
+    return sorted(chosen)
+
+
+def _keyword_title(scores: np.ndarray, words: dict[int, str]) -> str:
+    """取得分最高的关键词拼接为标题，首尾相接的中文二元组合并为更长的词"""
+    candidates = [
+        words[int(index)] for index in np.argsort(-scores, kind="stable")[:TITLE_KEYWORDS * 3]
+        if scores[index] > 0
+    ]
+
+    keywords: list[str] = []
+    for word in candidates:
+        keywords.append(word)
+        merged = True
+        while merged:
+            merged = False
+            for a in range(len(keywords)):
+                for b in range(len(keywords)):
+                    first, second = keywords[a], keywords[b]
+                    if (
+                        a != b
+                        and _CJK_RE.match(first)
+                        and _CJK_RE.match(second)
+                        and first[-1] == second[0]
+                    ):
+                        keywords[a] = first + second[1:]
+                        del keywords[b]
+                        merged = True
+                        break
+                if merged:
+                    break
+
+    # 整词保留，超出长度时丢弃靠后的关键词
+    keywords = keywords[:TITLE_KEYWORDS]
+    while len(keywords) > 1 and len("、".join(keywords)) > TITLE_MAX_CHARS:
+        keywords.pop()
+    return "、".join(keywords)
+
+
+def _fallback_title(subtitles: list[Subtitle]) -> str:
+    """没有可用关键词时取第一条字幕"""
+    for sub in subtitles:
+        text = re.sub(r"\s+", " ", sub.text).strip()
+        if text:
+            return text[:TITLE_MAX_CHARS] + "..." if len(text) > TITLE_MAX_CHARS else text
+    return ""
@@ -0,0 +1,273 @@
+"""
+[INPUT]: 依赖 sqlite3, json, os, threading, time, pathlib, artifact_cache, temp_manager
+[OUTPUT]: 对外提供 LLMCache, get_llm_cache()
+[POS]: AI 响应持久缓存，相同 (api_base, model, temperature, prompt) 直接返回已解析的 JSON，
+       也用于更细粒度的条目（如逐条字幕润色）；SQLite WAL 模式，多个 uvicorn worker 可同时读写
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from vmarker import temp_manager
+from vmarker.artifact_cache import canonical_key
+
+# =============================================================================
+#  辅助函数
+# =============================================================================
+
+
+def _parse_int_env(key: str, default: int) -> int:
+    """安全解析非负整数环境变量"""
+    value = os.getenv(key)
+    if value is None:
+        return default
+    try:
+        parsed = int(value)
+        return parsed if parsed >= 0 else default
+    except ValueError:
+        return default
+
+
+# =============================================================================
+#  环境变量配置
+# =============================================================================
+
+DEFAULT_MAX_MB = _parse_int_env("LLM_CACHE_MAX_MB", 64)  # 0 表示禁用
+DEFAULT_TTL_HOURS = _parse_int_env("LLM_CACHE_TTL_HOURS", 24 * 7)  # 条目有效期
+_SQL_CHUNK = 500  # 批量查询每条语句的键数（低于 SQLite 参数上限）
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    latency REAL NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+)
+"""
+
+
+# =============================================================================
+#  缓存类
+# =============================================================================
+
+
+class LLMCache:
+    """
+    AI 响应缓存
+
+    每个线程持有独立连接；写入后按 accessed 从旧到新淘汰直至总大小不超过上限，
+    过期条目在读取时删除。命中统计为当前进程。
+    """
+
+    def __init__(self, path: Path, max_bytes: int, ttl_seconds: float):
+        """
+        初始化缓存
+
+        Args:
+            path: SQLite 数据库文件
+            max_bytes: 容量上限（字节），0 表示禁用缓存
+            ttl_seconds: 条目有效期（秒）
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.latency_saved = 0.0
+        self._local = threading.local()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def make_key(api_base: str, model: str, temperature: float, prompt: str) -> str:
+        """缓存键：(api_base, model, temperature, prompt) 的哈希"""
+        return canonical_key("llm", api_base.rstrip("/"), model, temperature, prompt)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> dict | None:
+        """
+        查找缓存条目
+
+        Returns:
+            命中时返回已解析的 JSON，否则返回 None
+        """
+        if not self.enabled:
+            return None
+
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute(
+            "SELECT value, latency, created FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        value, latency, created = row
+        if now - created > self.ttl_seconds:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self.misses += 1
+            return None
+
+        conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        self.latency_saved += latency
+        return json.loads(value)
+
+    def put(self, key: str, value: dict, latency: float) -> None:
+        """
+        写入缓存条目
+
+        Args:
+            key: 缓存键
+            value: 已解析的 JSON
+            latency: 本次请求耗时（秒），命中时计入节省时间
+        """
+        if not self.enabled:
+            return
+
+        payload = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, value, size, latency, created, accessed) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, payload, len(payload.encode("utf-8")), latency, now, now),
+        )
+        self._evict(conn)
+
+    def get_many(self, keys: list[str]) -> dict[str, dict]:
+        """
+        批量查找缓存条目
+
+        Returns:
+            命中的 {键: 已解析的 JSON}
+        """
+        if not self.enabled or not keys:
+            return {}
+
+        conn = self._connect()
+        now = time.time()
+        found: dict[str, dict] = {}
+        expired: list[tuple[str]] = []
+        unique = list(dict.fromkeys(keys))
+
+        for i in range(0, len(unique), _SQL_CHUNK):
+            chunk = unique[i:i + _SQL_CHUNK]
+            rows = conn.execute(
+                "SELECT key, value, latency, created FROM entries "
+                f"WHERE key IN ({','.join('?' * len(chunk))})",
+                chunk,
+            ).fetchall()
+            for key, value, latency, created in rows:
+                if now - created > self.ttl_seconds:
+                    expired.append((key,))
+                    continue
+                found[key] = json.loads(value)
+                self.latency_saved += latency
+
+        if expired:
+            conn.executemany("DELETE FROM entries WHERE key = ?", expired)
+        if found:
+            conn.executemany(
+                "UPDATE entries SET accessed = ? WHERE key = ?", [(now, k) for k in found]
+            )
+        self.hits += len(found)
+        self.misses += len(unique) - len(found)
+        return found
+
+    def put_many(self, items: dict[str, dict], latency: float) -> None:
+        """
+        批量写入缓存条目（单个事务）
+
+        Args:
+            items: {键: 已解析的 JSON}
+            latency: 每个条目分摊的请求耗时（秒）
+        """
+        if not self.enabled or not items:
+            return
+
+        now = time.time()
+        rows = []
+        for key, value in items.items():
+            payload = json.dumps(value, ensure_ascii=False)
+            rows.append((key, payload, len(payload.encode("utf-8")), latency, now, now))
+
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, value, size, latency, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """按 LRU 淘汰条目直至不超过容量上限"""
+        (total,) = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        if total <= self.max_bytes:
+            return
+
+        doomed: list[tuple[str]] = []
+        rows = conn.execute("SELECT key, size FROM entries ORDER BY accessed").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+
+        conn.executemany("DELETE FROM entries WHERE key = ?", doomed)
+        self.evictions += len(doomed)
+
+    def stats(self) -> dict:
+        """命中统计"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "latency_saved_seconds": round(self.latency_saved, 3),
+            "max_bytes": self.max_bytes,
+        }
+
+
+# =============================================================================
+#  全局实例
+# =============================================================================
+
+_cache: LLMCache | None = None
+
+
+def get_llm_cache() -> LLMCache:
+    """获取进程内共享的 AI 响应缓存（数据库位于临时会话根目录下）"""
+    global _cache
+    if _cache is None:
+        _cache = LLMCache(
+            temp_manager.BASE_DIR / ".llm" / "cache.sqlite3",
+            DEFAULT_MAX_MB * 1024 * 1024,
+            DEFAULT_TTL_HOURS * 3600,
+        )
+    return _cache
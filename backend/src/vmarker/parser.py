@@ -1,7 +1,8 @@
 """
 [INPUT]: 依赖 models.py 的 Subtitle, SubtitleFile
-[OUTPUT]: 对外提供 parse_srt(), parse_srt_file()
-[POS]: SRT 字幕文件解析器，被所有需要字幕的功能消费
+[OUTPUT]: 对外提供 parse_srt(), parse_srt_file(), decode_srt_bytes(), format_srt()
+[POS]: SRT 字幕文件解析器，被所有需要字幕的功能消费；format_srt() 为其逆操作，
+       ASR 拼接与字幕润色共用
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
@@ -139,3 +140,31 @@ def decode_srt_bytes(data: bytes) -> str:
         except UnicodeDecodeError:
             continue
     raise ValueError("无法识别文件编码")
+
+
+def format_srt(subtitles: list[Subtitle]) -> str:
+    """
+    生成 SRT 内容（parse_srt() 的逆操作）
+
+    Args:
+        subtitles: 字幕列表
+
+    Returns:
+        SRT 格式字符串
+    """
+    blocks = [
+        f"{sub.index}\n"
+        f"{_format_timestamp(sub.start_time)} --> {_format_timestamp(sub.end_time)}\n"
+        f"{sub.text}"
+        for sub in subtitles
+    ]
+    return "\n\n".join(blocks) + "\n" if blocks else ""
+
+
+def _format_timestamp(seconds: float) -> str:
+    """秒数格式化为 SRT 时间戳（按毫秒四舍五入）"""
+    millis = round(seconds * 1000)
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
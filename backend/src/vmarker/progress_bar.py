@@ -1,6 +1,6 @@
 """
-[INPUT]: 依赖 video_encoder
-[OUTPUT]: 对外提供 generate() 函数
+[INPUT]: 依赖 video_encoder, artifact_cache
+[OUTPUT]: 对外提供 generate(), cache_key() 函数
 [POS]: 简单进度条视频生成模块，无章节分段的细线进度条
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
@@ -11,7 +11,8 @@ from typing import Callable
 
 from PIL import Image, ImageDraw
 
-from vmarker.video_encoder import VideoEncoder
+from vmarker.artifact_cache import canonical_key
+from vmarker.video_encoder import ENCODE_ARGS, VideoEncoder
 
 
 # =============================================================================
@@ -31,6 +32,8 @@ class ProgressBarConfig:
 # 回调类型
 ProgressCallback = Callable[[float, str], None]
 
+FPS = 30  # 输出帧率
+
 
 # =============================================================================
 #  默认配色
@@ -102,10 +105,9 @@ def generate(
         输出文件路径
     """
     output_path = Path(output_path)
-    fps = 30
 
     # 直接传参数，不用 VideoConfig（因为 VideoConfig 的 height 约束是 >= 20）
-    encoder = VideoEncoder(config.width, config.height, fps)
+    encoder = VideoEncoder(config.width, config.height, FPS)
 
     def render_frame(current_time: float) -> Image.Image:
         return _render_frame(config, current_time)
@@ -129,3 +131,19 @@ def generate(
         progress_callback(100, "完成")
 
     return output_path
+
+
+def cache_key(
+    config: ProgressBarConfig,
+    *,
+    format: str = "mp4",
+    key_frame_interval: float | None = None,
+) -> str:
+    """
+    计算渲染缓存键
+
+    参数与 generate() 一致，相同的键保证生成相同的视频。
+    """
+    return canonical_key(
+        "progress-bar", config, format, key_frame_interval, FPS, ENCODE_ARGS.get(format)
+    )
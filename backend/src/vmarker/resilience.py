@@ -0,0 +1,310 @@
+"""
+[INPUT]: 依赖 asyncio, os, random, time, email.utils, collections, httpx
+[OUTPUT]: 对外提供 RetryPolicy, CircuitBreaker, CircuitOpenError, LatencyTracker, get_breaker(),
+          get_tracker(), retry_delay(), is_retryable(), call_with_retry(), hedged(), stats()
+[POS]: AI 调用的尾延迟治理：抖动退避重试（遵循 Retry-After）、按 p95 延迟发送对冲请求、
+       按 api_base 熔断，被 ai_client 消费；重试与熔断也用于 asr 的转录上传
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+# =============================================================================
+#  辅助函数
+# =============================================================================
+
+
+def _parse_float_env(key: str, default: float) -> float:
+    """安全解析非负浮点数环境变量"""
+    value = os.getenv(key)
+    if value is None:
+        return default
+    try:
+        parsed = float(value)
+        return parsed if parsed >= 0 else default
+    except ValueError:
+        return default
+
+
+# =============================================================================
+#  环境变量配置
+# =============================================================================
+
+DEFAULT_MAX_RETRIES = int(_parse_float_env("AI_MAX_RETRIES", 2))  # 失败后的重试次数
+DEFAULT_BASE_DELAY = _parse_float_env("AI_RETRY_BASE_DELAY", 0.5)  # 首次退避上限（秒）
+# 单次等待上限，Retry-After 超过时放弃
+DEFAULT_MAX_DELAY = _parse_float_env("AI_RETRY_MAX_DELAY", 30.0)
+HEDGE_ENABLED = os.getenv("AI_HEDGE", "0") == "1"  # 是否启用对冲请求
+HEDGE_QUANTILE = 0.95  # 超过该分位延迟仍未返回时发送对冲请求
+HEDGE_MIN_SAMPLES = int(_parse_float_env("AI_HEDGE_MIN_SAMPLES", 20))  # 样本不足时不对冲
+HEDGE_MIN_DELAY = _parse_float_env("AI_HEDGE_MIN_DELAY", 1.0)  # 对冲等待下限（秒）
+# 连续失败次数达到后熔断，0 表示不熔断
+BREAKER_THRESHOLD = int(_parse_float_env("AI_BREAKER_THRESHOLD", 5))
+BREAKER_COOLDOWN = _parse_float_env("AI_BREAKER_COOLDOWN", 30.0)  # 熔断后多久放行试探请求（秒）
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+# =============================================================================
+#  指标
+# =============================================================================
+
+_counters = {
+    "retries": 0,         # 重试次数
+    "hedges": 0,          # 发出的对冲请求数
+    "hedge_wins": 0,      # 对冲请求先返回的次数
+    "short_circuits": 0,  # 因熔断直接拒绝的请求数
+}
+
+
+def stats() -> dict:
+    """重试、对冲与熔断统计（当前进程）"""
+    return {
+        **_counters,
+        "breakers": {base: breaker.state for base, breaker in _breakers.items()},
+    }
+
+
+# =============================================================================
+#  重试
+# =============================================================================
+
+
+@dataclass
+class RetryPolicy:
+    """重试策略"""
+    max_retries: int = DEFAULT_MAX_RETRIES
+    base_delay: float = DEFAULT_BASE_DELAY
+    max_delay: float = DEFAULT_MAX_DELAY
+
+
+def is_retryable(error: Exception) -> bool:
+    """网络错误、超时、429 和 5xx 网关类错误可重试"""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS
+    return isinstance(error, httpx.TransportError)
+
+
+def retry_delay(error: Exception, attempt: int, policy: RetryPolicy) -> float | None:
+    """
+    计算第 attempt 次重试前的等待时间
+
+    有 Retry-After 时按其等待，否则使用 full jitter 指数退避。
+
+    Returns:
+        等待秒数；超出 max_delay 时返回 None（放弃重试）
+    """
+    retry_after = None
+    if isinstance(error, httpx.HTTPStatusError):
+        retry_after = _parse_retry_after(error.response.headers.get("retry-after"))
+
+    if retry_after is not None:
+        return retry_after if retry_after <= policy.max_delay else None
+    return random.uniform(0, min(policy.max_delay, policy.base_delay * 2**attempt))
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    """解析 Retry-After（秒数或 HTTP 日期）"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+async def call_with_retry[T](
+    send: Callable[[], Awaitable[T]],
+    *,
+    breaker: "CircuitBreaker",
+    policy: RetryPolicy,
+    before: Callable[[], Awaitable[None]] | None = None,
+) -> T:
+    """
+    发送请求，可重试的失败按退避策略重试
+
+    每次尝试前检查熔断器；网络错误、429 和 5xx 计入熔断失败，
+    其他 HTTP 错误说明服务可达，直接抛出且不计入。
+
+    Args:
+        send: 发送请求的协程函数，失败时抛出 httpx.HTTPError
+        breaker: 服务商熔断器
+        policy: 重试策略
+        before: 每次尝试前等待的协程函数（如限流）
+
+    Returns:
+        send() 的返回值
+    """
+    for attempt in range(policy.max_retries + 1):
+        breaker.before_call()
+        if before is not None:
+            await before()
+        try:
+            result = await send()
+        except httpx.HTTPError as e:
+            if not is_retryable(e):
+                if isinstance(e, httpx.HTTPStatusError):
+                    breaker.record_success()
+                raise
+            breaker.record_failure()
+            delay = retry_delay(e, attempt, policy) if attempt < policy.max_retries else None
+            if delay is None:
+                raise
+            _counters["retries"] += 1
+            await asyncio.sleep(delay)
+            continue
+        breaker.record_success()
+        return result
+    raise AssertionError("unreachable")
+
+
+# =============================================================================
+#  熔断
+# =============================================================================
+
+
+class CircuitOpenError(RuntimeError):
+    """服务熔断中，请求被直接拒绝"""
+
+
+class CircuitBreaker:
+    """
+    连续失败计数熔断器
+
+    closed: 正常放行；连续失败达到阈值后进入 open
+    open: 直接拒绝，冷却期过后进入 half-open
+    half-open: 放行一个试探请求，成功则恢复 closed，失败则重新 open
+    """
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.state = "closed"
+        self._opened_at = 0.0
+
+    def before_call(self) -> None:
+        """请求前检查，熔断中抛出 CircuitOpenError"""
+        if self.state == "closed" or self.threshold <= 0:
+            return
+        now = time.monotonic()
+        if now - self._opened_at >= self.cooldown:
+            # 试探请求被取消而没有结果时，再过一个冷却期允许下一个试探
+            self.state = "half-open"
+            self._opened_at = now
+            return
+        _counters["short_circuits"] += 1
+        raise CircuitOpenError("上游服务连续失败，暂时停止请求，请稍后重试")
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.state = "closed"
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.threshold > 0 and (self.state == "half-open" or self.failures >= self.threshold):
+            self.state = "open"
+            self._opened_at = time.monotonic()
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(api_base: str) -> CircuitBreaker:
+    """获取服务商 (api_base) 共享的熔断器"""
+    key = api_base.rstrip("/")
+    breaker = _breakers.get(key)
+    if breaker is None:
+        breaker = CircuitBreaker()
+        _breakers[key] = breaker
+    return breaker
+
+
+# =============================================================================
+#  对冲
+# =============================================================================
+
+
+class LatencyTracker:
+    """最近 N 次成功请求的延迟，用于估算对冲阈值"""
+
+    def __init__(self, size: int = 200):
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def quantile(self, q: float) -> float | None:
+        """样本不足时返回 None"""
+        if len(self._samples) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+_trackers: dict[str, LatencyTracker] = {}
+
+
+def get_tracker(api_base: str) -> LatencyTracker:
+    """获取服务商 (api_base) 共享的延迟统计"""
+    key = api_base.rstrip("/")
+    tracker = _trackers.get(key)
+    if tracker is None:
+        tracker = LatencyTracker()
+        _trackers[key] = tracker
+    return tracker
+
+
+async def hedged[T](send: Callable[[], Awaitable[T]], delay: float | None) -> T:
+    """
+    发送请求，超过 delay 仍未返回时再发一个相同请求，取先成功的结果
+
+    Args:
+        send: 发送请求的协程函数
+        delay: 对冲等待时间，None 表示不对冲
+
+    Returns:
+        先成功返回的结果；两个请求都失败时抛出后失败的错误
+    """
+    if delay is None:
+        return await send()
+
+    primary = asyncio.create_task(send())
+    tasks = {primary}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=max(delay, HEDGE_MIN_DELAY))
+        if done:
+            return primary.result()
+
+        _counters["hedges"] += 1
+        backup = asyncio.create_task(send())
+        tasks.add(backup)
+        pending = set(tasks)
+        error: BaseException | None = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # 同一轮可能同时完成多个请求：先找成功的，全部失败后才抛出
+            for task in done:
+                if task.exception() is None:
+                    if task is backup:
+                        _counters["hedge_wins"] += 1
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        # 返回、失败或调用方被取消时，都不留下仍在进行的请求
+        for task in tasks:
+            task.cancel()
@@ -1,13 +1,14 @@
 """
-[INPUT]: 依赖 ai_client, models
-[OUTPUT]: 对外提供 generate_shownotes() 函数
-[POS]: 视频大纲生成模块，从字幕提取结构化大纲
+[INPUT]: 依赖 analysis, models
+[OUTPUT]: 对外提供 generate_shownotes() 函数, ShowNotes, OutlineItem
+[POS]: 视频大纲生成模块，从字幕提取结构化大纲（analysis 综合分析结果的视图）
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
 from dataclasses import dataclass
 
-from vmarker.ai_client import AIClient, AIConfig
+from vmarker import analysis
+from vmarker.analysis import OutlineItem
 from vmarker.models import Subtitle
 
 
@@ -15,13 +16,6 @@ from vmarker.models import Subtitle
 #  数据模型
 # =============================================================================
 
-@dataclass
-class OutlineItem:
-    """大纲条目"""
-    timestamp: float  # 开始时间（秒）
-    title: str        # 标题/要点
-
-
 @dataclass
 class ShowNotes:
     """视频大纲"""
@@ -29,52 +23,10 @@ class ShowNotes:
     outline: list[OutlineItem]  # 带时间戳的大纲
 
 
-# =============================================================================
-#  Prompt 模板
-# =============================================================================
-
-_SHOWNOTES_PROMPT = """你是一个视频内容分析助手。请根据以下字幕内容，生成视频大纲。
-
-要求：
-1. 生成一个简洁的视频整体摘要（summary），不超过 100 字
-2. 提取 5-10 个关键章节/要点，每个要点包含：
-   - timestamp: 该要点出现的时间点（秒数，取字幕的开始时间）
-   - title: 简洁的要点标题（10-20 字）
-
-请以 JSON 格式输出，格式如下：
-{{
-  "summary": "视频整体摘要...",
-  "outline": [
-    {{"timestamp": 0, "title": "开场介绍"}},
-    {{"timestamp": 120, "title": "核心观点一"}}
-  ]
-}}
-
-字幕内容：
-{subtitles}
-"""
-
-
 # =============================================================================
 #  核心函数
 # =============================================================================
 
-def _format_subtitles(subtitles: list[Subtitle], max_chars: int = 15000) -> str:
-    """格式化字幕用于 AI 输入"""
-    lines = []
-    char_count = 0
-
-    for sub in subtitles:
-        line = f"[{sub.start_time:.1f}s] {sub.text}"
-        char_count += len(line)
-        if char_count > max_chars:
-            lines.append("... (后续字幕省略)")
-            break
-        lines.append(line)
-
-    return "\n".join(lines)
-
-
 async def generate_shownotes(
     subtitles: list[Subtitle],
     *,
@@ -85,6 +37,9 @@ async def generate_shownotes(
     """
     从字幕生成视频大纲
 
+    取 analysis.analyze() 结果中的摘要与大纲；与 AI 章节分段共用同一请求和缓存，
+    同一字幕已分段过时不再请求 AI。
+
     Args:
         subtitles: 字幕列表
         api_key: AI API Key
@@ -94,21 +49,5 @@ async def generate_shownotes(
     Returns:
         ShowNotes 实例
     """
-    formatted = _format_subtitles(subtitles)
-    prompt = _SHOWNOTES_PROMPT.format(subtitles=formatted)
-
-    config = AIConfig(api_key=api_key, api_base=api_base, model=model)
-
-    async with AIClient(config) as client:
-        result = await client.chat_json(prompt)
-
-    # 解析结果
-    summary = result.get("summary", "")
-    outline_data = result.get("outline", [])
-
-    outline = [
-        OutlineItem(timestamp=item.get("timestamp", 0), title=item.get("title", ""))
-        for item in outline_data
-    ]
-
-    return ShowNotes(summary=summary, outline=outline)
+    result = await analysis.analyze(subtitles, api_key=api_key, api_base=api_base, model=model)
+    return ShowNotes(summary=result.summary, outline=result.outline)
@@ -0,0 +1,174 @@
+"""
+[INPUT]: 依赖 asyncio, hashlib, os, fcntl, pathlib, contextlib, temp_manager
+[OUTPUT]: 对外提供 SingleFlight, get_flight()
+[POS]: 昂贵操作合并执行（single-flight）；相同输入的并发调用在进程内等待同一任务，
+       跨 uvicorn worker 以 BASE_DIR/.inflight 下的文件锁串行执行，后到者在锁释放后从缓存取得结果；
+       缓存禁用时跳过文件锁；被 ai_client、artifact_cache、youtube_transcript 与 ASR 路由消费
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+import hashlib
+import os
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+from vmarker import temp_manager
+
+try:
+    import fcntl
+except ImportError:  # Windows 无 fcntl，只做进程内合并
+    fcntl = None
+
+
+# =============================================================================
+#  常量
+# =============================================================================
+
+LOCK_POLL_INTERVAL = 0.05  # 等待其他 worker 释放锁的初始轮询间隔（秒）
+LOCK_POLL_MAX = 0.5  # 轮询间隔上限（秒）
+
+
+# =============================================================================
+#  合并执行
+# =============================================================================
+
+class SingleFlight:
+    """
+    相同键的并发操作只执行一次
+
+    进程内：第一个调用者启动任务，其余调用者等待同一任务的结果（或异常）。
+    任务独立于调用者运行，某个调用者断开不会取消其他调用者等待的操作。
+
+    跨进程：任务执行期间持有 "<lock_dir>/<键摘要>.lock" 的排他文件锁，
+    其他 worker 的相同操作等锁释放后才开始。操作本身应先查缓存，
+    这样后到的 worker 直接取得先到者写入的结果；缓存禁用时锁没有意义，
+    调用方传入 cross_process=False 跳过。
+
+    打开锁文件到取得锁期间持有锁目录的共享锁；temp_manager 回收锁文件时
+    持有目录的排他锁，不会删除其他进程刚打开、尚未加锁的锁文件。
+    """
+
+    def __init__(self, lock_dir: Path | None):
+        """
+        Args:
+            lock_dir: 锁文件目录，None 表示不做跨进程合并
+        """
+        self.lock_dir = lock_dir
+        self._tasks: dict[str, asyncio.Task] = {}
+        self.leads = 0  # 实际执行的次数
+        self.shared = 0  # 等待已有任务的次数
+        self.lock_waits = 0  # 等待其他 worker 释放锁的次数
+
+    async def do[T](
+        self, key: str, fn: Callable[[], Awaitable[T]], *, cross_process: bool = True
+    ) -> tuple[T, bool]:
+        """
+        执行 fn，相同 key 已在执行时等待其结果
+
+        Args:
+            key: 操作键（应为输入的规范化哈希，如 canonical_key() 的结果）
+            fn: 无参协程函数
+            cross_process: 是否加跨进程文件锁（后到的 worker 无缓存可读时应为 False）
+
+        Returns:
+            (结果, 是否与其他调用者共享)
+        """
+        loop = asyncio.get_running_loop()
+        task = self._tasks.get(key)
+        shared = task is not None and not task.done() and task.get_loop() is loop
+
+        if shared:
+            self.shared += 1
+        else:
+            self.leads += 1
+            task = loop.create_task(self._run(key, fn, cross_process))
+            self._tasks[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+
+        return await asyncio.shield(task), shared
+
+    async def _run[T](self, key: str, fn: Callable[[], Awaitable[T]], cross_process: bool) -> T:
+        if not cross_process:
+            return await fn()
+        async with self._file_lock(key):
+            return await fn()
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            task.exception()  # 所有调用者都已离开时避免 "exception was never retrieved"
+
+    @asynccontextmanager
+    async def _file_lock(self, key: str) -> AsyncIterator[None]:
+        """跨进程排他锁；非阻塞轮询，不占用线程"""
+        if self.lock_dir is None or fcntl is None:
+            yield
+            return
+
+        self.lock_dir.mkdir(parents=True, exist_ok=True)
+        path = self.lock_dir / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.lock"
+        fd = None
+        dir_fd = os.open(self.lock_dir, os.O_RDONLY)
+        try:
+            # 目录共享锁持有到取得键锁为止，期间锁文件不会被回收
+            waited = await _poll_flock(dir_fd, fcntl.LOCK_SH)
+            fd = os.open(path, os.O_CREAT | os.O_RDWR, 0o644)
+            waited = await _poll_flock(fd, fcntl.LOCK_EX) or waited
+        except BaseException:
+            if fd is not None:
+                os.close(fd)
+            raise
+        finally:
+            os.close(dir_fd)  # 关闭即释放目录共享锁
+        if waited:
+            self.lock_waits += 1
+
+        try:
+            os.utime(fd)  # 供 temp_manager 按最近使用时间回收锁文件
+            try:
+                yield
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+    def stats(self) -> dict:
+        """合并统计"""
+        return {
+            "leads": self.leads,
+            "shared": self.shared,
+            "lock_waits": self.lock_waits,
+            "inflight": len(self._tasks),
+        }
+
+
+async def _poll_flock(fd: int, operation: int) -> bool:
+    """非阻塞轮询加锁，不占用线程；返回是否等待过"""
+    delay = LOCK_POLL_INTERVAL
+    waited = False
+    while True:
+        try:
+            fcntl.flock(fd, operation | fcntl.LOCK_NB)
+            return waited
+        except BlockingIOError:
+            waited = True
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, LOCK_POLL_MAX)
+
+
+# =============================================================================
+#  全局实例
+# =============================================================================
+
+_flight: SingleFlight | None = None
+
+
+def get_flight() -> SingleFlight:
+    """获取进程内共享的合并执行器（锁目录位于临时会话根目录下）"""
+    global _flight
+    if _flight is None:
+        _flight = SingleFlight(temp_manager.INFLIGHT_DIR)
+    return _flight
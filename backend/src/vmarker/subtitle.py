@@ -1,14 +1,59 @@
 """
-[INPUT]: 依赖 ai_client, models
-[OUTPUT]: 对外提供 polish_subtitles() 函数
-[POS]: 字幕润色模块，修复空耳等问题，保持时间戳不变
+[INPUT]: 依赖 ai_client, llm_cache, artifact_cache, models, parser, asyncio, os, time
+[OUTPUT]: 对外提供 polish_subtitles(), polish_subtitles_stream() 函数
+[POS]: 字幕润色模块，修复空耳等问题，保持时间戳不变；按 token 预算分批并发请求，
+       逐条缓存润色结果，重新润色时只请求修改过的字幕；默认只让模型返回修改过的字幕（diff 模式）
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
+import asyncio
+import os
+import time
+from collections.abc import AsyncIterator, Callable
 from dataclasses import dataclass
 
-from vmarker.ai_client import AIClient, AIConfig
+from vmarker.ai_client import AIClient, AIConfig, estimate_tokens
+from vmarker.artifact_cache import canonical_key
+from vmarker.llm_cache import get_llm_cache
 from vmarker.models import Subtitle
+from vmarker.parser import format_srt
+
+
+# =============================================================================
+#  辅助函数
+# =============================================================================
+
+def _parse_mode_env(key: str, default: str) -> str:
+    """解析润色模式环境变量，无效值回退默认"""
+    value = os.getenv(key, default).strip().lower()
+    return value if value in POLISH_MODES else default
+
+
+def _parse_int_env(key: str, default: int) -> int:
+    """安全解析非负整数环境变量"""
+    value = os.getenv(key)
+    if value is None:
+        return default
+    try:
+        parsed = int(value)
+        return parsed if parsed >= 0 else default
+    except ValueError:
+        return default
+
+
+# =============================================================================
+#  环境变量配置
+# =============================================================================
+
+DEFAULT_CONCURRENCY = max(1, _parse_int_env("POLISH_CONCURRENCY", 4))  # 同时进行的批次数
+DEFAULT_BATCH_TOKENS = max(1, _parse_int_env("POLISH_BATCH_TOKENS", 1500))  # 每批输入 token 预算
+MAX_BATCH_SIZE = 50  # 每批字幕条数上限
+# 单批响应无法解析时的重试次数（网络、限流、5xx 由 AIClient 按 AI_MAX_RETRIES 重试，此处不再叠加）
+DEFAULT_RETRIES = _parse_int_env("POLISH_RETRIES", 2)
+RETRY_DELAY = 1.0  # 首次重试等待（秒），之后指数增长
+CONTEXT_CUES = 1  # 逐条缓存键包含的前后相邻字幕条数
+POLISH_MODES = ("diff", "full")  # diff: 只返回修改过的字幕；full: 返回全部字幕
+DEFAULT_MODE = _parse_mode_env("POLISH_MODE", "diff")
 
 
 # =============================================================================
@@ -30,6 +75,8 @@ class PolishResult:
     """润色结果"""
     subtitles: list[PolishedSubtitle]
     changes_count: int  # 修改的字幕数量
+    cached_count: int = 0  # 直接取自缓存、未请求 AI 的字幕数量
+    output_tokens: int = 0  # 模型输出 token 数（服务商未返回 usage 时为估算值）
 
 
 # =============================================================================
@@ -59,6 +106,31 @@ _POLISH_PROMPT = """你是一个字幕校对专家。请修正以下字幕中的
 {subtitles}
 """
 
+_POLISH_DIFF_PROMPT = """你是一个字幕校对专家。请修正以下字幕中的错误，包括：
+1. 空耳错误（音译错误），如"派森"应该是"Python"，"加瓦"应该是"Java"
+2. 同音字错误，如"他的"和"她的"、"做"和"作"
+3. 明显的语法错误
+4. 专业术语的错误
+
+要求：
+- 只修正明显的错误，保持原意不变
+- 返回 JSON 格式，只包含修改过的字幕，没有问题的字幕不要输出
+- 所有字幕都没有问题时返回空数组
+
+输出格式：
+{{
+  "subtitles": [
+    {{"index": 3, "text": "修正后的文本"}}
+  ]
+}}
+
+字幕内容：
+{subtitles}
+"""
+
+_PROMPTS = {"diff": _POLISH_DIFF_PROMPT, "full": _POLISH_PROMPT}
+PROMPT_VERSION = 1  # 修改润色 Prompt 时递增，使逐条缓存失效
+
 
 # =============================================================================
 #  核心函数
@@ -72,24 +144,120 @@ def _format_subtitles_for_polish(subtitles: list[Subtitle]) -> str:
     return "\n".join(lines)
 
 
-def _format_timestamp(seconds: float) -> str:
-    """将秒数格式化为 SRT 时间戳格式"""
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
-    millis = int((seconds % 1) * 1000)
-    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+def generate_srt(subtitles: list[PolishedSubtitle]) -> str:
+    """生成 SRT 文件内容（使用润色后的文本）"""
+    return format_srt([
+        Subtitle(
+            index=sub.index,
+            start_time=sub.start_time,
+            end_time=sub.end_time,
+            text=sub.polished_text,
+        )
+        for sub in subtitles
+    ])
 
 
-def generate_srt(subtitles: list[PolishedSubtitle]) -> str:
-    """生成 SRT 文件内容"""
-    blocks = []
+def _plan_batches(
+    subtitles: list[Subtitle],
+    max_tokens: int = DEFAULT_BATCH_TOKENS,
+    max_size: int = MAX_BATCH_SIZE,
+) -> list[list[Subtitle]]:
+    """
+    按 token 预算切分批次
+
+    短句多的字幕合并成较大批次，长句多的字幕拆成较小批次，
+    每批不超过 max_size 条；单条超预算时独立成批。
+    """
+    batches: list[list[Subtitle]] = []
+    batch: list[Subtitle] = []
+    tokens = 0
+
     for sub in subtitles:
-        block = f"{sub.index}\n"
-        block += f"{_format_timestamp(sub.start_time)} --> {_format_timestamp(sub.end_time)}\n"
-        block += sub.polished_text
-        blocks.append(block)
-    return "\n\n".join(blocks) + "\n"
+        cost = estimate_tokens(f"[{sub.index}] {sub.text}\n")
+        if batch and (tokens + cost > max_tokens or len(batch) >= max_size):
+            batches.append(batch)
+            batch, tokens = [], 0
+        batch.append(sub)
+        tokens += cost
+
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+# (字幕序号, 润色后文本) -> None
+ItemCallback = Callable[[int, str], None]
+
+
+async def _polish_batch(
+    client: AIClient,
+    batch: list[Subtitle],
+    retries: int,
+    on_item: ItemCallback | None = None,
+    mode: str = DEFAULT_MODE,
+) -> dict[int, str]:
+    """
+    润色单个批次，响应无法解析时只重试该批次；传入 on_item 时以流式请求逐条回调
+
+    Returns:
+        {字幕序号: 润色后文本}。diff 模式下未返回的字幕视为未修改，取原文；
+        full 模式下模型遗漏的字幕不在结果中
+    """
+    prompt = _PROMPTS[mode].format(subtitles=_format_subtitles_for_polish(batch))
+    originals = {sub.index: sub.text for sub in batch}
+
+    for attempt in range(retries + 1):
+        try:
+            if on_item is None:
+                result = await client.chat_json(prompt)
+            else:
+                result = await _stream_batch(client, prompt, originals, on_item)
+            break
+        except ValueError:
+            if attempt == retries:
+                raise
+            await asyncio.sleep(RETRY_DELAY * 2**attempt)
+
+    changed = _valid_items(result.get("subtitles", []), originals)
+    if mode == "full":
+        return changed
+
+    unchanged = {index: text for index, text in originals.items() if index not in changed}
+    if on_item is not None:
+        for index, text in unchanged.items():
+            on_item(index, text)
+    return {**unchanged, **changed}
+
+
+def _valid_items(items: object, originals: dict[int, str]) -> dict[int, str]:
+    """校验模型返回的条目，丢弃序号不在本批次中或文本无效的条目"""
+    if not isinstance(items, list):
+        return {}
+    valid: dict[int, str] = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        index, text = item.get("index"), item.get("text")
+        if isinstance(index, int) and index in originals and isinstance(text, str) and text.strip():
+            valid[index] = text
+    return valid
+
+
+async def _stream_batch(
+    client: AIClient,
+    prompt: str,
+    originals: dict[int, str],
+    on_item: ItemCallback,
+) -> dict:
+    """流式请求单个批次，每条字幕闭合时回调（只回调通过校验的条目）"""
+    result: dict = {}
+    async for key, item in client.chat_json_stream(prompt):
+        if key is None:
+            result = item
+        elif key == "subtitles":
+            for index, text in _valid_items([item], originals).items():
+                on_item(index, text)
+    return result
 
 
 async def polish_subtitles(
@@ -98,53 +266,209 @@ async def polish_subtitles(
     api_key: str,
     api_base: str = "https://api.openai.com/v1",
     model: str = "gpt-4o-mini",
+    concurrency: int = DEFAULT_CONCURRENCY,
+    batch_tokens: int = DEFAULT_BATCH_TOKENS,
+    retries: int = DEFAULT_RETRIES,
+    use_cache: bool = True,
+    mode: str = DEFAULT_MODE,
 ) -> PolishResult:
     """
     润色字幕
 
+    每条字幕的润色结果按 (文本, 前后相邻字幕, 服务商, 模型) 缓存，
+    只有未命中缓存的字幕按 token 预算分批，批次并发请求（受 concurrency 和服务商限流约束），
+    结果按原顺序合并。修改少量字幕后重新润色只请求修改处附近的字幕。
+
+    diff 模式下模型只输出修改过的字幕，输出 token 不再随字幕总量增长；
+    返回的序号经过校验，不在本批次中的条目被丢弃。
+
     Args:
         subtitles: 原始字幕列表
         api_key: AI API Key
         api_base: API 基础地址
         model: 模型名称
+        concurrency: 同时进行的批次数
+        batch_tokens: 每批输入 token 预算
+        retries: 单批响应无法解析时的重试次数
+        use_cache: 是否读取逐条缓存（False 时全部重新请求，结果仍会写入缓存）
+        mode: "diff" 只返回修改过的字幕，"full" 返回全部字幕（默认读取 POLISH_MODE）
 
     Returns:
         PolishResult 实例
     """
-    # 分批处理，避免超出 token 限制
-    batch_size = 50
+    return await _run_batches(
+        subtitles,
+        AIConfig(api_key=api_key, api_base=api_base, model=model),
+        concurrency=concurrency,
+        batch_tokens=batch_tokens,
+        retries=retries,
+        use_cache=use_cache,
+        mode=mode,
+    )
+
+
+async def polish_subtitles_stream(
+    subtitles: list[Subtitle],
+    *,
+    api_key: str,
+    api_base: str = "https://api.openai.com/v1",
+    model: str = "gpt-4o-mini",
+    concurrency: int = DEFAULT_CONCURRENCY,
+    batch_tokens: int = DEFAULT_BATCH_TOKENS,
+    retries: int = DEFAULT_RETRIES,
+    use_cache: bool = True,
+    mode: str = DEFAULT_MODE,
+) -> AsyncIterator[PolishedSubtitle | PolishResult]:
+    """
+    润色字幕（流式版本）
+
+    参数同 polish_subtitles()。命中缓存的字幕最先产出，其余每条字幕在模型输出中闭合后立即产出，
+    并发批次之间不保证顺序（以 index 定位）；批次重试时可能重复产出同一条。
+    最后产出按原顺序合并的 PolishResult。
+
+    Yields:
+        PolishedSubtitle 实例，最后为 PolishResult
+    """
+    by_index = {sub.index: sub for sub in subtitles}
+    queue: asyncio.Queue[PolishedSubtitle] = asyncio.Queue()
+
+    def on_item(index: int, text: str) -> None:
+        sub = by_index.get(index)
+        if sub is not None:
+            queue.put_nowait(_polished(sub, text))
+
+    task = asyncio.create_task(_run_batches(
+        subtitles,
+        AIConfig(api_key=api_key, api_base=api_base, model=model),
+        concurrency=concurrency,
+        batch_tokens=batch_tokens,
+        retries=retries,
+        use_cache=use_cache,
+        mode=mode,
+        on_item=on_item,
+    ))
+
+    try:
+        while True:
+            getter = asyncio.create_task(queue.get())
+            done, _ = await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+            if getter in done:
+                yield getter.result()
+                continue
+
+            getter.cancel()
+            while not queue.empty():
+                yield queue.get_nowait()
+            yield task.result()
+            return
+    finally:
+        # 调用方提前退出（如客户端断开）时取消剩余批次
+        task.cancel()
+
+
+async def _run_batches(
+    subtitles: list[Subtitle],
+    config: AIConfig,
+    *,
+    concurrency: int,
+    batch_tokens: int,
+    retries: int,
+    use_cache: bool = True,
+    mode: str = DEFAULT_MODE,
+    on_item: ItemCallback | None = None,
+) -> PolishResult:
+    """查找逐条缓存，未命中的字幕分批并发润色，按原顺序合并"""
+    if mode not in POLISH_MODES:
+        raise ValueError(f"未知的润色模式: {mode}")
+
+    cache = get_llm_cache()
+    keys = _cue_keys(subtitles, config, mode)
+    cached = await asyncio.to_thread(cache.get_many, keys) if use_cache else {}
+
+    polished_texts: dict[int, str] = {}
+    pending: list[Subtitle] = []
+    output_tokens = 0
+    for sub, key in zip(subtitles, keys):
+        if key in cached:
+            polished_texts[sub.index] = cached[key].get("text", sub.text)
+            if on_item is not None:
+                on_item(sub.index, polished_texts[sub.index])
+        else:
+            pending.append(sub)
+
+    if pending:
+        batches = _plan_batches(pending, batch_tokens)
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        key_of = {sub.index: key for sub, key in zip(subtitles, keys)}
+
+        # 所有批次共用一个客户端（连接来自共享连接池）
+        async with AIClient(config) as client:
+
+            async def run(batch: list[Subtitle]) -> None:
+                async with semaphore:
+                    start = time.monotonic()
+                    polished_map = await _polish_batch(client, batch, retries, on_item, mode)
+                    latency = (time.monotonic() - start) / len(batch)
+
+                # 模型遗漏的字幕保留原文，不写入缓存
+                done = {
+                    sub.index: polished_map[sub.index] for sub in batch if sub.index in polished_map
+                }
+                polished_texts.update(done)
+                entries = {key_of[index]: {"text": text} for index, text in done.items()}
+                await asyncio.to_thread(cache.put_many, entries, latency)
+
+            # 任一批次重试后仍失败时取消其余批次，并抛出首个错误
+            try:
+                async with asyncio.TaskGroup() as group:
+                    for batch in batches:
+                        group.create_task(run(batch))
+            except ExceptionGroup as eg:
+                raise eg.exceptions[0] from None
+            output_tokens = client.output_tokens
+
     all_polished: list[PolishedSubtitle] = []
     changes_count = 0
 
-    for i in range(0, len(subtitles), batch_size):
-        batch = subtitles[i:i + batch_size]
-        formatted = _format_subtitles_for_polish(batch)
-        prompt = _POLISH_PROMPT.format(subtitles=formatted)
+    # 合并结果
+    for sub in subtitles:
+        polished = _polished(sub, polished_texts.get(sub.index, sub.text))
+        if polished.polished_text != sub.text:
+            changes_count += 1
+        all_polished.append(polished)
 
-        config = AIConfig(api_key=api_key, api_base=api_base, model=model)
+    return PolishResult(
+        subtitles=all_polished,
+        changes_count=changes_count,
+        cached_count=len(subtitles) - len(pending),
+        output_tokens=output_tokens,
+    )
 
-        async with AIClient(config) as client:
-            result = await client.chat_json(prompt)
-
-        # 解析结果，建立索引映射
-        polished_map = {
-            item.get("index", 0): item.get("text", "")
-            for item in result.get("subtitles", [])
-        }
-
-        # 合并结果
-        for sub in batch:
-            polished_text = polished_map.get(sub.index, sub.text)
-            is_changed = polished_text != sub.text
-            if is_changed:
-                changes_count += 1
-
-            all_polished.append(PolishedSubtitle(
-                index=sub.index,
-                start_time=sub.start_time,
-                end_time=sub.end_time,
-                original_text=sub.text,
-                polished_text=polished_text,
-            ))
-
-    return PolishResult(subtitles=all_polished, changes_count=changes_count)
+
+def _cue_keys(subtitles: list[Subtitle], config: AIConfig, mode: str) -> list[str]:
+    """
+    逐条缓存键：(润色模式, Prompt 版本, 服务商, 模型, 本条及前后 CONTEXT_CUES 条字幕文本)
+
+    不含序号与时间戳，插入或删除字幕只影响附近几条的缓存；
+    修改一条字幕会使它和相邻字幕重新润色（上下文已变化）。
+    """
+    texts = [sub.text for sub in subtitles]
+    api_base = config.api_base.rstrip("/")
+    keys = []
+    for i in range(len(texts)):
+        window = texts[max(0, i - CONTEXT_CUES):i + CONTEXT_CUES + 1]
+        offset = i - max(0, i - CONTEXT_CUES)
+        keys.append(
+            canonical_key("polish", mode, PROMPT_VERSION, api_base, config.model, offset, window)
+        )
+    return keys
+
+
+def _polished(sub: Subtitle, polished_text: str) -> PolishedSubtitle:
+    return PolishedSubtitle(
+        index=sub.index,
+        start_time=sub.start_time,
+        end_time=sub.end_time,
+        original_text=sub.text,
+        polished_text=polished_text,
+    )
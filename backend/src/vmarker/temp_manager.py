@@ -1,10 +1,15 @@
 """
-[INPUT]: 依赖 pathlib, shutil, uuid, time, tempfile
-[OUTPUT]: 对外提供 TempSession, temp_session(), cleanup_old_sessions()
-[POS]: 临时文件生命周期管理，确保视频处理过程中的资源正确释放
+[INPUT]: 依赖 pathlib, shutil, uuid, time, tempfile, hashlib, json, fcntl
+[OUTPUT]: 对外提供 TempSession, temp_session(), cleanup_old_sessions(),
+          内容寻址存储 (store_blob/store_blob_file/blob_temp_path/has_blob/link_file)
+[POS]: 临时文件生命周期管理，确保视频处理过程中的资源正确释放；相同内容的上传在会话间去重
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
+import hashlib
+import json
+import os
+import re
 import shutil
 import time
 import uuid
@@ -13,14 +18,194 @@ from pathlib import Path
 from tempfile import gettempdir
 from typing import Iterator
 
+try:
+    import fcntl
+except ImportError:  # Windows 无 fcntl，不会产生锁文件
+    fcntl = None
+
 
 # =============================================================================
 #  常量
 # =============================================================================
 
 BASE_DIR = Path(gettempdir()) / "vmarker"
+BLOB_DIR = BASE_DIR / ".blobs"  # 内容寻址存储，以 "." 开头避免被当作会话
+INFLIGHT_DIR = BASE_DIR / ".inflight"  # singleflight 跨进程锁文件
+META_FILENAME = "session.json"
 DEFAULT_MAX_AGE_HOURS = 24
 
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+# =============================================================================
+#  内容寻址存储
+# =============================================================================
+
+
+def compute_digest(content: bytes) -> str:
+    """计算内容的 SHA-256 摘要（十六进制）"""
+    return hashlib.sha256(content).hexdigest()
+
+
+def is_valid_digest(digest: str) -> bool:
+    """检查摘要格式是否合法（64 位小写十六进制）"""
+    return bool(_DIGEST_RE.match(digest))
+
+
+def blob_path(digest: str) -> Path:
+    """
+    获取 blob 存储路径
+
+    Raises:
+        ValueError: 摘要格式非法
+    """
+    if not is_valid_digest(digest):
+        raise ValueError(f"无效的内容摘要: {digest}")
+    return BLOB_DIR / digest
+
+
+def has_blob(digest: str) -> bool:
+    """检查 blob 是否已存储"""
+    return is_valid_digest(digest) and (BLOB_DIR / digest).exists()
+
+
+def store_blob(content: bytes, digest: str | None = None) -> str:
+    """
+    按内容摘要存储 blob，已存在则直接复用
+
+    先写入临时文件再原子重命名，多个 worker 同时写入同一内容也是安全的。
+
+    Args:
+        content: 文件内容
+        digest: 预先计算的摘要（可选）
+
+    Returns:
+        内容摘要
+    """
+    digest = digest or compute_digest(content)
+    if blob_path(digest).exists():
+        return digest
+
+    tmp_path = blob_temp_path()
+    tmp_path.write_bytes(content)
+    return store_blob_file(tmp_path, digest)
+
+
+def blob_temp_path() -> Path:
+    """
+    获取 blob 目录下的临时文件路径
+
+    与 blob 位于同一文件系统，写完后交给 store_blob_file() 原子重命名。
+    """
+    BLOB_DIR.mkdir(parents=True, exist_ok=True)
+    return BLOB_DIR / f".{uuid.uuid4().hex}.tmp"
+
+
+def store_blob_file(src: Path, digest: str) -> str:
+    """
+    将已写好的文件按摘要存为 blob（移动而非复制），已存在则删除 src 直接复用
+
+    Args:
+        src: 内容文件，应由 blob_temp_path() 分配
+        digest: 内容摘要（由调用方在写入时计算）
+
+    Returns:
+        内容摘要
+    """
+    path = blob_path(digest)
+    if path.exists():
+        src.unlink(missing_ok=True)
+    else:
+        os.replace(src, path)
+    return digest
+
+
+def link_file(src: Path, dst: Path) -> Path:
+    """
+    以硬链接方式放置文件，跨文件系统等情况下回退为复制
+
+    Args:
+        src: 源文件
+        dst: 目标路径（已存在则覆盖）
+
+    Returns:
+        目标路径
+    """
+    dst.unlink(missing_ok=True)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+    return dst
+
+
+def _collect_blobs(max_age_seconds: float) -> int:
+    """
+    回收无会话引用的 blob
+
+    会话通过硬链接引用 blob，因此 st_nlink == 1 表示已无引用。
+    链接数变化会刷新 ctime，保证刚释放的 blob 仍保留 max_age 供后续上传复用。
+    """
+    if not BLOB_DIR.exists():
+        return 0
+
+    collected = 0
+    now = time.time()
+
+    for path in BLOB_DIR.iterdir():
+        try:
+            stat = path.stat()
+            if stat.st_nlink <= 1 and now - stat.st_ctime > max_age_seconds:
+                path.unlink()
+                collected += 1
+        except OSError:
+            continue
+
+    return collected
+
+
+def _collect_locks(max_age_seconds: float) -> int:
+    """
+    回收长时间未使用的 singleflight 锁文件
+
+    持有锁目录的排他锁时进行：singleflight 从打开锁文件到加锁成功一直持有目录共享锁，
+    因此这里不会删除其他进程刚打开、尚未加锁的文件。目录正被使用时跳过本轮回收；
+    只删除能立即加锁（无人持有）的文件。
+    """
+    if fcntl is None or not INFLIGHT_DIR.exists():
+        return 0
+
+    collected = 0
+    now = time.time()
+
+    try:
+        dir_fd = os.open(INFLIGHT_DIR, os.O_RDONLY)
+    except OSError:
+        return 0
+    try:
+        fcntl.flock(dir_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        for path in INFLIGHT_DIR.iterdir():
+            try:
+                if now - path.stat().st_mtime <= max_age_seconds:
+                    continue
+                fd = os.open(path, os.O_RDWR)
+            except OSError:
+                continue
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                path.unlink()
+                collected += 1
+            except OSError:
+                continue
+            finally:
+                os.close(fd)
+    except BlockingIOError:
+        return 0
+    finally:
+        os.close(dir_fd)
+
+    return collected
+
 
 # =============================================================================
 #  会话管理类
@@ -65,6 +250,50 @@ class TempSession:
         path.write_bytes(content)
         return path
 
+    def link_blob(self, digest: str, filename: str) -> Path:
+        """
+        将已存储的 blob 链接到会话目录（不复制内容）
+
+        Args:
+            digest: 内容摘要
+            filename: 会话内文件名
+
+        Returns:
+            会话内文件路径
+
+        Raises:
+            FileNotFoundError: blob 不存在
+        """
+        src = blob_path(digest)
+        if not src.exists():
+            raise FileNotFoundError(f"内容不存在: {digest}")
+        return link_file(src, self.session_dir / filename)
+
+    def read_meta(self) -> dict:
+        """读取会话元数据，不存在时返回空字典"""
+        path = self.session_dir / META_FILENAME
+        if not path.exists():
+            return {}
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def update_meta(self, **fields) -> dict:
+        """
+        合并更新会话元数据
+
+        Args:
+            **fields: 需要写入的字段（需可 JSON 序列化）
+
+        Returns:
+            更新后的元数据
+        """
+        meta = self.read_meta()
+        meta.update(fields)
+        self.save_text(META_FILENAME, json.dumps(meta, ensure_ascii=False))
+        return meta
+
     def save_text(self, filename: str, content: str, encoding: str = "utf-8") -> Path:
         """
         保存文本文件
@@ -156,7 +385,7 @@ def temp_session() -> Iterator[TempSession]:
 
 def cleanup_old_sessions(max_age_hours: int = DEFAULT_MAX_AGE_HOURS) -> int:
     """
-    清理超时的临时会话
+    清理超时的临时会话，并回收不再被引用的 blob 与闲置的锁文件
 
     Args:
         max_age_hours: 最大保留时间（小时），默认 24 小时
@@ -172,7 +401,7 @@ def cleanup_old_sessions(max_age_hours: int = DEFAULT_MAX_AGE_HOURS) -> int:
     max_age_seconds = max_age_hours * 3600
 
     for session_dir in BASE_DIR.iterdir():
-        if not session_dir.is_dir():
+        if not session_dir.is_dir() or session_dir.name.startswith("."):
             continue
 
         try:
@@ -183,6 +412,9 @@ def cleanup_old_sessions(max_age_hours: int = DEFAULT_MAX_AGE_HOURS) -> int:
         except OSError:
             continue
 
+    _collect_blobs(max_age_seconds)
+    _collect_locks(max_age_seconds)
+
     return cleaned
 
 
@@ -196,6 +428,9 @@ def get_session(session_id: str) -> TempSession | None:
     Returns:
         TempSession 实例，如果不存在返回 None
     """
+    # "." 开头的目录保留给内部存储
+    if not session_id or session_id.startswith("."):
+        return None
     session = TempSession(session_id)
     return session if session.is_valid else None
 
@@ -0,0 +1,332 @@
+"""
+[INPUT]: 依赖 ai_client, models, asyncio, os
+[OUTPUT]: 对外提供 TranscriptWindow, Topic, Tokenizer, pack_transcript(), needs_windowing(),
+          split_windows(), extract_topics(), format_topics()
+[POS]: 字幕提示词工具：紧凑打包字幕（合并时间桶、去除滚动字幕重复、控制 token 预算），
+       以及长字幕 map-reduce 流水线的 map 阶段（按时间窗口并发提取候选主题）
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+import os
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from vmarker.ai_client import AIClient, estimate_tokens
+from vmarker.models import Subtitle
+
+# =============================================================================
+#  辅助函数
+# =============================================================================
+
+def _parse_int_env(key: str, default: int) -> int:
+    """安全解析正整数环境变量"""
+    value = os.getenv(key)
+    if value is None:
+        return default
+    try:
+        parsed = int(value)
+        return parsed if parsed > 0 else default
+    except ValueError:
+        return default
+
+
+# =============================================================================
+#  环境变量配置
+# =============================================================================
+
+# 打包后不超过此预算时走单次请求
+SINGLE_PROMPT_TOKENS = _parse_int_env("TRANSCRIPT_SINGLE_PROMPT_TOKENS", 12000)
+# 相邻字幕合并为一行的时间跨度
+DEFAULT_BUCKET_SECONDS = _parse_int_env("TRANSCRIPT_BUCKET_SECONDS", 20)
+MIN_ROLLING_OVERLAP = 4  # 滚动字幕前后重叠的最短字符数
+DEFAULT_WINDOW_SECONDS = _parse_int_env("TRANSCRIPT_WINDOW_SECONDS", 600)  # 窗口时长
+DEFAULT_OVERLAP_SECONDS = _parse_int_env("TRANSCRIPT_OVERLAP_SECONDS", 30)  # 相邻窗口重叠
+DEFAULT_CONCURRENCY = _parse_int_env("TRANSCRIPT_CONCURRENCY", 4)  # 同时处理的窗口数
+DEDUPE_SECONDS = 30.0  # 间隔小于此值的候选主题视为同一主题（来自重叠区域）
+
+
+# (文本) -> token 数
+Tokenizer = Callable[[str], int]
+
+
+# =============================================================================
+#  数据模型
+# =============================================================================
+
+@dataclass
+class TranscriptWindow:
+    """字幕时间窗口"""
+    index: int
+    start: float  # 开始时间（秒）
+    end: float    # 结束时间（秒）
+    subtitles: list[Subtitle]
+
+
+@dataclass
+class Topic:
+    """候选主题（map 阶段输出）"""
+    start_time: float
+    title: str
+    summary: str = ""
+
+
+# =============================================================================
+#  Prompt 模板
+# =============================================================================
+
+_MAP_PROMPT = """你是视频内容分析专家。以下是一段长视频中 {start:.1f}s - {end:.1f}s 的字幕片段。
+
+请找出这段字幕中的主题变化点，每个主题包含：
+- start_time: 主题开始时间（秒数，取字幕的开始时间）
+- title: 简洁的主题标题（不超过15字）
+- summary: 一句话概括该主题内容（不超过40字）
+
+只分析给出的片段，不要推测片段之外的内容。
+
+字幕（每行开头方括号内为开始秒数）:
+{subtitles}
+
+返回 JSON 格式（不要其他内容）:
+{{"topics": [{{"start_time": 0.0, "title": "标题", "summary": "概括"}}, ...]}}"""
+
+
+# =============================================================================
+#  打包与切分
+# =============================================================================
+
+def pack_transcript(
+    subtitles: list[Subtitle],
+    *,
+    bucket_seconds: float = DEFAULT_BUCKET_SECONDS,
+    max_tokens: int | None = None,
+    tokenizer: Tokenizer = estimate_tokens,
+) -> str:
+    """
+    将字幕打包为紧凑的提示词文本
+
+    - 开始时间相差不超过 bucket_seconds 的相邻字幕合并为一行
+    - 去除自动字幕中滚动显示造成的重复（整句重复或前后重叠）
+    - 时间戳只保留整数秒，如 "[123] 文本"
+    - 超出 max_tokens 时按比例截短每行文本，保留每段开头，仍覆盖全片
+
+    Args:
+        subtitles: 字幕列表（按时间排序）
+        bucket_seconds: 合并时间跨度（秒），0 表示不合并
+        max_tokens: token 预算（可选）
+        tokenizer: token 估算函数
+
+    Returns:
+        打包后的文本
+    """
+    buckets = _bucket_subtitles(subtitles, bucket_seconds)
+    text = _render_buckets(buckets)
+    if max_tokens is None:
+        return text
+
+    # 按超出比例截短，估算有误差时多收缩几轮
+    for _ in range(5):
+        total = tokenizer(text)
+        if total <= max_tokens:
+            break
+        ratio = max_tokens / total * 0.95
+        buckets = [(start, line[:max(1, int(len(line) * ratio))]) for start, line in buckets]
+        text = _render_buckets(buckets)
+
+    return text
+
+
+def _bucket_subtitles(subtitles: list[Subtitle], bucket_seconds: float) -> list[tuple[float, str]]:
+    """合并相邻字幕并去除滚动重复，返回 (开始时间, 文本) 列表"""
+    buckets: list[tuple[float, str]] = []
+    bucket_start = 0.0
+    parts: list[str] = []
+    previous = ""
+
+    for sub in subtitles:
+        text = _strip_rolling_overlap(previous, sub.text.strip())
+        if sub.text.strip():
+            previous = sub.text.strip()
+        if not text:
+            continue
+
+        if parts and sub.start_time - bucket_start >= bucket_seconds:
+            buckets.append((bucket_start, _join(parts)))
+            parts = []
+        if not parts:
+            bucket_start = sub.start_time
+        parts.append(text)
+
+    if parts:
+        buckets.append((bucket_start, _join(parts)))
+    return buckets
+
+
+def _strip_rolling_overlap(previous: str, text: str) -> str:
+    """去掉与上一条字幕重复的部分（整句重复或上一条结尾与本条开头重叠）"""
+    if not previous or not text:
+        return text
+    if text == previous or (len(text) >= MIN_ROLLING_OVERLAP and text in previous):
+        return ""
+
+    for k in range(min(len(previous), len(text)), MIN_ROLLING_OVERLAP - 1, -1):
+        if previous.endswith(text[:k]):
+            return text[k:].strip()
+    return text
+
+
+def _join(parts: list[str]) -> str:
+    """拼接文本片段，西文之间补空格，中文直接相连"""
+    result = parts[0]
+    for part in parts[1:]:
+        prev, nxt = result[-1], part[0]
+        if prev.isascii() and prev.isalnum() and nxt.isascii() and nxt.isalnum():
+            result += " "
+        result += part
+    return result
+
+
+def _render_buckets(buckets: list[tuple[float, str]]) -> str:
+    return "\n".join(f"[{int(start)}] {line}" for start, line in buckets)
+
+
+def needs_windowing(
+    subtitles: list[Subtitle],
+    max_tokens: int = SINGLE_PROMPT_TOKENS,
+    tokenizer: Tokenizer = estimate_tokens,
+) -> bool:
+    """打包后的字幕是否超出单次请求的 token 预算"""
+    return tokenizer(pack_transcript(subtitles)) > max_tokens
+
+
+def split_windows(
+    subtitles: list[Subtitle],
+    window_seconds: float = DEFAULT_WINDOW_SECONDS,
+    overlap_seconds: float = DEFAULT_OVERLAP_SECONDS,
+) -> list[TranscriptWindow]:
+    """
+    按时间切分字幕为相互重叠的窗口
+
+    重叠区域让跨越窗口边界的主题变化至少在一个窗口中完整出现。
+
+    Args:
+        subtitles: 字幕列表（按时间排序）
+        window_seconds: 窗口时长（秒）
+        overlap_seconds: 相邻窗口重叠时长（秒），需小于窗口时长
+
+    Returns:
+        TranscriptWindow 列表，空窗口被跳过
+    """
+    if window_seconds <= 0:
+        raise ValueError(f"window_seconds must be positive, got {window_seconds}")
+    if not 0 <= overlap_seconds < window_seconds:
+        raise ValueError(f"overlap_seconds must be in [0, window_seconds), got {overlap_seconds}")
+    if not subtitles:
+        return []
+
+    duration = max(s.end_time for s in subtitles)
+    step = window_seconds - overlap_seconds
+    windows: list[TranscriptWindow] = []
+    start = 0.0
+
+    while start < duration:
+        end = start + window_seconds
+        subs = [s for s in subtitles if start <= s.start_time < end]
+        if subs:
+            windows.append(
+                TranscriptWindow(
+                    index=len(windows), start=start, end=min(end, duration), subtitles=subs
+                )
+            )
+        if end >= duration:
+            break
+        start += step
+
+    return windows
+
+
+# =============================================================================
+#  Map 阶段
+# =============================================================================
+
+async def extract_topics(
+    client: AIClient,
+    subtitles: list[Subtitle],
+    *,
+    window_seconds: float = DEFAULT_WINDOW_SECONDS,
+    overlap_seconds: float = DEFAULT_OVERLAP_SECONDS,
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> list[Topic]:
+    """
+    按窗口并发提取候选主题
+
+    每个窗口一次请求，耗时取决于最慢的窗口而非视频总长；
+    结果按时间排序，重叠区域的重复主题被合并。
+
+    Args:
+        client: 已进入上下文的 AIClient
+        subtitles: 字幕列表
+        window_seconds: 窗口时长（秒）
+        overlap_seconds: 相邻窗口重叠时长（秒）
+        concurrency: 同时处理的窗口数
+
+    Returns:
+        Topic 列表（按开始时间排序）
+    """
+    windows = split_windows(subtitles, window_seconds, overlap_seconds)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(window: TranscriptWindow) -> list[Topic]:
+        prompt = _MAP_PROMPT.format(
+            start=window.start,
+            end=window.end,
+            subtitles=pack_transcript(window.subtitles),
+        )
+        async with semaphore:
+            data = await client.chat_json(prompt)
+        return _parse_topics(data, window)
+
+    try:
+        async with asyncio.TaskGroup() as group:
+            tasks = [group.create_task(run(window)) for window in windows]
+    except ExceptionGroup as eg:
+        raise eg.exceptions[0] from None
+
+    topics = [topic for task in tasks for topic in task.result()]
+    return _dedupe_topics(topics)
+
+
+def _parse_topics(data: dict, window: TranscriptWindow) -> list[Topic]:
+    """解析窗口结果，丢弃窗口范围之外的时间"""
+    topics = []
+    for item in data.get("topics", []):
+        try:
+            start_time = float(item.get("start_time", window.start))
+        except (TypeError, ValueError):
+            continue
+        if not window.start <= start_time <= window.end:
+            continue
+        topics.append(Topic(
+            start_time=start_time,
+            title=str(item.get("title", "")).strip(),
+            summary=str(item.get("summary", "")).strip(),
+        ))
+    return topics
+
+
+def _dedupe_topics(topics: list[Topic]) -> list[Topic]:
+    """按时间排序并合并相邻过近的候选主题"""
+    merged: list[Topic] = []
+    for topic in sorted(topics, key=lambda t: t.start_time):
+        if merged and topic.start_time - merged[-1].start_time < DEDUPE_SECONDS:
+            continue
+        merged.append(topic)
+    return merged
+
+
+def format_topics(topics: list[Topic]) -> str:
+    """格式化候选主题用于 reduce 提示词"""
+    return "\n".join(
+        f"[{int(t.start_time)}] {t.title}" + (f"：{t.summary}" if t.summary else "")
+        for t in topics
+    )
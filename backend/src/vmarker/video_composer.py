@@ -1,6 +1,7 @@
 """
-[INPUT]: 依赖 subprocess (FFmpeg), video_probe, pathlib
-[OUTPUT]: 对外提供 OverlayPosition, CompositionConfig, compose_vstack()
+[INPUT]: 依赖 subprocess (FFmpeg), video_probe, executor, pathlib
+[OUTPUT]: 对外提供 OverlayPosition, CompositionConfig, ENCODE_ARGS, compose_vstack(),
+          compose_vstack_async()
 [POS]: 视频合成模块，将 Bar 视频合成到原视频上方或下方
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
@@ -10,7 +11,22 @@ from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
 
-from vmarker.video_probe import probe
+from vmarker.executor import run_process
+from vmarker.video_probe import VideoInfo, probe, probe_async
+
+
+# =============================================================================
+#  常量
+# =============================================================================
+
+# 合成输出的编码参数（也参与合成结果缓存键计算）
+ENCODE_ARGS = [
+    "-c:v", "libx264",
+    "-crf", "18",
+    "-preset", "fast",
+    "-c:a", "aac",
+    "-b:a", "128k",
+]
 
 
 # =============================================================================
@@ -43,6 +59,7 @@ def compose_vstack(
     bar_video: Path,
     output_path: Path,
     config: CompositionConfig | None = None,
+    source_info: VideoInfo | None = None,
 ) -> Path:
     """
     将 Bar 视频垂直堆叠到源视频上方或下方
@@ -58,6 +75,7 @@ def compose_vstack(
         bar_video: Bar 视频路径
         output_path: 输出路径
         config: 合成配置，默认为 BOTTOM + MP4
+        source_info: 已知的源视频信息（可选，不传则探测）
 
     Returns:
         输出文件路径
@@ -66,14 +84,62 @@ def compose_vstack(
         FileNotFoundError: 输入文件不存在
         RuntimeError: FFmpeg 执行失败
     """
+    _check_inputs(source_video, bar_video)
+
+    config = config or CompositionConfig()
+    source_info = source_info or probe(source_video)
+
+    cmd = _vstack_cmd(source_video, bar_video, output_path, config, source_info)
+    result = subprocess.run(cmd, capture_output=True, text=True)
+
+    if result.returncode != 0:
+        raise RuntimeError(f"FFmpeg 合成失败: {result.stderr}")
+
+    return output_path
+
+
+async def compose_vstack_async(
+    source_video: Path,
+    bar_video: Path,
+    output_path: Path,
+    config: CompositionConfig | None = None,
+    source_info: VideoInfo | None = None,
+) -> Path:
+    """
+    将 Bar 视频垂直堆叠到源视频上方或下方（异步版本）
+
+    FFmpeg 以非阻塞子进程执行，参数、返回值与异常同 compose_vstack()。
+    """
+    _check_inputs(source_video, bar_video)
+
+    config = config or CompositionConfig()
+    source_info = source_info or await probe_async(source_video)
+
+    cmd = _vstack_cmd(source_video, bar_video, output_path, config, source_info)
+    result = await run_process(cmd)
+
+    if result.returncode != 0:
+        raise RuntimeError(f"FFmpeg 合成失败: {result.stderr}")
+
+    return output_path
+
+
+def _check_inputs(source_video: Path, bar_video: Path) -> None:
+    """检查输入文件存在"""
     if not source_video.exists():
         raise FileNotFoundError(f"源视频不存在: {source_video}")
     if not bar_video.exists():
         raise FileNotFoundError(f"Bar 视频不存在: {bar_video}")
 
-    config = config or CompositionConfig()
-    source_info = probe(source_video)
 
+def _vstack_cmd(
+    source_video: Path,
+    bar_video: Path,
+    output_path: Path,
+    config: CompositionConfig,
+    source_info: VideoInfo,
+) -> list[str]:
+    """构建 vstack 合成命令"""
     # 构建 filter_complex
     # 1. 将 bar 缩放到源视频宽度
     # 2. 根据位置决定堆叠顺序
@@ -91,7 +157,7 @@ def compose_vstack(
         )
 
     # 构建 FFmpeg 命令
-    cmd = [
+    return [
         "ffmpeg",
         "-y",
         "-i",
@@ -104,26 +170,10 @@ def compose_vstack(
         "[out]",
         "-map",
         "0:a?",  # 保留源视频音频（如果有）
-        "-c:v",
-        "libx264",
-        "-crf",
-        "18",
-        "-preset",
-        "fast",
-        "-c:a",
-        "aac",
-        "-b:a",
-        "128k",
+        *ENCODE_ARGS,
         str(output_path),
     ]
 
-    result = subprocess.run(cmd, capture_output=True, text=True)
-
-    if result.returncode != 0:
-        raise RuntimeError(f"FFmpeg 合成失败: {result.stderr}")
-
-    return output_path
-
 
 def get_composed_dimensions(
     source_video: Path,
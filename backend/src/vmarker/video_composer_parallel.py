@@ -1,19 +1,20 @@
 """
-[INPUT]: 依赖 subprocess, asyncio, pathlib, video_probe, video_composer, os
+[INPUT]: 依赖 asyncio, pathlib, video_probe, video_composer, executor, os
 [OUTPUT]: 对外提供 ParallelConfig, compose_vstack_parallel()
-[POS]: 并行视频合成模块，将长视频分片并行处理后再拼接
+[POS]: 并行视频合成模块，将长视频分片（边界对齐关键帧）并行处理后再拼接
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
 import asyncio
+import bisect
 import os
-import subprocess
 from dataclasses import dataclass
 from dataclasses import field as dc_field
 from enum import Enum
 from pathlib import Path
 
-from vmarker.video_probe import probe
+from vmarker.executor import run_process
+from vmarker.video_probe import VideoInfo, keyframe_times, probe_async
 from vmarker.video_composer import OverlayPosition
 
 
@@ -112,13 +113,24 @@ class JobProgress:
 # =============================================================================
 
 
-def calculate_segments(duration: float, chunk_seconds: int) -> list[Segment]:
+MIN_SNAPPED_SECONDS = 1.0  # 对齐关键帧后分片的最短时长
+
+
+def calculate_segments(
+    duration: float,
+    chunk_seconds: int,
+    keyframes: list[float] | None = None,
+) -> list[Segment]:
     """
     计算视频分片
 
+    提供关键帧时间表时，分片边界对齐到不超过名义边界的最近关键帧，
+    分片起点无需解码前导帧。
+
     Args:
         duration: 视频总时长（秒）
         chunk_seconds: 每片时长（秒）
+        keyframes: 关键帧时间列表（升序，可选）
 
     Returns:
         Segment 列表
@@ -137,6 +149,8 @@ def calculate_segments(duration: float, chunk_seconds: int) -> list[Segment]:
         # 计算当前分片的时长（最后一片可能不足 chunk_seconds）
         remaining = duration - start
         segment_duration = min(chunk_seconds, remaining)
+        if keyframes and segment_duration < remaining:
+            segment_duration = _snap_to_keyframe(keyframes, start, start + segment_duration) - start
 
         segments.append(Segment(
             index=index,
@@ -150,13 +164,21 @@ def calculate_segments(duration: float, chunk_seconds: int) -> list[Segment]:
     return segments
 
 
+def _snap_to_keyframe(keyframes: list[float], start: float, boundary: float) -> float:
+    """取不超过 boundary 的最后一个关键帧，过于靠近 start 时保留原边界"""
+    idx = bisect.bisect_right(keyframes, boundary) - 1
+    if idx >= 0 and keyframes[idx] - start >= MIN_SNAPPED_SECONDS:
+        return keyframes[idx]
+    return boundary
+
+
 async def compose_segment(
     source_video: Path,
     bar_video: Path,
     segment: Segment,
     output_path: Path,
     config: ParallelConfig,
-    source_info: "VideoInfo",  # type: ignore
+    source_info: VideoInfo,
 ) -> Path:
     """
     合成单个分片
@@ -211,16 +233,10 @@ async def compose_segment(
     ]
 
     # 运行 FFmpeg
-    process = await asyncio.create_subprocess_exec(
-        *cmd,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-    )
+    result = await run_process(cmd)
 
-    _, stderr = await process.communicate()
-
-    if process.returncode != 0:
-        error_msg = stderr.decode("utf-8", errors="ignore")[-500:]  # 最后 500 字符
+    if result.returncode != 0:
+        error_msg = result.stderr[-500:]  # 最后 500 字符
         raise RuntimeError(f"FFmpeg 分片合成失败: {error_msg}")
 
     return output_path
@@ -232,7 +248,7 @@ async def compose_segments_parallel(
     segments: list[Segment],
     output_dir: Path,
     config: ParallelConfig,
-    source_info: "VideoInfo",  # type: ignore
+    source_info: VideoInfo,
 ) -> list[Path]:
     """
     并行合成所有分片
@@ -321,14 +337,9 @@ async def concat_segments(
             "-c", "copy",
             str(output_path),
         ]
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        _, stderr = await process.communicate()
+        result = await run_process(cmd)
 
-        if process.returncode == 0 and output_path.exists():
+        if result.returncode == 0 and output_path.exists():
             return output_path
 
     # 降级到重编码拼接
@@ -344,15 +355,10 @@ async def concat_segments(
         "-b:a", "128k",
         str(output_path),
     ]
-    process = await asyncio.create_subprocess_exec(
-        *cmd,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-    )
-    _, stderr = await process.communicate()
-
-    if process.returncode != 0:
-        error_msg = stderr.decode("utf-8", errors="ignore")[-500:]
+    result = await run_process(cmd)
+
+    if result.returncode != 0:
+        error_msg = result.stderr[-500:]
         raise RuntimeError(f"FFmpeg 拼接失败: {error_msg}")
 
     return output_path
@@ -373,6 +379,7 @@ async def compose_vstack_parallel(
     bar_video: Path,
     output_path: Path,
     config: ParallelConfig | None = None,
+    source_info: VideoInfo | None = None,
 ) -> Path:
     """
     并行合成视频（垂直堆叠 Bar）
@@ -388,6 +395,7 @@ async def compose_vstack_parallel(
         bar_video: Bar 视频路径
         output_path: 输出路径
         config: 并行配置
+        source_info: 已知的源视频信息（可选，不传则探测）
 
     Returns:
         输出文件路径
@@ -403,18 +411,21 @@ async def compose_vstack_parallel(
 
     config = config or ParallelConfig()
     async with _ACTIVE_JOB_SEMAPHORE:
-        source_info = probe(source_video)
+        source_info = source_info or await probe_async(source_video)
         if source_info.duration <= 0:
             raise RuntimeError(f"无效视频时长: {source_info.duration}")
 
         # 1. 计算分片
-        segments = calculate_segments(source_info.duration, config.chunk_seconds)
+        keyframes = await asyncio.to_thread(keyframe_times, source_video)
+        segments = calculate_segments(source_info.duration, config.chunk_seconds, keyframes)
 
         # 如果只有一个分片，直接使用原有串行逻辑
         if len(segments) == 1:
-            from vmarker.video_composer import compose_vstack, CompositionConfig
+            from vmarker.video_composer import compose_vstack_async, CompositionConfig
             serial_config = CompositionConfig(position=config.position)
-            return compose_vstack(source_video, bar_video, output_path, serial_config)
+            return await compose_vstack_async(
+                source_video, bar_video, output_path, serial_config, source_info
+            )
 
         # 用于追踪需要清理的分片文件
         segment_outputs: list[Path] = []
@@ -1,6 +1,6 @@
 """
 [INPUT]: 依赖 Pillow, subprocess (FFmpeg)
-[OUTPUT]: 对外提供 VideoEncoder, hex_to_rgba(), get_font()
+[OUTPUT]: 对外提供 VideoEncoder, ENCODE_ARGS, hex_to_rgba(), get_font()
 [POS]: 视频编码工具，被 chapter_bar 和未来的 progress_bar 消费
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
@@ -22,6 +22,19 @@ ProgressCallback = Callable[[int, int], None]
 FrameRenderer = Callable[[float], Image.Image]
 
 
+# =============================================================================
+#  编码参数
+# =============================================================================
+
+# 按输出格式区分的 FFmpeg 编码参数（也参与渲染缓存键计算）
+ENCODE_ARGS: dict[str, list[str]] = {
+    # MP4 (H.264) - 通用格式，浏览器兼容，文件小
+    "mp4": ["-c:v", "libx264", "-pix_fmt", "yuv420p", "-crf", "18", "-preset", "fast"],
+    # MOV (PNG codec) - 透明背景，专业剪辑
+    "mov": ["-c:v", "png", "-pix_fmt", "rgba"],
+}
+
+
 # =============================================================================
 #  颜色工具
 # =============================================================================
@@ -158,38 +171,16 @@ class VideoEncoder:
     ) -> None:
         """调用 FFmpeg 合成视频"""
         input_fps = self.fps if input_fps is None else input_fps
-        if format == "mp4":
-            # MP4 (H.264) - 通用格式，浏览器兼容，文件小
-            cmd = [
-                "ffmpeg",
-                "-y",
-                "-framerate", str(input_fps),
-                "-i", str(frames_dir / "frame_%06d.png"),
-            ]
-            if filter_arg:
-                cmd.extend(["-vf", filter_arg])
-            cmd += [
-                "-c:v", "libx264",
-                "-pix_fmt", "yuv420p",
-                "-crf", "18",
-                "-preset", "fast",
-                str(output_path),
-            ]
-        else:
-            # MOV (PNG codec) - 透明背景，专业剪辑
-            cmd = [
-                "ffmpeg",
-                "-y",
-                "-framerate", str(input_fps),
-                "-i", str(frames_dir / "frame_%06d.png"),
-            ]
-            if filter_arg:
-                cmd.extend(["-vf", filter_arg])
-            cmd += [
-                "-c:v", "png",
-                "-pix_fmt", "rgba",
-                str(output_path),
-            ]
+        cmd = [
+            "ffmpeg",
+            "-y",
+            "-framerate", str(input_fps),
+            "-i", str(frames_dir / "frame_%06d.png"),
+        ]
+        if filter_arg:
+            cmd.extend(["-vf", filter_arg])
+        cmd += ENCODE_ARGS["mp4" if format == "mp4" else "mov"]
+        cmd.append(str(output_path))
 
         result = subprocess.run(cmd, capture_output=True, text=True)
 
@@ -1,15 +1,25 @@
 """
-[INPUT]: 依赖 subprocess (FFprobe), json, pathlib
-[OUTPUT]: 对外提供 VideoInfo, probe(), validate_video()
-[POS]: 视频元数据探测模块，为视频上传和合成提供基础信息
+[INPUT]: 依赖 subprocess (FFprobe), json, os, pathlib, mmap, struct, executor
+[OUTPUT]: 对外提供 VideoInfo, probe(), probe_async(), validate_video(), validate_video_async(),
+          file_identity(), keyframe_times()
+[POS]: 视频元数据探测模块，为视频上传和合成提供基础信息；MP4/MOV 直接解析 moov 头，
+       其余格式走 FFprobe，结果按文件身份缓存
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
 import json
+import math
+import mmap
+import os
+import struct
 import subprocess
-from dataclasses import dataclass
+from collections import OrderedDict
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass, fields
 from pathlib import Path
 
+from vmarker.executor import run_process
+
 
 # =============================================================================
 #  数据模型
@@ -26,14 +36,85 @@ class VideoInfo:
     fps: float  # 帧率
     codec: str  # 编码格式
     file_size: int  # 文件大小（字节）
+    audio_codec: str | None = None  # 音频编码，无音轨为 None
+    pix_fmt: str | None = None  # 像素格式
+    keyframe_interval: float | None = None  # 平均关键帧间隔（秒），未知为 None
+    rotation: int = 0  # 显示旋转角度（0/90/180/270）
+
+    def to_dict(self) -> dict:
+        """转为可 JSON 序列化的字典"""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "VideoInfo":
+        """从字典恢复，忽略未知字段"""
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in names})
 
 
 # =============================================================================
 #  常量
 # =============================================================================
 
-DEFAULT_MAX_DURATION = 300  # 5 分钟
+
+def _parse_int_env(key: str, default: int) -> int:
+    """安全解析非负整数环境变量"""
+    value = os.getenv(key)
+    if value is None:
+        return default
+    try:
+        parsed = int(value)
+        return parsed if parsed >= 0 else default
+    except ValueError:
+        return default
+
+
+# ASR 分片并发转录后，上传时长不再受单次转录超时限制
+DEFAULT_MAX_DURATION = _parse_int_env("MAX_VIDEO_DURATION_SECONDS", 1800)  # 30 分钟
 DEFAULT_MAX_SIZE_MB = 500  # 500MB
+KEYFRAME_SCAN_SECONDS = 10  # 关键帧间隔只扫描开头这段时长的数据包
+PROBE_CACHE_SIZE = 256
+
+ISOBMFF_EXTENSIONS = {".mp4", ".mov", ".m4v"}  # 可直接解析 moov 的容器
+
+# 样本描述 fourcc → FFprobe 编码名
+_VIDEO_CODECS = {
+    b"avc1": "h264",
+    b"avc3": "h264",
+    b"hvc1": "hevc",
+    b"hev1": "hevc",
+    b"av01": "av1",
+    b"vp09": "vp9",
+    b"vp08": "vp8",
+    b"mp4v": "mpeg4",
+    b"apch": "prores",
+    b"apcn": "prores",
+    b"apcs": "prores",
+    b"apco": "prores",
+    b"ap4h": "prores",
+    b"ap4x": "prores",
+    b"png ": "png",
+    b"jpeg": "mjpeg",
+}
+# 色度格式 (0: 单色, 1: 4:2:0, 2: 4:2:2, 3: 4:4:4) -> FFmpeg 像素格式前缀
+_CHROMA_FORMATS = {0: "gray", 1: "yuv420p", 2: "yuv422p", 3: "yuv444p"}
+_AVC_HIGH_PROFILES = (100, 110, 122, 144)  # avcC 带色度/位深扩展字段的 profile
+_VISUAL_SAMPLE_ENTRY_SIZE = 86  # 视觉样本描述固定部分，其后为 avcC/hvcC 等子 box
+
+_AUDIO_CODECS = {
+    b"mp4a": "aac",
+    b"Opus": "opus",
+    b"ac-3": "ac3",
+    b"ec-3": "eac3",
+    b"fLaC": "flac",
+    b"alac": "alac",
+    b".mp3": "mp3",
+    b"sowt": "pcm_s16le",
+    b"twos": "pcm_s16be",
+}
+
+# 探测结果缓存：文件身份 → VideoInfo
+_PROBE_CACHE: OrderedDict[tuple[int, int, int, int], VideoInfo] = OrderedDict()
 
 
 # =============================================================================
@@ -41,12 +122,26 @@ DEFAULT_MAX_SIZE_MB = 500  # 500MB
 # =============================================================================
 
 
-def probe(video_path: Path) -> VideoInfo:
+def file_identity(video_path: Path) -> tuple[int, int, int, int]:
+    """
+    文件身份 (设备, inode, 大小, 修改时间)
+
+    同一内容的硬链接（如不同会话引用同一上传）身份相同，可共享探测结果。
+    """
+    stat = video_path.stat()
+    return (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+def probe(video_path: Path, *, use_cache: bool = True) -> VideoInfo:
     """
     探测视频元数据
 
+    MP4/MOV 优先直接解析 moov 头（无需启动进程），解析失败或其他容器回退到 FFprobe；
+    相同文件身份的结果会被缓存。
+
     Args:
         video_path: 视频文件路径
+        use_cache: 是否使用探测缓存
 
     Returns:
         VideoInfo 实例
@@ -59,7 +154,89 @@ def probe(video_path: Path) -> VideoInfo:
     if not video_path.exists():
         raise FileNotFoundError(f"视频文件不存在: {video_path}")
 
-    cmd = [
+    identity = file_identity(video_path)
+    info = _cached_or_native(video_path, identity, use_cache)
+    if info is None:
+        info = _probe_ffprobe(video_path)
+
+    return _remember(identity, info)
+
+
+async def probe_async(video_path: Path, *, use_cache: bool = True) -> VideoInfo:
+    """
+    探测视频元数据（异步版本，FFprobe 以非阻塞子进程执行）
+
+    参数、返回值与异常同 probe()。
+    """
+    if not video_path.exists():
+        raise FileNotFoundError(f"视频文件不存在: {video_path}")
+
+    identity = file_identity(video_path)
+    info = _cached_or_native(video_path, identity, use_cache)
+    if info is None:
+        info = await _probe_ffprobe_async(video_path)
+
+    return _remember(identity, info)
+
+
+def _cached_or_native(
+    video_path: Path,
+    identity: tuple[int, int, int, int],
+    use_cache: bool,
+) -> VideoInfo | None:
+    """依次尝试探测缓存与 moov 直接解析，都不可用时返回 None"""
+    if use_cache and identity in _PROBE_CACHE:
+        _PROBE_CACHE.move_to_end(identity)
+        return _PROBE_CACHE[identity]
+
+    if video_path.suffix.lower() in ISOBMFF_EXTENSIONS:
+        return _probe_isobmff(video_path)
+    return None
+
+
+def _remember(identity: tuple[int, int, int, int], info: VideoInfo) -> VideoInfo:
+    """写入探测缓存"""
+    _PROBE_CACHE[identity] = info
+    _PROBE_CACHE.move_to_end(identity)
+    if len(_PROBE_CACHE) > PROBE_CACHE_SIZE:
+        _PROBE_CACHE.popitem(last=False)
+    return info
+
+
+def keyframe_times(video_path: Path) -> list[float] | None:
+    """
+    读取 MP4/MOV 的关键帧时间表（秒）
+
+    Returns:
+        关键帧时间列表，非 ISO-BMFF 容器或解析失败时返回 None
+    """
+    if video_path.suffix.lower() not in ISOBMFF_EXTENSIONS:
+        return None
+    try:
+        with _map_file(video_path) as buf:
+            track = _find_video_track(buf)
+            if track is None:
+                return None
+            return _sync_sample_times(buf, track[1])
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def _probe_ffprobe(video_path: Path) -> VideoInfo:
+    """调用 FFprobe 探测"""
+    result = subprocess.run(_ffprobe_cmd(video_path), capture_output=True, text=True)
+    return _parse_ffprobe_result(result.returncode, result.stdout, result.stderr)
+
+
+async def _probe_ffprobe_async(video_path: Path) -> VideoInfo:
+    """以非阻塞子进程调用 FFprobe 探测"""
+    result = await run_process(_ffprobe_cmd(video_path))
+    return _parse_ffprobe_result(result.returncode, result.stdout, result.stderr)
+
+
+def _ffprobe_cmd(video_path: Path) -> list[str]:
+    """FFprobe 命令（一次调用同时读取开头数据包以估算关键帧间隔）"""
+    return [
         "ffprobe",
         "-v",
         "quiet",
@@ -67,16 +244,21 @@ def probe(video_path: Path) -> VideoInfo:
         "json",
         "-show_format",
         "-show_streams",
+        "-show_entries",
+        "packet=stream_index,pts_time,flags",
+        "-read_intervals",
+        f"%+{KEYFRAME_SCAN_SECONDS}",
         str(video_path),
     ]
 
-    result = subprocess.run(cmd, capture_output=True, text=True)
 
-    if result.returncode != 0:
-        raise RuntimeError(f"FFprobe 执行失败: {result.stderr}")
+def _parse_ffprobe_result(returncode: int, stdout: str, stderr: str) -> VideoInfo:
+    """解析 FFprobe 输出"""
+    if returncode != 0:
+        raise RuntimeError(f"FFprobe 执行失败: {stderr}")
 
     try:
-        data = json.loads(result.stdout)
+        data = json.loads(stdout)
     except json.JSONDecodeError as e:
         raise ValueError(f"无法解析 FFprobe 输出: {e}") from e
 
@@ -89,6 +271,11 @@ def probe(video_path: Path) -> VideoInfo:
     if not video_stream:
         raise ValueError("未找到视频流")
 
+    audio_stream = next(
+        (s for s in data.get("streams", []) if s.get("codec_type") == "audio"),
+        None,
+    )
+
     # 解析帧率 (如 "30/1" 或 "29.97")
     fps = _parse_frame_rate(video_stream.get("r_frame_rate", "30/1"))
 
@@ -102,6 +289,10 @@ def probe(video_path: Path) -> VideoInfo:
         fps=fps,
         codec=video_stream.get("codec_name", "unknown"),
         file_size=int(data["format"].get("size", 0)),
+        audio_codec=audio_stream.get("codec_name") if audio_stream else None,
+        pix_fmt=video_stream.get("pix_fmt"),
+        keyframe_interval=_parse_keyframe_interval(data, video_stream.get("index", 0)),
+        rotation=_parse_rotation(video_stream),
     )
 
 
@@ -115,7 +306,7 @@ def validate_video(
 
     Args:
         video_path: 视频路径
-        max_duration: 最大时长（秒），默认 5 分钟
+        max_duration: 最大时长（秒），默认 30 分钟（MAX_VIDEO_DURATION_SECONDS）
         max_size_mb: 最大文件大小（MB），默认 500MB
 
     Returns:
@@ -125,7 +316,23 @@ def validate_video(
         ValueError: 视频不满足限制条件
     """
     info = probe(video_path)
+    _check_limits(info, max_duration, max_size_mb)
+    return info
+
+
+async def validate_video_async(
+    video_path: Path,
+    max_duration: float = DEFAULT_MAX_DURATION,
+    max_size_mb: float = DEFAULT_MAX_SIZE_MB,
+) -> VideoInfo:
+    """验证视频是否满足限制条件（异步版本），参数同 validate_video()"""
+    info = await probe_async(video_path)
+    _check_limits(info, max_duration, max_size_mb)
+    return info
 
+
+def _check_limits(info: VideoInfo, max_duration: float, max_size_mb: float) -> None:
+    """检查时长与大小限制"""
     if info.duration > max_duration:
         raise ValueError(
             f"视频时长 {info.duration:.1f}s 超出限制 {max_duration}s (约 {max_duration / 60:.0f} 分钟)"
@@ -137,7 +344,292 @@ def validate_video(
             f"文件大小 {info.file_size / 1024 / 1024:.1f}MB 超出限制 {max_size_mb}MB"
         )
 
-    return info
+
+# =============================================================================
+#  ISO-BMFF (MP4/MOV) 解析
+# =============================================================================
+
+
+def _map_file(path: Path) -> mmap.mmap:
+    """只读内存映射文件"""
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _iter_boxes(buf, start: int, end: int) -> Iterator[tuple[bytes, int, int]]:
+    """遍历 [start, end) 内的 box，产出 (类型, 内容起点, box 终点)"""
+    pos = start
+    while pos + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", buf, pos)
+        header = 8
+        if size == 1:
+            (size,) = struct.unpack_from(">Q", buf, pos + 8)
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            raise ValueError(f"box 越界: {box_type!r}")
+        yield box_type, pos + header, pos + size
+        pos += size
+
+
+def _find_box(buf, start: int, end: int, path: tuple[bytes, ...]) -> tuple[int, int] | None:
+    """按路径查找子 box，返回其内容范围"""
+    for box_type, body, box_end in _iter_boxes(buf, start, end):
+        if box_type == path[0]:
+            if len(path) == 1:
+                return body, box_end
+            return _find_box(buf, body, box_end, path[1:])
+    return None
+
+
+def _read_full_box_times(buf, body: int) -> tuple[int, int]:
+    """读取 mvhd/mdhd 的 (timescale, duration)，兼容 version 0/1"""
+    version = buf[body]
+    if version == 1:
+        return struct.unpack_from(">IQ", buf, body + 20)
+    return struct.unpack_from(">II", buf, body + 12)
+
+
+def _handler_type(buf, mdia: tuple[int, int]) -> bytes | None:
+    hdlr = _find_box(buf, *mdia, (b"hdlr",))
+    return bytes(buf[hdlr[0] + 8:hdlr[0] + 12]) if hdlr else None
+
+
+def _sample_entry(buf, stbl: tuple[int, int]) -> tuple[bytes, int] | None:
+    """读取 stsd 中第一个样本描述，返回 (fourcc, 描述起点)"""
+    stsd = _find_box(buf, *stbl, (b"stsd",))
+    if stsd is None or stsd[0] + 16 > stsd[1]:
+        return None
+    entry = stsd[0] + 8
+    return bytes(buf[entry + 4:entry + 8]), entry
+
+
+def _find_video_track(buf) -> tuple[tuple[int, int], tuple[int, int]] | None:
+    """查找第一条视频轨，返回 (trak 范围, mdia 范围)"""
+    moov = _find_box(buf, 0, len(buf), (b"moov",))
+    if moov is None:
+        return None
+    for box_type, body, box_end in _iter_boxes(buf, *moov):
+        if box_type != b"trak":
+            continue
+        mdia = _find_box(buf, body, box_end, (b"mdia",))
+        if mdia and _handler_type(buf, mdia) == b"vide":
+            return (body, box_end), mdia
+    return None
+
+
+def _read_stts(buf, stbl: tuple[int, int]) -> list[tuple[int, int]]:
+    """读取 stts 条目 [(样本数, 时长增量)]"""
+    stts = _find_box(buf, *stbl, (b"stts",))
+    if stts is None:
+        return []
+    (count,) = struct.unpack_from(">I", buf, stts[0] + 4)
+    return [struct.unpack_from(">II", buf, stts[0] + 8 + i * 8) for i in range(count)]
+
+
+def _sync_sample_times(buf, mdia: tuple[int, int]) -> list[float] | None:
+    """根据 stss + stts 计算关键帧时间；无 stss 表示每帧都是关键帧"""
+    mdhd = _find_box(buf, *mdia, (b"mdhd",))
+    stbl = _find_box(buf, *mdia, (b"minf", b"stbl"))
+    if mdhd is None or stbl is None:
+        return None
+    timescale, _ = _read_full_box_times(buf, mdhd[0])
+    stts = _read_stts(buf, stbl)
+    if not timescale or not stts:
+        return None
+
+    stss = _find_box(buf, *stbl, (b"stss",))
+    if stss is None:
+        samples = None
+    else:
+        (count,) = struct.unpack_from(">I", buf, stss[0] + 4)
+        samples = struct.unpack_from(f">{count}I", buf, stss[0] + 8)
+
+    # 逐段累加解码时间，sample 编号从 1 开始
+    times: list[float] = []
+    wanted = iter(samples) if samples is not None else None
+    target = next(wanted, None) if wanted is not None else 1
+    sample_no, ticks = 1, 0
+    for sample_count, delta in stts:
+        run_end = sample_no + sample_count
+        while target is not None and target < run_end:
+            times.append((ticks + (target - sample_no) * delta) / timescale)
+            target = next(wanted, None) if wanted is not None else target + 1
+        ticks += sample_count * delta
+        sample_no = run_end
+
+    return times
+
+
+def _tkhd_rotation(buf, trak: tuple[int, int]) -> int:
+    """从 tkhd 变换矩阵计算旋转角度"""
+    tkhd = _find_box(buf, *trak, (b"tkhd",))
+    if tkhd is None:
+        return 0
+    matrix = tkhd[0] + (52 if buf[tkhd[0]] == 1 else 40)
+    a, b = struct.unpack_from(">ii", buf, matrix)
+    return int(round(math.degrees(math.atan2(b, a)))) % 360
+
+
+def _probe_isobmff(video_path: Path) -> VideoInfo | None:
+    """
+    直接解析 MP4/MOV 的 moov 头获取元数据
+
+    Returns:
+        VideoInfo 实例；缺少必要信息（如分片 MP4、未知编码）时返回 None
+    """
+    try:
+        with _map_file(video_path) as buf:
+            moov = _find_box(buf, 0, len(buf), (b"moov",))
+            mvhd = _find_box(buf, *moov, (b"mvhd",)) if moov else None
+            track = _find_video_track(buf)
+            if mvhd is None or track is None:
+                return None
+
+            timescale, duration = _read_full_box_times(buf, mvhd[0])
+            if not timescale or not duration:
+                return None
+
+            trak, mdia = track
+            stbl = _find_box(buf, *mdia, (b"minf", b"stbl"))
+            mdhd = _find_box(buf, *mdia, (b"mdhd",))
+            if stbl is None or mdhd is None:
+                return None
+
+            entry = _sample_entry(buf, stbl)
+            codec = _VIDEO_CODECS.get(entry[0]) if entry else None
+            stts = _read_stts(buf, stbl)
+            track_timescale, _ = _read_full_box_times(buf, mdhd[0])
+            if codec is None or not stts or not track_timescale:
+                return None
+
+            # 视觉样本描述中的编码尺寸（与 FFprobe 的 width/height 一致）
+            width, height = struct.unpack_from(">HH", buf, entry[1] + 32)
+
+            # 帧率取占比最大的样本时长，与 FFprobe r_frame_rate 一致
+            _, main_delta = max(stts)
+            fps = track_timescale / main_delta if main_delta else 0.0
+            keyframes = _sync_sample_times(buf, mdia)
+
+            return VideoInfo(
+                duration=duration / timescale,
+                width=width,
+                height=height,
+                fps=fps,
+                codec=codec,
+                file_size=video_path.stat().st_size,
+                audio_codec=_audio_codec(buf, moov),
+                keyframe_interval=_average_interval(keyframes) if keyframes else None,
+                rotation=_tkhd_rotation(buf, trak),
+                pix_fmt=_pix_fmt(buf, entry[1], codec),
+            )
+    except (OSError, ValueError, IndexError, struct.error):
+        return None
+
+
+def _pix_fmt(buf, entry: int, codec: str) -> str | None:
+    """
+    从编码配置 box 推导像素格式（与 FFprobe 的 pix_fmt 命名一致）
+
+    支持 avcC / hvcC / av1C / vpcC；其他编码或字段缺失时返回 None。
+    """
+    (entry_size,) = struct.unpack_from(">I", buf, entry)
+    children = {
+        box_type: (body, box_end)
+        for box_type, body, box_end in _iter_boxes(
+            buf, entry + _VISUAL_SAMPLE_ENTRY_SIZE, entry + entry_size
+        )
+    }
+
+    if b"avcC" in children:
+        chroma_depth = _avcc_chroma_depth(buf, *children[b"avcC"])
+    elif b"hvcC" in children:
+        body, _ = children[b"hvcC"]
+        chroma_depth = buf[body + 16] & 0x03, (buf[body + 17] & 0x07) + 8
+    elif b"av1C" in children:
+        body, _ = children[b"av1C"]
+        chroma_depth = _av1c_chroma_depth(buf[body + 2])
+    elif b"vpcC" in children:
+        body, _ = children[b"vpcC"]
+        chroma_depth = _vpcc_chroma_depth(buf, body)
+    else:
+        return None
+    if chroma_depth is None:
+        return None
+
+    chroma, depth = chroma_depth
+    name = _CHROMA_FORMATS[chroma]
+    if depth > 8:
+        return f"{name}{depth}le"
+    if codec == "h264" and chroma and _full_range(buf, children.get(b"colr")):
+        # FFmpeg 的 H.264 解码器以 yuvj* 表示全范围 8 位格式
+        return name.replace("yuv", "yuvj")
+    return name
+
+
+def _avcc_chroma_depth(buf, body: int, end: int) -> tuple[int, int] | None:
+    """读取 avcC 的 (色度格式, 位深)；非 High 系列 profile 固定为 4:2:0 8 位"""
+    profile = buf[body + 1]
+    if profile not in _AVC_HIGH_PROFILES:
+        return 1, 8
+
+    # 跳过 SPS / PPS 参数集，其后才是色度与位深字段
+    pos = body + 5
+    for count_mask in (0x1F, 0xFF):
+        count = buf[pos] & count_mask
+        pos += 1
+        for _ in range(count):
+            (length,) = struct.unpack_from(">H", buf, pos)
+            pos += 2 + length
+
+    if pos + 2 > end:
+        # 部分封装器省略扩展字段：High profile 只能是 4:2:0 8 位，其余无法确定
+        return (1, 8) if profile == 100 else None
+    return buf[pos] & 0x03, (buf[pos + 1] & 0x07) + 8
+
+
+def _av1c_chroma_depth(flags: int) -> tuple[int, int]:
+    """读取 av1C 第 3 字节 (high_bitdepth, twelve_bit, monochrome, subsampling_x/y)"""
+    high_bitdepth, twelve_bit = flags & 0x40, flags & 0x20
+    depth = (12 if twelve_bit else 10) if high_bitdepth else 8
+    if flags & 0x10:
+        return 0, depth
+    subsampling_x, subsampling_y = flags & 0x08, flags & 0x04
+    return (1 if subsampling_y else 2) if subsampling_x else 3, depth
+
+
+def _vpcc_chroma_depth(buf, body: int) -> tuple[int, int] | None:
+    """读取 vpcC (version 1) 的位深与色度采样"""
+    if buf[body] != 1:
+        return None
+    value = buf[body + 6]
+    subsampling = value >> 1 & 0x07  # 0/1: 4:2:0, 2: 4:2:2, 3: 4:4:4
+    return (subsampling if subsampling in (2, 3) else 1), value >> 4
+
+
+def _full_range(buf, colr: tuple[int, int] | None) -> bool:
+    """colr (nclx) 中的 full_range_flag"""
+    if colr is None:
+        return False
+    body, end = colr
+    return end - body >= 11 and bytes(buf[body:body + 4]) == b"nclx" and bool(buf[body + 10] & 0x80)
+
+
+def _audio_codec(buf, moov: tuple[int, int]) -> str | None:
+    """读取第一条音频轨的编码"""
+    for box_type, body, box_end in _iter_boxes(buf, *moov):
+        if box_type != b"trak":
+            continue
+        mdia = _find_box(buf, body, box_end, (b"mdia",))
+        if mdia is None or _handler_type(buf, mdia) != b"soun":
+            continue
+        stbl = _find_box(buf, *mdia, (b"minf", b"stbl"))
+        entry = _sample_entry(buf, stbl) if stbl else None
+        if entry is None:
+            return None
+        return _AUDIO_CODECS.get(entry[0], entry[0].decode("latin-1").strip())
+    return None
 
 
 # =============================================================================
@@ -183,3 +675,40 @@ def _parse_duration(data: dict, video_stream: dict) -> float:
             pass
 
     raise ValueError("无法确定视频时长")
+
+
+def _parse_keyframe_interval(data: dict, stream_index: int) -> float | None:
+    """从数据包标记估算平均关键帧间隔"""
+    times: list[float] = []
+    for packet in data.get("packets", []):
+        if packet.get("stream_index") != stream_index or "K" not in packet.get("flags", ""):
+            continue
+        try:
+            times.append(float(packet["pts_time"]))
+        except (KeyError, ValueError, TypeError):
+            continue
+
+    return _average_interval(times)
+
+
+def _average_interval(times: list[float]) -> float | None:
+    """计算时间点序列的平均间隔，少于两个点时返回 None"""
+    if len(times) < 2:
+        return None
+    times = sorted(times)
+    return (times[-1] - times[0]) / (len(times) - 1)
+
+
+def _parse_rotation(video_stream: dict) -> int:
+    """解析显示旋转角度（Display Matrix 优先，其次 rotate 标签）"""
+    for side_data in video_stream.get("side_data_list", []):
+        if "rotation" in side_data:
+            try:
+                return int(round(-float(side_data["rotation"]))) % 360
+            except (ValueError, TypeError):
+                break
+
+    try:
+        return int(video_stream.get("tags", {}).get("rotate", 0)) % 360
+    except (ValueError, TypeError):
+        return 0
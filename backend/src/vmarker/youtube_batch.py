@@ -0,0 +1,167 @@
+"""
+[INPUT]: 依赖 asyncio, os, dataclasses, ai_client, chapter_bar, models, youtube_transcript
+[OUTPUT]: 对外提供 BatchItem, generate_chapters_batch(), format_youtube_chapters(), MAX_BATCH_URLS
+[POS]: YouTube 批量章节生成：字幕获取（有界并发 + 限流）与 AI 分段（独立并发上限）流水线执行，
+       每个视频完成即产出，单个链接失败不影响其余链接；API 批量路由与 CLI 共用
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+import os
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+
+from vmarker import chapter_bar
+from vmarker.ai_client import RateLimiter
+from vmarker.models import Chapter, ChapterList
+from vmarker.youtube_transcript import YouTubeTranscriptInfo, get_transcript_async
+
+# =============================================================================
+#  辅助函数
+# =============================================================================
+
+
+def _parse_int_env(key: str, default: int) -> int:
+    """安全解析正整数环境变量"""
+    value = os.getenv(key)
+    if value is None:
+        return default
+    try:
+        parsed = int(value)
+        return parsed if parsed > 0 else default
+    except ValueError:
+        return default
+
+
+def _parse_float_env(key: str, default: float) -> float:
+    """安全解析非负浮点数环境变量"""
+    value = os.getenv(key)
+    if value is None:
+        return default
+    try:
+        parsed = float(value)
+        return parsed if parsed >= 0 else default
+    except ValueError:
+        return default
+
+
+# =============================================================================
+#  环境变量配置
+# =============================================================================
+
+# 同时获取字幕的视频数
+DEFAULT_FETCH_CONCURRENCY = _parse_int_env("YOUTUBE_BATCH_FETCH_CONCURRENCY", 4)
+# 同时进行 AI 分段的视频数
+DEFAULT_AI_CONCURRENCY = _parse_int_env("YOUTUBE_BATCH_AI_CONCURRENCY", 2)
+# 每分钟访问 YouTube 的字幕请求上限，0 表示不限流
+DEFAULT_FETCH_RPM = _parse_float_env("YOUTUBE_TRANSCRIPT_RPM", 30)
+MAX_BATCH_URLS = 100  # 单次批量请求的链接数上限
+
+
+# =============================================================================
+#  数据模型
+# =============================================================================
+
+
+@dataclass
+class BatchItem:
+    """单个视频的批量处理结果（成功时 chapters 非空，失败时 error 非空）"""
+
+    index: int  # 在输入列表中的位置
+    url: str
+    info: YouTubeTranscriptInfo | None = None
+    chapters: ChapterList | None = None
+    error: str | None = None
+
+
+# =============================================================================
+#  核心函数
+# =============================================================================
+
+
+async def generate_chapters_batch(
+    urls: list[str],
+    *,
+    api_key: str,
+    api_base: str = "https://api.openai.com/v1",
+    model: str = "gpt-4o-mini",
+    fetch_concurrency: int = DEFAULT_FETCH_CONCURRENCY,
+    ai_concurrency: int = DEFAULT_AI_CONCURRENCY,
+    fetch_rpm: float = DEFAULT_FETCH_RPM,
+) -> AsyncIterator[BatchItem]:
+    """
+    批量生成 YouTube 章节
+
+    每个链接依次经过字幕获取与 AI 分段两个阶段，两个阶段各自限制并发：
+    某个视频进入 AI 分段后立即释放字幕获取名额，后续视频的字幕获取与之重叠。
+    结果按完成顺序产出（以 index 对应输入位置）；迭代提前结束时取消未完成的视频。
+
+    Args:
+        urls: YouTube 链接列表
+        api_key: API 密钥
+        api_base: API 基础 URL
+        model: 模型名称
+        fetch_concurrency: 同时获取字幕的视频数
+        ai_concurrency: 同时进行 AI 分段的视频数
+        fetch_rpm: 每分钟访问 YouTube 的字幕请求上限（缓存命中不计），0 表示不限流
+
+    Yields:
+        BatchItem，每个链接恰好一个
+    """
+    fetch_slots = asyncio.Semaphore(max(1, fetch_concurrency))
+    ai_slots = asyncio.Semaphore(max(1, ai_concurrency))
+    limiter = RateLimiter(fetch_rpm)
+    done: asyncio.Queue[BatchItem] = asyncio.Queue()
+
+    async def run(index: int, url: str) -> None:
+        item = BatchItem(index=index, url=url)
+        try:
+            async with fetch_slots:
+                item.info = await get_transcript_async(url, limiter=limiter)
+            async with ai_slots:
+                try:
+                    item.chapters = await chapter_bar.extract_ai(
+                        item.info.subtitles,
+                        item.info.duration,
+                        api_key=api_key,
+                        api_base=api_base,
+                        model=model,
+                    )
+                except Exception as e:
+                    item.error = f"AI 分段失败: {e}"
+        except (ValueError, RuntimeError) as e:
+            item.error = str(e)
+        except Exception as e:
+            item.error = f"处理失败: {e}"
+        done.put_nowait(item)
+
+    tasks = [asyncio.create_task(run(i, url)) for i, url in enumerate(urls)]
+    try:
+        for _ in tasks:
+            yield await done.get()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def format_youtube_chapters(chapters: list[Chapter]) -> str:
+    """格式化为 YouTube Description 时间戳格式"""
+    return "\n".join(f"{_format_timestamp(ch.start_time)} {ch.title}" for ch in chapters)
+
+
+# =============================================================================
+#  辅助函数
+# =============================================================================
+
+
+def _format_timestamp(seconds: float) -> str:
+    """将秒数格式化为 YouTube 时间戳"""
+    total_seconds = int(seconds)
+    hours = total_seconds // 3600
+    minutes = (total_seconds % 3600) // 60
+    secs = total_seconds % 60
+
+    if hours > 0:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes}:{secs:02d}"
@@ -1,12 +1,16 @@
 """
-[INPUT]: 依赖 yt-dlp, pathlib, re
-[OUTPUT]: 对外提供 YouTubeInfo, download_audio(), validate_youtube_url()
-[POS]: YouTube 音频下载模块，仅下载音轨以加快处理速度
+[INPUT]: 依赖 yt-dlp, pathlib, re, os, time
+[OUTPUT]: 对外提供 YouTubeInfo, AudioStream, AUDIO_MODES, download_audio(), resolve_audio_stream(),
+          validate_youtube_url()
+[POS]: YouTube 音频下载模块，仅下载体积最小的音轨；默认保留原始音频流（必要时只换封装），
+       下载与后处理分别计时
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
+import os
 import re
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
 
 import yt_dlp
@@ -23,6 +27,23 @@ YOUTUBE_URL_PATTERN = re.compile(
     r"[\w-]+"
 )
 
+# native: 保留原始音频流，ASR 上传不识别的封装（WebM）只换封装为 ogg，不重新编码
+# transcode: 转码为 128k m4a（旧行为）
+AUDIO_MODES = ("native", "transcode")
+REMUX_MAPPING = "webm>ogg/mp4>m4a"  # yt-dlp 映射语法：源扩展名>目标扩展名
+AUDIO_FORMAT = "bestaudio[vcodec=none]/bestaudio/best"
+AUDIO_FORMAT_SORT = ["+size", "+abr"]  # 排序靠前者优先：体积最小、码率最低（语音识别不需要高码率）
+AUDIO_EXTENSIONS = ("m4a", "ogg", "mp3", "webm", "opus")
+
+
+def _parse_mode_env(key: str, default: str) -> str:
+    """解析音频模式环境变量，无效值回退默认"""
+    value = os.getenv(key, default).strip().lower()
+    return value if value in AUDIO_MODES else default
+
+
+DEFAULT_AUDIO_MODE = _parse_mode_env("YOUTUBE_AUDIO_MODE", "native")
+
 
 # =============================================================================
 #  数据模型
@@ -36,6 +57,18 @@ class YouTubeInfo:
     title: str
     duration: float  # 秒
     audio_path: Path
+    # 各阶段耗时（秒）：info / download / postprocess
+    timings: dict[str, float] = field(default_factory=dict)
+
+
+@dataclass
+class AudioStream:
+    """可直接读取的音频流地址（供 FFmpeg 边下载边处理）"""
+
+    title: str
+    duration: float  # 秒
+    url: str
+    headers: dict[str, str]  # 访问 url 需要携带的请求头
 
 
 # =============================================================================
@@ -48,62 +81,137 @@ def validate_youtube_url(url: str) -> bool:
     return bool(YOUTUBE_URL_PATTERN.match(url.strip()))
 
 
-def download_audio(url: str, output_dir: Path) -> YouTubeInfo:
+def download_audio(url: str, output_dir: Path, mode: str = DEFAULT_AUDIO_MODE) -> YouTubeInfo:
     """
     下载 YouTube 视频的音频轨
 
+    只解析一次视频信息：检查时长后直接用同一份信息下载，不再重复请求 YouTube。
+
     Args:
         url: YouTube 视频 URL
         output_dir: 输出目录
+        mode: AUDIO_MODES 中的音频处理方式
 
     Returns:
-        YouTubeInfo 包含标题、时长和音频路径
+        YouTubeInfo 包含标题、时长、音频路径和各阶段耗时
 
     Raises:
-        ValueError: URL 格式无效或视频超时长
+        ValueError: URL 格式无效、视频超时长或模式无效
         RuntimeError: 下载失败（私有视频、不存在等）
     """
     if not validate_youtube_url(url):
         raise ValueError("无效的 YouTube 链接")
+    if mode not in AUDIO_MODES:
+        raise ValueError(f"不支持的音频模式: {mode}")
 
     output_dir.mkdir(parents=True, exist_ok=True)
-    output_template = str(output_dir / "%(id)s.%(ext)s")
+    marks: dict[str, float] = {}
+
+    def on_progress(status: dict) -> None:
+        if status.get("status") == "finished":
+            marks["downloaded"] = time.monotonic()
 
     ydl_opts = {
-        "format": "bestaudio/best",
-        "outtmpl": output_template,
+        **_audio_options(mode),
+        "outtmpl": str(output_dir / "%(id)s.%(ext)s"),
         "quiet": True,
         "no_warnings": True,
         "extract_flat": False,
-        "postprocessors": [
-            {
-                "key": "FFmpegExtractAudio",
-                "preferredcodec": "m4a",
-                "preferredquality": "128",
-            }
-        ],
+        "progress_hooks": [on_progress],
     }
 
     try:
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=False)
+            start = time.monotonic()
+            info = ydl.extract_info(url, download=False, process=False)
             title, duration, video_id = _extract_video_info(info)
             _check_duration(duration)
 
-            ydl.download([url])
+            fetched = time.monotonic()
+            ydl.process_ie_result(info, download=True)
+            finished = time.monotonic()
             audio_path = _find_audio_file(output_dir, video_id)
 
-            return YouTubeInfo(title=title, duration=duration, audio_path=audio_path)
+    except yt_dlp.utils.DownloadError as e:
+        raise RuntimeError(_parse_download_error(str(e))) from e
+
+    downloaded = marks.get("downloaded", finished)
+    timings = {
+        "info": round(fetched - start, 3),
+        "download": round(downloaded - fetched, 3),
+        "postprocess": round(finished - downloaded, 3),
+    }
+    return YouTubeInfo(title=title, duration=duration, audio_path=audio_path, timings=timings)
+
+
+def resolve_audio_stream(url: str) -> AudioStream:
+    """
+    解析体积最小的音频流地址，不下载
+
+    Args:
+        url: YouTube 视频 URL
+
+    Returns:
+        AudioStream 包含标题、时长、流地址和请求头
+
+    Raises:
+        ValueError: URL 格式无效或视频超时长
+        RuntimeError: 解析失败（私有视频、不存在等）
+    """
+    if not validate_youtube_url(url):
+        raise ValueError("无效的 YouTube 链接")
 
+    ydl_opts = {
+        "format": AUDIO_FORMAT,
+        "format_sort": AUDIO_FORMAT_SORT,
+        "quiet": True,
+        "no_warnings": True,
+    }
+
+    try:
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(url, download=False)
     except yt_dlp.utils.DownloadError as e:
         raise RuntimeError(_parse_download_error(str(e))) from e
 
+    title, duration, _ = _extract_video_info(info)
+    _check_duration(duration)
+    if not info.get("url"):
+        raise RuntimeError("未找到可直接读取的音频流")
+
+    return AudioStream(
+        title=title,
+        duration=duration,
+        url=info["url"],
+        headers=dict(info.get("http_headers") or {}),
+    )
+
 
 # =============================================================================
 #  辅助函数
 # =============================================================================
 
 
+def _audio_options(mode: str) -> dict:
+    """按音频模式生成 yt-dlp 格式选择与后处理选项"""
+    if mode == "transcode":
+        return {
+            "format": "bestaudio/best",
+            "postprocessors": [
+                {
+                    "key": "FFmpegExtractAudio",
+                    "preferredcodec": "m4a",
+                    "preferredquality": "128",
+                }
+            ],
+        }
+    return {
+        "format": AUDIO_FORMAT,
+        "format_sort": AUDIO_FORMAT_SORT,
+        "postprocessors": [{"key": "FFmpegVideoRemuxer", "preferedformat": REMUX_MAPPING}],
+    }
+
+
 def _extract_video_info(info: dict) -> tuple[str, float, str]:
     """从 yt-dlp info dict 提取视频信息"""
     title = info.get("title", "未知标题")
@@ -121,7 +229,7 @@ def _check_duration(duration: float) -> None:
 
 def _find_audio_file(output_dir: Path, video_id: str) -> Path:
     """查找下载的音频文件"""
-    for ext in ("m4a", "mp3", "webm", "opus"):
+    for ext in AUDIO_EXTENSIONS:
         audio_path = output_dir / f"{video_id}.{ext}"
         if audio_path.exists():
             return audio_path
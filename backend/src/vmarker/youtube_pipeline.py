@@ -0,0 +1,200 @@
+"""
+[INPUT]: 依赖 asyncio, os, shutil, time, uuid, pathlib, asr, executor, http_pool, parser,
+         youtube_downloader
+[OUTPUT]: 对外提供 StreamedTranscript, transcribe_youtube(), SEGMENT_SECONDS, STREAMING_ENABLED
+[POS]: YouTube 流式转录流水线：FFmpeg 边下载边编码并按固定时长切分音频，
+       每个分片写完即并发转录，下载与 ASR 重叠，总耗时接近 max(下载, ASR) 而非两者之和
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+import os
+import shutil
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from vmarker import http_pool
+from vmarker.asr import AUDIO_FORMATS, AUDIO_SAMPLE_RATE, ASRConfig, stitch_srt, transcribe_file
+from vmarker.executor import run_io, run_process
+from vmarker.models import SubtitleFile
+from vmarker.parser import parse_srt
+from vmarker.youtube_downloader import AudioStream, resolve_audio_stream
+
+# =============================================================================
+#  辅助函数
+# =============================================================================
+
+
+def _parse_int_env(key: str, default: int) -> int:
+    """安全解析正整数环境变量"""
+    value = os.getenv(key)
+    if value is None:
+        return default
+    try:
+        parsed = int(value)
+        return parsed if parsed > 0 else default
+    except ValueError:
+        return default
+
+
+# =============================================================================
+#  常量
+# =============================================================================
+
+# 分片时长：越短首个分片越早开始转录，但切点处断句的机会越多（边下载边切分无法预先检测静音）
+SEGMENT_SECONDS = _parse_int_env("YOUTUBE_SEGMENT_SECONDS", 180)
+STREAMING_ENABLED = os.getenv("YOUTUBE_STREAMING_ASR", "1") != "0"  # 关闭时先完整下载再转录
+POLL_INTERVAL = 0.2  # 检查分片列表的间隔（秒）
+SEGMENT_LIST = "segments.csv"
+
+
+# =============================================================================
+#  数据模型
+# =============================================================================
+
+
+@dataclass
+class StreamedTranscript:
+    """流式转录结果"""
+
+    title: str
+    duration: float  # 秒
+    subtitles: SubtitleFile
+    # 各阶段耗时（秒）：resolve / first_segment / download / asr
+    timings: dict[str, float] = field(default_factory=dict)
+
+
+# =============================================================================
+#  核心函数
+# =============================================================================
+
+
+async def transcribe_youtube(
+    url: str,
+    work_dir: Path,
+    config: ASRConfig,
+    pool: http_pool.HTTPPool | None = None,
+    segment_seconds: int = SEGMENT_SECONDS,
+) -> StreamedTranscript:
+    """
+    边下载边转录 YouTube 音频
+
+    FFmpeg 直接读取音频流，编码为 config.audio_format 并用 segment 封装器按固定时长切分，
+    分片列表每写完一个分片追加一行；流水线轮询列表，新分片立即转录（最多 config.concurrency 个），
+    最后按分片起点偏移时间拼接。任一步失败时终止下载并取消其余转录。
+
+    Args:
+        url: YouTube 视频 URL
+        work_dir: 工作目录（分片写在其下的临时子目录，结束后删除）
+        config: ASR 配置
+        pool: 连接池（可选，默认使用应用级连接池）
+        segment_seconds: 分片时长（秒）
+
+    Returns:
+        StreamedTranscript 包含标题、时长、字幕和各阶段耗时
+
+    Raises:
+        ValueError: URL 无效或视频超时长
+        RuntimeError: 解析或下载失败
+        httpx.HTTPStatusError: ASR 请求失败
+    """
+    start = time.monotonic()
+    stream = await run_io(resolve_audio_stream, url)
+    resolved = time.monotonic()
+
+    segment_dir = work_dir / f".stream-{uuid.uuid4().hex[:8]}"
+    segment_dir.mkdir(parents=True)
+    audio_format = config.audio_format if config.audio_format in AUDIO_FORMATS else "mp3"
+    semaphore = asyncio.Semaphore(max(1, config.concurrency))
+    parts: list[str] = []
+    offsets: list[float] = []
+    marks: dict[str, float] = {}
+
+    async def transcribe(i: int, path: Path) -> None:
+        async with semaphore:
+            parts[i] = await transcribe_file(path, config, pool)
+            path.unlink(missing_ok=True)
+
+    try:
+        async with asyncio.TaskGroup() as group:
+            ffmpeg = group.create_task(
+                run_process(_segment_command(stream, segment_dir, audio_format, segment_seconds))
+            )
+            seen = 0
+            while True:
+                done = ffmpeg.done()
+                for name, offset in _read_segment_list(segment_dir / SEGMENT_LIST)[seen:]:
+                    marks.setdefault("first_segment", time.monotonic())
+                    parts.append("")
+                    offsets.append(offset)
+                    group.create_task(transcribe(seen, segment_dir / name))
+                    seen += 1
+                if done:
+                    break
+                await asyncio.sleep(POLL_INTERVAL)
+
+            marks["download"] = time.monotonic()
+            result = ffmpeg.result()
+            if result.returncode != 0:
+                raise RuntimeError(f"音频流处理失败: {result.stderr[-500:]}")
+    except ExceptionGroup as eg:
+        raise eg.exceptions[0] from None
+    finally:
+        shutil.rmtree(segment_dir, ignore_errors=True)
+
+    finished = time.monotonic()
+    return StreamedTranscript(
+        title=stream.title,
+        duration=stream.duration,
+        subtitles=parse_srt(stitch_srt(parts, offsets)),
+        timings={
+            "resolve": round(resolved - start, 3),
+            "first_segment": round(marks.get("first_segment", finished) - resolved, 3),
+            "download": round(marks["download"] - resolved, 3),
+            "asr": round(finished - resolved, 3),  # 与下载重叠，从开始下载计起
+        },
+    )
+
+
+# =============================================================================
+#  辅助函数
+# =============================================================================
+
+
+def _segment_command(
+    stream: AudioStream, segment_dir: Path, audio_format: str, segment_seconds: int
+) -> list[str]:
+    """构建边读取边切分的 FFmpeg 命令"""
+    suffix, codec_args = AUDIO_FORMATS[audio_format]
+    headers = "".join(f"{key}: {value}\r\n" for key, value in stream.headers.items())
+    return [
+        "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+        *(["-headers", headers] if headers else []),
+        "-i", stream.url,
+        "-vn", "-ac", "1", "-ar", str(AUDIO_SAMPLE_RATE),
+        *codec_args,
+        "-f", "segment",
+        "-segment_time", str(segment_seconds),
+        "-segment_list", str(segment_dir / SEGMENT_LIST),
+        "-segment_list_type", "csv",
+        "-reset_timestamps", "1",
+        str(segment_dir / f"%04d{suffix}"),
+    ]
+
+
+def _read_segment_list(path: Path) -> list[tuple[str, float]]:
+    """读取已完成的分片 (文件名, 起点秒)；只取以换行结尾的完整行"""
+    try:
+        content = path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return []
+
+    segments = []
+    for line in content.splitlines(keepends=True):
+        if not line.endswith("\n"):
+            break
+        name, start, *_ = line.strip().split(",")
+        segments.append((name, float(start)))
+    return segments
@@ -1,12 +1,18 @@
 """
-[INPUT]: 依赖 youtube_transcript_api, re
-[OUTPUT]: 对外提供 YouTubeTranscriptInfo, get_transcript(), extract_video_id()
-[POS]: YouTube 字幕获取模块，直接从 YouTube 获取现有字幕（自动生成或人工）
+[INPUT]: 依赖 youtube_transcript_api, re, os, threading, ai_client, executor, llm_cache,
+         singleflight, temp_manager, artifact_cache
+[OUTPUT]: 对外提供 YouTubeTranscriptInfo, TranscriptProvider, YouTubeApiProvider, get_transcript(),
+          get_transcript_async(), extract_video_id(), get_provider(), get_transcript_cache()
+[POS]: YouTube 字幕获取模块，直接从 YouTube 获取现有字幕（自动生成或人工）；
+       结果按 (video_id, 语言偏好) 缓存，异步调用在有界线程池中执行，字幕来源可替换（测试用替身）
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
+import os
 import re
+import threading
 from dataclasses import dataclass
+from typing import Protocol
 
 from youtube_transcript_api import YouTubeTranscriptApi
 from youtube_transcript_api._errors import (
@@ -15,7 +21,30 @@ from youtube_transcript_api._errors import (
     VideoUnavailable,
 )
 
+from vmarker import temp_manager
+from vmarker.ai_client import RateLimiter
+from vmarker.artifact_cache import canonical_key
+from vmarker.executor import run_io
+from vmarker.llm_cache import LLMCache
 from vmarker.models import Subtitle
+from vmarker.singleflight import get_flight
+
+
+# =============================================================================
+#  辅助函数
+# =============================================================================
+
+
+def _parse_int_env(key: str, default: int) -> int:
+    """安全解析非负整数环境变量"""
+    value = os.getenv(key)
+    if value is None:
+        return default
+    try:
+        parsed = int(value)
+        return parsed if parsed >= 0 else default
+    except ValueError:
+        return default
 
 
 # =============================================================================
@@ -23,6 +52,9 @@ from vmarker.models import Subtitle
 # =============================================================================
 
 MAX_DURATION_MINUTES = 60  # 字幕方式支持更长视频
+DEFAULT_LANGUAGES = ["zh-Hans", "zh", "zh-Hant", "en"]  # 字幕语言优先级
+CACHE_MAX_MB = _parse_int_env("TRANSCRIPT_CACHE_MAX_MB", 32)  # 0 表示禁用
+CACHE_TTL_HOURS = _parse_int_env("TRANSCRIPT_CACHE_TTL_HOURS", 24)  # 字幕可能被作者更新，有效期较短
 VIDEO_ID_PATTERN = re.compile(
     r"(?:youtube\.com/(?:watch\?v=|shorts/)|youtu\.be/)([\w-]{11})"
 )
@@ -43,6 +75,36 @@ class YouTubeTranscriptInfo:
     subtitles: list[Subtitle]
 
 
+class TranscriptProvider(Protocol):
+    """字幕来源：返回原始字幕条目 [{"text", "start", "duration"}, ...]"""
+
+    def fetch(self, video_id: str, languages: list[str]) -> list[dict]: ...
+
+
+class YouTubeApiProvider:
+    """
+    youtube-transcript-api 字幕来源
+
+    每个线程复用一个 API 实例（及其 HTTP 会话），不在每次调用时重建。
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _api(self) -> YouTubeTranscriptApi:
+        api = getattr(self._local, "api", None)
+        if api is None:
+            api = self._local.api = YouTubeTranscriptApi()
+        return api
+
+    def fetch(self, video_id: str, languages: list[str]) -> list[dict]:
+        transcript_list = self._api().list(video_id)
+        transcript = _find_best_transcript(transcript_list, languages)
+        fetched = transcript.fetch()
+        # 新版本返回 FetchedTranscript 对象，旧版本直接返回字典列表
+        return fetched.to_raw_data() if hasattr(fetched, "to_raw_data") else list(fetched)
+
+
 # =============================================================================
 #  核心函数
 # =============================================================================
@@ -56,11 +118,13 @@ def extract_video_id(url: str) -> str | None:
 
 def get_transcript(url: str, languages: list[str] | None = None) -> YouTubeTranscriptInfo:
     """
-    从 YouTube 获取字幕
+    从 YouTube 获取字幕（同步，会阻塞；异步代码请用 get_transcript_async）
+
+    先查缓存，未命中时从字幕来源获取并写入缓存。
 
     Args:
         url: YouTube 视频 URL
-        languages: 优先语言列表，默认 ["zh-Hans", "zh", "en"]
+        languages: 优先语言列表，默认 DEFAULT_LANGUAGES
 
     Returns:
         YouTubeTranscriptInfo 包含字幕列表和时长
@@ -74,31 +138,70 @@ def get_transcript(url: str, languages: list[str] | None = None) -> YouTubeTrans
         raise ValueError("无效的 YouTube 链接")
 
     if languages is None:
-        languages = ["zh-Hans", "zh", "zh-Hant", "en"]
+        languages = DEFAULT_LANGUAGES
 
-    try:
-        # 创建 API 实例并列出可用字幕
-        ytt_api = YouTubeTranscriptApi()
-        transcript_list = ytt_api.list(video_id)
+    return _lookup(video_id, languages) or _fetch(video_id, languages)
 
-        # 查找最佳字幕
-        transcript = _find_best_transcript(transcript_list, languages)
 
-        # 获取原始字幕数据（字典列表）
-        fetched = transcript.fetch()
-        raw_data = fetched if isinstance(fetched, list) else list(fetched)
+async def get_transcript_async(
+    url: str,
+    languages: list[str] | None = None,
+    limiter: RateLimiter | None = None,
+) -> YouTubeTranscriptInfo:
+    """
+    异步获取字幕
+
+    在有界 I/O 线程池中执行，事件循环不被阻塞；同一视频的并发请求合并为一次获取。
+
+    Args:
+        url: YouTube 视频 URL
+        languages: 优先语言列表，默认 DEFAULT_LANGUAGES
+        limiter: 限流器（可选），只对未命中缓存、需要访问 YouTube 的请求生效
+
+    Returns:
+        YouTubeTranscriptInfo 包含字幕列表和时长
+
+    Raises:
+        ValueError: URL 无效或视频 ID 提取失败
+        RuntimeError: 字幕获取失败
+    """
+    video_id = extract_video_id(url)
+    if not video_id:
+        raise ValueError("无效的 YouTube 链接")
+
+    languages = languages or DEFAULT_LANGUAGES
+
+    async def fetch() -> YouTubeTranscriptInfo:
+        cached = await run_io(_lookup, video_id, languages)
+        if cached is not None:
+            return cached
+        if limiter is not None:
+            await limiter.acquire()
+        return await run_io(_fetch, video_id, languages)
+
+    info, _ = await get_flight().do(
+        f"transcript:{_cache_key(video_id, languages)}",
+        fetch,
+        cross_process=get_transcript_cache().enabled,
+    )
+    return info
+
+
+def _lookup(video_id: str, languages: list[str]) -> YouTubeTranscriptInfo | None:
+    """查缓存，未命中返回 None"""
+    cached = get_transcript_cache().get(_cache_key(video_id, languages))
+    return _unpack(video_id, cached) if cached is not None else None
+
+
+def _fetch(video_id: str, languages: list[str]) -> YouTubeTranscriptInfo:
+    """从字幕来源获取并写入缓存"""
+    try:
+        raw_data = get_provider().fetch(video_id, languages)
 
         subtitles = _convert_to_subtitles(raw_data)
         duration = _calculate_duration(raw_data)
         _check_duration(duration)
 
-        return YouTubeTranscriptInfo(
-            video_id=video_id,
-            title=video_id,  # API 不返回标题，用 ID 代替
-            duration=duration,
-            subtitles=subtitles,
-        )
-
     except VideoUnavailable:
         raise RuntimeError("视频不存在或已被删除")
     except TranscriptsDisabled:
@@ -108,6 +211,67 @@ def get_transcript(url: str, languages: list[str] | None = None) -> YouTubeTrans
     except Exception as e:
         raise RuntimeError(f"获取字幕失败: {e}")
 
+    info = YouTubeTranscriptInfo(
+        video_id=video_id,
+        title=video_id,  # API 不返回标题，用 ID 代替
+        duration=duration,
+        subtitles=subtitles,
+    )
+    get_transcript_cache().put(_cache_key(video_id, languages), _pack(info), 0.0)
+    return info
+
+
+# =============================================================================
+#  字幕来源与缓存
+# =============================================================================
+
+_provider: TranscriptProvider | None = None
+_cache: LLMCache | None = None
+
+
+def get_provider() -> TranscriptProvider:
+    """获取字幕来源（测试时替换 _provider 为替身）"""
+    global _provider
+    if _provider is None:
+        _provider = YouTubeApiProvider()
+    return _provider
+
+
+def get_transcript_cache() -> LLMCache:
+    """获取进程内共享的字幕缓存（数据库位于临时会话根目录下，多个 worker 共享）"""
+    global _cache
+    if _cache is None:
+        _cache = LLMCache(
+            temp_manager.BASE_DIR / ".transcripts" / "cache.sqlite3",
+            CACHE_MAX_MB * 1024 * 1024,
+            CACHE_TTL_HOURS * 3600,
+        )
+    return _cache
+
+
+def _cache_key(video_id: str, languages: list[str]) -> str:
+    return canonical_key("transcript", video_id, languages)
+
+
+def _pack(info: YouTubeTranscriptInfo) -> dict:
+    """紧凑存储：每条字幕为 [start, end, text]，序号按位置恢复"""
+    return {
+        "duration": info.duration,
+        "cues": [[s.start_time, s.end_time, s.text] for s in info.subtitles],
+    }
+
+
+def _unpack(video_id: str, value: dict) -> YouTubeTranscriptInfo:
+    return YouTubeTranscriptInfo(
+        video_id=video_id,
+        title=video_id,
+        duration=value["duration"],
+        subtitles=[
+            Subtitle(index=i + 1, start_time=start, end_time=end, text=text)
+            for i, (start, end, text) in enumerate(value["cues"])
+        ],
+    )
+
 
 # =============================================================================
 #  辅助函数
@@ -0,0 +1,139 @@
+"""
+[INPUT]: 依赖 pytest, asyncio, httpx, vmarker.ai_client, vmarker.http_pool, vmarker.llm_cache
+[OUTPUT]: ai_client 模块测试用例
+[POS]: tests/ 的 AI 客户端流式响应与增量解析测试
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from vmarker import http_pool, llm_cache
+from vmarker.ai_client import AIClient, AIConfig, JSONItemParser, estimate_tokens
+
+_OUTPUT = (
+    '```json\n{"summary": "含有 } 和 \\" 的摘要", "chapters": ['
+    '{"title": "开场 {", "start_time": 0, "end_time": 60}, '
+    '{"title": "正文", "start_time": 60, "end_time": 120, "tags": ["a", {"b": 1}]}'
+    ']}\n```'
+)
+
+
+def _sse(text: str, size: int = 7) -> bytes:
+    """把文本切成 SSE 增量事件"""
+    lines = []
+    for i in range(0, len(text), size):
+        delta = {"choices": [{"delta": {"content": text[i:i + size]}}]}
+        lines.append(f"data: {json.dumps(delta, ensure_ascii=False)}\n\n")
+    lines.append("data: [DONE]\n\n")
+    return "".join(lines).encode("utf-8")
+
+
+class TestJSONItemParser:
+    """增量 JSON 解析测试"""
+
+    def test_items_emitted_as_objects_close(self):
+        """对象闭合即产出，字符串中的括号与转义不影响解析"""
+        parser = JSONItemParser()
+        emitted: list[tuple[int, tuple[str, dict]]] = []
+        for i in range(len(_OUTPUT)):
+            for item in parser.feed(_OUTPUT[i]):
+                emitted.append((i, item))
+
+        assert [item for _, item in emitted] == [
+            ("chapters", {"title": "开场 {", "start_time": 0, "end_time": 60}),
+            (
+                "chapters",
+                {"title": "正文", "start_time": 60, "end_time": 120, "tags": ["a", {"b": 1}]},
+            ),
+        ]
+        # 第一个章节在整段输出结束前就已产出
+        assert emitted[0][0] < _OUTPUT.index("正文")
+        assert parser.result()["summary"] == '含有 } 和 " 的摘要'
+
+
+class TestChatStream:
+    """流式请求测试"""
+
+    @pytest.fixture(autouse=True)
+    def cache(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(
+            llm_cache, "_cache", llm_cache.LLMCache(tmp_path / "llm.db", 1024 * 1024, 3600)
+        )
+
+    def _collect(self, requests: list[httpx.Request]):
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(
+                200, content=_sse(_OUTPUT), headers={"content-type": "text/event-stream"}
+            )
+
+        pool = http_pool.HTTPPool(transport=httpx.MockTransport(handler))
+        config = AIConfig(api_key="k", api_base="https://api.example.com/v1")
+
+        async def main():
+            async with AIClient(config, pool) as client:
+                events = [event async for event in client.chat_json_stream("prompt")]
+            await pool.aclose()
+            return events
+
+        return asyncio.run(main())
+
+    def test_stream_items_then_result(self):
+        """逐条产出章节，最后产出完整结果，并写入缓存"""
+        requests: list[httpx.Request] = []
+        events = self._collect(requests)
+
+        assert [key for key, _ in events] == ["chapters", "chapters", None]
+        assert events[-1][1]["summary"] == '含有 } 和 " 的摘要'
+        assert json.loads(requests[0].content)["stream"] is True
+
+        # 再次请求命中缓存，产出相同事件
+        assert self._collect(requests) == events
+        assert len(requests) == 1
+
+
+class TestOutputTokens:
+    """输出 token 统计测试"""
+
+    def _client(self, handler) -> tuple[AIClient, http_pool.HTTPPool]:
+        pool = http_pool.HTTPPool(transport=httpx.MockTransport(handler))
+        return AIClient(AIConfig(api_key="k", api_base="https://api.example.com/v1"), pool), pool
+
+    def test_usage_from_response(self):
+        """优先使用服务商返回的 completion_tokens"""
+        def handler(request):
+            return httpx.Response(200, json={
+                "choices": [{"message": {"content": "好的"}}],
+                "usage": {"completion_tokens": 42},
+            })
+
+        client, pool = self._client(handler)
+
+        async def main():
+            async with client:
+                await client.chat("prompt")
+                await client.chat("prompt")
+            await pool.aclose()
+
+        asyncio.run(main())
+        assert client.output_tokens == 84
+
+    def test_estimated_for_stream_without_usage(self):
+        """流式响应没有 usage 时按输出内容估算"""
+        def handler(request):
+            return httpx.Response(
+                200, content=_sse(_OUTPUT), headers={"content-type": "text/event-stream"}
+            )
+
+        client, pool = self._client(handler)
+
+        async def main():
+            async with client:
+                return "".join([delta async for delta in client.chat_stream("prompt")])
+
+        assert asyncio.run(main()) == _OUTPUT
+        assert client.output_tokens == estimate_tokens(_OUTPUT)
@@ -0,0 +1,127 @@
+"""
+[INPUT]: 依赖 pytest, asyncio, json, httpx, FastAPI TestClient, vmarker.analysis,
+         vmarker.chapter_bar, vmarker.shownotes, vmarker.http_pool,
+         vmarker.llm_cache, vmarker.singleflight
+[OUTPUT]: analysis 模块测试用例
+[POS]: tests/ 的章节与大纲合并请求测试
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from vmarker import analysis, http_pool, llm_cache, singleflight
+from vmarker import chapter_bar as cb
+from vmarker import shownotes as sn
+from vmarker.api.main import app
+from vmarker.models import Chapter, Subtitle
+
+_SUBS = [
+    Subtitle(index=i + 1, start_time=i * 10, end_time=i * 10 + 10, text=f"第{i}句")
+    for i in range(30)
+]
+
+_RESULT = {
+    "chapters": [
+        {"title": "开场", "start_time": 0, "end_time": 120},
+        {"title": "正文", "start_time": 120, "end_time": 300},
+    ],
+    "summary": "一段测试视频",
+    "outline": [{"timestamp": 0, "title": "开场介绍"}, {"timestamp": 120, "title": "核心内容"}],
+}
+
+
+@pytest.fixture
+def ai_requests(tmp_path, monkeypatch) -> list[httpx.Request]:
+    """所有 AI 请求由本地替身处理，并记录请求"""
+    monkeypatch.setattr(
+        llm_cache, "_cache", llm_cache.LLMCache(tmp_path / "llm.db", 1024 * 1024, 3600)
+    )
+    monkeypatch.setattr(singleflight, "_flight", singleflight.SingleFlight(tmp_path / ".inflight"))
+    sent: list[httpx.Request] = []
+
+    def handler(request):
+        sent.append(request)
+        content = json.dumps(_RESULT, ensure_ascii=False)
+        if json.loads(request.content).get("stream"):
+            delta = {"choices": [{"delta": {"content": content}}]}
+            body = f"data: {json.dumps(delta, ensure_ascii=False)}\n\ndata: [DONE]\n\n"
+            return httpx.Response(200, content=body.encode("utf-8"))
+        return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+    pool = http_pool.init_pool(http_pool.HTTPPool(transport=httpx.MockTransport(handler)))
+    yield sent
+    asyncio.run(pool.aclose())
+    monkeypatch.setattr(http_pool, "_pool", None)
+
+
+class TestAnalyze:
+    """综合分析测试"""
+
+    def test_single_request(self, ai_requests):
+        """章节、摘要、大纲来自同一次请求"""
+        result = asyncio.run(analysis.analyze(_SUBS, 300, api_key="k"))
+
+        assert [c.title for c in result.chapters.chapters] == ["开场", "正文"]
+        assert result.chapters.duration == 300
+        assert result.summary == "一段测试视频"
+        assert result.outline[1] == analysis.OutlineItem(timestamp=120, title="核心内容")
+        assert len(ai_requests) == 1
+
+        prompt = json.loads(ai_requests[0].content)["messages"][0]["content"]
+        assert "chapters" in prompt and "summary" in prompt and "outline" in prompt
+
+    def test_views_share_one_round_trip(self, ai_requests):
+        """先分段再生成大纲，只请求一次 AI"""
+        async def main():
+            chapters = await cb.extract_ai(_SUBS, 300, api_key="k")
+            notes = await sn.generate_shownotes(_SUBS, api_key="k")
+            return chapters, notes
+
+        chapters, notes = asyncio.run(main())
+        assert len(chapters.chapters) == 2
+        assert notes.summary == "一段测试视频"
+        assert len(notes.outline) == 2
+        assert len(ai_requests) == 1
+
+    def test_stream_then_shownotes_from_cache(self, ai_requests):
+        """流式分段逐个产出章节，之后生成大纲命中缓存"""
+        async def main():
+            streamed = [c async for c in cb.extract_ai_stream(_SUBS, 300, api_key="k")]
+            notes = await sn.generate_shownotes(_SUBS, api_key="k")
+            return streamed, notes
+
+        streamed, notes = asyncio.run(main())
+        assert streamed == [
+            Chapter(title="开场", start_time=0, end_time=120),
+            Chapter(title="正文", start_time=120, end_time=300),
+        ]
+        assert notes.outline[0].title == "开场介绍"
+        assert len(ai_requests) == 1
+
+
+class TestAnalyzeRoute:
+    """综合分析接口测试"""
+
+    def test_analyze_then_views(self, ai_requests, monkeypatch):
+        """综合分析后，章节与大纲接口命中缓存"""
+        monkeypatch.setenv("API_KEY", "k")
+        srt = "\n".join(
+            f"{s.index}\n00:{int(s.start_time) // 60:02d}:{int(s.start_time) % 60:02d},000 --> "
+            f"00:{int(s.end_time) // 60:02d}:{int(s.end_time) % 60:02d},000\n{s.text}\n"
+            for s in _SUBS
+        ).encode("utf-8")
+        client = TestClient(app)  # 不触发 lifespan，保留替身连接池
+
+        body = client.post("/api/v1/analysis/analyze", files={"file": ("a.srt", srt)}).json()
+        assert body["summary"] == "一段测试视频"
+        assert [c["title"] for c in body["chapters"]] == ["开场", "正文"]
+        assert body["outline"][0] == {"timestamp": 0, "title": "开场介绍"}
+
+        notes = client.post("/api/v1/shownotes/generate", files={"file": ("a.srt", srt)}).json()
+        assert notes["summary"] == "一段测试视频"
+        assert len(ai_requests) == 1
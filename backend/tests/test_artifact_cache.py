@@ -0,0 +1,136 @@
+"""
+[INPUT]: 依赖 pytest, asyncio, vmarker.artifact_cache, vmarker.chapter_bar, vmarker.progress_bar,
+         vmarker.singleflight
+[OUTPUT]: artifact_cache 模块测试用例
+[POS]: tests/ 的渲染产物缓存测试
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+import os
+
+from vmarker import chapter_bar as cb
+from vmarker import progress_bar as pb
+from vmarker import singleflight
+from vmarker.artifact_cache import ArtifactCache, canonical_key
+from vmarker.models import Chapter, ChapterBarConfig
+
+
+def _config(theme: str = "tech-blue") -> ChapterBarConfig:
+    return ChapterBarConfig(
+        chapters=[Chapter(title="开场", start_time=0, end_time=60)],
+        duration=60,
+        theme=theme,
+    )
+
+
+class TestCanonicalKey:
+    """缓存键测试"""
+
+    def test_dict_order_independent(self):
+        """字典键顺序不影响结果"""
+        assert canonical_key({"a": 1, "b": 2}) == canonical_key({"b": 2, "a": 1})
+
+    def test_model_and_dataclass(self):
+        """模型与 dataclass 参与计算"""
+        c1 = pb.ProgressBarConfig(duration=60)
+        c2 = pb.ProgressBarConfig(duration=61)
+        assert pb.cache_key(c1) != pb.cache_key(c2)
+        assert pb.cache_key(c1) == pb.cache_key(pb.ProgressBarConfig(duration=60))
+
+    def test_chapter_bar_key_covers_render_inputs(self):
+        """配色、格式、关键帧间隔都会改变键"""
+        base = cb.cache_key(_config())
+        assert base == cb.cache_key(_config())
+        assert base != cb.cache_key(_config("fresh-green"))
+        assert base != cb.cache_key(_config(), format="mov")
+        assert base != cb.cache_key(_config(), key_frame_interval=0.5)
+
+
+class TestArtifactCache:
+    """磁盘缓存测试"""
+
+    def test_get_or_create(self, tmp_path):
+        """未命中时生成，之后命中复用"""
+        cache = ArtifactCache(tmp_path / "cache", max_bytes=1024)
+        calls = []
+
+        def produce(path):
+            calls.append(path)
+            path.write_bytes(b"bar")
+
+        out1 = tmp_path / "out1.mp4"
+        out2 = tmp_path / "out2.mp4"
+        assert cache.get_or_create("k", out1, produce) is False
+        assert cache.get_or_create("k", out2, produce) is True
+
+        assert len(calls) == 1
+        assert out2.read_bytes() == b"bar"
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_lru_eviction(self, tmp_path):
+        """超出容量时淘汰最久未使用的条目"""
+        cache = ArtifactCache(tmp_path / "cache", max_bytes=20)
+        for i, name in enumerate(("a", "b")):
+            src = tmp_path / f"{name}.mp4"
+            src.write_bytes(b"x" * 10)
+            path = cache.put(name, src, ".mp4")
+            os.utime(path, (i, i))
+
+        # 访问 a，使 b 成为最久未使用
+        assert cache.get("a", ".mp4") is not None
+
+        src = tmp_path / "c.mp4"
+        src.write_bytes(b"x" * 10)
+        cache.put("c", src, ".mp4")
+
+        assert cache.get("b", ".mp4") is None
+        assert cache.get("a", ".mp4") is not None
+        assert cache.evictions == 1
+
+    def test_disabled(self, tmp_path):
+        """容量为 0 时禁用缓存"""
+        cache = ArtifactCache(tmp_path / "cache", max_bytes=0)
+        out = tmp_path / "out.mp4"
+
+        assert cache.get_or_create("k", out, lambda p: p.write_bytes(b"bar")) is False
+        assert cache.get("k", ".mp4") is None
+        assert not (tmp_path / "cache").exists()
+
+    def test_same_output_path_different_keys(self, tmp_path):
+        """同一会话路径先后生成两个键，先写入的缓存条目不被后一次生成覆盖"""
+        cache = ArtifactCache(tmp_path / "cache", max_bytes=1024)
+        out = tmp_path / "output.mp4"
+
+        cache.get_or_create("k1", out, lambda p: p.write_bytes(b"first"))
+        cache.get_or_create("k2", out, lambda p: p.write_bytes(b"second"))
+
+        assert out.read_bytes() == b"second"
+        assert cache.get("k1", ".mp4").read_bytes() == b"first"
+        assert cache.get("k2", ".mp4").read_bytes() == b"second"
+
+    def test_same_output_path_different_keys_async(self, tmp_path, monkeypatch):
+        """异步版本：命中后再生成新键同样不改写缓存条目；每次未命中只计一次"""
+        monkeypatch.setattr(
+            singleflight, "_flight", singleflight.SingleFlight(tmp_path / ".inflight")
+        )
+        cache = ArtifactCache(tmp_path / "cache", max_bytes=1024)
+        out = tmp_path / "output.mp4"
+
+        def writer(data):
+            async def produce(path):
+                path.write_bytes(data)
+            return produce
+
+        async def main():
+            await cache.get_or_create_async("k1", out, writer(b"first"))
+            assert await cache.get_or_create_async("k1", out, writer(b"unused")) is True
+            await cache.get_or_create_async("k2", out, writer(b"second"))
+
+        asyncio.run(main())
+
+        assert out.read_bytes() == b"second"
+        assert cache.get("k1", ".mp4").read_bytes() == b"first"
+        assert (cache.hits, cache.misses) == (2, 2)
+        assert sorted(p.name for p in tmp_path.iterdir()) == [".inflight", "cache", "output.mp4"]
@@ -0,0 +1,241 @@
+"""
+[INPUT]: 依赖 pytest, asyncio, httpx, vmarker.asr, vmarker.executor, vmarker.http_pool,
+         vmarker.parser, vmarker.resilience
+[OUTPUT]: asr 模块测试用例
+[POS]: tests/ 的语音识别上传前处理与分片并发转录测试
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+from pathlib import Path
+
+import httpx
+import pytest
+
+from vmarker import asr, http_pool, resilience
+from vmarker.executor import ProcessResult
+from vmarker.parser import parse_srt
+
+_SRT = "1\n00:00:00,000 --> 00:00:01,000\n你好\n"
+
+
+class FakeFFmpeg:
+    """替身 FFmpeg：记录命令；静音检测返回预设输出，其余命令把输出文件写成小体积音频"""
+
+    def __init__(
+        self, stderr: str = "  Duration: 00:01:00.00, start: 0.000000, bitrate: 32 kb/s\n"
+    ):
+        self.commands: list[list[str]] = []
+        self.stderr = stderr
+
+    async def __call__(self, cmd: list[str]) -> ProcessResult:
+        self.commands.append(cmd)
+        if cmd[-1] == "-":
+            return ProcessResult(returncode=0, stdout="", stderr=self.stderr)
+        Path(cmd[-1]).write_bytes(b"audio")
+        return ProcessResult(returncode=0, stdout="", stderr="")
+
+    def named(self, flag: str) -> list[list[str]]:
+        return [cmd for cmd in self.commands if flag in cmd]
+
+
+@pytest.fixture
+def ffmpeg(monkeypatch) -> FakeFFmpeg:
+    fake = FakeFFmpeg()
+    monkeypatch.setattr(asr, "run_process", fake)
+    return fake
+
+
+def _transcribe(path: Path, **kwargs) -> tuple[str, list[httpx.Request]]:
+    requests: list[httpx.Request] = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, text=_SRT)
+
+    pool = http_pool.HTTPPool(transport=httpx.MockTransport(handler))
+    config = asr.ASRConfig(api_key="k", api_base="https://asr.example.com/v1", **kwargs)
+
+    async def main():
+        srt = await asr.transcribe_to_srt(path, config, pool)
+        await pool.aclose()
+        return srt
+
+    return asyncio.run(main()), requests
+
+
+class TestExtractAudio:
+    """上传前音频提取测试"""
+
+    def test_uploads_compact_audio(self, tmp_path, ffmpeg):
+        """视频先提取为单声道 16 kHz 音频，只上传音频"""
+        video = tmp_path / "source.mp4"
+        video.write_bytes(b"video" * 1000)
+
+        srt, requests = _transcribe(video)
+
+        assert srt == _SRT
+        (cmd,) = ffmpeg.named("-ac")
+        assert cmd[cmd.index("-ac") + 1] == "1"
+        assert cmd[cmd.index("-ar") + 1] == "16000"
+        assert "libmp3lame" in cmd
+        body = requests[0].content
+        assert b'filename="source.asr.mp3"' in body
+        assert b"video" not in body
+        assert (tmp_path / "source.asr.mp3").exists()
+
+    def test_second_call_reuses_audio(self, tmp_path, ffmpeg):
+        """再次转录复用已提取的音频"""
+        video = tmp_path / "source.mp4"
+        video.write_bytes(b"video")
+
+        _transcribe(video)
+        _transcribe(video)
+
+        assert len(ffmpeg.named("-ac")) == 1
+
+    def test_audio_input_and_none_not_extracted(self, tmp_path, ffmpeg):
+        """音频文件与 audio_format="none" 直接上传"""
+        audio = tmp_path / "a.m4a"
+        audio.write_bytes(b"audio")
+        video = tmp_path / "b.mp4"
+        video.write_bytes(b"video")
+
+        _transcribe(audio)
+        _, requests = _transcribe(video, audio_format="none")
+
+        assert ffmpeg.named("-ac") == []
+        assert b'filename="b.mp4"' in requests[0].content
+
+    def test_opus(self, tmp_path, ffmpeg):
+        """opus 格式输出为 ogg 封装"""
+        video = tmp_path / "source.mp4"
+        video.write_bytes(b"video")
+
+        path = asyncio.run(asr.extract_audio(video, "opus"))
+
+        assert path.name == "source.asr.ogg"
+        assert "libopus" in ffmpeg.commands[0]
+
+    def test_failure_leaves_no_file(self, tmp_path, monkeypatch):
+        """提取失败时抛出错误，不留下音频文件"""
+        async def run_process(cmd):
+            Path(cmd[-1]).write_bytes(b"partial")
+            return ProcessResult(
+                returncode=1, stdout="", stderr="Output file does not contain any stream"
+            )
+
+        monkeypatch.setattr(asr, "run_process", run_process)
+        video = tmp_path / "source.mp4"
+        video.write_bytes(b"video")
+
+        with pytest.raises(RuntimeError, match="音频提取失败"):
+            asyncio.run(asr.extract_audio(video))
+        assert list(tmp_path.iterdir()) == [video]
+
+
+_SILENCEDETECT = """Input #0, mp3, from 'source.asr.mp3':
+  Duration: 00:25:00.05, start: 0.000000, bitrate: 32 kb/s
+[silencedetect @ 0x1] silence_start: -0.01
+[silencedetect @ 0x1] silence_end: 1.2 | silence_duration: 1.21
+[silencedetect @ 0x1] silence_start: 500
+[silencedetect @ 0x1] silence_end: 501 | silence_duration: 1
+[silencedetect @ 0x1] silence_start: 1100.5
+[silencedetect @ 0x1] silence_end: 1101.5 | silence_duration: 1
+[silencedetect @ 0x1] silence_start: 1499
+"""
+
+
+class TestChunking:
+    """静音切分与拼接测试"""
+
+    def test_parse_silencedetect(self):
+        """解析时长与静音区间，末尾未结束的静音延续到结尾"""
+        duration, silences = asr._parse_silencedetect(_SILENCEDETECT)
+
+        assert duration == 1500.05
+        assert silences == [(0.0, 1.2), (500, 501), (1100.5, 1101.5), (1499, 1500.05)]
+
+    def test_plan_cuts_at_silences(self):
+        """在分片后半段的静音中点切分，没有静音时在上限处硬切"""
+        chunks = asr.plan_chunks(1500, [(100, 101), (500, 501), (1000, 1001)], max_seconds=600)
+
+        assert chunks == [(0.0, 500.5), (500.5, 1000.5), (1000.5, 1500)]
+        assert asr.plan_chunks(1500, [], max_seconds=600) == [(0.0, 600), (600, 1200), (1200, 1500)]
+        assert asr.plan_chunks(300, [], max_seconds=600) == [(0.0, 300)]
+
+    def test_stitch_offsets_and_renumbers(self):
+        """各分片时间加上起点偏移，序号连续，空分片跳过"""
+        srt = asr.stitch_srt([_SRT, "", _SRT], [0, 500.5, 1101])
+        result = parse_srt(srt)
+
+        assert [s.index for s in result.subtitles] == [1, 2]
+        assert result.subtitles[1].start_time == 1101
+        assert result.subtitles[1].end_time == 1102
+
+    def test_chunks_transcribed_concurrently(self, tmp_path, ffmpeg):
+        """长音频切分后并发转录（受并发上限约束），结果按原时间拼接"""
+        ffmpeg.stderr = _SILENCEDETECT
+        active = 0
+        max_active = 0
+
+        async def handler(request):
+            nonlocal active, max_active
+            active += 1
+            max_active = max(max_active, active)
+            await asyncio.sleep(0.02)
+            active -= 1
+            return httpx.Response(200, text=_SRT)
+
+        pool = http_pool.HTTPPool(transport=httpx.MockTransport(handler))
+        audio = tmp_path / "a.mp3"
+        audio.write_bytes(b"audio")
+        config = asr.ASRConfig(api_key="k", chunk_seconds=300, concurrency=2)
+
+        async def main():
+            srt = await asr.transcribe_to_srt(audio, config, pool)
+            await pool.aclose()
+            return srt
+
+        result = parse_srt(asyncio.run(main()))
+
+        cuts = ffmpeg.named("-ss")
+        assert len(cuts) == len(result.subtitles) >= 5
+        assert all(float(cmd[cmd.index("-t") + 1]) <= 300 for cmd in cuts)
+        assert [s.index for s in result.subtitles] == list(range(1, len(cuts) + 1))
+        starts = [float(cmd[cmd.index("-ss") + 1]) for cmd in cuts]
+        assert [s.start_time for s in result.subtitles] == starts
+        assert max_active == 2
+        assert list(tmp_path.iterdir()) == [audio]  # 分片目录已清理
+
+    def test_chunk_upload_retried(self, tmp_path, ffmpeg, monkeypatch):
+        """单个分片上传遇到临时错误时重试，整体转录不失败"""
+        monkeypatch.setattr(resilience, "_breakers", {})
+        ffmpeg.stderr = _SILENCEDETECT
+        bodies = []
+
+        def handler(request):
+            bodies.append(request.content)
+            if len(bodies) == 1:
+                return httpx.Response(503)
+            return httpx.Response(200, text=_SRT)
+
+        pool = http_pool.HTTPPool(transport=httpx.MockTransport(handler))
+        audio = tmp_path / "a.mp3"
+        audio.write_bytes(b"audio")
+        config = asr.ASRConfig(
+            api_key="k",
+            chunk_seconds=300,
+            retry=resilience.RetryPolicy(max_retries=2, base_delay=0),
+        )
+
+        async def main():
+            srt = await asr.transcribe_to_srt(audio, config, pool)
+            await pool.aclose()
+            return srt
+
+        result = parse_srt(asyncio.run(main()))
+
+        assert len(result.subtitles) == len(ffmpeg.named("-ss"))
+        assert len(bodies) == len(result.subtitles) + 1
+        assert b"audio" in bodies[0] and b"audio" in bodies[1]  # 重试时重新读取分片文件
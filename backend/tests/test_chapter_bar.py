@@ -1,12 +1,22 @@
 """
-[INPUT]: 依赖 pytest, vmarker.chapter_bar
+[INPUT]: 依赖 pytest, asyncio, time, FastAPI TestClient, vmarker.chapter_bar, vmarker.api,
+         vmarker.job_store
 [OUTPUT]: chapter_bar 模块测试用例
 [POS]: tests/ 的 chapter_bar 测试
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
 from vmarker import chapter_bar as cb
-from vmarker.models import Chapter, Subtitle
+from vmarker import job_store
+from vmarker.api.main import app
+from vmarker.api.routes import chapter_bar as chapter_bar_routes
+from vmarker.models import Chapter, ChapterList, Subtitle
 
 
 class TestExtractAuto:
@@ -138,3 +148,184 @@ class TestValidate:
 
         assert result.valid is True
         assert result.chapters[0].title == "章节1"
+
+
+_SUBS = [
+    Subtitle(index=i + 1, start_time=i * 10, end_time=i * 10 + 10, text=f"第{i}句")
+    for i in range(30)
+]
+_AI_CHAPTERS = ChapterList(
+    chapters=[Chapter(title="AI 章节", start_time=0, end_time=300)], duration=300
+)
+
+
+def _fake_ai(delay: float, error: Exception | None = None):
+    async def extract_ai(subtitles, duration, **kwargs):
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return _AI_CHAPTERS
+    return extract_ai
+
+
+class TestExtractBudgeted:
+    """限时 AI 分段测试"""
+
+    def _run(self, budget: float) -> tuple[cb.BudgetedChapters, ChapterList | None]:
+        """返回限时结果，以及等待后台 AI 分段完成后的结果"""
+        async def main():
+            result = await cb.extract_budgeted(_SUBS, 300, api_key="k", budget=budget)
+            upgraded = await result.pending if result.pending is not None else None
+            return result, upgraded
+        return asyncio.run(main())
+
+    def test_ai_within_budget(self, monkeypatch):
+        """AI 在预算内返回时使用 AI 结果"""
+        monkeypatch.setattr(cb, "extract_ai", _fake_ai(0.01))
+        result, _ = self._run(budget=1)
+
+        assert result.source == "ai"
+        assert result.chapters == _AI_CHAPTERS
+        assert result.pending is None
+
+    def test_local_when_over_budget(self, monkeypatch):
+        """AI 超出预算时先返回本地结果，AI 继续进行"""
+        monkeypatch.setattr(cb, "extract_ai", _fake_ai(0.2))
+        start = time.perf_counter()
+        result, upgraded = self._run(budget=0.05)
+
+        assert result.source == "lexical"
+        assert result.chapters.duration == 300
+        assert upgraded == _AI_CHAPTERS
+        assert time.perf_counter() - start >= 0.2
+
+    def test_local_when_ai_fails(self, monkeypatch):
+        """AI 失败时返回本地结果和失败原因"""
+        monkeypatch.setattr(cb, "extract_ai", _fake_ai(0, RuntimeError("boom")))
+        result, _ = self._run(budget=1)
+
+        assert result.source == "lexical"
+        assert result.pending is None
+        assert str(result.error) == "boom"
+
+    def test_local_failure_retrieved_when_ai_wins(self, monkeypatch):
+        """AI 先返回时，本地分段的异常不会成为未取出的任务异常"""
+        monkeypatch.setattr(cb, "extract_ai", _fake_ai(0))
+
+        def lexical(subtitles, duration):
+            time.sleep(0.05)
+            raise RuntimeError("lexical boom")
+
+        monkeypatch.setattr(cb, "extract_lexical", lexical)
+        unhandled = []
+
+        async def main():
+            asyncio.get_running_loop().set_exception_handler(lambda _, ctx: unhandled.append(ctx))
+            result = await cb.extract_budgeted(_SUBS, 300, api_key="k", budget=1)
+            await asyncio.sleep(0.1)
+            return result
+
+        assert asyncio.run(main()).source == "ai"
+        assert unhandled == []
+
+    def test_local_when_ai_cancelled(self, monkeypatch):
+        """AI 任务被取消时返回本地结果，不抛出 CancelledError"""
+        async def extract_ai(subtitles, duration, **kwargs):
+            asyncio.current_task().cancel()
+            await asyncio.sleep(1)
+
+        monkeypatch.setattr(cb, "extract_ai", extract_ai)
+        result, _ = self._run(budget=1)
+
+        assert result.source == "lexical"
+        assert result.pending is None
+        assert isinstance(result.error, asyncio.CancelledError)
+
+
+class TestAIChaptersRoute:
+    """AI 分段接口测试"""
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("API_KEY", "k")
+        monkeypatch.setattr(job_store, "_store", job_store.JobStore(tmp_path / "jobs", 3600))
+        monkeypatch.setattr(chapter_bar_routes, "_jobs", {})
+        with TestClient(app) as test_client:
+            yield test_client
+
+    def _srt(self) -> bytes:
+        return "\n".join(
+            f"{s.index}\n00:{int(s.start_time) // 60:02d}:{int(s.start_time) % 60:02d},000 --> "
+            f"00:{int(s.end_time) // 60:02d}:{int(s.end_time) % 60:02d},000\n{s.text}\n"
+            for s in _SUBS
+        ).encode("utf-8")
+
+    def test_upgrade_through_job(self, client, monkeypatch):
+        """超出预算返回本地结果和任务 ID，任务完成后获取 AI 结果"""
+        monkeypatch.setattr(cb, "extract_ai", _fake_ai(0.2))
+        response = client.post(
+            "/api/v1/chapter-bar/chapters/ai",
+            files={"file": ("a.srt", self._srt())},
+            data={"budget": "0.01"},
+        )
+        body = response.json()
+        assert body["source"] == "lexical"
+        assert body["job_id"]
+
+        url = f"/api/v1/chapter-bar/chapters/ai/jobs/{body['job_id']}"
+        assert client.get(url).json()["status"] == "pending"
+
+        time.sleep(0.3)
+        job = client.get(url).json()
+        assert job["status"] == "done"
+        assert job["result"]["source"] == "ai"
+        assert job["result"]["chapters"][0]["title"] == "AI 章节"
+
+        # 其他 worker 没有该任务，从 job_store 读取结果
+        chapter_bar_routes._jobs.clear()
+        assert client.get(url).json() == job
+
+    def test_failed_job(self, client, monkeypatch):
+        """后台 AI 分段失败时任务状态为 failed"""
+        monkeypatch.setattr(cb, "extract_ai", _fake_ai(0.1, RuntimeError("boom")))
+        body = client.post(
+            "/api/v1/chapter-bar/chapters/ai",
+            files={"file": ("a.srt", self._srt())},
+            data={"budget": "0.01"},
+        ).json()
+
+        time.sleep(0.2)
+        chapter_bar_routes._jobs.clear()
+        job = client.get(f"/api/v1/chapter-bar/chapters/ai/jobs/{body['job_id']}").json()
+        assert job == {"status": "failed", "result": None, "error": "boom"}
+
+    def test_heartbeat_keeps_job_pending(self, client, monkeypatch):
+        """所属 worker 在任务进行期间刷新心跳，长任务不会被判定为失败"""
+        store = job_store.JobStore(job_store.get_job_store().root, 3600, stale_after=0.2)
+        monkeypatch.setattr(job_store, "_store", store)
+        monkeypatch.setattr(chapter_bar_routes, "HEARTBEAT_INTERVAL", 0.05)
+        monkeypatch.setattr(cb, "extract_ai", _fake_ai(0.6))
+        body = client.post(
+            "/api/v1/chapter-bar/chapters/ai",
+            files={"file": ("a.srt", self._srt())},
+            data={"budget": "0.01"},
+        ).json()
+
+        time.sleep(0.4)
+        chapter_bar_routes._jobs.clear()
+        job = client.get(f"/api/v1/chapter-bar/chapters/ai/jobs/{body['job_id']}").json()
+        assert job["status"] == "pending"
+
+    def test_owner_stopped(self, client, monkeypatch):
+        """所属 worker 停止刷新心跳后，其他 worker 查询到 failed"""
+        store = job_store.JobStore(job_store.get_job_store().root, 3600, stale_after=0)
+        monkeypatch.setattr(job_store, "_store", store)
+        store.put("0" * 32, {"status": "pending"})
+
+        job = client.get(f"/api/v1/chapter-bar/chapters/ai/jobs/{'0' * 32}").json()
+        assert job["status"] == "failed"
+        assert job["error"]
+
+    def test_unknown_job(self, client):
+        """未知任务返回 404"""
+        assert client.get("/api/v1/chapter-bar/chapters/ai/jobs/missing").status_code == 404
@@ -0,0 +1,103 @@
+"""
+[INPUT]: 依赖 pytest, asyncio, vmarker.executor
+[OUTPUT]: executor 模块测试用例
+[POS]: tests/ 的异步执行层测试
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+import operator
+import sys
+import threading
+import time
+
+from vmarker import executor
+
+
+class TestRunProcess:
+    """异步子进程测试"""
+
+    def test_collects_output(self):
+        """收集返回码与输出"""
+        script = "import sys; print('out'); sys.stderr.write('err'); sys.exit(3)"
+        cmd = [sys.executable, "-c", script]
+        result = asyncio.run(executor.run_process(cmd))
+
+        assert result.returncode == 3
+        assert result.stdout.strip() == "out"
+        assert result.stderr == "err"
+
+    def test_does_not_block_loop(self):
+        """子进程运行期间事件循环仍可调度其他任务"""
+
+        async def main():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.01)
+
+            task = asyncio.create_task(ticker())
+            await executor.run_process([sys.executable, "-c", "import time; time.sleep(0.3)"])
+            task.cancel()
+            return ticks
+
+        assert asyncio.run(main()) > 5
+
+
+class TestRunCpu:
+    """进程池测试"""
+
+    def test_runs_in_pool(self):
+        """函数在进程池中执行并返回结果"""
+        try:
+            assert asyncio.run(executor.run_cpu(operator.add, 2, 3)) == 5
+        finally:
+            executor.shutdown()
+
+
+class TestRunIo:
+    """线程池测试"""
+
+    def test_bounded_and_non_blocking(self, monkeypatch):
+        """阻塞函数在线程池中执行，并发数受上限约束，事件循环不被阻塞"""
+        monkeypatch.setattr(executor, "DEFAULT_IO_WORKERS", 2)
+        monkeypatch.setattr(executor, "_io_pool", None)
+        active = 0
+        max_active = 0
+        lock = threading.Lock()
+
+        def blocking():
+            nonlocal active, max_active
+            with lock:
+                active += 1
+                max_active = max(max_active, active)
+            time.sleep(0.05)
+            with lock:
+                active -= 1
+            return threading.current_thread().name
+
+        async def main():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.01)
+
+            task = asyncio.create_task(ticker())
+            names = await asyncio.gather(*(executor.run_io(blocking) for _ in range(6)))
+            task.cancel()
+            return names, ticks
+
+        try:
+            names, ticks = asyncio.run(main())
+        finally:
+            executor.shutdown()
+
+        assert max_active == 2
+        assert all(name.startswith("vmarker-io") for name in names)
+        assert ticks > 5
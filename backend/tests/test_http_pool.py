@@ -0,0 +1,99 @@
+"""
+[INPUT]: 依赖 pytest, asyncio, httpx, vmarker.http_pool, vmarker.ai_client, vmarker.asr,
+         vmarker.llm_cache, vmarker.singleflight
+[OUTPUT]: http_pool 模块测试用例
+[POS]: tests/ 的共享连接池测试
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from vmarker import asr, http_pool, llm_cache, singleflight
+from vmarker.ai_client import AIClient, AIConfig
+
+
+@pytest.fixture(autouse=True)
+def no_llm_cache(tmp_path, monkeypatch):
+    """禁用 AI 响应缓存，确保每次调用都发出请求"""
+    monkeypatch.setattr(llm_cache, "_cache", llm_cache.LLMCache(tmp_path / "llm.db", 0, 3600))
+    monkeypatch.setattr(singleflight, "_flight", singleflight.SingleFlight(tmp_path / ".inflight"))
+
+
+def _stub_transport(requests: list[httpx.Request]) -> httpx.MockTransport:
+    """本地替身服务：记录请求并返回固定响应"""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.path.endswith("/chat/completions"):
+            return httpx.Response(200, json={"choices": [{"message": {"content": '{"ok": true}'}}]})
+        return httpx.Response(200, text="1\n00:00:00,000 --> 00:00:01,000\n你好\n")
+
+    return httpx.MockTransport(handler)
+
+
+class TestHTTPPool:
+    """连接池测试"""
+
+    def test_client_per_origin(self):
+        """同源复用客户端，不同源分开"""
+        pool = http_pool.HTTPPool(transport=_stub_transport([]))
+
+        a = pool.client("https://api.example.com/v1/chat/completions")
+        b = pool.client("https://api.example.com:443/v1/audio/transcriptions")
+        c = pool.client("https://asr.example.com/v1")
+
+        assert a is b
+        assert a is not c
+        asyncio.run(pool.aclose())
+
+    def test_timeout_per_call_type(self):
+        """不同调用类型使用不同读超时，建连超时相同"""
+        chat = http_pool.timeout_for("chat")
+        asr_timeout = http_pool.timeout_for("asr")
+
+        assert chat.read == http_pool.TIMEOUTS["chat"]
+        assert asr_timeout.read == http_pool.TIMEOUTS["asr"]
+        assert chat.connect == asr_timeout.connect == http_pool.CONNECT_TIMEOUT
+        assert http_pool.timeout_for("chat", 5.0).read == 5.0
+
+
+class TestInjection:
+    """AIClient 与 ASR 使用注入的连接池"""
+
+    def test_ai_client_reuses_pool(self):
+        """多次进入 AIClient 复用同一客户端，且不会关闭它"""
+        requests: list[httpx.Request] = []
+        pool = http_pool.HTTPPool(transport=_stub_transport(requests))
+        config = AIConfig(api_key="k", api_base="https://api.example.com/v1")
+
+        async def main():
+            for _ in range(2):
+                async with AIClient(config, pool) as client:
+                    assert await client.chat_json("hi") == {"ok": True}
+            shared = pool.client(config.api_base)
+            assert not shared.is_closed
+            await pool.aclose()
+            return shared
+
+        shared = asyncio.run(main())
+        assert shared.is_closed
+        assert len(requests) == 2
+        assert requests[0].headers["authorization"] == "Bearer k"
+
+    def test_asr_uses_pool(self, tmp_path):
+        """ASR 请求经过连接池"""
+        requests: list[httpx.Request] = []
+        pool = http_pool.HTTPPool(transport=_stub_transport(requests))
+        video = tmp_path / "a.mp4"
+        video.write_bytes(b"data")
+        config = asr.ASRConfig(
+            api_key="k", api_base="https://asr.example.com/v1", audio_format="none"
+        )
+
+        result = asyncio.run(asr.transcribe_video(video, config, pool))
+
+        assert result.subtitles[0].text == "你好"
+        assert requests[0].url.path == "/v1/audio/transcriptions"
@@ -0,0 +1,61 @@
+"""
+[INPUT]: 依赖 pytest, os, json, vmarker.job_store
+[OUTPUT]: job_store 模块测试用例
+[POS]: tests/ 的后台任务状态存储测试
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import json
+import os
+
+import pytest
+
+from vmarker.job_store import JobStore
+
+JOB_ID = "0" * 32
+
+
+class TestJobStore:
+    """任务状态存储测试"""
+
+    def test_roundtrip_records_owner(self, tmp_path):
+        """写入后可读取，文件中记录所属进程与心跳"""
+        store = JobStore(tmp_path, ttl_seconds=3600)
+        store.put(JOB_ID, {"status": "pending"})
+
+        assert store.get(JOB_ID) == {"status": "pending"}
+        data = json.loads((tmp_path / f"{JOB_ID}.json").read_text(encoding="utf-8"))
+        assert data["owner"] == os.getpid()
+        assert data["heartbeat"] > 0
+        assert [p.name for p in tmp_path.iterdir()] == [f"{JOB_ID}.json"]
+
+    def test_stale_pending_reported_failed(self, tmp_path):
+        """心跳过期的未完成任务视为失败，已完成任务不受影响"""
+        store = JobStore(tmp_path, ttl_seconds=3600, stale_after=0)
+        store.put(JOB_ID, {"status": "pending"})
+        store.put("1" * 32, {"status": "done", "result": None})
+
+        record = store.get(JOB_ID)
+        assert record["status"] == "failed"
+        assert str(os.getpid()) in record["error"]
+        assert store.get("1" * 32) == {"status": "done", "result": None}
+
+    def test_expired_and_collect(self, tmp_path):
+        """过期记录读不到，collect 将其删除"""
+        store = JobStore(tmp_path, ttl_seconds=3600)
+        store.put(JOB_ID, {"status": "done"})
+        os.utime(tmp_path / f"{JOB_ID}.json", (0, 0))
+        assert store.collect() == 1
+        assert store.get(JOB_ID) is None
+
+        store.ttl_seconds = 0
+        store.put(JOB_ID, {"status": "done"})
+        assert store.get(JOB_ID) is None
+
+    def test_invalid_job_id(self, tmp_path):
+        """非法任务 ID 不会映射到目录之外"""
+        store = JobStore(tmp_path, ttl_seconds=3600)
+        assert store.get("../session.json") is None
+        assert store.get("missing") is None
+        with pytest.raises(ValueError):
+            store.put("../x", {"status": "pending"})
@@ -0,0 +1,105 @@
+"""
+[INPUT]: 依赖 pytest, random, time, numpy, vmarker.lexical, vmarker.chapter_bar
+[OUTPUT]: lexical 模块测试用例
+[POS]: tests/ 的离线词汇衔接分段测试
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import random
+import time
+
+import numpy as np
+
+from vmarker import chapter_bar as cb
+from vmarker import lexical
+from vmarker.models import Subtitle
+
+_TOPICS = [
+    "机器学习 模型 训练 数据 神经网络 梯度 参数 损失函数 深度学习 优化器".split(),
+    "咖啡 豆子 烘焙 研磨 手冲 水温 萃取 风味 酸度 拿铁".split(),
+    "basketball defense player coach tactics score rebound playoffs shooting dribble".split(),
+]
+
+
+def _subs(
+    cues_per_topic: int, seconds: float = 4.0, topics=_TOPICS, seed: int = 1
+) -> list[Subtitle]:
+    """每个主题连续若干条字幕，字幕由主题词随机组合并夹带口头禅"""
+    rng = random.Random(seed)
+    subs = []
+    for words in topics:
+        for _ in range(cues_per_topic):
+            t = len(subs) * seconds
+            text = "我们今天说一下" + " ".join(rng.sample(words, 3)) + "的问题"
+            subs.append(
+                Subtitle(index=len(subs) + 1, start_time=t, end_time=t + seconds, text=text)
+            )
+    return subs
+
+
+class TestTokenize:
+    """分词测试"""
+
+    def test_cjk_bigrams_and_words(self):
+        """中文取二元组并去掉虚词，西文取小写单词并去掉停用词"""
+        assert lexical.tokenize("神经网络的训练") == ["神经", "经网", "网络", "训练"]
+        assert lexical.tokenize("The Transformer and GPU") == ["transformer", "gpu"]
+
+
+class TestScores:
+    """相似度与深度测试"""
+
+    def test_gap_scores_drop_at_topic_change(self):
+        """主题切换处相似度最低"""
+        matrix = np.array([[1, 0], [1, 0], [1, 0], [0, 1], [0, 1], [0, 1]], dtype=float)
+        scores = lexical.gap_scores(matrix, window=2)
+        assert len(scores) == 5
+        assert scores.argmin() == 2
+        assert scores[0] == 1.0
+
+    def test_depth_only_at_valleys(self):
+        """只有低谷有深度，深度为两侧峰值之差的和"""
+        depths = lexical.depth_scores(np.array([0.9, 0.5, 0.8, 0.2, 0.6]))
+        assert depths.tolist() == [0, (0.9 - 0.5) + (0.8 - 0.5), 0, (0.8 - 0.2) + (0.6 - 0.2), 0]
+
+
+class TestSegment:
+    """分段测试"""
+
+    def test_boundaries_at_topic_changes(self):
+        """在主题切换处分段，标题取各段关键词而非口头禅"""
+        subs = _subs(200)
+        result = cb.extract_lexical(subs, 2400)
+
+        assert [c.start_time for c in result.chapters] == [0, 800, 1600]
+        assert result.chapters[-1].end_time == 2400
+        for chapter, words in zip(result.chapters, _TOPICS):
+            assert chapter.title
+            assert "今天" not in chapter.title and "问题" not in chapter.title
+            assert chapter.title.split("、")[0].lower() in " ".join(words).lower()
+
+        assert cb.validate(result.chapters, 2400).valid
+
+    def test_chapter_limit(self):
+        """章节数不超过上限"""
+        result = lexical.segment(_subs(200), 2400, chapters=2)
+        assert len(result.chapters) == 2
+
+    def test_short_input(self):
+        """字幕过少时返回单个章节"""
+        subs = [Subtitle(index=1, start_time=0, end_time=5, text="大家好")]
+        result = lexical.segment(subs, 5)
+        assert len(result.chapters) == 1
+        assert result.chapters[0].title == "大家好"
+        assert result.chapters[0].end_time == 5
+
+    def test_one_hour_fast(self):
+        """1 小时字幕远低于一秒完成"""
+        topics = [_TOPICS[i % 3] for i in range(12)]
+        subs = _subs(150, seconds=2.0, topics=topics)
+        assert subs[-1].end_time == 3600
+
+        start = time.perf_counter()
+        result = lexical.segment(subs, 3600)
+        assert time.perf_counter() - start < 1.0
+        assert len(result.chapters) >= 2
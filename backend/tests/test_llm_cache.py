@@ -0,0 +1,118 @@
+"""
+[INPUT]: 依赖 pytest, asyncio, httpx, vmarker.llm_cache, vmarker.singleflight, vmarker.ai_client
+[OUTPUT]: llm_cache 模块测试用例
+[POS]: tests/ 的 AI 响应缓存测试
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from vmarker import http_pool, llm_cache, singleflight
+from vmarker.ai_client import AIClient, AIConfig
+from vmarker.llm_cache import LLMCache
+
+
+class TestLLMCache:
+    """缓存存取测试"""
+
+    def test_key_covers_request_inputs(self):
+        """api_base / model / temperature / prompt 都会改变键"""
+        base = LLMCache.make_key("https://a/v1", "m", 0.3, "p")
+        assert base == LLMCache.make_key("https://a/v1/", "m", 0.3, "p")
+        assert base != LLMCache.make_key("https://b/v1", "m", 0.3, "p")
+        assert base != LLMCache.make_key("https://a/v1", "m2", 0.3, "p")
+        assert base != LLMCache.make_key("https://a/v1", "m", 0.7, "p")
+        assert base != LLMCache.make_key("https://a/v1", "m", 0.3, "p2")
+
+    def test_round_trip_and_stats(self, tmp_path):
+        """命中返回解析后的 JSON，并累计节省时间"""
+        cache = LLMCache(tmp_path / "llm.db", 1024 * 1024, 3600)
+        assert cache.get("k") is None
+
+        cache.put("k", {"chapters": ["开场"]}, latency=1.5)
+
+        assert cache.get("k") == {"chapters": ["开场"]}
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"]) == (1, 1)
+        assert stats["latency_saved_seconds"] == 1.5
+
+    def test_ttl(self, tmp_path):
+        """过期条目视为未命中"""
+        cache = LLMCache(tmp_path / "llm.db", 1024 * 1024, ttl_seconds=0)
+        cache.put("k", {"a": 1}, latency=1.0)
+        assert cache.get("k") is None
+
+    def test_lru_eviction(self, tmp_path):
+        """超出容量时淘汰最久未访问的条目"""
+        entry = {"text": "x" * 40}
+        size = len(json.dumps(entry))
+        cache = LLMCache(tmp_path / "llm.db", size * 2, 3600)
+
+        cache.put("a", entry, latency=0)
+        cache.put("b", entry, latency=0)
+        cache._connect().execute("UPDATE entries SET accessed = 0 WHERE key = 'b'")
+        cache.put("c", entry, latency=0)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == entry
+        assert cache.evictions == 1
+
+    def test_shared_between_instances(self, tmp_path):
+        """多个实例（模拟多个 worker）共享同一数据库"""
+        path = tmp_path / "llm.db"
+        LLMCache(path, 1024 * 1024, 3600).put("k", {"a": 1}, latency=0)
+        assert LLMCache(path, 1024 * 1024, 3600).get("k") == {"a": 1}
+
+    def test_many(self, tmp_path):
+        """批量写入与查找，只返回命中的键"""
+        cache = LLMCache(tmp_path / "llm.db", 1024 * 1024, 3600)
+        cache.put_many({f"k{i}": {"text": str(i)} for i in range(600)}, latency=0.1)
+
+        found = cache.get_many([f"k{i}" for i in range(590, 610)])
+
+        assert found == {f"k{i}": {"text": str(i)} for i in range(590, 600)}
+        assert (cache.hits, cache.misses) == (10, 10)
+
+
+class TestChatJsonCache:
+    """AIClient.chat_json 缓存测试"""
+
+    @pytest.fixture
+    def requests(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(llm_cache, "_cache", LLMCache(tmp_path / "llm.db", 1024 * 1024, 3600))
+        monkeypatch.setattr(
+            singleflight, "_flight", singleflight.SingleFlight(tmp_path / ".inflight")
+        )
+        return []
+
+    def _run(self, requests, **kwargs):
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, json={"choices": [{"message": {"content": '{"n": 1}'}}]})
+
+        pool = http_pool.HTTPPool(transport=httpx.MockTransport(handler))
+        config = AIConfig(api_key="k", api_base="https://api.example.com/v1")
+
+        async def main():
+            async with AIClient(config, pool) as client:
+                result = await client.chat_json("prompt", **kwargs)
+            await pool.aclose()
+            return result
+
+        return asyncio.run(main())
+
+    def test_identical_prompt_served_from_cache(self, requests):
+        """相同请求只发送一次"""
+        assert self._run(requests) == {"n": 1}
+        assert self._run(requests) == {"n": 1}
+        assert len(requests) == 1
+
+    def test_bypass(self, requests):
+        """use_cache=False 强制请求"""
+        self._run(requests)
+        self._run(requests, use_cache=False)
+        assert len(requests) == 2
@@ -0,0 +1,302 @@
+"""
+[INPUT]: 依赖 pytest, asyncio, httpx, vmarker.resilience, vmarker.ai_client, vmarker.http_pool,
+         vmarker.llm_cache
+[OUTPUT]: resilience 模块测试用例
+[POS]: tests/ 的 AI 调用重试、对冲与熔断测试
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from vmarker import ai_client, http_pool, llm_cache, resilience
+from vmarker.ai_client import AIClient, AIConfig
+from vmarker.resilience import CircuitBreaker, CircuitOpenError, RetryPolicy
+
+API_BASE = "https://api.example.com/v1"
+NO_WAIT = RetryPolicy(max_retries=2, base_delay=0, max_delay=5)
+
+
+@pytest.fixture(autouse=True)
+def isolated_state(tmp_path, monkeypatch):
+    """每个用例使用独立的熔断器、延迟统计、计数与空缓存"""
+    monkeypatch.setattr(resilience, "_breakers", {})
+    monkeypatch.setattr(resilience, "_trackers", {})
+    monkeypatch.setattr(resilience, "_counters", dict.fromkeys(resilience._counters, 0))
+    monkeypatch.setattr(llm_cache, "_cache", llm_cache.LLMCache(tmp_path / "llm.db", 0, 3600))
+
+
+def _ok(content: str = "ok") -> httpx.Response:
+    return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+
+def _chat(handler, policy: RetryPolicy = NO_WAIT) -> str:
+    pool = http_pool.HTTPPool(transport=httpx.MockTransport(handler))
+
+    async def main():
+        try:
+            async with AIClient(AIConfig(api_key="k", api_base=API_BASE), pool, policy) as client:
+                return await client.chat("prompt")
+        finally:
+            await pool.aclose()
+
+    return asyncio.run(main())
+
+
+def _status_error(status: int, headers: dict | None = None) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", API_BASE)
+    response = httpx.Response(status, headers=headers, request=request)
+    return httpx.HTTPStatusError("error", request=request, response=response)
+
+
+class TestRetryDelay:
+    """退避时间计算测试"""
+
+    def test_jitter_within_exponential_cap(self):
+        """无 Retry-After 时在 [0, base * 2^attempt] 内随机"""
+        policy = RetryPolicy(base_delay=1, max_delay=3)
+        for attempt, cap in [(0, 1), (1, 2), (4, 3)]:
+            error = _status_error(503)
+            delays = [resilience.retry_delay(error, attempt, policy) for _ in range(50)]
+            assert all(0 <= d <= cap for d in delays)
+
+    def test_retry_after_honoured(self):
+        """Retry-After 秒数优先于抖动退避，超过上限时放弃"""
+        policy = RetryPolicy(base_delay=0, max_delay=10)
+        assert resilience.retry_delay(_status_error(429, {"retry-after": "7"}), 0, policy) == 7
+        assert resilience.retry_delay(_status_error(429, {"retry-after": "60"}), 0, policy) is None
+
+    def test_retryable_errors(self):
+        """429、5xx 与网络错误可重试，其他 4xx 不重试"""
+        assert resilience.is_retryable(_status_error(429))
+        assert resilience.is_retryable(_status_error(502))
+        assert resilience.is_retryable(httpx.ReadTimeout("timeout"))
+        assert not resilience.is_retryable(_status_error(401))
+
+
+class TestRetry:
+    """AIClient 重试测试"""
+
+    def test_retries_until_success(self):
+        """429 与 503 后重试成功"""
+        responses = [
+            httpx.Response(429, headers={"retry-after": "0"}),
+            httpx.Response(503),
+            _ok("done"),
+        ]
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return responses[len(calls) - 1]
+
+        assert _chat(handler) == "done"
+        assert len(calls) == 3
+        assert resilience.stats()["retries"] == 2
+
+    def test_gives_up_after_max_retries(self):
+        """重试次数用尽后抛出最后的错误"""
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(500)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            _chat(handler)
+        assert len(calls) == NO_WAIT.max_retries + 1
+
+    def test_client_error_not_retried(self):
+        """401 等请求错误直接抛出"""
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(401)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            _chat(handler)
+        assert len(calls) == 1
+
+
+class TestCircuitBreaker:
+    """熔断测试"""
+
+    def test_opens_after_threshold_and_recovers(self, monkeypatch):
+        """连续失败达到阈值后拒绝请求，冷却后放行试探请求"""
+        now = [100.0]
+        monkeypatch.setattr(resilience.time, "monotonic", lambda: now[0])
+        breaker = CircuitBreaker(threshold=2, cooldown=10)
+
+        breaker.record_failure()
+        breaker.before_call()
+        breaker.record_failure()
+        assert breaker.state == "open"
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+        now[0] += 10
+        breaker.before_call()
+        assert breaker.state == "half-open"
+        # 试探进行中，其他请求仍被拒绝
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+        breaker.record_success()
+        assert breaker.state == "closed"
+        breaker.before_call()
+
+    def test_client_short_circuits(self, monkeypatch):
+        """熔断后 AIClient 不再发出请求"""
+        monkeypatch.setattr(
+            resilience, "_breakers", {API_BASE: CircuitBreaker(threshold=3, cooldown=60)}
+        )
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(503)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            _chat(handler)
+        assert len(calls) == 3
+
+        with pytest.raises(CircuitOpenError):
+            _chat(handler)
+        assert len(calls) == 3
+        assert resilience.stats()["breakers"] == {API_BASE: "open"}
+        assert resilience.stats()["short_circuits"] == 1
+
+
+class TestHedged:
+    """对冲请求测试"""
+
+    def test_backup_wins_when_primary_slow(self, monkeypatch):
+        """主请求超过阈值未返回时发出对冲请求，取先返回的结果"""
+        monkeypatch.setattr(resilience, "HEDGE_MIN_DELAY", 0)
+        calls = []
+        cancelled = []
+
+        async def send():
+            calls.append(len(calls))
+            if len(calls) == 1:
+                try:
+                    await asyncio.sleep(10)
+                except asyncio.CancelledError:
+                    cancelled.append(True)
+                    raise
+                return "primary"
+            return "backup"
+
+        assert asyncio.run(resilience.hedged(send, 0.01)) == "backup"
+        assert cancelled == [True]
+        assert resilience.stats()["hedges"] == 1
+        assert resilience.stats()["hedge_wins"] == 1
+
+    def test_success_wins_over_failure_in_same_round(self, monkeypatch):
+        """主请求失败与对冲请求成功同时完成时，返回成功的结果"""
+        monkeypatch.setattr(resilience, "HEDGE_MIN_DELAY", 0)
+
+        async def main():
+            backup_done = asyncio.Event()
+            calls = []
+
+            async def send():
+                calls.append(len(calls))
+                if len(calls) == 1:
+                    await backup_done.wait()
+                    raise _status_error(503)
+                backup_done.set()
+                return "backup"
+
+            return await resilience.hedged(send, 0.01)
+
+        for _ in range(10):
+            assert asyncio.run(main()) == "backup"
+
+    def test_raises_when_all_fail(self, monkeypatch):
+        """主请求与对冲请求都失败时抛出错误"""
+        monkeypatch.setattr(resilience, "HEDGE_MIN_DELAY", 0)
+        calls = []
+
+        async def send():
+            calls.append(1)
+            await asyncio.sleep(0.02 if len(calls) == 1 else 0.03)
+            raise _status_error(503)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            asyncio.run(resilience.hedged(send, 0.01))
+        assert len(calls) == 2
+
+    def test_client_hedges_inside_one_attempt(self, monkeypatch):
+        """AIClient 的对冲请求共用一次尝试：只取一次限流令牌、只记一次熔断失败"""
+        monkeypatch.setattr(resilience, "HEDGE_ENABLED", True)
+        monkeypatch.setattr(resilience, "HEDGE_MIN_DELAY", 0)
+        monkeypatch.setattr(resilience.LatencyTracker, "quantile", lambda self, q: 0.01)
+        acquired = []
+
+        class Limiter:
+            async def acquire(self):
+                acquired.append(1)
+
+        monkeypatch.setattr(ai_client, "get_rate_limiter", lambda api_base: Limiter())
+        calls = []
+
+        async def handler(request):
+            calls.append(request)
+            await asyncio.sleep(0.05)
+            return httpx.Response(503)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            _chat(handler, RetryPolicy(max_retries=0))
+        assert len(calls) == 2
+        assert len(acquired) == 1
+        assert resilience.get_breaker(API_BASE).failures == 1
+
+    def test_no_hedge_when_fast(self):
+        """主请求在阈值内返回时不发出对冲请求"""
+        calls = []
+
+        async def send():
+            calls.append(1)
+            return "primary"
+
+        assert asyncio.run(resilience.hedged(send, 0.5)) == "primary"
+        assert len(calls) == 1
+        assert resilience.stats()["hedges"] == 0
+
+    def test_caller_cancel_cancels_primary(self):
+        """等待对冲阈值期间调用方被取消时，主请求随之取消"""
+        cancelled = []
+
+        async def send():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        async def main():
+            caller = asyncio.create_task(resilience.hedged(send, 5))
+            await asyncio.sleep(0.01)
+            caller.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await caller
+            await asyncio.sleep(0.01)
+            return list(cancelled)
+
+        assert asyncio.run(main()) == [True]
+
+    def test_tracker_needs_samples(self, monkeypatch):
+        """样本不足时不估算阈值"""
+        monkeypatch.setattr(resilience, "HEDGE_MIN_SAMPLES", 10)
+        tracker = resilience.LatencyTracker()
+        for i in range(9):
+            tracker.record(i)
+        assert tracker.quantile(0.95) is None
+
+        for i in range(9, 100):
+            tracker.record(i)
+        assert tracker.quantile(0.95) == 95
@@ -0,0 +1,295 @@
+"""
+[INPUT]: 依赖 pytest, asyncio, fcntl, httpx, vmarker.singleflight, vmarker.artifact_cache,
+         vmarker.ai_client, vmarker.llm_cache, vmarker.resilience, vmarker.temp_manager
+[OUTPUT]: singleflight 模块测试用例
+[POS]: tests/ 的相同操作合并执行测试
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+import fcntl
+import os
+import time
+
+import httpx
+import pytest
+
+from vmarker import http_pool, llm_cache, resilience, singleflight
+from vmarker import temp_manager as tm
+from vmarker.ai_client import AIClient, AIConfig
+from vmarker.artifact_cache import ArtifactCache
+from vmarker.singleflight import SingleFlight
+
+
+@pytest.fixture(autouse=True)
+def flight(tmp_path, monkeypatch) -> SingleFlight:
+    """锁目录重定向到临时目录"""
+    instance = SingleFlight(tmp_path / ".inflight")
+    monkeypatch.setattr(singleflight, "_flight", instance)
+    return instance
+
+
+class TestSingleFlight:
+    """进程内合并测试"""
+
+    def test_concurrent_calls_share_one_execution(self, flight):
+        """并发的相同操作只执行一次，其余调用者共享结果"""
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {"n": len(calls)}
+
+        async def main():
+            return await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+
+        results = asyncio.run(main())
+
+        assert len(calls) == 1
+        assert [r for r, _ in results] == [{"n": 1}] * 5
+        assert [shared for _, shared in results] == [False, True, True, True, True]
+        assert flight.stats()["inflight"] == 0
+
+    def test_error_shared_then_retried(self, flight):
+        """失败传给所有等待者，之后的调用重新执行"""
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        async def main():
+            results = await asyncio.gather(
+                flight.do("k", work), flight.do("k", work), return_exceptions=True
+            )
+            assert all(isinstance(r, RuntimeError) for r in results)
+            with pytest.raises(RuntimeError):
+                await flight.do("k", work)
+
+        asyncio.run(main())
+        assert len(calls) == 2
+
+    def test_caller_cancel_does_not_cancel_others(self, flight):
+        """先到的调用者断开，后到者仍得到结果"""
+        async def work():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        async def main():
+            first = asyncio.create_task(flight.do("k", work))
+            await asyncio.sleep(0)
+            second = asyncio.create_task(flight.do("k", work))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            return await second
+
+        assert asyncio.run(main()) == ("done", True)
+
+
+class TestCrossProcess:
+    """跨 worker 文件锁测试（两个实例共享锁目录，模拟两个 worker）"""
+
+    def test_second_worker_waits_then_reads_cache(self, tmp_path):
+        """后到的 worker 等待锁释放，再从缓存取得结果"""
+        worker_a = SingleFlight(tmp_path / ".inflight")
+        worker_b = SingleFlight(tmp_path / ".inflight")
+        store: dict[str, str] = {}
+        calls = []
+
+        def work(name):
+            async def run():
+                if "k" in store:
+                    return store["k"]
+                calls.append(name)
+                await asyncio.sleep(0.1)
+                store["k"] = name
+                return name
+            return run
+
+        async def main():
+            a = asyncio.create_task(worker_a.do("k", work("a")))
+            await asyncio.sleep(0.01)
+            b = asyncio.create_task(worker_b.do("k", work("b")))
+            return await a, await b
+
+        (a, _), (b, shared) = asyncio.run(main())
+
+        assert calls == ["a"]
+        assert a == b == "a"
+        assert not shared
+        assert worker_b.lock_waits == 1
+
+    def test_idle_locks_collected(self, tmp_path, monkeypatch):
+        """清理时回收闲置的锁文件"""
+        monkeypatch.setattr(tm, "BASE_DIR", tmp_path)
+        monkeypatch.setattr(tm, "INFLIGHT_DIR", tmp_path / ".inflight")
+
+        async def work():
+            return 1
+
+        asyncio.run(SingleFlight(tm.INFLIGHT_DIR).do("k", work))
+        (lock,) = tm.INFLIGHT_DIR.iterdir()
+        old = time.time() - 48 * 3600
+        os.utime(lock, (old, old))
+
+        assert tm.cleanup_old_sessions(max_age_hours=24) == 0
+        assert not lock.exists()
+
+    def test_collect_skipped_while_directory_in_use(self, tmp_path, monkeypatch):
+        """其他进程打开锁文件尚未加锁（持有目录共享锁）时不回收"""
+        monkeypatch.setattr(tm, "BASE_DIR", tmp_path)
+        monkeypatch.setattr(tm, "INFLIGHT_DIR", tmp_path / ".inflight")
+
+        async def work():
+            return 1
+
+        asyncio.run(SingleFlight(tm.INFLIGHT_DIR).do("k", work))
+        (lock,) = tm.INFLIGHT_DIR.iterdir()
+        old = time.time() - 48 * 3600
+        os.utime(lock, (old, old))
+
+        dir_fd = os.open(tm.INFLIGHT_DIR, os.O_RDONLY)
+        try:
+            fcntl.flock(dir_fd, fcntl.LOCK_SH)
+            tm.cleanup_old_sessions(max_age_hours=24)
+            assert lock.exists()
+        finally:
+            os.close(dir_fd)
+
+        tm.cleanup_old_sessions(max_age_hours=24)
+        assert not lock.exists()
+
+    def test_collector_blocks_new_lockers(self, tmp_path):
+        """回收期间（目录排他锁）新的加锁请求等待回收结束"""
+        lock_dir = tmp_path / ".inflight"
+        lock_dir.mkdir()
+        worker = SingleFlight(lock_dir)
+
+        async def work():
+            return 1
+
+        async def main():
+            dir_fd = os.open(lock_dir, os.O_RDONLY)
+            fcntl.flock(dir_fd, fcntl.LOCK_EX)
+            task = asyncio.create_task(worker.do("k", work))
+            await asyncio.sleep(0.1)
+            assert not task.done()
+            assert list(lock_dir.iterdir()) == []
+            os.close(dir_fd)
+            return await task
+
+        assert asyncio.run(main()) == (1, False)
+        assert worker.lock_waits == 1
+
+    def test_no_file_lock_without_cross_process(self, tmp_path):
+        """cross_process=False 时只做进程内合并，不创建锁文件"""
+        worker = SingleFlight(tmp_path / ".inflight")
+
+        async def work():
+            return 1
+
+        assert asyncio.run(worker.do("k", work, cross_process=False)) == (1, False)
+        assert not (tmp_path / ".inflight").exists()
+
+
+class TestCallers:
+    """渲染与 AI 路径的合并测试"""
+
+    def test_artifact_rendered_once(self, tmp_path):
+        """相同产物的并发生成只渲染一次，各调用者都得到输出文件"""
+        cache = ArtifactCache(tmp_path / "cache", max_bytes=1024)
+        calls = []
+
+        async def produce(path):
+            calls.append(path)
+            await asyncio.sleep(0.05)
+            path.write_bytes(b"bar")
+
+        outputs = [tmp_path / f"out{i}.mp4" for i in range(3)]
+
+        async def main():
+            return await asyncio.gather(
+                *(cache.get_or_create_async("k", out, produce) for out in outputs)
+            )
+
+        hits = asyncio.run(main())
+
+        assert len(calls) == 1
+        assert hits == [False, True, True]
+        assert all(out.read_bytes() == b"bar" for out in outputs)
+
+    def test_disabled_cache_skips_file_lock(self, tmp_path, flight):
+        """缓存禁用时其他 worker 无结果可读，不加跨进程锁"""
+        cache = ArtifactCache(tmp_path / "cache", max_bytes=0)
+
+        async def produce(path):
+            path.write_bytes(b"bar")
+
+        output = tmp_path / "out.mp4"
+        assert not asyncio.run(cache.get_or_create_async("k", output, produce))
+        assert output.read_bytes() == b"bar"
+        assert not flight.lock_dir.exists()
+
+    def test_identical_ai_requests_sent_once(self, tmp_path, monkeypatch):
+        """并发的相同 chat_json 请求只发送一次"""
+        monkeypatch.setattr(
+            llm_cache, "_cache", llm_cache.LLMCache(tmp_path / "llm.db", 1024 * 1024, 3600)
+        )
+        requests = []
+
+        async def handler(request):
+            requests.append(request)
+            await asyncio.sleep(0.05)
+            return httpx.Response(200, json={"choices": [{"message": {"content": '{"n": 1}'}}]})
+
+        pool = http_pool.HTTPPool(transport=httpx.MockTransport(handler))
+        config = AIConfig(api_key="k", api_base="https://api.example.com/v1")
+
+        async def main():
+            async with AIClient(config, pool) as client:
+                results = await asyncio.gather(*(client.chat_json("prompt") for _ in range(4)))
+            await pool.aclose()
+            return results
+
+        assert asyncio.run(main()) == [{"n": 1}] * 4
+        assert len(requests) == 1
+
+    def test_shared_request_outlives_leader_client(self, tmp_path, monkeypatch):
+        """发起者的客户端先退出时，共享请求仍可重试完成，输出 token 计入每个调用者"""
+        monkeypatch.setattr(
+            llm_cache, "_cache", llm_cache.LLMCache(tmp_path / "llm.db", 1024 * 1024, 3600)
+        )
+        requests = []
+
+        async def handler(request):
+            requests.append(request)
+            await asyncio.sleep(0.05)
+            if len(requests) == 1:
+                return httpx.Response(503)
+            return httpx.Response(200, json={
+                "choices": [{"message": {"content": '{"n": 1}'}}],
+                "usage": {"completion_tokens": 7},
+            })
+
+        pool = http_pool.HTTPPool(transport=httpx.MockTransport(handler))
+        config = AIConfig(api_key="k", api_base="https://api.example.com/v1")
+        retry = resilience.RetryPolicy(max_retries=1, base_delay=0.1, max_delay=0.1)
+        leader = AIClient(config, pool, retry)
+        waiter = AIClient(config, pool, retry)
+
+        async def main():
+            async with leader:
+                leading = asyncio.create_task(leader.chat_json("prompt"))
+                await asyncio.sleep(0.01)
+            # 首次请求失败、重试之前，发起者的客户端已退出
+            async with waiter:
+                result = await waiter.chat_json("prompt")
+            await leading
+            await pool.aclose()
+            return result
+
+        assert asyncio.run(main()) == {"n": 1}
+        assert len(requests) == 2
+        assert leader.output_tokens == waiter.output_tokens == 7
@@ -0,0 +1,325 @@
+"""
+[INPUT]: 依赖 pytest, asyncio, vmarker.subtitle, vmarker.ai_client, vmarker.llm_cache
+[OUTPUT]: subtitle 模块测试用例
+[POS]: tests/ 的字幕润色测试
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+import json
+import re
+
+import pytest
+
+from vmarker import llm_cache, subtitle
+from vmarker.ai_client import RateLimiter, estimate_tokens
+from vmarker.models import Subtitle
+
+
+def _subs(count: int, text: str = "字幕") -> list[Subtitle]:
+    return [
+        Subtitle(index=i, start_time=i, end_time=i + 1, text=f"{text}{i}")
+        for i in range(1, count + 1)
+    ]
+
+
+class FakeClient:
+    """替身 AIClient：把每条字幕改为大写标记，可模拟失败与并发"""
+
+    def __init__(self, fail_times: int = 0, error: Exception | None = None):
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+        self.fail_times = fail_times
+        self.error = error or ValueError("JSON 解析失败")
+        self.output_tokens = 0
+
+    def __call__(self, config):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return None
+
+    async def chat_json(self, prompt: str) -> dict:
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(0.01)
+            if self.fail_times:
+                self.fail_times -= 1
+                raise self.error
+            items = re.findall(r"^\[(\d+)\] (.*)$", prompt, re.MULTILINE)
+            return {"subtitles": [{"index": int(i), "text": f"{t}!"} for i, t in items]}
+        finally:
+            self.active -= 1
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path, monkeypatch) -> llm_cache.LLMCache:
+    """每个用例使用独立的空缓存"""
+    instance = llm_cache.LLMCache(tmp_path / "llm.db", 1024 * 1024, 3600)
+    monkeypatch.setattr(llm_cache, "_cache", instance)
+    return instance
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    client = FakeClient()
+    monkeypatch.setattr(subtitle, "AIClient", client)
+    monkeypatch.setattr(subtitle, "RETRY_DELAY", 0)
+    return client
+
+
+def _polish(subs, **kwargs):
+    return asyncio.run(subtitle.polish_subtitles(subs, api_key="k", **kwargs))
+
+
+class TestPlanBatches:
+    """分批规划测试"""
+
+    def test_respects_size_cap(self):
+        """短句按条数上限切分"""
+        batches = subtitle._plan_batches(_subs(120), max_tokens=10_000, max_size=50)
+        assert [len(b) for b in batches] == [50, 50, 20]
+
+    def test_respects_token_budget(self):
+        """长句按 token 预算切分，顺序保持不变"""
+        subs = _subs(10, text="很长的字幕" * 20)
+        budget = estimate_tokens(f"[1] {subs[0].text}\n") * 3
+        batches = subtitle._plan_batches(subs, max_tokens=budget)
+
+        assert all(len(b) <= 3 for b in batches)
+        assert [s.index for b in batches for s in b] == list(range(1, 11))
+
+
+class TestPolishSubtitles:
+    """并发润色测试"""
+
+    def test_results_in_order(self, fake_client):
+        """并发执行，结果按原顺序合并"""
+        result = _polish(_subs(120), concurrency=3)
+
+        assert [s.index for s in result.subtitles] == list(range(1, 121))
+        assert result.subtitles[0].polished_text == "字幕1!"
+        assert result.changes_count == 120
+        assert fake_client.calls == 3
+        assert fake_client.max_active > 1
+
+    def test_concurrency_limit(self, fake_client):
+        """并发数不超过上限"""
+        _polish(_subs(200), concurrency=2)
+        assert fake_client.max_active <= 2
+
+    def test_failed_batch_retried_alone(self, fake_client):
+        """响应无法解析的批次单独重试，成功批次不重跑"""
+        fake_client.fail_times = 1
+        result = _polish(_subs(100), concurrency=1)
+
+        assert fake_client.calls == 3
+        assert result.changes_count == 100
+
+    def test_retries_exhausted(self, fake_client):
+        """重试耗尽后抛出原始错误"""
+        fake_client.fail_times = 10
+        with pytest.raises(ValueError, match="JSON"):
+            _polish(_subs(10), retries=1)
+
+        assert fake_client.calls == 2
+
+    def test_request_errors_not_retried(self, fake_client):
+        """请求错误已由 AIClient 重试，批次层不再重试"""
+        fake_client.fail_times = 10
+        fake_client.error = RuntimeError("boom")
+        with pytest.raises(RuntimeError, match="boom"):
+            _polish(_subs(10), retries=2)
+
+        assert fake_client.calls == 1
+
+
+class TestPolishCache:
+    """逐条缓存测试"""
+
+    def test_repolish_after_edit_sends_one_batch(self, fake_client):
+        """2000 条字幕修改 10 条后重新润色，只请求一个批次"""
+        subs = _subs(2000)
+        first = _polish(subs)
+        assert fake_client.calls == 40
+        assert first.cached_count == 0
+
+        edited = [
+            sub.model_copy(update={"text": f"改过的{sub.text}"})
+            if 1000 <= sub.index < 1010
+            else sub
+            for sub in subs
+        ]
+        fake_client.calls = 0
+        second = _polish(edited)
+
+        assert fake_client.calls == 1
+        assert second.cached_count == 2000 - 12  # 修改的 10 条及其前后各 1 条
+        assert second.changes_count == 2000
+        assert second.subtitles[1000].polished_text == "改过的字幕1001!"
+        assert second.subtitles[0].polished_text == "字幕1!"
+
+    def test_unchanged_file_not_sent(self, fake_client):
+        """完全相同的字幕不请求 AI，修改统计保持正确"""
+        _polish(_subs(30))
+        fake_client.calls = 0
+        result = _polish(_subs(30))
+
+        assert fake_client.calls == 0
+        assert result.changes_count == 30
+        assert result.cached_count == 30
+
+    def test_context_and_use_cache(self, fake_client):
+        """相邻字幕不同则不命中；use_cache=False 时全部重新请求"""
+        _polish(_subs(3))
+        fake_client.calls = 0
+
+        assert _polish(_subs(3), use_cache=False).cached_count == 0
+        assert fake_client.calls == 1
+
+        reordered = _subs(3)
+        reordered[0], reordered[2] = (
+            reordered[0].model_copy(update={"text": reordered[2].text}),
+            reordered[2].model_copy(update={"text": reordered[0].text}),
+        )
+        assert _polish(reordered).cached_count == 0
+
+
+class DiffClient(FakeClient):
+    """替身 AIClient：只修正含"派森"的字幕，按模式返回修改过的或全部字幕"""
+
+    async def chat_json(self, prompt: str) -> dict:
+        self.calls += 1
+        items = re.findall(r"^\[(\d+)\] (.*)$", prompt, re.MULTILINE)
+        polished = [{"index": int(i), "text": t.replace("派森", "Python")} for i, t in items]
+        if "只包含修改过的字幕" in prompt:
+            polished = [item for item, (_, t) in zip(polished, items) if item["text"] != t]
+            polished.append({"index": 99999, "text": "不存在的字幕"})
+        result = {"subtitles": polished}
+        self.output_tokens += estimate_tokens(json.dumps(result, ensure_ascii=False))
+        return result
+
+
+class TestDiffMode:
+    """只返回修改条目的润色模式测试"""
+
+    @pytest.fixture
+    def diff_client(self, monkeypatch):
+        client = DiffClient()
+        monkeypatch.setattr(subtitle, "AIClient", client)
+        return client
+
+    def _subs(self) -> list[Subtitle]:
+        subs = _subs(200, text="我们用派森写代码" * 3)
+        return [
+            sub if sub.index % 50 == 0 else sub.model_copy(update={"text": f"普通字幕{sub.index}"})
+            for sub in subs
+        ]
+
+    def test_merges_changes_and_drops_unknown_indices(self, diff_client):
+        """只合并修改过的字幕，未返回的保留原文，不存在的序号被丢弃"""
+        result = _polish(self._subs(), mode="diff")
+
+        assert [s.index for s in result.subtitles] == list(range(1, 201))
+        assert result.changes_count == 4
+        assert result.subtitles[49].polished_text.startswith("我们用Python写代码")
+        assert result.subtitles[0].polished_text == "普通字幕1"
+
+        # 未修改的字幕同样写入逐条缓存
+        diff_client.calls = 0
+        assert _polish(self._subs(), mode="diff").cached_count == 200
+        assert diff_client.calls == 0
+
+    def test_fewer_output_tokens_than_full(self, diff_client):
+        """输出 token 数上报到结果中，diff 模式远少于 full 模式"""
+        full = _polish(self._subs(), mode="full", use_cache=False)
+        diff_client.output_tokens = 0
+        diff = _polish(self._subs(), mode="diff", use_cache=False)
+
+        expected = [s.polished_text for s in full.subtitles]
+        assert [s.polished_text for s in diff.subtitles] == expected
+        assert 0 < diff.output_tokens < full.output_tokens / 5
+
+    def test_cache_keyed_by_mode_and_prompt_version(self, diff_client, monkeypatch):
+        """不同模式与 Prompt 版本的结果互不复用"""
+        _polish(self._subs(), mode="full")
+        assert _polish(self._subs(), mode="diff").cached_count == 0
+
+        monkeypatch.setattr(subtitle, "PROMPT_VERSION", subtitle.PROMPT_VERSION + 1)
+        assert _polish(self._subs(), mode="diff").cached_count == 0
+
+    def test_unknown_mode(self, diff_client):
+        """未知模式报错"""
+        with pytest.raises(ValueError):
+            _polish(self._subs(), mode="partial")
+
+
+class TestGenerateSrt:
+    """润色结果导出测试"""
+
+    def test_uses_polished_text_and_rounds_millis(self):
+        """导出润色后的文本，时间戳与 parser.format_srt 一致（按毫秒四舍五入）"""
+        subs = [subtitle.PolishedSubtitle(1, 1.001, 2.5, "原文", "润色")]
+
+        assert subtitle.generate_srt(subs) == "1\n00:00:01,001 --> 00:00:02,500\n润色\n"
+
+
+class TestRateLimiter:
+    """限流器测试"""
+
+    def test_disabled(self):
+        """速率为 0 时不等待"""
+        async def main():
+            limiter = RateLimiter(0)
+            for _ in range(100):
+                await limiter.acquire()
+
+        asyncio.run(main())
+
+    def test_limits_rate(self):
+        """超出突发容量后按速率放行"""
+        async def main():
+            limiter = RateLimiter(600)  # 每秒 10 次
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            for _ in range(13):
+                await limiter.acquire()
+            return loop.time() - start
+
+        assert asyncio.run(main()) >= 0.25
+
+
+class TestPolishStream:
+    """流式润色测试"""
+
+    def test_items_then_result(self, monkeypatch):
+        """逐条产出润色结果，最后产出按顺序合并的结果"""
+
+        class StreamClient(FakeClient):
+            async def chat_json_stream(self, prompt: str):
+                result = await self.chat_json(prompt)
+                for item in result["subtitles"]:
+                    yield "subtitles", item
+                yield None, result
+
+        monkeypatch.setattr(subtitle, "AIClient", StreamClient())
+
+        async def main():
+            return [event async for event in subtitle.polish_subtitles_stream(
+                _subs(120), api_key="k", concurrency=3,
+            )]
+
+        events = asyncio.run(main())
+        items, final = events[:-1], events[-1]
+
+        assert len(items) == 120
+        assert {item.index for item in items} == set(range(1, 121))
+        assert isinstance(final, subtitle.PolishResult)
+        assert [s.index for s in final.subtitles] == list(range(1, 121))
+        assert final.changes_count == 120
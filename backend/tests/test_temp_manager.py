@@ -0,0 +1,145 @@
+"""
+[INPUT]: 依赖 pytest, asyncio, FastAPI UploadFile, vmarker.temp_manager, vmarker.api.routes.video
+[OUTPUT]: temp_manager 模块测试用例
+[POS]: tests/ 的临时会话与内容寻址存储测试
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+import io
+import os
+import time
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from vmarker import temp_manager as tm
+from vmarker.api.routes import video as video_routes
+
+
+@pytest.fixture
+def base_dir(tmp_path, monkeypatch):
+    """将会话根目录重定向到临时目录"""
+    monkeypatch.setattr(tm, "BASE_DIR", tmp_path)
+    monkeypatch.setattr(tm, "BLOB_DIR", tmp_path / ".blobs")
+    return tmp_path
+
+
+class TestBlobStore:
+    """内容寻址存储测试"""
+
+    def test_store_is_idempotent(self, base_dir):
+        """相同内容只存储一份"""
+        d1 = tm.store_blob(b"video-bytes")
+        d2 = tm.store_blob(b"video-bytes")
+
+        assert d1 == d2 == tm.compute_digest(b"video-bytes")
+        assert len(list(tm.BLOB_DIR.iterdir())) == 1
+
+    def test_invalid_digest(self, base_dir):
+        """非法摘要不可访问"""
+        assert tm.has_blob("../etc/passwd") is False
+        with pytest.raises(ValueError):
+            tm.blob_path("not-a-digest")
+
+    def test_sessions_share_blob(self, base_dir):
+        """多个会话链接同一 blob，不复制内容"""
+        digest = tm.store_blob(b"video-bytes")
+        s1, s2 = tm.TempSession(), tm.TempSession()
+
+        p1 = s1.link_blob(digest, "source.mp4")
+        p2 = s2.link_blob(digest, "source.mp4")
+
+        assert p1.read_bytes() == p2.read_bytes() == b"video-bytes"
+        assert tm.blob_path(digest).stat().st_nlink == 3
+
+    def test_link_missing_blob(self, base_dir):
+        """链接不存在的 blob 报错"""
+        with pytest.raises(FileNotFoundError):
+            tm.TempSession().link_blob("0" * 64, "source.mp4")
+
+    def test_store_blob_file_moves(self, base_dir):
+        """已写好的临时文件移动为 blob，内容已存在时删除临时文件"""
+        digest = tm.compute_digest(b"video-bytes")
+        for _ in range(2):
+            tmp = tm.blob_temp_path()
+            tmp.write_bytes(b"video-bytes")
+            assert tm.store_blob_file(tmp, digest) == digest
+            assert not tmp.exists()
+
+        assert [p.name for p in tm.BLOB_DIR.iterdir()] == [digest]
+
+
+class TestStreamingUpload:
+    """上传内容分块写入 blob 测试"""
+
+    def _receive(self, content: bytes, monkeypatch, chunk: int = 4):
+        monkeypatch.setattr(video_routes, "UPLOAD_CHUNK_BYTES", chunk)
+        upload = UploadFile(io.BytesIO(content), filename="a.mp4")
+        return asyncio.run(video_routes._receive_upload(upload))
+
+    def test_digest_while_streaming(self, base_dir, monkeypatch):
+        """分块写入并计算摘要，结果与整体摘要一致，不留临时文件"""
+        content = b"video-bytes" * 10
+        digest = self._receive(content, monkeypatch)
+
+        assert digest == tm.compute_digest(content)
+        assert tm.blob_path(digest).read_bytes() == content
+        assert [p.name for p in tm.BLOB_DIR.iterdir()] == [digest]
+
+    def test_oversize_aborts(self, base_dir, monkeypatch):
+        """超出大小限制时中止并删除临时文件"""
+        monkeypatch.setattr(video_routes, "MAX_FILE_SIZE", 10)
+        with pytest.raises(HTTPException) as exc:
+            self._receive(b"x" * 11, monkeypatch)
+
+        assert exc.value.status_code == 400
+        assert list(tm.BLOB_DIR.iterdir()) == []
+
+
+class TestCleanup:
+    """清理与引用计数测试"""
+
+    def test_unreferenced_blob_collected(self, base_dir):
+        """会话全部清理后 blob 被回收"""
+        digest = tm.store_blob(b"video-bytes")
+        session = tm.TempSession()
+        session.link_blob(digest, "source.mp4")
+        session.cleanup()
+
+        time.sleep(0.01)
+        assert tm._collect_blobs(max_age_seconds=0) == 1
+        assert not tm.has_blob(digest)
+
+    def test_live_session_keeps_blob(self, base_dir):
+        """未过期会话引用的 blob 不回收"""
+        digest = tm.store_blob(b"video-bytes")
+        tm.TempSession().link_blob(digest, "source.mp4")
+
+        assert tm.cleanup_old_sessions(max_age_hours=24) == 0
+        assert tm._collect_blobs(max_age_seconds=0) == 0
+        assert tm.has_blob(digest)
+
+    def test_blob_dir_not_treated_as_session(self, base_dir):
+        """内部存储目录不会被当作会话"""
+        tm.store_blob(b"video-bytes")
+        old = time.time() - 48 * 3600
+        os.utime(tm.BLOB_DIR, (old, old))
+
+        assert tm.cleanup_old_sessions(max_age_hours=24) == 0
+        assert tm.BLOB_DIR.exists()
+        assert tm.get_session(".blobs") is None
+
+
+class TestSessionMeta:
+    """会话元数据测试"""
+
+    def test_update_meta_merges(self, base_dir):
+        """元数据合并写入"""
+        session = tm.TempSession()
+        assert session.read_meta() == {}
+
+        session.update_meta(source_digest="abc")
+        session.update_meta(probe={"duration": 1.0})
+
+        assert session.read_meta() == {"source_digest": "abc", "probe": {"duration": 1.0}}
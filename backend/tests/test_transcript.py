@@ -0,0 +1,167 @@
+"""
+[INPUT]: 依赖 pytest, asyncio, vmarker.transcript, vmarker.analysis, vmarker.chapter_bar
+[OUTPUT]: transcript 模块测试用例
+[POS]: tests/ 的长字幕 map-reduce 测试
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+import re
+
+import pytest
+
+from vmarker import analysis, transcript
+from vmarker import chapter_bar as cb
+from vmarker.models import Subtitle
+
+
+def _subs(duration: int, step: int = 5, text: str = "这是一句比较长的字幕内容") -> list[Subtitle]:
+    return [
+        Subtitle(index=i + 1, start_time=t, end_time=t + step, text=f"第{i}句{text}")
+        for i, t in enumerate(range(0, duration, step))
+    ]
+
+
+class FakeClient:
+    """替身 AIClient：map 请求返回窗口首尾两个主题，reduce 请求返回固定章节"""
+
+    def __init__(self, config=None):
+        self.prompts: list[str] = []
+        self.active = 0
+        self.max_active = 0
+
+    def __call__(self, config):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return None
+
+    async def chat_json(self, prompt: str) -> dict:
+        self.prompts.append(prompt)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(0.01)
+        finally:
+            self.active -= 1
+
+        if "候选主题" in prompt:
+            return {"chapters": [{"title": "全片", "start_time": 0, "end_time": 3600}]}
+        times = [float(t) for t in re.findall(r"^\[(\d+)\]", prompt, re.MULTILINE)]
+        return {"topics": [
+            {"start_time": times[0], "title": f"主题{times[0]:.0f}"},
+            {"start_time": times[-1], "title": f"主题{times[-1]:.0f}"},
+            {"start_time": 99999, "title": "越界"},
+        ]}
+
+
+class TestPackTranscript:
+    """字幕打包测试"""
+
+    def test_buckets_and_compact_timestamps(self):
+        """相邻字幕合并为一行，时间戳取整数秒"""
+        subs = [
+            Subtitle(index=1, start_time=0.5, end_time=2, text="hello"),
+            Subtitle(index=2, start_time=2.5, end_time=4, text="world"),
+            Subtitle(index=3, start_time=21.2, end_time=23, text="你好"),
+            Subtitle(index=4, start_time=23.5, end_time=25, text="世界"),
+        ]
+        packed = transcript.pack_transcript(subs, bucket_seconds=20)
+        assert packed == "[0] hello world\n[21] 你好世界"
+
+    def test_rolling_caption_dedupe(self):
+        """自动字幕的滚动重复被去除"""
+        subs = [
+            Subtitle(index=1, start_time=0, end_time=3, text="today we talk about"),
+            Subtitle(index=2, start_time=2, end_time=5, text="today we talk about"),
+            Subtitle(index=3, start_time=4, end_time=7, text="talk about python decorators"),
+            Subtitle(index=4, start_time=6, end_time=9, text="python decorators"),
+        ]
+        packed = transcript.pack_transcript(subs)
+        assert packed == "[0] today we talk about python decorators"
+
+    def test_smaller_than_per_cue_lines(self):
+        """短字幕打包后明显小于逐条带时间戳的格式"""
+        subs = [
+            Subtitle(
+                index=i + 1, start_time=i * 2.5, end_time=i * 2.5 + 2.5, text=f"caption number {i}"
+            )
+            for i in range(400)
+        ]
+        naive = "\n".join(f"[{s.start_time:.1f}s] {s.text}" for s in subs)
+        assert len(transcript.pack_transcript(subs)) < len(naive) * 0.8
+
+    def test_token_budget(self):
+        """超出预算时截短每行，仍保留全部时间段"""
+        subs = _subs(600)
+        full = transcript.pack_transcript(subs)
+        packed = transcript.pack_transcript(subs, max_tokens=200)
+
+        assert transcript.estimate_tokens(packed) <= 200
+        assert packed.count("\n") == full.count("\n")
+
+    def test_pluggable_tokenizer(self):
+        """可替换 token 估算函数"""
+        packed = transcript.pack_transcript(_subs(600), max_tokens=300, tokenizer=len)
+        assert len(packed) <= 300
+
+
+class TestSplitWindows:
+    """窗口切分测试"""
+
+    def test_overlapping_windows_cover_all(self):
+        """窗口相互重叠且覆盖全部字幕"""
+        subs = _subs(1500)
+        windows = transcript.split_windows(subs, window_seconds=600, overlap_seconds=60)
+
+        assert [(w.start, w.end) for w in windows] == [(0, 600), (540, 1140), (1080, 1500)]
+        covered = {s.index for w in windows for s in w.subtitles}
+        assert covered == {s.index for s in subs}
+
+    def test_invalid_overlap(self):
+        """重叠时长必须小于窗口时长"""
+        with pytest.raises(ValueError):
+            transcript.split_windows(_subs(100), window_seconds=60, overlap_seconds=60)
+
+    def test_needs_windowing(self):
+        """只有超长字幕才切分"""
+        assert not transcript.needs_windowing(_subs(300))
+        assert transcript.needs_windowing(_subs(7200))
+
+
+class TestExtractTopics:
+    """map 阶段测试"""
+
+    def test_concurrent_and_deduped(self):
+        """窗口并发处理，结果按时间排序、越界与重复被丢弃"""
+        client = FakeClient()
+        topics = asyncio.run(transcript.extract_topics(
+            client, _subs(1800), window_seconds=600, overlap_seconds=60, concurrency=4,
+        ))
+
+        starts = [t.start_time for t in topics]
+        assert starts == sorted(starts)
+        assert all(b - a >= transcript.DEDUPE_SECONDS for a, b in zip(starts, starts[1:]))
+        assert 99999 not in starts
+        assert client.max_active > 1
+        assert len(client.prompts) == 4
+
+
+class TestExtractAi:
+    """chapter_bar.extract_ai 长字幕测试"""
+
+    def test_long_transcript_uses_map_reduce(self, monkeypatch):
+        """超长字幕不截断，走 map-reduce 覆盖全片"""
+        client = FakeClient()
+        monkeypatch.setattr(analysis, "AIClient", client)
+
+        result = asyncio.run(cb.extract_ai(_subs(7200), 7200, api_key="k"))
+
+        reduce_prompt = client.prompts[-1]
+        assert "候选主题" in reduce_prompt
+        times = [int(t) for t in re.findall(r"^\[(\d+)\]", reduce_prompt, re.MULTILINE)]
+        assert max(times) >= 7000  # 视频末尾也被覆盖
+        assert result.chapters[0].title == "全片"
@@ -50,6 +50,20 @@ class TestCalculateSegments:
         with pytest.raises(ValueError, match="chunk_seconds must be positive"):
             calculate_segments(duration=60, chunk_seconds=0)
 
+    def test_snap_to_keyframes(self):
+        """分片边界对齐到之前最近的关键帧"""
+        keyframes = [0.0, 58.0, 62.0, 118.0, 130.0]
+        result = calculate_segments(duration=150, chunk_seconds=60, keyframes=keyframes)
+
+        assert [s.start for s in result] == [0.0, 58.0, 118.0]
+        assert sum(s.duration for s in result) == 150
+
+    def test_snap_keeps_boundary_without_nearby_keyframe(self):
+        """没有合适关键帧时保留名义边界"""
+        result = calculate_segments(duration=120, chunk_seconds=60, keyframes=[0.0])
+
+        assert [s.start for s in result] == [0.0, 60.0]
+
     def test_chunk_seconds_negative_raises(self):
         """chunk_seconds<0 应抛出 ValueError"""
         with pytest.raises(ValueError, match="chunk_seconds must be positive"):
@@ -0,0 +1,239 @@
+"""
+[INPUT]: 依赖 pytest, vmarker.video_probe
+[OUTPUT]: video_probe 模块测试用例
+[POS]: tests/ 的视频探测测试
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import os
+import struct
+
+import pytest
+
+from vmarker import video_probe
+from vmarker.video_probe import VideoInfo
+
+
+def _box(box_type: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def _full(payload: bytes, version: int = 0) -> bytes:
+    return bytes([version, 0, 0, 0]) + payload
+
+
+def _trak(
+    handler: bytes,
+    fourcc: bytes,
+    stbl_extra: bytes = b"",
+    matrix=(65536, 0),
+    entry_extra: bytes = b"",
+) -> bytes:
+    a, b = matrix
+    tkhd = _full(b"\0" * 36 + struct.pack(">9i", a, b, 0, -b, a, 0, 0, 0, 1 << 30) + b"\0" * 8)
+    mdhd = _full(struct.pack(">IIIII", 0, 0, 15360, 153600, 0))
+    hdlr = _full(b"\0" * 4 + handler + b"\0" * 13)
+    entry = _box(fourcc, b"\0" * 24 + struct.pack(">HH", 1280, 720) + b"\0" * 50 + entry_extra)
+    stsd = _full(struct.pack(">I", 1) + entry)
+    stts = _full(struct.pack(">III", 1, 300, 512))
+    stbl = _box(b"stbl", _box(b"stsd", stsd) + _box(b"stts", stts) + stbl_extra)
+    mdia = _box(b"mdia", _box(b"mdhd", mdhd) + _box(b"hdlr", hdlr) + _box(b"minf", stbl))
+    return _box(b"trak", _box(b"tkhd", tkhd) + mdia)
+
+
+def _mp4(matrix=(65536, 0), fourcc: bytes = b"avc1", entry_extra: bytes = b"") -> bytes:
+    """构造最小 MP4：10 秒 30fps 视频（每 2 秒一个关键帧）+ AAC 音轨"""
+    mvhd = _full(struct.pack(">IIII", 0, 0, 1000, 10000) + b"\0" * 80)
+    stss = _box(b"stss", _full(struct.pack(">6I", 5, 1, 61, 121, 181, 241)))
+    moov = _box(
+        b"moov",
+        _box(b"mvhd", mvhd)
+        + _trak(b"vide", fourcc, stss, matrix, entry_extra)
+        + _trak(b"soun", b"mp4a"),
+    )
+    return _box(b"ftyp", b"isom\0\0\0\0") + _box(b"mdat", b"\0" * 16) + moov
+
+
+def _avcc(profile: int, extension: bytes = b"") -> bytes:
+    """avcC：一个 SPS、一个 PPS，可带 High profile 的色度/位深扩展"""
+    return _box(
+        b"avcC",
+        bytes([1, profile, 0, 40, 0xFF, 0xE1]) + struct.pack(">H", 3) + b"sps"
+        + bytes([1]) + struct.pack(">H", 2) + b"pp" + extension,
+    )
+
+
+def _info(**overrides) -> VideoInfo:
+    data = dict(duration=60.0, width=1920, height=1080, fps=30.0, codec="h264", file_size=1)
+    data.update(overrides)
+    return VideoInfo(**data)
+
+
+class TestProbeCache:
+    """探测缓存测试"""
+
+    @pytest.fixture(autouse=True)
+    def fake_ffprobe(self, monkeypatch):
+        """替换 FFprobe 调用并记录次数"""
+        calls = []
+
+        def fake(path):
+            calls.append(path)
+            return _info()
+
+        monkeypatch.setattr(video_probe, "_probe_ffprobe", fake)
+        monkeypatch.setattr(video_probe, "_PROBE_CACHE", video_probe.OrderedDict())
+        return calls
+
+    def test_same_file_probed_once(self, tmp_path, fake_ffprobe):
+        """同一文件只探测一次"""
+        path = tmp_path / "a.mp4"
+        path.write_bytes(b"data")
+
+        video_probe.probe(path)
+        video_probe.probe(path)
+
+        assert len(fake_ffprobe) == 1
+
+    def test_hardlinks_share_result(self, tmp_path, fake_ffprobe):
+        """硬链接共享文件身份"""
+        path = tmp_path / "a.mp4"
+        path.write_bytes(b"data")
+        link = tmp_path / "b.mp4"
+        os.link(path, link)
+
+        video_probe.probe(path)
+        video_probe.probe(link)
+
+        assert len(fake_ffprobe) == 1
+
+    def test_modified_file_reprobed(self, tmp_path, fake_ffprobe):
+        """文件变化后重新探测"""
+        path = tmp_path / "a.mp4"
+        path.write_bytes(b"data")
+        video_probe.probe(path)
+
+        path.write_bytes(b"other data")
+        video_probe.probe(path)
+
+        assert len(fake_ffprobe) == 2
+
+    def test_bypass_cache(self, tmp_path, fake_ffprobe):
+        """use_cache=False 强制探测"""
+        path = tmp_path / "a.mp4"
+        path.write_bytes(b"data")
+
+        video_probe.probe(path)
+        video_probe.probe(path, use_cache=False)
+
+        assert len(fake_ffprobe) == 2
+
+
+class TestParsing:
+    """FFprobe 输出解析测试"""
+
+    def test_keyframe_interval(self):
+        """按视频流关键帧估算间隔"""
+        data = {
+            "packets": [
+                {"stream_index": 0, "pts_time": "0.0", "flags": "K__"},
+                {"stream_index": 1, "pts_time": "0.5", "flags": "K__"},
+                {"stream_index": 0, "pts_time": "1.0", "flags": "___"},
+                {"stream_index": 0, "pts_time": "2.0", "flags": "K__"},
+                {"stream_index": 0, "pts_time": "4.0", "flags": "K__"},
+            ]
+        }
+        assert video_probe._parse_keyframe_interval(data, 0) == 2.0
+        assert video_probe._parse_keyframe_interval({}, 0) is None
+
+    def test_rotation(self):
+        """旋转角度解析"""
+        assert video_probe._parse_rotation({"side_data_list": [{"rotation": -90}]}) == 90
+        assert video_probe._parse_rotation({"tags": {"rotate": "180"}}) == 180
+        assert video_probe._parse_rotation({}) == 0
+
+    def test_round_trip(self):
+        """字典序列化往返"""
+        info = _info(audio_codec="aac", rotation=90)
+        assert VideoInfo.from_dict({**info.to_dict(), "unknown": 1}) == info
+
+
+class TestIsoBmff:
+    """MP4/MOV 头解析测试"""
+
+    @pytest.fixture(autouse=True)
+    def no_ffprobe(self, monkeypatch):
+        """禁止回退到 FFprobe"""
+        def fail(path):
+            raise RuntimeError("ffprobe should not be called")
+
+        monkeypatch.setattr(video_probe, "_probe_ffprobe", fail)
+        monkeypatch.setattr(video_probe, "_PROBE_CACHE", video_probe.OrderedDict())
+
+    def test_probe_without_ffprobe(self, tmp_path):
+        """直接从 moov 读取元数据"""
+        path = tmp_path / "a.mp4"
+        path.write_bytes(_mp4())
+
+        info = video_probe.probe(path)
+
+        assert info.duration == 10.0
+        assert (info.width, info.height) == (1280, 720)
+        assert info.fps == 30.0
+        assert info.codec == "h264"
+        assert info.audio_codec == "aac"
+        assert info.keyframe_interval == 2.0
+        assert info.rotation == 0
+        assert info.file_size == path.stat().st_size
+
+    def test_rotation_matrix(self, tmp_path):
+        """旋转矩阵解析"""
+        path = tmp_path / "a.mov"
+        path.write_bytes(_mp4(matrix=(0, 65536)))
+
+        assert video_probe.probe(path).rotation == 90
+
+    def test_keyframe_times(self, tmp_path):
+        """关键帧时间表"""
+        path = tmp_path / "a.mp4"
+        path.write_bytes(_mp4())
+
+        assert video_probe.keyframe_times(path) == [0.0, 2.0, 4.0, 6.0, 8.0]
+
+    @pytest.mark.parametrize(
+        ("fourcc", "entry_extra", "expected"),
+        [
+            (b"avc1", _avcc(77), "yuv420p"),
+            (b"avc1", _avcc(100), "yuv420p"),
+            (b"avc1", _avcc(110, bytes([0xFE, 0xFA, 0xFA, 0])), "yuv422p10le"),
+            (
+                b"avc1",
+                _avcc(100) + _box(b"colr", b"nclx" + struct.pack(">HHH", 1, 1, 1) + b"\x80"),
+                "yuvj420p",
+            ),
+            (
+                b"hvc1",
+                _box(b"hvcC", bytes(16) + bytes([0xFD, 0xFA, 0xFA]) + bytes(4)),
+                "yuv420p10le",
+            ),
+            (b"av01", _box(b"av1C", bytes([0x81, 0, 0x0C, 0])), "yuv420p"),
+            (b"vp09", _box(b"vpcC", _full(bytes([0, 0, 0xA6, 0]), version=1)), "yuv444p10le"),
+            (b"avc1", b"", None),
+        ],
+    )
+    def test_pix_fmt(self, tmp_path, fourcc, entry_extra, expected):
+        """从编码配置 box 推导像素格式"""
+        path = tmp_path / "a.mp4"
+        path.write_bytes(_mp4(fourcc=fourcc, entry_extra=entry_extra))
+
+        assert video_probe.probe(path).pix_fmt == expected
+
+    def test_invalid_file_falls_back(self, tmp_path):
+        """解析失败时回退 FFprobe"""
+        path = tmp_path / "a.mp4"
+        path.write_bytes(b"not an mp4 file at all")
+
+        assert video_probe._probe_isobmff(path) is None
+        assert video_probe.keyframe_times(path) is None
+        with pytest.raises(RuntimeError, match="ffprobe"):
+            video_probe.probe(path)
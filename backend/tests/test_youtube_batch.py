@@ -0,0 +1,143 @@
+"""
+[INPUT]: 依赖 pytest, asyncio, json, FastAPI TestClient, vmarker.youtube_batch,
+         vmarker.youtube_transcript, vmarker.chapter_bar
+[OUTPUT]: youtube_batch 模块测试用例
+[POS]: tests/ 的 YouTube 批量章节生成测试
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from vmarker import chapter_bar
+from vmarker import youtube_batch as yb
+from vmarker.api.main import app
+from vmarker.models import Chapter, ChapterList, Subtitle
+from vmarker.youtube_transcript import YouTubeTranscriptInfo, extract_video_id
+
+
+def _url(video_id: str) -> str:
+    return f"https://www.youtube.com/watch?v={video_id}"
+
+
+class FakeStages:
+    """替身字幕获取与 AI 分段：按视频 ID 设定耗时与失败，记录各阶段最大并发"""
+
+    def __init__(self):
+        self.fetch_delay: dict[str, float] = {}
+        self.fail_fetch: set[str] = set()
+        self.fail_ai: set[str] = set()
+        self.active = {"fetch": 0, "ai": 0}
+        self.max_active = {"fetch": 0, "ai": 0}
+
+    def _enter(self, stage: str) -> None:
+        self.active[stage] += 1
+        self.max_active[stage] = max(self.max_active[stage], self.active[stage])
+
+    async def get_transcript_async(self, url, limiter=None):
+        video_id = extract_video_id(url)
+        if not video_id:
+            raise ValueError("无效的 YouTube 链接")
+        self._enter("fetch")
+        try:
+            await asyncio.sleep(self.fetch_delay.get(video_id, 0.01))
+            if video_id in self.fail_fetch:
+                raise RuntimeError("该视频已禁用字幕")
+            subtitle = Subtitle(index=1, start_time=0, end_time=60, text=video_id)
+            return YouTubeTranscriptInfo(
+                video_id=video_id, title=video_id, duration=60, subtitles=[subtitle]
+            )
+        finally:
+            self.active["fetch"] -= 1
+
+    async def extract_ai(self, subtitles, duration, **kwargs):
+        self._enter("ai")
+        try:
+            await asyncio.sleep(0.02)
+            if subtitles[0].text in self.fail_ai:
+                raise RuntimeError("boom")
+            return ChapterList(
+                chapters=[
+                    Chapter(title="开场", start_time=0, end_time=30),
+                    Chapter(title="正文", start_time=30, end_time=60),
+                ],
+                duration=duration,
+            )
+        finally:
+            self.active["ai"] -= 1
+
+
+@pytest.fixture
+def stages(monkeypatch) -> FakeStages:
+    fake = FakeStages()
+    monkeypatch.setattr(yb, "get_transcript_async", fake.get_transcript_async)
+    monkeypatch.setattr(chapter_bar, "extract_ai", fake.extract_ai)
+    return fake
+
+
+def _collect(urls: list[str], **kwargs) -> list[yb.BatchItem]:
+    async def main():
+        batch = yb.generate_chapters_batch(urls, api_key="k", fetch_rpm=0, **kwargs)
+        return [item async for item in batch]
+
+    return asyncio.run(main())
+
+
+class TestBatch:
+    """批量生成测试"""
+
+    def test_streams_in_completion_order_with_isolated_errors(self, stages):
+        """按完成顺序产出；单个链接失败不影响其余链接"""
+        ids = [f"video{i:06d}" for i in range(4)]
+        stages.fetch_delay[ids[0]] = 0.2
+        stages.fail_fetch.add(ids[1])
+        stages.fail_ai.add(ids[2])
+
+        items = _collect([_url(v) for v in ids] + ["https://example.com/x"])
+
+        assert items[-1].index == 0  # 最慢的最后到达
+        by_index = {item.index: item for item in items}
+        assert len(by_index) == 5
+        assert by_index[0].chapters is not None and by_index[3].chapters is not None
+        assert by_index[1].error == "该视频已禁用字幕"
+        assert by_index[2].error == "AI 分段失败: boom"
+        assert "无效" in by_index[4].error
+
+    def test_stage_concurrency_bounded(self, stages):
+        """字幕获取与 AI 分段分别受并发上限约束"""
+        urls = [_url(f"video{i:06d}") for i in range(10)]
+
+        items = _collect(urls, fetch_concurrency=3, ai_concurrency=2)
+
+        assert all(item.error is None for item in items)
+        assert stages.max_active == {"fetch": 3, "ai": 2}
+
+    def test_format_youtube_chapters(self):
+        """YouTube 描述时间戳格式"""
+        chapters = [
+            Chapter(title="开场", start_time=0, end_time=65),
+            Chapter(title="正文", start_time=3725, end_time=4000),
+        ]
+
+        assert yb.format_youtube_chapters(chapters) == "0:00 开场\n1:02:05 正文"
+
+    def test_route_streams_ndjson(self, stages, monkeypatch):
+        """批量路由逐行返回结果、错误与汇总"""
+        monkeypatch.setenv("API_KEY", "k")
+        stages.fail_fetch.add("video000001")
+        client = TestClient(app)
+
+        response = client.post(
+            "/api/v1/youtube/batch", json={"urls": [_url("video000000"), _url("video000001")]}
+        )
+
+        events = [json.loads(line) for line in response.text.splitlines()]
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert sorted(e["type"] for e in events[:2]) == ["error", "result"]
+        result = next(e for e in events if e["type"] == "result")
+        assert result["youtube_format"] == "0:00 开场\n0:30 正文"
+        assert events[-1] == {"type": "done", "total": 2, "succeeded": 1, "failed": 1}
+        assert client.post("/api/v1/youtube/batch", json={"urls": []}).status_code == 422
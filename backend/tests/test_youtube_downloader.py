@@ -0,0 +1,99 @@
+"""
+[INPUT]: 依赖 pytest, yt_dlp, vmarker.youtube_downloader
+[OUTPUT]: youtube_downloader 模块测试用例
+[POS]: tests/ 的 YouTube 音频下载模式与阶段计时测试
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import pytest
+import yt_dlp
+
+from vmarker import youtube_downloader as yd
+
+_URL = "https://www.youtube.com/watch?v=abcdefghijk"
+
+
+class FakeYoutubeDL:
+    """替身 yt-dlp：记录选项与调用，下载时按后处理选项写出音频文件"""
+
+    instances: list["FakeYoutubeDL"] = []
+
+    def __init__(self, opts):
+        self.opts = opts
+        self.calls: list[str] = []
+        FakeYoutubeDL.instances.append(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def extract_info(self, url, download=True, process=True):
+        self.calls.append(f"extract_info(download={download}, process={process})")
+        return {"id": "abcdefghijk", "title": "标题", "duration": 120}
+
+    def process_ie_result(self, info, download=True):
+        self.calls.append("process_ie_result")
+        for hook in self.opts["progress_hooks"]:
+            hook({"status": "finished"})
+        postprocessor = self.opts["postprocessors"][0]
+        ext = "ogg" if postprocessor["key"] == "FFmpegVideoRemuxer" else "m4a"
+        path = self.opts["outtmpl"].replace("%(id)s", info["id"]).replace("%(ext)s", ext)
+        open(path, "wb").write(b"audio")
+        return info
+
+
+@pytest.fixture
+def ydl(monkeypatch) -> type[FakeYoutubeDL]:
+    FakeYoutubeDL.instances = []
+    monkeypatch.setattr(yt_dlp, "YoutubeDL", FakeYoutubeDL)
+    return FakeYoutubeDL
+
+
+class TestDownloadAudio:
+    """音频下载测试"""
+
+    def test_native_keeps_stream(self, tmp_path, ydl):
+        """native 模式选最小音频流，只换封装不转码，信息只解析一次"""
+        info = yd.download_audio(_URL, tmp_path, mode="native")
+
+        (instance,) = ydl.instances
+        assert instance.opts["format_sort"] == ["+size", "+abr"]
+        assert instance.opts["postprocessors"] == [
+            {"key": "FFmpegVideoRemuxer", "preferedformat": "webm>ogg/mp4>m4a"}
+        ]
+        assert instance.calls == [
+            "extract_info(download=False, process=False)",
+            "process_ie_result",
+        ]
+        assert info.audio_path == tmp_path / "abcdefghijk.ogg"
+        assert info.duration == 120
+
+    def test_transcode(self, tmp_path, ydl):
+        """transcode 模式保留旧的 m4a 转码"""
+        info = yd.download_audio(_URL, tmp_path, mode="transcode")
+
+        (instance,) = ydl.instances
+        assert instance.opts["postprocessors"][0]["key"] == "FFmpegExtractAudio"
+        assert info.audio_path.suffix == ".m4a"
+
+    def test_timings_reported(self, tmp_path, ydl):
+        """分别报告信息解析、下载与后处理耗时"""
+        info = yd.download_audio(_URL, tmp_path)
+
+        assert set(info.timings) == {"info", "download", "postprocess"}
+        assert all(value >= 0 for value in info.timings.values())
+
+    def test_too_long_not_downloaded(self, tmp_path, ydl, monkeypatch):
+        """超时长视频在下载前拒绝"""
+        monkeypatch.setattr(yd, "MAX_DURATION_MINUTES", 1)
+
+        with pytest.raises(ValueError, match="分钟限制"):
+            yd.download_audio(_URL, tmp_path)
+        assert "process_ie_result" not in ydl.instances[0].calls
+
+    def test_invalid_mode(self, tmp_path):
+        """无效模式抛出 ValueError"""
+        with pytest.raises(ValueError, match="音频模式"):
+            yd.download_audio(_URL, tmp_path, mode="flac")
@@ -0,0 +1,136 @@
+"""
+[INPUT]: 依赖 pytest, asyncio, httpx, vmarker.youtube_pipeline, vmarker.youtube_downloader,
+         vmarker.asr, vmarker.http_pool, vmarker.executor, vmarker.resilience
+[OUTPUT]: youtube_pipeline 模块测试用例
+[POS]: tests/ 的 YouTube 边下载边转录流水线测试
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+from pathlib import Path
+
+import httpx
+import pytest
+
+from vmarker import http_pool, resilience
+from vmarker import youtube_pipeline as yp
+from vmarker.asr import ASRConfig
+from vmarker.executor import ProcessResult
+from vmarker.youtube_downloader import AudioStream
+
+_SRT = "1\n00:00:00,000 --> 00:00:01,000\n你好\n"
+_URL = "https://www.youtube.com/watch?v=abcdefghijk"
+
+
+class FakeSegmenter:
+    """替身 FFmpeg segment：逐个写出分片并追加分片列表，最后一行先写半行再补全"""
+
+    def __init__(self, segments: int = 3, delay: float = 0.05, returncode: int = 0):
+        self.segments = segments
+        self.delay = delay
+        self.returncode = returncode
+        self.finished = False
+        self.commands: list[list[str]] = []
+
+    async def __call__(self, cmd: list[str]) -> ProcessResult:
+        self.commands.append(cmd)
+        pattern = cmd[-1]
+        segment_list = Path(cmd[cmd.index("-segment_list") + 1])
+        seconds = float(cmd[cmd.index("-segment_time") + 1])
+        for i in range(self.segments):
+            await asyncio.sleep(self.delay)
+            path = Path(pattern % i)
+            path.write_bytes(b"audio")
+            line = f"{path.name},{i * seconds:.6f},{(i + 1) * seconds:.6f}\n"
+            with open(segment_list, "a") as f:
+                f.write(line[:5])
+            with open(segment_list, "a") as f:
+                f.write(line[5:])
+        self.finished = True
+        stderr = "403 Forbidden" if self.returncode else ""
+        return ProcessResult(returncode=self.returncode, stdout="", stderr=stderr)
+
+
+@pytest.fixture
+def segmenter(monkeypatch) -> FakeSegmenter:
+    fake = FakeSegmenter()
+    monkeypatch.setattr(yp, "run_process", fake)
+    monkeypatch.setattr(yp, "POLL_INTERVAL", 0.01)
+    monkeypatch.setattr(
+        yp, "resolve_audio_stream",
+        lambda url: AudioStream(
+            title="标题",
+            duration=90,
+            url="https://media.example.com/a",
+            headers={"User-Agent": "ua"},
+        ),
+    )
+    return fake
+
+
+def _run(tmp_path: Path, handler, **config) -> yp.StreamedTranscript:
+    pool = http_pool.HTTPPool(transport=httpx.MockTransport(handler))
+    asr_config = ASRConfig(api_key="k", api_base="https://asr.example.com/v1", **config)
+
+    async def main():
+        try:
+            return await yp.transcribe_youtube(_URL, tmp_path, asr_config, pool, segment_seconds=30)
+        finally:
+            await pool.aclose()
+
+    return asyncio.run(main())
+
+
+class TestStreamingPipeline:
+    """边下载边转录测试"""
+
+    def test_transcription_overlaps_download(self, tmp_path, segmenter):
+        """分片写完即转录，首个请求在下载结束前发出；结果按分片起点拼接"""
+        started_during_download = []
+
+        async def handler(request):
+            started_during_download.append(not segmenter.finished)
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, text=_SRT)
+
+        result = _run(tmp_path, handler)
+
+        assert len(started_during_download) == 3
+        assert started_during_download[0]
+        assert [s.start_time for s in result.subtitles.subtitles] == [0, 30, 60]
+        assert [s.index for s in result.subtitles.subtitles] == [1, 2, 3]
+        assert result.title == "标题"
+        assert set(result.timings) == {"resolve", "first_segment", "download", "asr"}
+        assert list(tmp_path.iterdir()) == []  # 分片目录已清理
+
+    def test_command_streams_compact_audio(self, tmp_path, segmenter):
+        """FFmpeg 直接读取流地址，带请求头，输出单声道 16 kHz 分片"""
+        _run(tmp_path, lambda request: httpx.Response(200, text=_SRT), audio_format="opus")
+
+        (cmd,) = segmenter.commands
+        assert cmd[cmd.index("-i") + 1] == "https://media.example.com/a"
+        assert cmd[cmd.index("-headers") + 1] == "User-Agent: ua\r\n"
+        assert cmd[cmd.index("-ar") + 1] == "16000"
+        assert "libopus" in cmd
+        assert cmd[-1].endswith("%04d.ogg")
+
+    def test_download_failure(self, tmp_path, segmenter):
+        """FFmpeg 失败时抛出 RuntimeError 并清理分片"""
+        segmenter.returncode = 1
+
+        with pytest.raises(RuntimeError, match="403"):
+            _run(tmp_path, lambda request: httpx.Response(200, text=_SRT))
+        assert list(tmp_path.iterdir()) == []
+
+    def test_asr_failure_stops_download(self, tmp_path, segmenter, monkeypatch):
+        """转录失败时终止下载"""
+        monkeypatch.setattr(resilience, "_breakers", {})
+        segmenter.segments = 50
+
+        with pytest.raises(httpx.HTTPStatusError):
+            _run(
+                tmp_path,
+                lambda request: httpx.Response(500),
+                retry=resilience.RetryPolicy(max_retries=0),
+            )
+        assert not segmenter.finished
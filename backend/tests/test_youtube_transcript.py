@@ -0,0 +1,130 @@
+"""
+[INPUT]: 依赖 pytest, asyncio, time, youtube_transcript_api, vmarker.youtube_transcript,
+         vmarker.llm_cache, vmarker.singleflight
+[OUTPUT]: youtube_transcript 模块测试用例
+[POS]: tests/ 的 YouTube 字幕获取、缓存与线程池卸载测试
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+import time
+
+import pytest
+from youtube_transcript_api._errors import TranscriptsDisabled
+
+from vmarker import singleflight
+from vmarker import youtube_transcript as yt
+from vmarker.llm_cache import LLMCache
+
+_URL = "https://www.youtube.com/watch?v=abcdefghijk"
+_RAW = [
+    {"text": "你好\n世界", "start": 0.0, "duration": 2.0},
+    {"text": "再见", "start": 2.0, "duration": 1.5},
+]
+
+
+class FakeProvider:
+    """替身字幕来源：记录调用，可模拟耗时与错误"""
+
+    def __init__(self, raw=_RAW, delay: float = 0.0, error: Exception | None = None):
+        self.raw = raw
+        self.delay = delay
+        self.error = error
+        self.calls: list[tuple[str, list[str]]] = []
+
+    def fetch(self, video_id, languages):
+        self.calls.append((video_id, languages))
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.raw
+
+
+@pytest.fixture
+def provider(tmp_path, monkeypatch) -> FakeProvider:
+    fake = FakeProvider()
+    monkeypatch.setattr(yt, "_provider", fake)
+    monkeypatch.setattr(yt, "_cache", LLMCache(tmp_path / "transcripts.db", 1024 * 1024, 3600))
+    monkeypatch.setattr(singleflight, "_flight", singleflight.SingleFlight(tmp_path / ".inflight"))
+    return fake
+
+
+class TestGetTranscript:
+    """字幕获取与缓存测试"""
+
+    def test_converts_subtitles(self, provider):
+        """原始条目转为 Subtitle 列表，时长取最后一条结束时间"""
+        info = yt.get_transcript(_URL)
+
+        assert info.video_id == "abcdefghijk"
+        assert info.duration == 3.5
+        assert [s.text for s in info.subtitles] == ["你好 世界", "再见"]
+        assert provider.calls == [("abcdefghijk", yt.DEFAULT_LANGUAGES)]
+
+    def test_cached_per_language_preference(self, provider):
+        """相同 (视频, 语言偏好) 命中缓存，不再访问字幕来源；语言偏好不同则分开缓存"""
+        first = yt.get_transcript(_URL)
+        second = yt.get_transcript("https://youtu.be/abcdefghijk")
+        yt.get_transcript(_URL, ["en"])
+
+        assert second == first
+        assert len(provider.calls) == 2
+        assert yt.get_transcript_cache().hits == 1
+
+    def test_errors_mapped_and_not_cached(self, provider):
+        """来源错误转为 RuntimeError，失败结果不缓存"""
+        provider.error = TranscriptsDisabled("abcdefghijk")
+
+        with pytest.raises(RuntimeError, match="已禁用字幕"):
+            yt.get_transcript(_URL)
+        provider.error = None
+        assert yt.get_transcript(_URL).duration == 3.5
+        assert len(provider.calls) == 2
+
+    def test_invalid_url(self, provider):
+        """无效链接抛出 ValueError"""
+        with pytest.raises(ValueError):
+            asyncio.run(yt.get_transcript_async("https://example.com/video"))
+
+
+class TestAsync:
+    """线程池卸载测试"""
+
+    def test_does_not_block_loop_and_coalesces(self, provider):
+        """获取在线程池中执行，事件循环仍可调度；同一视频的并发请求只获取一次"""
+        provider.delay = 0.2
+
+        async def main():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.01)
+
+            task = asyncio.create_task(ticker())
+            infos = await asyncio.gather(*(yt.get_transcript_async(_URL) for _ in range(3)))
+            task.cancel()
+            return infos, ticks
+
+        infos, ticks = asyncio.run(main())
+
+        assert ticks > 5
+        assert len(provider.calls) == 1
+        assert all(info.duration == 3.5 for info in infos)
+
+    def test_limiter_only_on_cache_miss(self, provider):
+        """限流只作用于需要访问字幕来源的请求"""
+        class CountingLimiter:
+            calls = 0
+
+            async def acquire(self):
+                CountingLimiter.calls += 1
+
+        limiter = CountingLimiter()
+        asyncio.run(yt.get_transcript_async(_URL, limiter=limiter))
+        asyncio.run(yt.get_transcript_async(_URL, limiter=limiter))
+
+        assert CountingLimiter.calls == 1
+        assert len(provider.calls) == 1
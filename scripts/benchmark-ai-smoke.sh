@@ -0,0 +1,5 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+python scripts/stub-ai-server.py --help >/dev/null
+python scripts/benchmark-ai.py --help >/dev/null
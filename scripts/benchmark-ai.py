@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Load-test the AI-backed API routes against the local stand-in AI server.
+
+Starts scripts/stub-ai-server.py and the backend (unless --stub-url / --app-url
+point at running instances), drives the analysis, subtitle polish, show notes,
+AI chapter and YouTube routes at a fixed concurrency, and reports throughput
+and latency percentiles per scenario plus the backend /metrics snapshot.
+
+Example:
+  python scripts/benchmark-ai.py --requests 50 --concurrency 10 \
+    --latency lognormal:0.8:0.5 --error-rate 0.05 --unique
+
+  # YouTube route (fetches the real transcript; the AI calls hit the stub)
+  python scripts/benchmark-ai.py --scenarios youtube \
+    --youtube-url https://www.youtube.com/watch?v=dQw4w9WgXcQ
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import httpx
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+BACKEND_SRC = REPO_ROOT / "backend" / "src"
+DEFAULT_SRT = REPO_ROOT / "backend" / "tests" / "fixtures" / "grpo_sample.srt"
+
+SCENARIOS = {
+    "analysis": "/api/v1/analysis/analyze",
+    "polish": "/api/v1/subtitle/polish",
+    "shownotes": "/api/v1/shownotes/generate",
+    "chapters-ai": "/api/v1/chapter-bar/chapters/ai",
+    "youtube": "/api/v1/youtube/from-url",
+}
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Load-test the AI-backed API routes against a stand-in AI server.",
+    )
+    parser.add_argument(
+        "--scenarios",
+        default="analysis,polish,shownotes,chapters-ai",
+        help=f"Comma-separated scenarios to run ({', '.join(SCENARIOS)}).",
+    )
+    parser.add_argument("--requests", type=int, default=20, help="Requests per scenario.")
+    parser.add_argument("--concurrency", type=int, default=5, help="Concurrent requests.")
+    parser.add_argument("--srt", type=Path, default=DEFAULT_SRT, help="SRT file uploaded to the routes.")
+    parser.add_argument(
+        "--unique",
+        action="store_true",
+        help="Make every request's subtitles distinct so AI caches and coalescing are bypassed.",
+    )
+    parser.add_argument("--youtube-url", default=None, help="Video URL for the youtube scenario.")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Per-request timeout in seconds.")
+    parser.add_argument("--app-url", default=None, help="Use a running backend instead of starting one.")
+    parser.add_argument("--stub-url", default=None, help="Use a running stand-in server instead of starting one.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Backend uvicorn workers when the backend is started here.",
+    )
+    parser.add_argument("--latency", default="fixed:0.5", help="Stand-in chat latency distribution.")
+    parser.add_argument("--asr-latency", default="fixed:1.0", help="Stand-in ASR latency distribution.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Stand-in error rate.")
+    parser.add_argument("--error-status", default="503", help="Stand-in error statuses.")
+    parser.add_argument("--seed", type=int, default=0, help="Stand-in random seed.")
+    parser.add_argument("--json", type=Path, default=None, help="Write results as JSON to this path.")
+    return parser.parse_args()
+
+
+# -----------------------------------------------------------------------------
+# Processes
+# -----------------------------------------------------------------------------
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(url: str, proc: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"process exited with code {proc.returncode}: {' '.join(proc.args)}")
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise RuntimeError(f"timed out waiting for {url}")
+
+
+def _start_stub(args: argparse.Namespace) -> tuple[str, subprocess.Popen]:
+    port = _free_port()
+    cmd = [
+        sys.executable, str(REPO_ROOT / "scripts" / "stub-ai-server.py"),
+        "--port", str(port),
+        "--latency", args.latency,
+        "--asr-latency", args.asr_latency,
+        "--error-rate", str(args.error_rate),
+        "--error-status", args.error_status,
+        "--seed", str(args.seed),
+    ]
+    proc = subprocess.Popen(cmd)
+    url = f"http://127.0.0.1:{port}"
+    _wait_ready(f"{url}/stats", proc)
+    return url, proc
+
+
+def _start_app(stub_url: str, workers: int, tmpdir: str) -> tuple[str, subprocess.Popen]:
+    port = _free_port()
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(BACKEND_SRC),
+        "API_KEY": "stub",
+        "API_BASE": f"{stub_url}/v1",
+        "ASR_API_BASE": f"{stub_url}/v1",
+        "TMPDIR": tmpdir,  # 缓存与会话目录隔离，每次运行从冷缓存开始
+    }
+    cmd = [
+        sys.executable, "-m", "uvicorn", "vmarker.api.main:app",
+        "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+    ]
+    proc = subprocess.Popen(cmd, env=env, cwd=REPO_ROOT / "backend")
+    url = f"http://127.0.0.1:{port}"
+    _wait_ready(f"{url}/health", proc)
+    return url, proc
+
+
+# -----------------------------------------------------------------------------
+# Load
+# -----------------------------------------------------------------------------
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    latencies: list[float] = field(default_factory=list)
+    errors: dict[str, int] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    def summary(self) -> dict:
+        ordered = sorted(self.latencies)
+        return {
+            "scenario": self.name,
+            "ok": len(ordered),
+            "errors": sum(self.errors.values()),
+            "error_kinds": self.errors,
+            "elapsed_s": round(self.elapsed, 3),
+            "throughput_rps": round(len(ordered) / self.elapsed, 3) if self.elapsed else 0.0,
+            "p50_s": _percentile(ordered, 50),
+            "p90_s": _percentile(ordered, 90),
+            "p99_s": _percentile(ordered, 99),
+            "max_s": round(ordered[-1], 3) if ordered else None,
+        }
+
+
+def _percentile(ordered: list[float], pct: float) -> float | None:
+    if not ordered:
+        return None
+    rank = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return round(ordered[rank], 3)
+
+
+def _vary_srt(content: str, n: int) -> str:
+    """Append a request marker to every cue text so prompts differ per request."""
+    blocks = content.strip().split("\n\n")
+    return "\n\n".join(f"{block} #{n}" for block in blocks) + "\n"
+
+
+def _request_for(name: str, n: int, srt: str, args: argparse.Namespace) -> dict:
+    if name == "youtube":
+        return {"json": {"url": args.youtube_url}}
+    content = _vary_srt(srt, n) if args.unique else srt
+    return {"files": {"file": ("bench.srt", content.encode("utf-8"), "application/x-subrip")}}
+
+
+async def _run_scenario(
+    client: httpx.AsyncClient, name: str, srt: str, args: argparse.Namespace,
+) -> ScenarioResult:
+    result = ScenarioResult(name)
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(n: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                resp = await client.post(SCENARIOS[name], **_request_for(name, n, srt, args))
+            except httpx.HTTPError as exc:
+                kind = type(exc).__name__
+            else:
+                if resp.status_code == 200:
+                    result.latencies.append(time.perf_counter() - start)
+                    return
+                kind = str(resp.status_code)
+            result.errors[kind] = result.errors.get(kind, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(n) for n in range(args.requests)))
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+async def _run(app_url: str, scenarios: list[str], args: argparse.Namespace) -> dict:
+    srt = args.srt.read_text(encoding="utf-8")
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=app_url, timeout=args.timeout, limits=limits) as client:
+        results = [await _run_scenario(client, name, srt, args) for name in scenarios]
+        metrics = (await client.get("/metrics")).json()
+    return {"scenarios": [r.summary() for r in results], "metrics": metrics}
+
+
+def _print_table(report: dict) -> None:
+    header = f"{'scenario':<12} {'ok':>5} {'err':>5} {'rps':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}"
+    print(header)
+    print("-" * len(header))
+
+    def fmt(value: float | None) -> str:
+        return "-" if value is None else f"{value:.3f}"
+
+    for row in report["scenarios"]:
+        print(
+            f"{row['scenario']:<12} {row['ok']:>5} {row['errors']:>5} {row['throughput_rps']:>8.2f} "
+            f"{fmt(row['p50_s']):>8} {fmt(row['p90_s']):>8} {fmt(row['p99_s']):>8} {fmt(row['max_s']):>8}"
+        )
+        if row["error_kinds"]:
+            print(f"{'':<12} errors: {row['error_kinds']}")
+    print()
+    print("metrics:", json.dumps(report["metrics"], ensure_ascii=False))
+
+
+def main() -> int:
+    args = _parse_args()
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = [s for s in scenarios if s not in SCENARIOS]
+    if unknown:
+        print(f"unknown scenarios: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+    if "youtube" in scenarios and not args.youtube_url:
+        print("the youtube scenario needs --youtube-url", file=sys.stderr)
+        return 2
+
+    procs: list[subprocess.Popen] = []
+    with tempfile.TemporaryDirectory(prefix="vmarker-bench-") as tmpdir:
+        try:
+            stub_url = args.stub_url
+            if stub_url is None and args.app_url is None:
+                stub_url, proc = _start_stub(args)
+                procs.append(proc)
+            app_url = args.app_url
+            if app_url is None:
+                app_url, proc = _start_app(stub_url, args.workers, tmpdir)
+                procs.append(proc)
+
+            report = asyncio.run(_run(app_url, scenarios, args))
+        finally:
+            for proc in reversed(procs):
+                proc.terminate()
+                proc.wait(timeout=10)
+
+    report["config"] = {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "unique": args.unique,
+        "latency": args.latency,
+        "error_rate": args.error_rate,
+        "workers": args.workers,
+    }
+    _print_table(report)
+    if args.json:
+        args.json.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for OpenAI-compatible chat and Whisper-compatible ASR APIs.
+
+Serves:
+  POST /v1/chat/completions      (JSON or SSE when "stream": true)
+  POST /v1/audio/transcriptions  (SRT, or JSON with response_format=json)
+
+Responses are deterministic: chat replies are shaped after the vmarker prompt
+they answer (analysis, topic windows, subtitle polish), and transcriptions are
+derived from the upload size. Latency, errors and canned replies are
+configurable so concurrency, pooling, retries and caching can be measured
+offline.
+
+Example:
+  python scripts/stub-ai-server.py --port 8900 \
+    --latency lognormal:0.8:0.5 --asr-latency uniform:1:3 --error-rate 0.02
+
+  # then point the backend at it
+  API_KEY=stub API_BASE=http://127.0.0.1:8900/v1 uv run uvicorn vmarker.api.main:app
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+from collections.abc import AsyncIterator, Callable
+from pathlib import Path
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+
+
+_SUBTITLE_LINE_RE = re.compile(r"^\[(\d+)\] (.*)$", re.MULTILINE)
+_DURATION_RE = re.compile(r"视频总时长: ([\d.]+) 秒")
+_WINDOW_RE = re.compile(r"([\d.]+)s - ([\d.]+)s")
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Local stand-in for OpenAI-compatible chat and Whisper ASR APIs.",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Bind host.")
+    parser.add_argument("--port", type=int, default=8900, help="Bind port.")
+    parser.add_argument(
+        "--latency",
+        default="fixed:0.5",
+        help="Chat latency distribution: fixed:S | uniform:LO:HI | lognormal:MEDIAN:SIGMA "
+             "(seconds; for streams this is the time to first token).",
+    )
+    parser.add_argument(
+        "--stream-chunk-delay",
+        type=float,
+        default=0.01,
+        help="Delay between streamed chunks in seconds.",
+    )
+    parser.add_argument(
+        "--stream-chunk-chars",
+        type=int,
+        default=8,
+        help="Characters per streamed chunk.",
+    )
+    parser.add_argument(
+        "--asr-latency",
+        default="fixed:1.0",
+        help="ASR latency distribution, same syntax as --latency.",
+    )
+    parser.add_argument(
+        "--asr-bytes-per-second",
+        type=float,
+        default=4000,
+        help="Upload bytes per second of audio, used to size transcripts (32 kbit/s MP3 = 4000).",
+    )
+    parser.add_argument(
+        "--asr-cue-seconds",
+        type=float,
+        default=4.0,
+        help="Length of each generated subtitle cue.",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of requests answered with an error status.",
+    )
+    parser.add_argument(
+        "--error-status",
+        default="503",
+        help="Comma-separated error statuses to choose from (e.g. 429,500,503).",
+    )
+    parser.add_argument(
+        "--retry-after",
+        type=float,
+        default=None,
+        help="Retry-After seconds sent with 429/503 errors.",
+    )
+    parser.add_argument(
+        "--chat-response",
+        type=Path,
+        default=None,
+        help="File whose content is returned verbatim as every chat reply.",
+    )
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for latency and errors.")
+    return parser.parse_args(argv)
+
+
+def parse_distribution(spec: str, rng: random.Random) -> Callable[[], float]:
+    """Build a sampler from fixed:S, uniform:LO:HI or lognormal:MEDIAN:SIGMA."""
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(":") if v]
+    if kind == "fixed" and len(values) == 1:
+        return lambda: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda: rng.uniform(values[0], values[1])
+    if kind == "lognormal" and len(values) == 2:
+        import math
+
+        mu = math.log(values[0])
+        return lambda: rng.lognormvariate(mu, values[1])
+    raise ValueError(f"invalid latency distribution: {spec}")
+
+
+# -----------------------------------------------------------------------------
+# Deterministic replies
+# -----------------------------------------------------------------------------
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:6]
+
+
+def chat_reply(prompt: str) -> dict:
+    """Reply shaped after the vmarker prompt being answered."""
+    if "字幕校对专家" in prompt:
+        items = [{"index": int(i), "text": t} for i, t in _SUBTITLE_LINE_RE.findall(prompt)]
+        for item in items[::10]:
+            item["text"] += "。"
+        if "只包含修改过的字幕" in prompt:
+            items = items[::10]
+        return {"subtitles": items}
+
+    if '"topics"' in prompt:
+        match = _WINDOW_RE.search(prompt)
+        start, end = (float(match.group(1)), float(match.group(2))) if match else (0.0, 60.0)
+        step = (end - start) / 3
+        return {"topics": [
+            {"start_time": round(start + i * step, 1), "title": f"主题 {_digest(prompt)}-{i + 1}", "summary": "测试概括"}
+            for i in range(3)
+        ]}
+
+    if '"chapters"' in prompt:
+        match = _DURATION_RE.search(prompt)
+        duration = float(match.group(1)) if match else 600.0
+        count = 6
+        step = duration / count
+        chapters = [
+            {"title": f"章节 {i + 1}", "start_time": round(i * step, 1), "end_time": round((i + 1) * step, 1)}
+            for i in range(count)
+        ]
+        return {
+            "chapters": chapters,
+            "summary": f"测试摘要 {_digest(prompt)}",
+            "outline": [{"timestamp": c["start_time"], "title": f"要点 {c['title']}"} for c in chapters],
+        }
+
+    return {"ok": True, "prompt_digest": _digest(prompt)}
+
+
+def transcription_srt(size: int, bytes_per_second: float, cue_seconds: float, seed: str) -> str:
+    """SRT whose length follows the upload size."""
+    duration = max(cue_seconds, size / bytes_per_second)
+    blocks = []
+    start = 0.0
+    while start < duration:
+        end = min(start + cue_seconds, duration)
+        index = len(blocks) + 1
+        blocks.append(f"{index}\n{_timestamp(start)} --> {_timestamp(end)}\n第 {index} 句测试字幕 {seed}")
+        start = end
+    return "\n\n".join(blocks) + "\n"
+
+
+def _timestamp(seconds: float) -> str:
+    millis = round(seconds * 1000)
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
+
+# -----------------------------------------------------------------------------
+# App
+# -----------------------------------------------------------------------------
+
+
+def create_app(args: argparse.Namespace) -> FastAPI:
+    rng = random.Random(args.seed)
+    chat_latency = parse_distribution(args.latency, rng)
+    asr_latency = parse_distribution(args.asr_latency, rng)
+    error_statuses = [int(s) for s in args.error_status.split(",") if s.strip()]
+    canned = args.chat_response.read_text(encoding="utf-8") if args.chat_response else None
+    counters = {"chat": 0, "chat_stream": 0, "asr": 0, "errors": 0}
+
+    app = FastAPI(title="vmarker stub AI server")
+
+    def maybe_error() -> Response | None:
+        if args.error_rate <= 0 or rng.random() >= args.error_rate:
+            return None
+        counters["errors"] += 1
+        status = rng.choice(error_statuses)
+        headers = {}
+        if args.retry_after is not None and status in (429, 503):
+            headers["Retry-After"] = f"{args.retry_after:g}"
+        return JSONResponse({"error": {"message": "stub error", "code": status}}, status, headers=headers)
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request) -> Response:
+        body = await request.json()
+        prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+        content = canned if canned is not None else json.dumps(chat_reply(prompt), ensure_ascii=False)
+        usage = {
+            "prompt_tokens": len(prompt) // 2,
+            "completion_tokens": max(1, len(content) // 2),
+        }
+
+        await asyncio.sleep(chat_latency())
+        error = maybe_error()
+        if error is not None:
+            return error
+
+        if not body.get("stream"):
+            counters["chat"] += 1
+            return JSONResponse({
+                "id": f"stub-{_digest(prompt)}",
+                "object": "chat.completion",
+                "model": body.get("model", "stub"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+
+        counters["chat_stream"] += 1
+
+        async def events() -> AsyncIterator[str]:
+            size = max(1, args.stream_chunk_chars)
+            for i in range(0, len(content), size):
+                delta = {"choices": [{"index": 0, "delta": {"content": content[i:i + size]}}]}
+                yield f"data: {json.dumps(delta, ensure_ascii=False)}\n\n"
+                await asyncio.sleep(args.stream_chunk_delay)
+            yield f"data: {json.dumps({'choices': [], 'usage': usage})}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/v1/audio/transcriptions")
+    async def audio_transcriptions(request: Request) -> Response:
+        form = await request.form()
+        upload = form.get("file")
+        data = await upload.read() if upload is not None else b""
+
+        await asyncio.sleep(asr_latency())
+        error = maybe_error()
+        if error is not None:
+            return error
+
+        counters["asr"] += 1
+        srt = transcription_srt(
+            len(data), args.asr_bytes_per_second, args.asr_cue_seconds, hashlib.sha256(data).hexdigest()[:6],
+        )
+        if form.get("response_format", "srt") == "json":
+            return JSONResponse({"text": srt})
+        return PlainTextResponse(srt)
+
+    @app.get("/stats")
+    async def stats() -> dict:
+        return counters
+
+    return app
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    uvicorn.run(create_app(args), host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
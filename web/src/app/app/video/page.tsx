@@ -43,6 +43,7 @@ import {
   videoApi,
   chapterBarApi,
   showNotesApi,
+  analysisApi,
   subtitleApi,
   formatTime,
   downloadBlob,
@@ -89,7 +90,7 @@ interface FeatureResults {
 // ============================================================
 
 const MAX_FILE_SIZE_MB = 500;
-const MAX_DURATION_SECONDS = 300;
+const MAX_DURATION_SECONDS = 1800; // 与后端 MAX_VIDEO_DURATION_SECONDS 默认值一致
 const ALLOWED_EXTENSIONS = [".mp4", ".mov", ".webm", ".mkv", ".avi"];
 
 const FEATURES = [
@@ -222,7 +223,7 @@ export default function VideoPage() {
       const result = await videoApi.upload(file);
 
       if (result.duration > MAX_DURATION_SECONDS) {
-        setError(`视频时长 ${formatTime(result.duration)} 超出限制 (最大 5 分钟)`);
+        setError(`视频时长 ${formatTime(result.duration)} 超出限制 (最大 30 分钟)`);
         await videoApi.cleanup(result.session_id);
         setSelectedFile(null);
         return;
@@ -305,10 +306,16 @@ export default function VideoPage() {
       const progressBase = needsAsr ? 40 : 10;
       const progressPerTask = (90 - progressBase) / totalTasks;
 
+      // 同时需要章节和大纲时，一次 AI 请求获取两者（失败时各自单独请求）
+      const analysis =
+        selection.chapterBar && selection.showNotes && srtFile
+          ? await analysisApi.analyze(srtFile).catch(() => null)
+          : null;
+
       // Chapter Bar
       if (selection.chapterBar && srtFile) {
         setProcessingStep("生成章节进度条...");
-        const chapterResult = await chapterBarApi.extractAI(srtFile);
+        const chapterResult = analysis ?? (await chapterBarApi.extractAI(srtFile));
         const blob = await videoApi.compose(sessionId, {
           feature: "chapter-bar",
           position: config.position,
@@ -339,7 +346,9 @@ export default function VideoPage() {
       // Show Notes
       if (selection.showNotes && srtFile) {
         setProcessingStep("生成视频大纲...");
-        newResults.showNotes = await showNotesApi.generate(srtFile);
+        newResults.showNotes = analysis
+          ? { summary: analysis.summary, outline: analysis.outline }
+          : await showNotesApi.generate(srtFile);
         completedTasks++;
         setProcessingProgress(progressBase + progressPerTask * completedTasks);
       }
@@ -463,7 +472,7 @@ export default function VideoPage() {
           <CardHeader>
             <CardTitle>上传视频</CardTitle>
             <CardDescription>
-              支持 MP4, MOV, WebM 等格式，≤500MB，≤5 分钟
+              支持 MP4, MOV, WebM 等格式，≤500MB，≤30 分钟
             </CardDescription>
           </CardHeader>
           <CardContent className="space-y-6">
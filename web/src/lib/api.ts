@@ -1,16 +1,20 @@
 /**
- * [INPUT]: 依赖 @/lib/supabase
+ * [INPUT]: 依赖 @/lib/supabase, @/lib/sha256
  * [OUTPUT]: 对外提供 API 客户端和类型定义
  * [POS]: lib 模块的 API 层，封装后端调用
  * [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
  */
 
+import { sha256File } from "./sha256";
 import { supabase } from "./supabase";
 
 // ============================================================
 // 配置
 // ============================================================
 const API_BASE = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
+/** AI 分段任务轮询间隔与最长等待时间 */
+const AI_JOB_POLL_MS = 2000;
+const AI_JOB_TIMEOUT_MS = 120_000;
 
 // ============================================================
 // 类型定义
@@ -29,6 +33,19 @@ export interface ChapterList {
   duration: number;
 }
 
+/** AI 分段结果（超出服务端预算时先返回本地分段，AI 结果通过 job_id 获取） */
+export interface AIChapterList extends ChapterList {
+  source: "auto" | "lexical" | "ai";
+  job_id?: string | null;
+}
+
+/** AI 分段任务状态 */
+export interface AIChapterJob {
+  status: "pending" | "done" | "failed";
+  result?: AIChapterList | null;
+  error?: string | null;
+}
+
 /** 验证问题 */
 export interface ValidationIssue {
   code: string;
@@ -151,8 +168,13 @@ export const chapterBarApi = {
     return handleResponse<ChapterList>(res);
   },
 
-  /** AI 智能分段提取章节（服务端配置 API Key） */
-  async extractAI(file: File): Promise<ChapterList> {
+  /**
+   * AI 智能分段提取章节（服务端配置 API Key）
+   *
+   * 服务端超出预算时先返回本地分段和 job_id，此处轮询任务获取 AI 结果；
+   * 任务失败、过期或等待超时则使用本地分段。
+   */
+  async extractAI(file: File): Promise<AIChapterList> {
     const formData = new FormData();
     formData.append("file", file);
 
@@ -160,7 +182,23 @@ export const chapterBarApi = {
       method: "POST",
       body: formData,
     });
-    return handleResponse<ChapterList>(res);
+    const result = await handleResponse<AIChapterList>(res);
+    if (!result.job_id) return result;
+
+    const deadline = Date.now() + AI_JOB_TIMEOUT_MS;
+    while (Date.now() < deadline) {
+      await new Promise((resolve) => setTimeout(resolve, AI_JOB_POLL_MS));
+      const job = await chapterBarApi.getAIJob(result.job_id).catch(() => null);
+      if (job?.status === "done" && job.result) return job.result;
+      if (job?.status !== "pending") break;
+    }
+    return result;
+  },
+
+  /** 获取超出预算后继续进行的 AI 分段任务 */
+  async getAIJob(jobId: string): Promise<AIChapterJob> {
+    const res = await fetch(`${API_BASE}/api/v1/chapter-bar/chapters/ai/jobs/${jobId}`);
+    return handleResponse<AIChapterJob>(res);
   },
 
   /** 验证章节配置 */
@@ -287,6 +325,27 @@ export const showNotesApi = {
   },
 };
 
+// ============================================================
+// 综合分析 API
+// ============================================================
+
+/** 综合分析结果（章节 + 摘要 + 大纲） */
+export interface AnalysisResult extends ChapterList, ShowNotesResult {}
+
+export const analysisApi = {
+  /** 一次 AI 请求同时生成章节、摘要与大纲 */
+  async analyze(file: File): Promise<AnalysisResult> {
+    const formData = new FormData();
+    formData.append("file", file);
+
+    const res = await fetch(`${API_BASE}/api/v1/analysis/analyze`, {
+      method: "POST",
+      body: formData,
+    });
+    return handleResponse<AnalysisResult>(res);
+  },
+};
+
 // ============================================================
 // 字幕润色类型定义
 // ============================================================
@@ -305,6 +364,8 @@ export interface PolishedSubtitleItem {
 export interface PolishResult {
   subtitles: PolishedSubtitleItem[];
   changes_count: number;
+  cached_count: number; // 命中逐条缓存、未请求 AI 的字幕数
+  output_tokens: number; // 模型输出 token 数
   srt_content: string;
 }
 
@@ -388,6 +449,7 @@ export interface VideoUploadResult {
   height: number;
   fps: number;
   file_size_mb: number;
+  sha256: string;
 }
 
 /** ASR 结果 */
@@ -418,8 +480,24 @@ export interface ComposeRequest {
 // ============================================================
 
 export const videoApi = {
-  /** 上传视频 */
+  /** 上传视频（服务端已有相同内容时秒传，无法预先计算摘要时直接上传） */
   async upload(file: File): Promise<VideoUploadResult> {
+    // 按块增量摘要：不整体读入内存，也不依赖仅在安全上下文可用的 crypto.subtle
+    const sha256 = await sha256File(file).catch(() => null);
+    if (sha256) {
+      const hashForm = new FormData();
+      hashForm.append("sha256", sha256);
+      hashForm.append("filename", file.name);
+
+      const hashRes = await fetch(`${API_BASE}/api/v1/video/upload/by-hash`, {
+        method: "POST",
+        body: hashForm,
+      });
+      if (hashRes.status !== 404) {
+        return handleResponse<VideoUploadResult>(hashRes);
+      }
+    }
+
     const formData = new FormData();
     formData.append("file", file);
 
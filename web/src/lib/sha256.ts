@@ -0,0 +1,129 @@
+/**
+ * [INPUT]: 无外部依赖
+ * [OUTPUT]: 对外提供 Sha256 增量摘要类, sha256File()
+ * [POS]: lib 目录的哈希工具，Web Crypto 只能整体摘要，大文件按块增量计算；被 api.ts 的秒传预检消费
+ * [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+ */
+
+// ============================================================
+// 常量
+// ============================================================
+// 使用 Int32Array：读出的值保持 32 位整数，避免 V8 转为浮点数
+const K = new Int32Array([
+  0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+  0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+  0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+  0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+  0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+  0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+  0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+  0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2,
+]);
+
+/** 按块读取文件的大小：只有当前块驻留内存 */
+const FILE_CHUNK_BYTES = 4 * 1024 * 1024;
+
+// ============================================================
+// 增量摘要
+// ============================================================
+
+/** SHA-256 增量计算（FIPS 180-4），可多次 update 后 digestHex */
+export class Sha256 {
+  private h = new Int32Array([
+    0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a, 0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19,
+  ]);
+  private w = new Int32Array(64);
+  private block = new Uint8Array(64);
+  private blockLen = 0;
+  private bytes = 0;
+
+  update(data: Uint8Array): this {
+    let offset = 0;
+    this.bytes += data.length;
+    if (this.blockLen > 0) {
+      const take = Math.min(64 - this.blockLen, data.length);
+      this.block.set(data.subarray(0, take), this.blockLen);
+      this.blockLen += take;
+      offset = take;
+      if (this.blockLen < 64) return this;
+      this.compress(this.block, 0);
+      this.blockLen = 0;
+    }
+    for (; offset + 64 <= data.length; offset += 64) {
+      this.compress(data, offset);
+    }
+    this.block.set(data.subarray(offset), 0);
+    this.blockLen = data.length - offset;
+    return this;
+  }
+
+  digestHex(): string {
+    const bits = this.bytes * 8;
+    const padLen = this.blockLen < 56 ? 56 - this.blockLen : 120 - this.blockLen;
+    const tail = new Uint8Array(padLen + 8);
+    tail[0] = 0x80;
+    const view = new DataView(tail.buffer);
+    view.setUint32(padLen, Math.floor(bits / 0x100000000));
+    view.setUint32(padLen + 4, bits >>> 0);
+    this.update(tail);
+    return Array.from(this.h, (x) => (x >>> 0).toString(16).padStart(8, "0")).join("");
+  }
+
+  private compress(data: Uint8Array, offset: number): void {
+    const w = this.w;
+    for (let i = 0; i < 16; i++) {
+      const j = offset + i * 4;
+      w[i] = (data[j] << 24) | (data[j + 1] << 16) | (data[j + 2] << 8) | data[j + 3];
+    }
+    for (let i = 16; i < 64; i++) {
+      const a = w[i - 15];
+      const b = w[i - 2];
+      const s0 = ((a >>> 7) | (a << 25)) ^ ((a >>> 18) | (a << 14)) ^ (a >>> 3);
+      const s1 = ((b >>> 17) | (b << 15)) ^ ((b >>> 19) | (b << 13)) ^ (b >>> 10);
+      w[i] = (w[i - 16] + s0 + w[i - 7] + s1) | 0;
+    }
+
+    const state = this.h;
+    let a = state[0];
+    let b = state[1];
+    let c = state[2];
+    let d = state[3];
+    let e = state[4];
+    let f = state[5];
+    let g = state[6];
+    let h = state[7];
+    for (let i = 0; i < 64; i++) {
+      const s1 = ((e >>> 6) | (e << 26)) ^ ((e >>> 11) | (e << 21)) ^ ((e >>> 25) | (e << 7));
+      const t1 = (h + s1 + ((e & f) ^ (~e & g)) + K[i] + w[i]) | 0;
+      const s0 = ((a >>> 2) | (a << 30)) ^ ((a >>> 13) | (a << 19)) ^ ((a >>> 22) | (a << 10));
+      const t2 = (s0 + ((a & b) ^ (a & c) ^ (b & c))) | 0;
+      h = g;
+      g = f;
+      f = e;
+      e = (d + t1) | 0;
+      d = c;
+      c = b;
+      b = a;
+      a = (t1 + t2) | 0;
+    }
+
+    state[0] = (state[0] + a) | 0;
+    state[1] = (state[1] + b) | 0;
+    state[2] = (state[2] + c) | 0;
+    state[3] = (state[3] + d) | 0;
+    state[4] = (state[4] + e) | 0;
+    state[5] = (state[5] + f) | 0;
+    state[6] = (state[6] + g) | 0;
+    state[7] = (state[7] + h) | 0;
+  }
+}
+
+/** 按块读取计算文件 SHA-256（十六进制），内存占用与文件大小无关 */
+export async function sha256File(file: Blob): Promise<string> {
+  const hash = new Sha256();
+  for (let start = 0; start < file.size; start += FILE_CHUNK_BYTES) {
+    const chunk = file.slice(start, start + FILE_CHUNK_BYTES);
+    hash.update(new Uint8Array(await chunk.arrayBuffer()));
+  }
+  return hash.digestHex();
+}